@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""
+Micro-benchmark of the per-message overhead of dispatching the actions of the connection.
+
+Compares the registry, i.e. a dict lookup and the compiled validation of the
+request model, with the previous dispatch: a membership test on the tuple of
+action types, a chain of `if message_type == ...` and a `validate_args` that
+rebuilt the required arguments of every action on each call. The handlers do
+nothing, so only the overhead is measured.
+"""
+import argparse
+import time
+
+from ocean_connection.connections.ocean_connection.actions import (
+    ActionRegistry,
+    CreateDispenserRequest,
+    CreateFixedRateExchangeRequest,
+    DatasetAlgorithmRequest,
+    DeployAlgorithmRequest,
+    DeployBatchRequest,
+    DeployDataRequest,
+    DownloadRequest,
+)
+
+
+MODELS = {
+    "DEPLOY_C2D": DeployDataRequest,
+    "DEPLOY_ALGORITHM": DeployAlgorithmRequest,
+    "PERMISSION_DATASET": DatasetAlgorithmRequest,
+    "C2D_JOB": DatasetAlgorithmRequest,
+    "DEPLOY_DATA_DOWNLOAD": DeployDataRequest,
+    "CREATE_DISPENSER": CreateDispenserRequest,
+    "CREATE_FIXED_RATE_EXCHANGE": CreateFixedRateExchangeRequest,
+    "DOWNLOAD_JOB": DownloadRequest,
+    "DEPLOY_C2D_BATCH": DeployBatchRequest,
+    "DEPLOY_DATA_DOWNLOAD_BATCH": DeployBatchRequest,
+}
+ACTION_TYPES = tuple(MODELS)
+
+
+def legacy_validate_args(**kwargs) -> (bool, str):
+    """`utils.validate_args` before the registry."""
+    required_args_per_action = {
+        "DEPLOY_C2D": [
+            "description",
+            "name",
+            "author",
+            "license",
+            "dataset_url",
+            "has_pricing_schema",
+        ],
+        "DEPLOY_ALGORITHM": [
+            "description",
+            "name",
+            "author",
+            "license",
+            "language",
+            "format",
+            "version",
+            "entrypoint",
+            "image",
+            "tag",
+            "checksum",
+            "files_url",
+            "has_pricing_schema",
+        ],
+        "PERMISSION_DATASET": [
+            "data_did",
+            "algo_did",
+        ],
+        "C2D_JOB": [
+            "data_did",
+            "algo_did",
+        ],
+        "DEPLOY_DATA_DOWNLOAD": [
+            "description",
+            "name",
+            "author",
+            "license",
+            "dataset_url",
+            "has_pricing_schema",
+        ],
+        "CREATE_DISPENSER": [
+            "datatoken_address",
+        ],
+        "CREATE_FIXED_RATE_EXCHANGE": [
+            "datatoken_address",
+            "rate",
+            "ocean_amt",
+        ],
+        "DOWNLOAD_JOB": [
+            "datatoken_address",
+            "asset_did",
+            "datatoken_amt",
+        ],
+        "DEPLOY_C2D_BATCH": [
+            "datasets",
+        ],
+        "DEPLOY_DATA_DOWNLOAD_BATCH": [
+            "datasets",
+        ],
+    }
+
+    for arg in required_args_per_action[kwargs["type"]]:
+        if arg not in kwargs:
+            return (
+                False,
+                f"'{arg}' is missing from the required arguments for {kwargs['type']}. Please add it.",
+            )
+
+    return True, ""
+
+
+def legacy_handler(**kwargs):
+    """A handler validating its kwargs like every handler did."""
+    valid, validation_message = legacy_validate_args(**kwargs)
+    if not valid:
+        raise Exception(f"{validation_message}")
+    return kwargs
+
+
+def legacy_dispatch(**kwargs):
+    """`on_send` and `_dispatch` before the registry."""
+    if "type" not in kwargs or kwargs["type"] not in ACTION_TYPES:
+        raise Exception("Message type is not correctly provided.")
+    message_type = kwargs["type"]
+    if message_type == "DEPLOY_C2D":
+        return legacy_handler(**kwargs)
+    elif message_type == "DEPLOY_ALGORITHM":
+        return legacy_handler(**kwargs)
+    elif message_type == "PERMISSION_DATASET":
+        return legacy_handler(**kwargs)
+    elif message_type == "C2D_JOB":
+        return legacy_handler(**kwargs)
+    elif message_type == "DEPLOY_DATA_DOWNLOAD":
+        return legacy_handler(**kwargs)
+    elif message_type == "CREATE_DISPENSER":
+        return legacy_handler(**kwargs)
+    elif message_type == "CREATE_FIXED_RATE_EXCHANGE":
+        return legacy_handler(**kwargs)
+    elif message_type == "DOWNLOAD_JOB":
+        return legacy_handler(**kwargs)
+    elif message_type == "DEPLOY_C2D_BATCH":
+        return legacy_handler(**kwargs)
+    elif message_type == "DEPLOY_DATA_DOWNLOAD_BATCH":
+        return legacy_handler(**kwargs)
+
+
+def registry_dispatcher():
+    """Returns `on_send` and `_dispatch` with the registry."""
+    registry = ActionRegistry()
+    for action_type, model in MODELS.items():
+        registry.register(action_type, model, lambda connection, request: request)
+
+    def dispatch(**kwargs):
+        if registry.get(kwargs.get("type")) is None:
+            raise Exception("Message type is not correctly provided.")
+        spec, request = registry.parse(kwargs)
+        return spec.handler(None, request)
+
+    return dispatch
+
+
+def message(action_type: str) -> dict:
+    """Returns a valid message of an action type."""
+    return {"type": action_type, **{field: "x" for field in MODELS[action_type].FIELDS}}
+
+
+def measure(dispatch, kwargs: dict, count: int) -> float:
+    """Returns the nanoseconds taken to dispatch a message."""
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        dispatch(**kwargs)
+    return (time.perf_counter_ns() - start) / count
+
+
+def main() -> None:
+    """Prints the per-message overhead and the message rate of both dispatches."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    dispatchers = (("if-chain", legacy_dispatch), ("registry", registry_dispatcher()))
+    print(f"{'action':>28} {'dispatch':>10} {'ns/msg':>8} {'msg/s':>10}")
+    # The first and last branches of the chain, and the action with the most arguments.
+    for action_type in ("DEPLOY_C2D", "DEPLOY_ALGORITHM", "DEPLOY_DATA_DOWNLOAD_BATCH"):
+        kwargs = message(action_type)
+        for name, dispatch in dispatchers:
+            dispatch(**kwargs)
+            ns = measure(dispatch, kwargs, args.count)
+            print(f"{action_type:>28} {name:>10} {ns:>8.0f} {1e9 / ns:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""
+Micro-benchmark of the results sent through the default protocol serializer,
+with their binary values in base64 or raw.
+
+Run it from an agent project, where the vendored protocols import as `packages`.
+"""
+import argparse
+import base64
+import json
+import os
+import time
+import tracemalloc
+
+from ocean_connection.connections.ocean_connection.utils import (
+    decode_message,
+    encode_message,
+)
+from packages.fetchai.protocols.default.message import DefaultMessage
+from packages.fetchai.protocols.default.serialization import DefaultSerializer
+
+
+SIZES = (1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+
+
+def send(content: bytes) -> bytes:
+    """Serializes a 'bytes' message like the multiplexer does for the envelopes."""
+    return DefaultSerializer.encode(
+        DefaultMessage(performative=DefaultMessage.Performative.BYTES, content=content)
+    )
+
+
+def receive(obj: bytes) -> bytes:
+    """Deserializes a 'bytes' message and returns its content."""
+    return DefaultSerializer.decode(obj).content
+
+
+def base64_encode(data: bytes) -> bytes:
+    """Sends a result with its data in base64, as results were before the raw values."""
+    return send(
+        json.dumps(
+            {"type": "DOWNLOAD", "data": {"__bytes__": base64.b64encode(data).decode()}}
+        ).encode()
+    )
+
+
+def base64_decode(obj: bytes) -> bytes:
+    """Receives a result with its data in base64."""
+    return base64.b64decode(json.loads(receive(obj))["data"]["__bytes__"])
+
+
+def raw_encode(data: bytes) -> bytes:
+    """Sends a result with `encode_message`, large data raw."""
+    return send(encode_message({"type": "DOWNLOAD", "data": data}))
+
+
+def raw_decode(obj: bytes) -> bytes:
+    """Receives a result with `decode_message`."""
+    return decode_message(receive(obj))["data"]
+
+
+def measure(function, argument, size: int, repeat: int):
+    """
+    Measures a function on a payload.
+
+    return: the throughput in MB/s and the peak of the memory allocated by a call,
+        in payloads.
+    """
+    function(argument)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(argument)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size * repeat / elapsed / 1e6, peak / size
+
+
+def main() -> None:
+    """Prints the throughput and copies of each path by payload size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'path':>7} {'op':>7} {'MB/s':>10} {'copies':>7}")
+    for size in SIZES:
+        data = os.urandom(size)
+        for path, encode, decode in (
+            ("base64", base64_encode, base64_decode),
+            ("raw", raw_encode, raw_decode),
+        ):
+            encoded = encode(data)
+            for op, function, argument in (
+                ("encode", encode, data),
+                ("decode", decode, encoded),
+            ):
+                throughput, copies = measure(function, argument, size, args.repeat)
+                print(
+                    f"{size:>10} {path:>7} {op:>7} {throughput:>10.0f} {copies:>7.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
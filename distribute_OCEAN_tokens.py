@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
+import argparse
+import csv
+import json
 import os
-from typing import List
-from brownie.network import accounts
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from brownie.network import accounts, web3
 from web3.main import Web3
 from ocean_lib.example_config import get_config_dict
 from ocean_lib.models.datatoken_base import DatatokenBase
@@ -10,6 +14,12 @@ from ocean_lib.ocean.ocean import Ocean
 from ocean_lib.ocean.util import get_ocean_token_address
 from ocean_lib.web3_internal.utils import connect_to_network
 
+from ocean_connection.connections.ocean_connection.multicall import (
+    BatchReader,
+    balance_of_call,
+)
+from ocean_connection.connections.ocean_connection.nonce import NonceManager
+
 
 def distribute_ocean_tokens(
     ocean: Ocean,
@@ -24,26 +34,232 @@ def distribute_ocean_tokens(
         ocean.config_dict, address=get_ocean_token_address(ocean.config_dict)
     )
 
-    for recipient in recipients:
-        if OCEAN_token.balanceOf(recipient) < amount:
+    balances = BatchReader(web3).execute(
+        [balance_of_call(OCEAN_token.address, recipient) for recipient in recipients]
+    )
+    for recipient, balance in zip(recipients, balances):
+        if balance < amount:
             OCEAN_token.mint(recipient, amount, {"from": ocean_deployer_wallet})
 
 
+def load_recipients(
+    path: str, default_amount: Optional[int] = None
+) -> List[Tuple[str, int]]:
+    """
+    Reads recipients and amounts from a CSV or JSONL file.
+
+    CSV files have an `address` column and an optional `amount` column, JSONL files
+    have one `{"address": ..., "amount": ...}` object per line. Amounts are in OCEAN
+    and `default_amount`, in wei, is used for recipients without one.
+    """
+    with open(path, "r") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    recipients = []
+    for row in rows:
+        amount = row.get("amount")
+        if amount in (None, ""):
+            if default_amount is None:
+                raise ValueError(f"No amount for recipient {row['address']}.")
+            amount_wei = default_amount
+        else:
+            amount_wei = Web3.toWei(Decimal(str(amount)), "ether")
+        recipients.append((Web3.toChecksumAddress(row["address"].strip()), amount_wei))
+
+    return recipients
+
+
+def load_progress(path: Optional[str]) -> Dict[str, dict]:
+    """
+    Returns the last progress entry of every recipient, keyed by address.
+
+    The progress file is a JSONL log, so a run interrupted while writing it loses
+    at most its last line.
+    """
+    progress: Dict[str, dict] = {}
+    if not path or not os.path.exists(path):
+        return progress
+
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            progress[entry["address"]] = entry
+
+    return progress
+
+
+def distribute_ocean_tokens_bulk(
+    ocean: Ocean,
+    recipients: List[Tuple[str, int]],
+    ocean_deployer_wallet,
+    progress_path: Optional[str] = None,
+    batch_size: int = 100,
+    timeout: int = 300,
+) -> Dict[str, int]:
+    """
+    Mint OCEAN tokens to many recipients.
+
+    Balances are read in batches, the mints of a batch are broadcast back-to-back
+    with locally allocated nonces and their receipts are then awaited together.
+    Every sent and confirmed mint is appended to the progress file, so a rerun skips
+    the recipients that were already funded.
+
+    param ocean: the Ocean instance.
+    param recipients: the addresses and amounts in wei to fund.
+    param ocean_deployer_wallet: the wallet allowed to mint OCEAN.
+    param progress_path: JSONL file to record the progress to, None to not record it.
+    param batch_size: the number of mints in flight at once.
+    param timeout: seconds to wait for the receipt of a mint.
+    return: the number of recipients `funded`, `skipped` and `failed`.
+    """
+    OCEAN_token = DatatokenBase.get_typed(
+        ocean.config_dict, address=get_ocean_token_address(ocean.config_dict)
+    )
+    reader = BatchReader(web3)
+    nonces = NonceManager(web3)
+    minter = ocean_deployer_wallet.address
+    progress = load_progress(progress_path)
+    counts = {"funded": 0, "skipped": 0, "failed": 0}
+
+    pending = []
+    for address, amount in recipients:
+        if progress.get(address, {}).get("status") == "confirmed":
+            counts["skipped"] += 1
+        else:
+            pending.append((address, amount))
+
+    progress_file = open(progress_path, "a") if progress_path else None
+
+    def record(entry: dict) -> None:
+        if progress_file:
+            progress_file.write(json.dumps(entry) + "\n")
+            progress_file.flush()
+
+    try:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            balances = reader.execute(
+                [balance_of_call(OCEAN_token.address, address) for address, _ in batch]
+            )
+
+            sent = []
+            for (address, amount), balance in zip(batch, balances):
+                if balance >= amount:
+                    counts["skipped"] += 1
+                    record(
+                        {"address": address, "amount": amount, "status": "confirmed"}
+                    )
+                    continue
+
+                nonce = nonces.allocate(minter)
+                try:
+                    tx = OCEAN_token.mint(
+                        address,
+                        amount,
+                        {
+                            "from": ocean_deployer_wallet,
+                            "nonce": nonce,
+                            "required_confs": 0,
+                        },
+                    )
+                except Exception as e:
+                    nonces.fail(minter, nonce)
+                    counts["failed"] += 1
+                    record(
+                        {
+                            "address": address,
+                            "amount": amount,
+                            "status": "failed",
+                            "error": str(e),
+                        }
+                    )
+                    continue
+
+                record(
+                    {
+                        "address": address,
+                        "amount": amount,
+                        "status": "sent",
+                        "tx_hash": tx.txid,
+                    }
+                )
+                sent.append((address, amount, nonce, tx.txid))
+
+            for address, amount, nonce, tx_hash in sent:
+                try:
+                    receipt = web3.eth.wait_for_transaction_receipt(
+                        tx_hash, timeout=timeout
+                    )
+                    confirmed = receipt["status"] == 1
+                except Exception:
+                    confirmed = False
+
+                if confirmed:
+                    nonces.confirm(minter, nonce)
+                    counts["funded"] += 1
+                else:
+                    nonces.fail(minter, nonce)
+                    counts["failed"] += 1
+                record(
+                    {
+                        "address": address,
+                        "amount": amount,
+                        "status": "confirmed" if confirmed else "failed",
+                        "tx_hash": tx_hash,
+                    }
+                )
+    finally:
+        if progress_file:
+            progress_file.close()
+
+    return counts
+
+
 if __name__ == "__main__":
-    connect_to_network("development")
+    parser = argparse.ArgumentParser(description="Mint OCEAN tokens to agent wallets.")
+    parser.add_argument("--network", default="development")
+    parser.add_argument(
+        "--recipients", help="CSV or JSONL file of addresses and amounts."
+    )
+    parser.add_argument(
+        "--amount", default="10000", help="Default amount of OCEAN per recipient."
+    )
+    parser.add_argument(
+        "--progress", help="JSONL file recording the progress, to resume a run."
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
 
-    config = get_config_dict("development")
+    connect_to_network(args.network)
+
+    config = get_config_dict(args.network)
     ocean = Ocean(config)
-    amount = Web3.toWei(10000, "ether")
+    amount = Web3.toWei(Decimal(args.amount), "ether")
     ocean_deployer_wallet = accounts.add(os.getenv("FACTORY_DEPLOYER_PRIVATE_KEY"))
 
-    recipients = []
-    for private_key_envvar in ["SELLER_AEA_KEY_ETHEREUM", "BUYER_AEA_KEY_ETHEREUM"]:
-        private_key = os.environ.get(private_key_envvar)
-        if not private_key:
-            continue
+    if args.recipients:
+        counts = distribute_ocean_tokens_bulk(
+            ocean,
+            load_recipients(args.recipients, default_amount=amount),
+            ocean_deployer_wallet,
+            progress_path=args.progress,
+            batch_size=args.batch_size,
+        )
+        print(json.dumps(counts))
+    else:
+        recipients = []
+        for private_key_envvar in ["SELLER_AEA_KEY_ETHEREUM", "BUYER_AEA_KEY_ETHEREUM"]:
+            private_key = os.environ.get(private_key_envvar)
+            if not private_key:
+                continue
 
-        w = accounts.add(private_key)
-        recipients.append(w.address)
+            w = accounts.add(private_key)
+            recipients.append(w.address)
 
-    distribute_ocean_tokens(ocean, amount, recipients, ocean_deployer_wallet)
+        distribute_ocean_tokens(ocean, amount, recipients, ocean_deployer_wallet)
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Registry of the actions of the connection and the models of their requests."""
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from ocean_connection.connections.ocean_connection.lazy import import_module
+
+
+UNKNOWN_ACTION = "Message type is not correctly provided. Please add the message type according to your action."
+
+
+class InvalidRequest(ValueError):
+    """Raised when a request has an unknown type, or misses or mistypes an argument."""
+
+
+class ActionRequest:
+    """
+    Base of the request models of the actions.
+
+    A model lists its fields in `__slots__`, annotated with their types. Fields
+    with a value in `DEFAULTS` are optional, the others are required. When the
+    class is created, its fields are compiled into a `from_kwargs` that checks
+    their presence and types and copies them in a single pass, so validating a
+    request costs no lookups of the model. An `int` is a valid `float`, and a
+    `bool` is only valid where a `bool` is expected.
+    """
+
+    __slots__ = ("type", "kwargs")
+
+    type: str
+    kwargs: Dict[str, Any]
+
+    DEFAULTS: ClassVar[Dict[str, Any]] = {}
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(
+            field
+            for klass in reversed(cls.__mro__)
+            if issubclass(klass, ActionRequest) and klass is not ActionRequest
+            for field in klass.__dict__.get("__slots__", ())
+        )
+        cls.from_kwargs = classmethod(_compile(cls))
+
+    @classmethod
+    def from_kwargs(cls, kwargs: Dict[str, Any]) -> "ActionRequest":
+        """
+        Validates the kwargs of a message and wraps them in the model.
+
+        param kwargs: the message kwargs, including its `type`.
+        raises InvalidRequest: if a required field is missing or a field has the wrong type.
+        """
+        request = object.__new__(cls)
+        request.type = kwargs.get("type")
+        request.kwargs = kwargs
+        return request
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        """Returns the message kwargs, with the validated fields and the defaults of the model."""
+        kwargs = dict(self.kwargs)
+        for field in self.FIELDS:
+            kwargs[field] = getattr(self, field)
+        return kwargs
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+def _compile(cls: type) -> Callable[..., ActionRequest]:
+    """Generates the `from_kwargs` of a model, like `dataclasses` does for `__init__`."""
+    annotations: Dict[str, Any] = {}
+    for klass in reversed(cls.__mro__):
+        annotations.update(klass.__dict__.get("__annotations__", {}))
+    types = {
+        field: _runtime_types(annotations[field])
+        for field in cls.FIELDS
+        if field in annotations
+    }
+    types = {field: checked for field, checked in types.items() if checked}
+
+    lines = ["def from_kwargs(cls, kwargs):"]
+    for field in cls.FIELDS:
+        if field not in cls.DEFAULTS:
+            lines.append(f"    if {field!r} not in kwargs:")
+            lines.append(f"        raise _missing({field!r}, kwargs)")
+    lines.append("    request = _new(cls)")
+    lines.append("    request.type = kwargs.get('type')")
+    lines.append("    request.kwargs = kwargs")
+    for field in cls.FIELDS:
+        indent = "    "
+        if field in cls.DEFAULTS:
+            lines.append(f"    if {field!r} not in kwargs:")
+            lines.append(f"        request.{field} = _defaults[{field!r}]")
+            lines.append("    else:")
+            indent += "    "
+        lines.append(f"{indent}value = kwargs[{field!r}]")
+        if field in types:
+            lines.append(f"{indent}if not _valid(value, _types[{field!r}]):")
+            lines.append(
+                f"{indent}    raise _invalid({field!r}, value, _types[{field!r}], kwargs)"
+            )
+        lines.append(f"{indent}request.{field} = value")
+    lines.append("    return request")
+
+    namespace: Dict[str, Any] = {}
+    exec(  # nosec - the source only names the fields of the model
+        "\n".join(lines),
+        {
+            "_missing": _missing,
+            "_invalid": _invalid,
+            "_valid": _valid,
+            "_new": object.__new__,
+            "_defaults": dict(cls.DEFAULTS),
+            "_types": types,
+        },
+        namespace,
+    )
+    return namespace["from_kwargs"]
+
+
+def _runtime_types(annotation: Any) -> Tuple[type, ...]:
+    """Returns the classes an annotation allows, empty if it isn't checked."""
+    if get_origin(annotation) is Union:
+        types = [_runtime_types(arg) for arg in get_args(annotation)]
+        if not all(types):
+            return ()
+        return tuple(cls for checked in types for cls in checked)
+    if get_origin(annotation) is not None:
+        annotation = get_origin(annotation)
+    if annotation is None:
+        return (type(None),)
+    if not isinstance(annotation, type) or annotation is object:
+        return ()
+    if annotation is float:
+        return (float, int)
+    return (annotation,)
+
+
+def _valid(value: Any, types: Tuple[type, ...]) -> bool:
+    if isinstance(value, bool) and bool not in types:
+        return False
+    return isinstance(value, types)
+
+
+def _missing(field: str, kwargs: Dict[str, Any]) -> InvalidRequest:
+    return InvalidRequest(
+        f"'{field}' is missing from the required arguments for {kwargs.get('type')}. Please add it."
+    )
+
+
+def _invalid(
+    field: str, value: Any, types: Tuple[type, ...], kwargs: Dict[str, Any]
+) -> InvalidRequest:
+    expected = " or ".join(cls.__name__ for cls in types)
+    return InvalidRequest(
+        f"'{field}' must be a {expected} for {kwargs.get('type')}, not a {type(value).__name__}."
+    )
+
+
+class ActionSpec(NamedTuple):
+    """An action: the model of its requests and the handler running them."""
+
+    action_type: str
+    model: type
+    handler: Callable[[Any, ActionRequest], Any]
+
+
+class ActionRegistry:
+    """
+    Maps the type of a message to the action handling it.
+
+    Handlers are called with the connection and the validated request model and
+    return the result message. Besides the actions of the connection, modules
+    listed in the `action_plugins` option are imported when connecting, so that
+    they can register their own actions with `register_action`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._actions: Dict[str, ActionSpec] = {}
+
+    def register(
+        self,
+        action_type: str,
+        model: type,
+        handler: Optional[Callable[[Any, ActionRequest], Any]] = None,
+        replace: bool = False,
+    ) -> Any:
+        """
+        Registers an action, as a decorator of its handler if `handler` is None.
+
+        param action_type: the `type` of the messages of the action.
+        param model: the `ActionRequest` subclass validating the requests.
+        param handler: called with the connection and the request, returns the result message.
+        param replace: whether to replace an action registered with the same type.
+        raises ValueError: if the type is registered already and `replace` is False.
+        """
+        if handler is None:
+            return lambda fn: self.register(action_type, model, fn, replace) or fn
+
+        if not (isinstance(model, type) and issubclass(model, ActionRequest)):
+            raise TypeError(f"The model of {action_type} must be an ActionRequest.")
+        if action_type in self._actions and not replace:
+            raise ValueError(f"Action {action_type} is registered already.")
+
+        self._actions[action_type] = ActionSpec(action_type, model, handler)
+        return None
+
+    def unregister(self, action_type: str) -> None:
+        """Removes an action, if registered."""
+        self._actions.pop(action_type, None)
+
+    def get(self, action_type: Any) -> Optional[ActionSpec]:
+        """Returns the action of a message type, None if there is none."""
+        return self._actions.get(action_type)
+
+    def parse(self, kwargs: Dict[str, Any]) -> Tuple[ActionSpec, ActionRequest]:
+        """
+        Looks up the action of a message and validates the message.
+
+        param kwargs: the message kwargs, including its `type`.
+        raises InvalidRequest: if the type is unknown or a required field is missing.
+        """
+        spec = self._actions.get(kwargs.get("type"))
+        if spec is None:
+            raise InvalidRequest(UNKNOWN_ACTION)
+
+        return spec, spec.model.from_kwargs(kwargs)
+
+    def load_plugins(self, modules: Iterable[str]) -> None:
+        """
+        Imports the modules registering third-party actions.
+
+        param modules: the dotted names of the modules.
+        """
+        for module in modules:
+            import_module(module)
+
+    def __contains__(self, action_type: Any) -> bool:
+        return action_type in self._actions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._actions)
+
+    def __len__(self) -> int:
+        return len(self._actions)
+
+
+ACTIONS = ActionRegistry()
+
+
+def register_action(
+    action_type: str,
+    model: type,
+    handler: Optional[Callable[[Any, ActionRequest], Any]] = None,
+    replace: bool = False,
+) -> Any:
+    """Registers an action of the connection, see `ActionRegistry.register`."""
+    return ACTIONS.register(action_type, model, handler, replace)
+
+
+def action(action_type: str, model: type, **fixed_kwargs: Any) -> Callable:
+    """
+    Registers a method of the connection taking the message kwargs as an action.
+
+    The method is called with the kwargs of the validated request, see
+    `ActionRequest.to_kwargs`, and is left as it is, so that it can still be
+    called directly.
+
+    param action_type: the `type` of the messages of the action.
+    param model: the `ActionRequest` subclass validating the requests.
+    param fixed_kwargs: extra kwargs the method is called with.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        ACTIONS.register(
+            action_type,
+            model,
+            lambda connection, request: method(
+                connection, **fixed_kwargs, **request.to_kwargs()
+            ),
+        )
+        return method
+
+    return decorator
+
+
+class DeployDataRequest(ActionRequest):
+    """Request of `DEPLOY_C2D` and `DEPLOY_DATA_DOWNLOAD`."""
+
+    __slots__ = (
+        "description",
+        "name",
+        "author",
+        "license",
+        "dataset_url",
+        "has_pricing_schema",
+    )
+
+    description: str
+    name: str
+    author: str
+    license: str
+    dataset_url: str
+    has_pricing_schema: bool
+
+
+class DeployAlgorithmRequest(ActionRequest):
+    """Request of `DEPLOY_ALGORITHM`."""
+
+    __slots__ = (
+        "description",
+        "name",
+        "author",
+        "license",
+        "language",
+        "format",
+        "version",
+        "entrypoint",
+        "image",
+        "tag",
+        "checksum",
+        "files_url",
+        "has_pricing_schema",
+    )
+
+    description: str
+    name: str
+    author: str
+    license: str
+    language: str
+    format: str
+    version: str
+    entrypoint: str
+    image: str
+    tag: str
+    checksum: str
+    files_url: str
+    has_pricing_schema: bool
+
+
+class DatasetAlgorithmRequest(ActionRequest):
+    """Request of `PERMISSION_DATASET` and `C2D_JOB`."""
+
+    __slots__ = ("data_did", "algo_did")
+
+    data_did: str
+    algo_did: str
+
+
+class CreateDispenserRequest(ActionRequest):
+    """Request of `CREATE_DISPENSER`."""
+
+    __slots__ = ("datatoken_address",)
+
+    datatoken_address: str
+
+
+class CreateFixedRateExchangeRequest(ActionRequest):
+    """Request of `CREATE_FIXED_RATE_EXCHANGE`."""
+
+    __slots__ = ("datatoken_address", "rate", "ocean_amt")
+
+    datatoken_address: str
+    rate: float
+    ocean_amt: float
+
+
+class DownloadRequest(ActionRequest):
+    """Request of `DOWNLOAD_JOB`."""
+
+    __slots__ = ("datatoken_address", "asset_did", "datatoken_amt")
+
+    datatoken_address: str
+    asset_did: str
+    datatoken_amt: int
+
+
+class DownloadAssetRequest(DownloadRequest):
+    """Request of `DOWNLOAD_ASSET`."""
+
+    __slots__ = ("delivery", "file_index")
+
+    delivery: str
+    file_index: int
+
+    DEFAULTS = {"delivery": "inline", "file_index": 0}
+
+
+class DeployBatchRequest(ActionRequest):
+    """Request of `DEPLOY_C2D_BATCH` and `DEPLOY_DATA_DOWNLOAD_BATCH`."""
+
+    __slots__ = ("datasets",)
+
+    datasets: list
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Asyncio clients of the provider, for `AsyncOceanConnection`."""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Set, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+
+from ocean_connection.connections.ocean_connection.jobs import JOB_FINISHED, TrackedJob
+from ocean_connection.connections.ocean_connection.lazy import lazy_import
+
+
+DataServiceProvider = lazy_import(
+    "ocean_lib.data_provider.data_service_provider", "DataServiceProvider"
+)
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncProvider:
+    """The compute endpoints of the provider, over aiohttp."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        """
+        Initialize the client.
+
+        param session: the HTTP session, shared by the clients of the connection.
+        """
+        self.session = session
+        self._endpoints: Dict[str, Dict[str, List[str]]] = {}
+
+    async def status(self, ddo: Any, service: Any, job_id: str, wallet: Any) -> dict:
+        """Returns the status of a compute job, like `ocean.compute.status`."""
+        nonce, signature = DataServiceProvider.sign_message(
+            wallet, f"{wallet.address}{job_id}{ddo.did}"
+        )
+        method, url = await self._endpoint("computeStatus", service.service_endpoint)
+        params = {
+            "consumerAddress": wallet.address,
+            "documentId": ddo.did,
+            "jobId": job_id,
+            "nonce": nonce,
+            "signature": signature,
+        }
+        async with self.session.request(method, url, params=params) as response:
+            if response.status != 200:
+                raise ValueError(
+                    f"Failed to get the status of job {job_id}: {await response.text()}"
+                )
+            status = await response.json(content_type=None)
+
+        if isinstance(status, list):
+            status = status[0]
+        status["ok"] = status.get("status") not in (31, 32, None)
+        return status
+
+    async def result(
+        self, ddo: Any, service: Any, job_id: str, index: int, wallet: Any
+    ) -> bytes:
+        """Returns an output file of a compute job, like `ocean.compute.result`."""
+        nonce, signature = DataServiceProvider.sign_message(
+            wallet, f"{wallet.address}{job_id}{index}"
+        )
+        method, url = await self._endpoint("computeResult", service.service_endpoint)
+        params = {
+            "signature": signature,
+            "nonce": nonce,
+            "jobId": job_id,
+            "index": index,
+            "consumerAddress": wallet.address,
+        }
+        async with self.session.request(method, url, params=params) as response:
+            if response.status != 200:
+                raise ValueError(
+                    f"Failed to get result {index} of job {job_id}: {await response.text()}"
+                )
+            return await response.read()
+
+    async def _endpoint(self, name: str, service_endpoint: str) -> Tuple[str, str]:
+        root = _provider_root(service_endpoint)
+        if root not in self._endpoints:
+            async with self.session.get(root) as response:
+                info = await response.json(content_type=None)
+            self._endpoints[root] = info["serviceEndpoints"]
+
+        method, path = self._endpoints[root][name]
+        return method.upper(), urljoin(root, path)
+
+
+def _provider_root(service_endpoint: str) -> str:
+    """Returns the root URL of the provider of a service endpoint."""
+    if "/api" in service_endpoint:
+        service_endpoint = service_endpoint[: service_endpoint.find("/api")]
+    return service_endpoint.rstrip("/")
+
+
+class ThreadedClient:
+    """Exposes the methods of a blocking client as coroutines run in a thread pool."""
+
+    def __init__(
+        self, target: Any, run_blocking: Callable[..., Awaitable[Any]]
+    ) -> None:
+        """
+        Initialize the client.
+
+        param target: the blocking client, e.g. the simulated compute client.
+        param run_blocking: awaits a blocking call run in the pool of the connection.
+        """
+        self._target = target
+        self._run_blocking = run_blocking
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._target, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._run_blocking(method, *args, **kwargs)
+
+        return call
+
+
+class AsyncComputeJobTracker:
+    """
+    Polls the status of the outstanding compute jobs, one coroutine per job.
+
+    Polling follows the same schedule as `ComputeJobTracker`: the interval of a
+    job grows geometrically while its status doesn't change and is reset when
+    it does, so thousands of running jobs only cost sleeping coroutines.
+    """
+
+    def __init__(
+        self,
+        compute: Any,
+        on_finished: Callable[[TrackedJob, List[bytes]], None],
+        on_failed: Callable[[TrackedJob, str], None],
+        min_interval: float = 5.0,
+        max_interval: float = 120.0,
+        backoff: float = 1.5,
+        job_timeout: float = 6 * 3600.0,
+    ) -> None:
+        """
+        Initialize the tracker.
+
+        param compute: an async compute client, providing `status` and `result`.
+        param on_finished: called with the job and its output files.
+        param on_failed: called with the job and the reason of the failure.
+        param min_interval: seconds between the first polls of a job.
+        param max_interval: maximum seconds between two polls of a job.
+        param backoff: factor applied to the interval while the status doesn't change.
+        param job_timeout: seconds after which a job is given up.
+        """
+        self.compute = compute
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.job_timeout = job_timeout
+        self.polls = 0
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def track(
+        self, job_id: str, ddo: Any, service: Any, consumer_wallet: Any, request: dict
+    ) -> None:
+        """
+        Starts tracking a compute job, from the event loop.
+
+        param job_id: the id of the job.
+        param ddo: the DDO of the dataset the job runs on.
+        param service: the compute service of the dataset.
+        param consumer_wallet: the wallet that started the job.
+        param request: the kwargs of the request that started the job.
+        """
+        job = TrackedJob(
+            job_id,
+            ddo,
+            service,
+            consumer_wallet,
+            request,
+            self.min_interval,
+            time.monotonic(),
+        )
+        task = asyncio.ensure_future(self._follow(job))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda done: self._tasks.pop(job_id, None))
+
+    @property
+    def outstanding(self) -> List[str]:
+        """The ids of the tracked jobs."""
+        return list(self._tasks)
+
+    async def close(self) -> None:
+        """Stops tracking the jobs."""
+        tasks: Set[asyncio.Task] = set(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _follow(self, job: TrackedJob) -> None:
+        while True:
+            await asyncio.sleep(job.interval)
+            self.polls += 1
+            job.polls += 1
+            try:
+                status = await self.compute.status(
+                    job.ddo, job.service, job.job_id, job.consumer_wallet
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                _logger.warning(f"Failed to get the status of job {job.job_id}: {e}")
+                status = job.last_status
+
+            if status and status.get("status") == JOB_FINISHED:
+                await self._finish(job, status)
+                return
+
+            if time.monotonic() - job.started_at > self.job_timeout:
+                self.on_failed(job, f"Job did not finish within {self.job_timeout}s.")
+                return
+
+            if (
+                status
+                and job.last_status
+                and status.get("status") != job.last_status.get("status")
+            ):
+                job.interval = self.min_interval
+            else:
+                job.interval = min(job.interval * self.backoff, self.max_interval)
+            job.last_status = status
+
+    async def _finish(self, job: TrackedJob, status: dict) -> None:
+        outputs: Iterable[int] = [
+            index
+            for index, result in enumerate(status.get("results") or [])
+            if result.get("type") == "output"
+        ]
+        try:
+            results = [
+                await self.compute.result(
+                    job.ddo, job.service, job.job_id, index, job.consumer_wallet
+                )
+                for index in outputs
+            ]
+        except Exception as e:  # pylint: disable=broad-except
+            self.on_failed(job, f"Failed to fetch the results: {e}")
+            return
+
+        if not results:
+            self.on_failed(job, f"Job finished without output: {status}")
+            return
+
+        self.on_finished(job, results)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Tracking of ERC20 allowances to skip redundant approvals."""
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Tuple
+
+
+class AllowanceManager:
+    """
+    Sends `approve()` transactions only when the current allowance is too low.
+
+    Allowances are cached per (token, owner, spender). The cache is lowered by the
+    amounts that operations may spend, and the on-chain `allowance()` is read
+    before deciding to approve, so a stale cache never causes an extra transaction.
+    With a `standing_amount`, approvals are made for at least that amount, so that
+    the next operations don't need an approval at all.
+    """
+
+    def __init__(self, standing_amount: int = 0) -> None:
+        """
+        Initialize the allowance manager.
+
+        param standing_amount: minimum amount, in wei, to approve when an approval
+        is needed. 0 approves exactly the amount that is needed.
+        """
+        self.standing_amount = standing_amount
+        self.approvals = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = defaultdict(
+            threading.Lock
+        )
+        self._allowances: Dict[Tuple[str, str, str], int] = {}
+
+    def ensure(
+        self,
+        token: Any,
+        owner: str,
+        spender: str,
+        amount: int,
+        approve: Callable[[int], Any],
+    ) -> bool:
+        """
+        Makes sure the spender can spend `amount` of the owner's tokens.
+
+        param token: the token contract, providing `address` and `allowance()`.
+        param owner: the address of the token owner.
+        param spender: the address of the spender.
+        param amount: the amount in wei the spender needs.
+        param approve: sends the approval transaction for the given amount in wei.
+        return: whether an approval transaction was sent.
+        """
+        key = (token.address, owner, spender)
+        with self._lock:
+            key_lock = self._key_locks[key]
+
+        with key_lock:
+            with self._lock:
+                cached = self._allowances.get(key)
+
+            if cached is None or cached < amount:
+                cached = token.allowance(owner, spender)
+                with self._lock:
+                    self._allowances[key] = cached
+
+            if cached >= amount:
+                with self._lock:
+                    self.skipped += 1
+                return False
+
+            value = max(amount, self.standing_amount)
+            try:
+                approve(value)
+            except BaseException:
+                self.invalidate(token.address, owner, spender)
+                raise
+
+            with self._lock:
+                self._allowances[key] = value
+                self.approvals += 1
+            return True
+
+    def spend(self, token_address: str, owner: str, spender: str, amount: int) -> None:
+        """
+        Lowers the cached allowance after an operation that spent up to `amount`.
+
+        param token_address: the address of the token.
+        param owner: the address of the token owner.
+        param spender: the address of the spender.
+        param amount: the maximum amount in wei the operation could spend.
+        """
+        key = (token_address, owner, spender)
+        with self._lock:
+            if key in self._allowances:
+                self._allowances[key] = max(0, self._allowances[key] - amount)
+
+    def prime(
+        self, token_address: str, owner: str, spender: str, allowance: int
+    ) -> None:
+        """
+        Caches an allowance read elsewhere, e.g. in a batch of reads.
+
+        param token_address: the address of the token.
+        param owner: the address of the token owner.
+        param spender: the address of the spender.
+        param allowance: the on-chain allowance in wei.
+        """
+        with self._lock:
+            self._allowances[(token_address, owner, spender)] = allowance
+
+    def invalidate(self, token_address: str, owner: str, spender: str) -> None:
+        """
+        Forgets the cached allowance, so the next `ensure` reads it on-chain.
+
+        param token_address: the address of the token.
+        param owner: the address of the token owner.
+        param spender: the address of the spender.
+        """
+        with self._lock:
+            self._allowances.pop((token_address, owner, spender), None)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of approvals sent and skipped."""
+        with self._lock:
+            return {"approvals": self.approvals, "skipped": self.skipped}
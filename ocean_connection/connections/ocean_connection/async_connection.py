@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Asyncio implementation of the Ocean connection."""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+import aiohttp
+from aea.connections.base import Connection, ConnectionStates
+from aea.mail.base import Envelope
+
+from ocean_connection.connections.ocean_connection.actions import (
+    ACTIONS,
+    UNKNOWN_ACTION,
+    InvalidRequest,
+)
+from ocean_connection.connections.ocean_connection.aio import (
+    AsyncComputeJobTracker,
+    AsyncProvider,
+    ThreadedClient,
+)
+from ocean_connection.connections.ocean_connection.connection import (
+    CONNECTION_ID,
+    OceanConnection,
+)
+from ocean_connection.connections.ocean_connection.utils import decode_message
+
+
+# The deployments whose receipt is delivered once Aquarius has indexed the asset.
+INDEXED_DEPLOYMENTS = ("DEPLOY_C2D", "DEPLOY_ALGORITHM", "DEPLOY_DATA_DOWNLOAD")
+
+
+class _BlockingEngine(OceanConnection):
+    """
+    Runs the blocking part of the actions of an `AsyncOceanConnection` in its
+    thread pool.
+
+    The waits that follow an action are left to the coroutines of the async
+    connection: deployments return without waiting for Aquarius, the
+    confirmations of the transactions are awaited on the loop and compute jobs
+    are tracked by an `AsyncComputeJobTracker`.
+    """
+
+    WAIT_FOR_INDEXING = False
+
+    def __init__(self, owner: "AsyncOceanConnection", *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._owner = owner
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the async connection is connected."""
+        return self._owner.is_connected
+
+    def put_envelope(self, envelope: Optional[Envelope]) -> None:
+        """Delivers an envelope through the async connection."""
+        self._owner.put_envelope(envelope)
+
+    def _create_executor(self) -> None:
+        # The async connection schedules the actions itself.
+        return None
+
+    def _track_job(self, job_id: str, ddo: Any, service: Any, request: dict) -> None:
+        self._owner.loop_call(
+            self._owner.job_tracker.track, job_id, ddo, service, self.wallet, request
+        )
+
+
+class AsyncOceanConnection(Connection):
+    """
+    Proxy to the functionality of the SDK, driven by asyncio.
+
+    Each action runs as a coroutine. ocean_lib and brownie only have blocking
+    APIs, so there is no async web3 provider: the handler of the action runs in
+    a thread of a small pool, and so do the waits inside it, i.e. the ocean_lib,
+    Aquarius and provider calls, the waits for transactions to be mined and the
+    retry backoffs. Up to `max_blocking_calls` handlers run at once.
+
+    The waits after the handler don't hold a thread: the confirmations of the
+    transactions and the indexing of deployments are awaited on the futures of
+    the shared `ConfirmationWatcher` and `IndexingWatcher`, which poll the node
+    and Aquarius in batches, and compute jobs are polled with aiohttp.
+    """
+
+    connection_id = CONNECTION_ID
+
+    # Threads running the handlers of the actions.
+    MAX_BLOCKING_CALLS = 8
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # pragma: no cover
+        """
+        Initialize the connection.
+
+        Takes the arguments of `OceanConnection`.
+
+        :param args: arguments passed to component base
+        :param kwargs: keyword arguments passed to component base
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = _BlockingEngine(self, *args, **kwargs)
+        self.job_tracker: Optional[AsyncComputeJobTracker] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._incoming: Optional[asyncio.Queue] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def connect(self) -> None:
+        """Connects to Ocean, loading the blocking part in the thread pool."""
+        if self.is_connected:
+            return
+
+        with self._connect_context():
+            config = self.configuration.config
+            self._loop = asyncio.get_event_loop()
+            self._incoming = asyncio.Queue()
+            self._pool = ThreadPoolExecutor(
+                max_workers=config.get("max_blocking_calls", self.MAX_BLOCKING_CALLS),
+                thread_name_prefix="ocean-blocking",
+            )
+            limits = {
+                **OceanConnection.ACTION_LIMITS,
+                **(config.get("action_limits") or {}),
+            }
+            self._limits = {
+                action: asyncio.Semaphore(limit) for action, limit in limits.items()
+            }
+            engine_connected = False
+            try:
+                await self._run_blocking(self.engine.on_connect)
+                engine_connected = True
+                self._create_clients()
+            except BaseException:
+                await self._close_clients()
+                if engine_connected:
+                    await self._run_blocking(self.engine.on_disconnect)
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                raise
+
+    async def disconnect(self) -> None:
+        """Waits for the running actions, then disconnects from Ocean."""
+        if self.is_disconnected:
+            return
+
+        with self._state.transit(
+            initial=ConnectionStates.disconnecting,
+            success=ConnectionStates.disconnected,
+            fail=ConnectionStates.disconnected,
+        ):
+            if self._tasks:
+                await asyncio.wait(self._tasks)
+            await self._close_clients()
+            if self._pool is not None:
+                await self._run_blocking(self.engine.on_disconnect)
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    async def send(self, envelope: Envelope) -> None:
+        """
+        Starts the action of an envelope.
+
+        The request is the JSON content of the message, see `decode_message`. Its
+        result is delivered to the sender through `receive`.
+
+        param envelope: the envelope of the request.
+        """
+        self._ensure_connected()
+        request = decode_message(envelope.message.content)
+        request.setdefault("sender", envelope.sender)
+
+        task = self._loop.create_task(self.run_action(request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def receive(self, *args: Any, **kwargs: Any) -> Optional[Envelope]:
+        """Returns the next envelope for the agent."""
+        self._ensure_connected()
+        return await self._incoming.get()
+
+    async def run_action(self, request: dict) -> dict:
+        """
+        Runs an action and delivers its result to the agent.
+
+        param request: the kwargs of the action, including its `type`.
+        return: the result message, an `ERROR` one if the action failed.
+        """
+        message_type = request.get("type")
+        try:
+            if message_type not in ACTIONS:
+                raise InvalidRequest(UNKNOWN_ACTION)
+
+            limit = self._limits.get(message_type)
+            if limit is None:
+                msg = await self._run_action(request)
+            else:
+                async with limit:
+                    msg = await self._run_action(request)
+        except Exception as e:  # pylint: disable=broad-except
+            self.logger.error(f"{message_type} failed with error: {e}")
+            msg = {"type": "ERROR", "action": message_type, "error": str(e)}
+
+        self.put_envelope(self.engine._make_envelope(msg, request))
+        return msg
+
+    def put_envelope(self, envelope: Optional[Envelope]) -> None:
+        """Queues an envelope for the agent, from any thread."""
+        self.loop_call(self._incoming.put_nowait, envelope)
+
+    def loop_call(self, fn: Any, *args: Any) -> None:
+        """Calls a function on the event loop, from any thread."""
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    async def _run_action(self, request: dict) -> dict:
+        engine = self.engine
+        start = time.perf_counter()
+        action_id = await self._run_blocking(
+            engine.journal.begin, request["type"], request
+        )
+        msg, wallet, transactions = await self._run_blocking(
+            engine._run_steps, action_id, request, start
+        )
+        try:
+            await asyncio.gather(
+                *(
+                    asyncio.wrap_future(tx.confirmed)
+                    for tx in transactions
+                    if tx is not None
+                )
+            )
+        except Exception as e:
+            await self._run_blocking(engine._fail_action, action_id, request, start, e)
+            raise
+        await self._run_blocking(
+            engine._complete_action, action_id, request, start, msg, wallet
+        )
+
+        if request["type"] in INDEXED_DEPLOYMENTS:
+            indexing = self.engine._watch_indexing(msg, request)
+            if indexing is not None:
+                await asyncio.wrap_future(indexing)
+        return msg
+
+    async def _run_blocking(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        """Runs a blocking call in the thread pool."""
+        return await self._loop.run_in_executor(
+            self._pool, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def _close_clients(self) -> None:
+        """Closes the clients created by `_create_clients`, if they were."""
+        if self.job_tracker is not None:
+            await self.job_tracker.close()
+            self.job_tracker = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _create_clients(self) -> None:
+        """Creates the compute client of the backend: an aiohttp one for Ocean."""
+        config = self.configuration.config
+        engine = self.engine
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=config.get("http_timeout", 30)),
+            connector=aiohttp.TCPConnector(limit=config.get("http_connections", 100)),
+        )
+
+        if engine.backend.name == "ocean":
+            compute: Any = engine.metrics.instrument(
+                AsyncProvider(self._session), "provider"
+            )
+        else:
+            # Other backends only have blocking clients, called from the pool.
+            compute = ThreadedClient(engine.compute, self._run_blocking)
+
+        self.job_tracker = AsyncComputeJobTracker(
+            compute,
+            on_finished=engine._on_job_finished,
+            on_failed=engine._on_job_failed,
+            min_interval=config.get("job_poll_interval", 5),
+            max_interval=config.get("job_poll_max_interval", 120),
+        )
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""The backends the connection talks to: the Ocean stack, or a simulation of it."""
+import os
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from ocean_connection.connections.ocean_connection.lazy import lazy_import
+from ocean_connection.connections.ocean_connection.simulation import (
+    SimulatedBackend,
+    SimulationConfig,
+)
+
+
+BACKENDS = ("ocean", "simulation")
+
+RPC_METRICS_MIDDLEWARE = "ocean_connection_metrics"
+
+# brownie, web3 and ocean_lib take seconds to import, so they are only
+# imported when first used, i.e. while connecting.
+accounts = lazy_import("brownie.network", "accounts")
+history = lazy_import("brownie.network", "history")
+priority_fee = lazy_import("brownie.network", "priority_fee")
+get_config_dict = lazy_import("ocean_lib.example_config", "get_config_dict")
+Ocean = lazy_import("ocean_lib.ocean.ocean", "Ocean")
+connect_to_network = lazy_import("ocean_lib.web3_internal.utils", "connect_to_network")
+
+
+class OceanBackend:
+    """
+    The Ocean stack: brownie connected to the node of `OCEAN_NETWORK_NAME`,
+    ocean_lib, Aquarius and the provider.
+
+    Besides the `Ocean` instance, the backend provides the classes and the chain
+    objects the connection uses directly.
+    """
+
+    name = "ocean"
+    web3 = lazy_import("brownie.network", "web3")
+    chain = lazy_import("brownie.network", "chain")
+    ComputeInput = lazy_import("ocean_lib.models.compute_input", "ComputeInput")
+    OneExchange = lazy_import("ocean_lib.models.fixed_rate_exchange", "OneExchange")
+    Aquarius = lazy_import("ocean_lib.aquarius", "Aquarius")
+    # Persisted DDOs are read back with `DDO.from_dict`.
+    ddo_from_dict = None
+
+    def connect(self) -> str:
+        """Connects to the network and returns its name."""
+        network_name = os.environ["OCEAN_NETWORK_NAME"]
+        connect_to_network(network_name)
+        if network_name != "development":
+            priority_fee(self.chain.priority_fee)
+
+        return network_name
+
+    def config_dict(self, network_name: str) -> dict:
+        """Returns the config dict of the network."""
+        return get_config_dict(network_name)
+
+    def create_ocean(self, config: dict) -> Any:
+        """Creates the Ocean instance."""
+        return Ocean(config)
+
+    def add_account(self, key: Optional[str]) -> Any:
+        """
+        Adds the account of a private key, as the only account.
+
+        param key: the private key.
+        """
+        return self.add_accounts([key])[0]
+
+    def add_accounts(self, keys: List[Optional[str]]) -> List[Any]:
+        """
+        Adds the accounts of private keys, as the only accounts.
+
+        param keys: the private keys.
+        """
+        if not keys or None in keys:
+            raise ValueError("The key_path of the wallet must be configured.")
+
+        accounts.clear()
+        return [accounts.add(key) for key in keys]
+
+    def tx_count(self) -> int:
+        """Returns the number of transactions sent so far, to read their receipts later."""
+        # Lazy objects only forward attributes and calls, not len() or slicing.
+        return len(history.resolve())
+
+    def receipts_since(self, start: int) -> List[Tuple[str, int, int]]:
+        """
+        Returns the sender, nonce and gas used of the transactions sent since `start`.
+
+        param start: a previous `tx_count()`.
+        """
+        return [
+            (str(tx.sender), tx.nonce, tx.gas_used or 0)
+            for tx in history.resolve()[start:]
+        ]
+
+    def instrument_rpc(self, observe: Callable[[str, float, bool], None]) -> None:
+        """
+        Reports every JSON-RPC request to the node, with a web3 middleware.
+
+        param observe: called with `rpc`, the duration and whether the request failed.
+        """
+
+        def metrics_middleware(make_request, web3):
+            def middleware(method, params):
+                start = time.perf_counter()
+                failed = True
+                try:
+                    response = make_request(method, params)
+                    failed = "error" in response
+                    return response
+                finally:
+                    observe("rpc", time.perf_counter() - start, failed)
+
+            return middleware
+
+        onion = self.web3.middleware_onion
+        if RPC_METRICS_MIDDLEWARE in onion:
+            onion.remove(RPC_METRICS_MIDDLEWARE)
+        onion.add(metrics_middleware, RPC_METRICS_MIDDLEWARE)
+
+
+def create_backend(name: str, config: dict) -> Any:
+    """
+    Creates the backend of the connection.
+
+    param name: one of `BACKENDS`.
+    param config: the configuration of the connection, with the `simulation`
+    config of the simulation backend.
+    """
+    if name == "ocean":
+        return OceanBackend()
+    if name == "simulation":
+        return SimulatedBackend(SimulationConfig.from_dict(config.get("simulation")))
+
+    raise ValueError(f"Unknown backend '{name}', use one of {BACKENDS}.")
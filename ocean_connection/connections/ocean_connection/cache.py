@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""In-process caches used by the connection."""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _PersistedCache:
+    """
+    Writes a cache to its JSON file outside of the lock of its entries.
+
+    Writes are coalesced: changes made while a write runs are all saved by the
+    next one, and the writers whose changes were saved already return at once.
+    """
+
+    persist_path: Optional[str]
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._changes = 0
+        self._saved_changes = 0
+
+    def _changed(self) -> None:
+        """Counts a change of the entries, to be called with the lock held."""
+        self._changes += 1
+
+    def _snapshot(self) -> Any:
+        """Returns the entries to persist, called with the lock held."""
+        raise NotImplementedError
+
+    def _to_json(self, snapshot: Any) -> Any:
+        return snapshot
+
+    def _save(self) -> None:
+        if not self.persist_path:
+            return
+
+        with self._save_lock:
+            with self._lock:
+                changes = self._changes
+                if changes == self._saved_changes:
+                    return
+                snapshot = self._snapshot()
+
+            persisted = self._to_json(snapshot)
+            # Write to a sibling temporary file and swap it in, so readers never
+            # see a partially written cache.
+            directory = os.path.dirname(os.path.abspath(self.persist_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(persisted, f)
+            os.replace(tmp_path, self.persist_path)
+            self._saved_changes = changes
+
+
+class DDOCache(_PersistedCache):
+    """
+    LRU cache of resolved DDOs with a time-to-live.
+
+    Misses are resolved through the given resolver, e.g. `ocean.assets.resolve`.
+    When a `persist_path` is given, the cache is loaded from it on creation and
+    written back after every change, so restarts start warm.
+    """
+
+    def __init__(
+        self,
+        resolver: Callable[[str], Any],
+        max_size: int = 256,
+        ttl: float = 300.0,
+        persist_path: Optional[str] = None,
+        to_dict: Callable[[Any], dict] = lambda ddo: ddo.as_dictionary(),
+        from_dict: Optional[Callable[[dict], Any]] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        param resolver: returns the DDO of a DID, or None if it is unknown.
+        param max_size: the maximum number of cached DDOs.
+        param ttl: seconds after which a cached DDO is resolved again.
+        param persist_path: JSON file to persist the cache to, None to keep it in memory.
+        param to_dict: serializes a DDO for persistence.
+        param from_dict: deserializes a persisted DDO, defaults to `DDO.from_dict`.
+        """
+        self.resolver = resolver
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.to_dict = to_dict
+        self.from_dict = from_dict
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        if persist_path and os.path.exists(persist_path):
+            self._load()
+
+    def get(self, did: str) -> Any:
+        """
+        Returns the DDO of the DID, resolving it on a miss.
+
+        param did: the DID of the asset.
+        """
+        with self._lock:
+            entry = self._entries.get(did)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(did)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        ddo = self.resolver(did)
+        if ddo is not None:
+            self.put(did, ddo)
+
+        return ddo
+
+    def put(self, did: str, ddo: Any) -> None:
+        """
+        Stores the DDO of the DID.
+
+        param did: the DID of the asset.
+        param ddo: the DDO.
+        """
+        with self._lock:
+            self._entries[did] = (time.time(), ddo)
+            self._entries.move_to_end(did)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._changed()
+        self._save()
+
+    def invalidate(self, did: str) -> None:
+        """
+        Drops the DDO of the DID, e.g. after the asset got updated.
+
+        param did: the DID of the asset.
+        """
+        with self._lock:
+            if self._entries.pop(did, None) is not None:
+                self._changed()
+        self._save()
+
+    def clear(self) -> None:
+        """Drops every cached DDO."""
+        with self._lock:
+            self._entries.clear()
+            self._changed()
+        self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters and the size of the cache."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, did: str) -> bool:
+        return did in self._entries
+
+    def _load(self) -> None:
+        from_dict = self.from_dict
+        if from_dict is None:
+            from ocean_lib.assets.ddo import DDO
+
+            from_dict = DDO.from_dict
+
+        with open(self.persist_path, "r") as f:
+            persisted = json.load(f)
+
+        now = time.time()
+        for did, entry in persisted.items():
+            if now - entry["stored_at"] < self.ttl:
+                self._entries[did] = (entry["stored_at"], from_dict(entry["ddo"]))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _snapshot(self) -> Any:
+        return list(self._entries.items())
+
+    def _to_json(self, snapshot: Any) -> Any:
+        # DDOs are serialized outside of the lock, they aren't modified once cached.
+        return {
+            did: {"stored_at": stored_at, "ddo": self.to_dict(ddo)}
+            for did, (stored_at, ddo) in snapshot
+        }
+
+
+class OrderCache(_PersistedCache):
+    """
+    Cache of paid access orders, keyed by (DID, service id, consumer address).
+
+    An order stays usable for the timeout of its service, 0 meaning forever. Orders
+    are dropped `safety_margin` seconds before they expire, so that a download
+    doesn't start with an order about to expire.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        safety_margin: float = 60.0,
+        persist_path: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        param max_size: the maximum number of cached orders.
+        param safety_margin: seconds before expiry from which an order isn't reused.
+        param persist_path: JSON file to persist the cache to, None to keep it in memory.
+        """
+        self.max_size = max_size
+        self.safety_margin = safety_margin
+        self.persist_path = persist_path
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[str, Optional[float]]]" = (
+            OrderedDict()
+        )
+
+        if persist_path and os.path.exists(persist_path):
+            self._load()
+
+    def get(self, did: str, service_id: str, consumer: str) -> Optional[str]:
+        """
+        Returns the tx id of a still valid order, None if there is none.
+
+        param did: the DID of the asset.
+        param service_id: the id of the access service.
+        param consumer: the address of the consumer.
+        """
+        key = (did, service_id, consumer)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                order_tx_id, expires_at = entry
+                if expires_at is None or time.time() < expires_at - self.safety_margin:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return order_tx_id
+            self.misses += 1
+
+        if entry is not None:
+            self.invalidate(did, service_id, consumer)
+
+        return None
+
+    def put(
+        self,
+        did: str,
+        service_id: str,
+        consumer: str,
+        order_tx_id: str,
+        timeout: int,
+        ordered_at: Optional[float] = None,
+    ) -> None:
+        """
+        Stores a paid order.
+
+        param did: the DID of the asset.
+        param service_id: the id of the access service.
+        param consumer: the address of the consumer.
+        param order_tx_id: the tx id of the order.
+        param timeout: the timeout of the service in seconds, 0 if orders never expire.
+        param ordered_at: when the order was paid, now if None.
+        """
+        ordered_at = time.time() if ordered_at is None else ordered_at
+        expires_at = ordered_at + timeout if timeout else None
+        key = (did, service_id, consumer)
+        with self._lock:
+            self._entries[key] = (order_tx_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._changed()
+        self._save()
+
+    def invalidate(self, did: str, service_id: str, consumer: str) -> None:
+        """
+        Drops an order, e.g. after the provider refused it.
+
+        param did: the DID of the asset.
+        param service_id: the id of the access service.
+        param consumer: the address of the consumer.
+        """
+        with self._lock:
+            if self._entries.pop((did, service_id, consumer), None) is not None:
+                self._changed()
+        self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters and the size of the cache."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        with open(self.persist_path, "r") as f:
+            persisted = json.load(f)
+
+        now = time.time()
+        for entry in persisted:
+            if entry["expires_at"] is None or now < entry["expires_at"]:
+                key = (entry["did"], entry["service_id"], entry["consumer"])
+                self._entries[key] = (entry["order_tx_id"], entry["expires_at"])
+
+    def _snapshot(self) -> Any:
+        return [
+            {
+                "did": did,
+                "service_id": service_id,
+                "consumer": consumer,
+                "order_tx_id": order_tx_id,
+                "expires_at": expires_at,
+            }
+            for (did, service_id, consumer), (
+                order_tx_id,
+                expires_at,
+            ) in self._entries.items()
+        ]
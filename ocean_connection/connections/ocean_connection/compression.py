@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Optional compression of the payloads of result messages."""
+import fnmatch
+import mimetypes
+import os
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from ocean_connection.connections.ocean_connection.lazy import import_module
+from ocean_connection.connections.ocean_connection.streaming import DEFAULT_CHUNK_SIZE
+
+
+DEFAULT_MIN_SIZE = 64 * 1024
+
+# Codecs tried by `auto`, the first one whose library is installed is used:
+# `zstandard` and `lz4` are optional dependencies, zlib is in the standard library.
+CODEC_PREFERENCE = ("zstd", "lz4", "zlib")
+
+# Formats that are compressed already, compressing them again only costs CPU.
+INCOMPRESSIBLE_CONTENT_TYPES = (
+    "application/gzip",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/zstd",
+    "application/x-lz4",
+    "application/zip",
+    "application/x-7z-compressed",
+    "application/vnd.rar",
+    "application/vnd.apache.parquet",
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    "audio/*",
+    "video/*",
+)
+
+_MAGIC_NUMBERS = (
+    (b"\x1f\x8b", "application/gzip"),
+    (b"BZh", "application/x-bzip2"),
+    (b"\xfd7zXZ\x00", "application/x-xz"),
+    (b"\x28\xb5\x2f\xfd", "application/zstd"),
+    (b"\x04\x22\x4d\x18", "application/x-lz4"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (b"Rar!\x1a\x07", "application/vnd.rar"),
+    (b"PAR1", "application/vnd.apache.parquet"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+_MAGIC_LENGTH = max(len(magic) for magic, _ in _MAGIC_NUMBERS)
+
+
+def guess_content_type(data: bytes = b"", path: Optional[str] = None) -> Optional[str]:
+    """
+    Guesses the content type of a payload from its first bytes, then from its file name.
+
+    param data: the payload, or at least its first bytes.
+    param path: the file the payload comes from, if any.
+    return: the content type, None if unknown.
+    """
+    for magic, content_type in _MAGIC_NUMBERS:
+        if data[: len(magic)] == magic:
+            return content_type
+
+    if path is not None:
+        return mimetypes.guess_type(path)[0]
+
+    return None
+
+
+class Codec:
+    """
+    A compression format and the library implementing it.
+
+    The compressors have the `compress(data)` and `flush()` methods of
+    `zlib.compressobj`, the decompressors its `decompress(data)` method.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compressor: Callable[[Optional[int]], Any],
+        decompressor: Callable[[], Any],
+    ) -> None:
+        """
+        Initialize the codec.
+
+        param name: the name of the format, sent as the `encoding` of the payloads.
+        param compressor: creates a compressor for a compression level, the default one if None.
+        param decompressor: creates a decompressor.
+        """
+        self.name = name
+        self._compressor = compressor
+        self._decompressor = decompressor
+
+    def compressor(self, level: Optional[int] = None) -> Any:
+        """Returns a new streaming compressor."""
+        return self._compressor(level)
+
+    def decompressor(self) -> Any:
+        """Returns a new streaming decompressor."""
+        return self._decompressor()
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        """Compresses a whole payload."""
+        return b"".join(compress_chunks(self, (data,), level))
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompresses a whole payload."""
+        return b"".join(decompress_chunks(self, (data,)))
+
+
+class _Lz4Compressor:
+    """Gives `lz4.frame.LZ4FrameCompressor` the interface of `zlib.compressobj`."""
+
+    def __init__(self, frame: Any, level: Optional[int]) -> None:
+        self._compressor = frame.LZ4FrameCompressor(compression_level=level or 0)
+        self._header = self._compressor.begin()
+
+    def compress(self, data: bytes) -> bytes:
+        header, self._header = self._header, b""
+        return header + self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        header, self._header = self._header, b""
+        return header + self._compressor.flush()
+
+
+def _zlib() -> Codec:
+    return Codec(
+        "zlib",
+        lambda level: zlib.compressobj(-1 if level is None else level),
+        zlib.decompressobj,
+    )
+
+
+def _zstd() -> Codec:
+    zstandard = import_module("zstandard")
+    return Codec(
+        "zstd",
+        lambda level: zstandard.ZstdCompressor(
+            level=3 if level is None else level
+        ).compressobj(),
+        lambda: zstandard.ZstdDecompressor().decompressobj(),
+    )
+
+
+def _lz4() -> Codec:
+    frame = import_module("lz4.frame")
+    return Codec(
+        "lz4",
+        lambda level: _Lz4Compressor(frame, level),
+        frame.LZ4FrameDecompressor,
+    )
+
+
+_CODECS = {"zstd": _zstd, "lz4": _lz4, "zlib": _zlib}
+_loaded: Dict[str, Codec] = {}
+
+
+def get_codec(name: str = "auto") -> Codec:
+    """
+    Returns a codec by name.
+
+    param name: `zstd`, `lz4`, `zlib` or `auto` for the first of them that is installed.
+    raises ImportError: if the library of the codec isn't installed.
+    """
+    if name == "auto":
+        for candidate in CODEC_PREFERENCE:
+            try:
+                return get_codec(candidate)
+            except ImportError:
+                continue
+
+    if name not in _CODECS:
+        raise ValueError(
+            f"Unknown codec '{name}'. Use one of {', '.join(CODEC_PREFERENCE)} or 'auto'."
+        )
+    if name not in _loaded:
+        _loaded[name] = _CODECS[name]()
+
+    return _loaded[name]
+
+
+def available_codecs() -> Iterator[str]:
+    """Yields the names of the codecs whose library is installed, in order of preference."""
+    for name in CODEC_PREFERENCE:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        yield name
+
+
+def compress_chunks(
+    codec: Codec, chunks: Iterable[bytes], level: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Compresses a payload chunk by chunk into a single compressed stream.
+
+    param codec: the codec to compress with.
+    param chunks: the chunks of the payload.
+    param level: the compression level, the default one of the codec if None.
+    """
+    compressor = codec.compressor(level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    compressed = compressor.flush()
+    if compressed:
+        yield compressed
+
+
+def decompress_chunks(codec: Codec, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Decompresses a stream produced by `compress_chunks`, chunk by chunk.
+
+    param codec: the codec the stream was compressed with.
+    param chunks: the chunks of the compressed stream.
+    raises ValueError: if the stream is truncated.
+    """
+    decompressor = codec.decompressor()
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    flush = getattr(decompressor, "flush", None)
+    if flush is not None:
+        data = flush()
+        if data:
+            yield data
+    if not getattr(decompressor, "eof", True):
+        raise ValueError(f"Truncated {codec.name} stream.")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Returns the original payload of a result message.
+
+    param data: the payload, as received.
+    param encoding: the `encoding` sent along the payload, None if it wasn't compressed.
+    """
+    if encoding is None:
+        return data
+
+    return get_codec(encoding).decompress(data)
+
+
+class CompressionPolicy:
+    """
+    Decides which result payloads are compressed, and compresses them.
+
+    Payloads smaller than `min_size`, of a content type that is compressed
+    already, or that don't shrink below `max_ratio` of their size are sent as
+    they are.
+    """
+
+    def __init__(
+        self,
+        codec: Optional[str] = "auto",
+        min_size: int = DEFAULT_MIN_SIZE,
+        level: Optional[int] = None,
+        skip_content_types: Iterable[str] = INCOMPRESSIBLE_CONTENT_TYPES,
+        max_ratio: float = 0.9,
+    ) -> None:
+        """
+        Initialize the policy.
+
+        param codec: `zstd`, `lz4`, `zlib`, `auto` for the best installed one, None to not compress.
+        param min_size: the size from which payloads are compressed, in bytes.
+        param level: the compression level, the default one of the codec if None.
+        param skip_content_types: the content types not to compress, `type/*` patterns allowed.
+        param max_ratio: the compressed size, relative to the original, above which
+            the original is sent.
+        """
+        self.codec = None if codec in (None, "none") else get_codec(codec)
+        self.min_size = min_size
+        self.level = level
+        self.skip_content_types = tuple(skip_content_types)
+        self.max_ratio = max_ratio
+
+    @classmethod
+    def from_config(cls, config: Any) -> "CompressionPolicy":
+        """
+        Creates a policy from the `compression` option of the connection.
+
+        param config: None or False to not compress, True for the defaults,
+            a codec name or a dict of the kwargs of the policy.
+        """
+        if not config:
+            return cls(codec=None)
+        if config is True:
+            return cls()
+        if isinstance(config, str):
+            return cls(codec=config)
+
+        return cls(**config)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether payloads are compressed at all."""
+        return self.codec is not None
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """The `encoding` of the compressed payloads."""
+        return None if self.codec is None else self.codec.name
+
+    def should_compress(self, size: int, content_type: Optional[str] = None) -> bool:
+        """
+        Whether a payload is worth compressing.
+
+        param size: the size of the payload in bytes.
+        param content_type: the content type of the payload, None if unknown.
+        """
+        if self.codec is None or size < self.min_size:
+            return False
+
+        return content_type is None or not any(
+            fnmatch.fnmatchcase(content_type, pattern)
+            for pattern in self.skip_content_types
+        )
+
+    def compress(self, data: bytes, path: Optional[str] = None) -> Optional[bytes]:
+        """
+        Compresses a payload held in memory.
+
+        param data: the payload.
+        param path: the file the payload comes from, to guess its content type.
+        return: the compressed payload, None if it should be sent as it is.
+        """
+        if not self.should_compress(len(data), guess_content_type(data, path)):
+            return None
+
+        return self.shrink(data)
+
+    def shrink(self, data: bytes) -> Optional[bytes]:
+        """
+        Compresses a payload already found worth compressing, e.g. a chunk of a larger one.
+
+        return: the compressed payload, None if it doesn't shrink enough or the
+            compression is disabled.
+        """
+        if self.codec is None:
+            return None
+
+        compressed = self.codec.compress(data, self.level)
+        return compressed if len(compressed) <= len(data) * self.max_ratio else None
+
+    def compress_file(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Optional[bytes]:
+        """
+        Compresses a file, reading it in chunks so that it is never held in memory.
+
+        param path: the path of the file.
+        param chunk_size: the size of the chunks read, in bytes.
+        return: the compressed file, None if it should be sent as it is.
+        """
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(_MAGIC_LENGTH)
+            if not self.should_compress(size, guess_content_type(head, path)):
+                return None
+
+            f.seek(0)
+            chunks = iter(lambda: f.read(chunk_size), b"")
+            compressed = b"".join(compress_chunks(self.codec, chunks, self.level))
+
+        return compressed if len(compressed) <= size * self.max_ratio else None
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Tracking of broadcast transactions until they have their confirmations."""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+_logger = logging.getLogger(__name__)
+
+
+class TransactionFailed(Exception):
+    """A watched transaction reverted, or wasn't mined in time."""
+
+
+class PendingTransaction:
+    """
+    A broadcast transaction, with futures resolved with its receipt when it is
+    mined and when it has its confirmations.
+    """
+
+    def __init__(
+        self,
+        txid: str,
+        sender: Optional[str],
+        nonce: Optional[int],
+        required_confs: int,
+        now: float,
+    ) -> None:
+        self.txid = txid
+        self.sender = sender
+        self.nonce = nonce
+        self.required_confs = required_confs
+        self.broadcast_at = now
+        self.receipt: Any = None
+        self.mined: Future = Future()
+        self.confirmed: Future = Future()
+
+    @property
+    def block_number(self) -> Optional[int]:
+        """The block the transaction was mined in, None while it is pending."""
+        return None if self.receipt is None else self.receipt["blockNumber"]
+
+    def wait_mined(self, timeout: Optional[float] = None) -> Any:
+        """
+        Waits for the transaction to be mined.
+
+        param timeout: seconds to wait, forever if None.
+        return: the receipt of the transaction.
+        raises TransactionFailed: if the transaction reverted or was dropped.
+        """
+        return self.mined.result(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """
+        Waits for the transaction to have its confirmations.
+
+        param timeout: seconds to wait, forever if None.
+        return: the receipt of the transaction.
+        raises TransactionFailed: if the transaction reverted or was dropped.
+        """
+        return self.confirmed.result(timeout)
+
+    def __repr__(self) -> str:
+        return f"<PendingTransaction {self.txid}>"
+
+
+class ConfirmationWatcher:
+    """
+    Watches all the broadcast transactions from a single thread, once started.
+
+    The thread polls the block number, and only when a new block arrives reads
+    the receipts of the transactions that may have been mined in it: senders
+    whose mined transaction count moved past their nonce, or transactions of
+    unknown nonce. A receipt is read again when the transaction reaches its
+    confirmations, so that a transaction reorganised into another block waits
+    for its confirmations again.
+    """
+
+    def __init__(
+        self,
+        web3: Any,
+        poll_interval: float = 1.0,
+        timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the watcher.
+
+        param web3: the web3 instance of the chain.
+        param poll_interval: seconds between two reads of the block number.
+        param timeout: seconds after which a transaction not mined is given up.
+        param clock: the clock measuring the timeout.
+        """
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, PendingTransaction] = {}
+        self._head: Optional[int] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(
+        self,
+        txid: str,
+        sender: Optional[str] = None,
+        nonce: Optional[int] = None,
+        required_confs: int = 1,
+    ) -> PendingTransaction:
+        """
+        Starts watching a broadcast transaction.
+
+        param txid: the hash of the transaction.
+        param sender: the address that sent the transaction, if known.
+        param nonce: the nonce of the transaction, if known.
+        param required_confs: the number of blocks, including the one the
+        transaction is mined in, after which it is confirmed.
+        return: the pending transaction.
+        """
+        pending = PendingTransaction(
+            txid, sender, nonce, max(1, required_confs), self.clock()
+        )
+        with self._lock:
+            self._pending[txid] = pending
+        self._wakeup.set()
+
+        return pending
+
+    @property
+    def outstanding(self) -> List[str]:
+        """The hashes of the transactions not confirmed yet."""
+        with self._lock:
+            return list(self._pending)
+
+    def poll_once(self) -> None:
+        """Reads the block number and settles the transactions a new block settles."""
+        self.polls += 1
+        head = self.web3.eth.block_number
+        with self._lock:
+            new_block = head != self._head
+            self._head = head
+            pending = list(self._pending.values())
+
+        unmined = [tx for tx in pending if tx.receipt is None]
+        if new_block and unmined:
+            self._read_receipts(self._maybe_mined(unmined))
+
+        now = self.clock()
+        for tx in pending:
+            if tx.receipt is None:
+                if now - tx.broadcast_at > self.timeout:
+                    self._fail(
+                        tx,
+                        f"Transaction {tx.txid} timed out, not mined after {self.timeout}s.",
+                    )
+            elif head - tx.block_number + 1 >= tx.required_confs:
+                self._confirm(tx)
+
+    def start(self) -> None:
+        """Starts polling from a background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="ocean-confirmations", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops watching, failing the transactions still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            pending = list(self._pending.values())
+        for tx in pending:
+            self._fail(tx, f"Stopped watching transaction {tx.txid}.")
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            with self._lock:
+                idle = not self._pending
+            if idle:
+                # Sleep until a transaction is watched.
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            try:
+                self.poll_once()
+            except Exception as e:  # pylint: disable=broad-except
+                _logger.warning(f"Failed to poll the transactions: {e}")
+            # Wake up early when a transaction is watched.
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _maybe_mined(
+        self, unmined: List[PendingTransaction]
+    ) -> List[PendingTransaction]:
+        """Filters out the transactions whose nonce the chain hasn't used yet."""
+        counts: Dict[str, int] = {}
+        candidates = []
+        for tx in unmined:
+            if tx.sender is None or tx.nonce is None:
+                candidates.append(tx)
+                continue
+            if tx.sender not in counts:
+                counts[tx.sender] = self.web3.eth.get_transaction_count(
+                    tx.sender, "latest"
+                )
+            if tx.nonce < counts[tx.sender]:
+                candidates.append(tx)
+
+        return candidates
+
+    def _read_receipts(self, candidates: Iterable[PendingTransaction]) -> None:
+        for tx in candidates:
+            receipt = self._receipt(tx.txid)
+            if receipt is None:
+                continue
+            if not receipt["status"]:
+                self._fail(tx, f"Transaction {tx.txid} reverted.")
+                continue
+
+            tx.receipt = receipt
+            if not tx.mined.done():
+                tx.mined.set_result(receipt)
+
+    def _confirm(self, tx: PendingTransaction) -> None:
+        receipt = self._receipt(tx.txid)
+        if receipt is None or receipt["blockHash"] != tx.receipt["blockHash"]:
+            # Reorganised out of its block: wait for it to be mined again.
+            _logger.info(f"Transaction {tx.txid} left block {tx.block_number}.")
+            tx.receipt = receipt
+            return
+
+        with self._lock:
+            self._pending.pop(tx.txid, None)
+        tx.confirmed.set_result(receipt)
+
+    def _fail(self, tx: PendingTransaction, reason: str) -> None:
+        with self._lock:
+            self._pending.pop(tx.txid, None)
+        error = TransactionFailed(reason)
+        for future in (tx.mined, tx.confirmed):
+            if not future.done():
+                future.set_exception(error)
+
+    def _receipt(self, txid: str) -> Any:
+        try:
+            return self.web3.eth.get_transaction_receipt(txid)
+        except Exception:  # pylint: disable=broad-except
+            # Not mined yet, or a failed request: the next block tries again.
+            return None
+
+
+def wait_mined(
+    transactions: Iterable[Optional[PendingTransaction]],
+    timeout: Optional[float] = None,
+) -> List[Any]:
+    """
+    Waits for transactions to be mined, e.g. before sending a transaction whose
+    gas estimation depends on them. None entries are skipped.
+
+    param transactions: the pending transactions.
+    param timeout: seconds to wait for each transaction, forever if None.
+    return: the receipts of the transactions.
+    raises TransactionFailed: if one of the transactions failed.
+    """
+    return [tx.wait_mined(timeout) for tx in transactions if tx is not None]
+
+
+def wait_confirmed(
+    transactions: Iterable[Optional[PendingTransaction]],
+    timeout: Optional[float] = None,
+) -> List[Any]:
+    """
+    Waits for transactions to have their confirmations. None entries are skipped.
+
+    param transactions: the pending transactions.
+    param timeout: seconds to wait for each transaction, forever if None.
+    return: the receipts of the transactions.
+    raises TransactionFailed: if one of the transactions failed.
+    """
+    return [tx.wait(timeout) for tx in transactions if tx is not None]
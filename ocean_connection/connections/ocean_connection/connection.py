@@ -17,33 +17,116 @@
 #
 # ------------------------------------------------------------------------------
 """Scaffold connection and channel."""
-from typing import Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
 
 from aea.configurations.base import PublicId
 from aea.connections.base import BaseSyncConnection, Connection
 from aea.mail.base import Envelope
 
 import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any
-from brownie.network import accounts, chain, priority_fee, web3
 
 
 from aea.configurations.base import PublicId
 from aea.connections.base import BaseSyncConnection
+from ocean_connection.connections.ocean_connection.allowances import (
+    AllowanceManager,
+)
+from ocean_connection.connections.ocean_connection.actions import (
+    ACTIONS,
+    UNKNOWN_ACTION,
+    CreateDispenserRequest,
+    CreateFixedRateExchangeRequest,
+    DatasetAlgorithmRequest,
+    DeployAlgorithmRequest,
+    DeployBatchRequest,
+    DeployDataRequest,
+    DownloadAssetRequest,
+    DownloadRequest,
+    InvalidRequest,
+    action,
+)
+from ocean_connection.connections.ocean_connection.backends import create_backend
+from ocean_connection.connections.ocean_connection.cache import (
+    DDOCache,
+    OrderCache,
+)
+from ocean_connection.connections.ocean_connection.compression import (
+    CompressionPolicy,
+    guess_content_type,
+)
+from ocean_connection.connections.ocean_connection.confirmations import (
+    ConfirmationWatcher,
+    PendingTransaction,
+    wait_confirmed,
+    wait_mined,
+)
+from ocean_connection.connections.ocean_connection.download_cache import (
+    CachedFile,
+    DownloadCache,
+)
+from ocean_connection.connections.ocean_connection.environments import (
+    ComputeEnvironmentRegistry,
+)
+from ocean_connection.connections.ocean_connection.executor import ActionExecutor
+from ocean_connection.connections.ocean_connection.gas import (
+    POLYGON_GAS_STATION_URL,
+    GasOracle,
+)
+from ocean_connection.connections.ocean_connection.indexing import IndexingWatcher
+from ocean_connection.connections.ocean_connection.journal import ActionJournal
+from ocean_connection.connections.ocean_connection.lazy import (
+    import_times,
+    lazy_import,
+)
+from ocean_connection.connections.ocean_connection.metrics import (
+    ConnectionMetrics,
+    MetricsServer,
+    PeriodicTask,
+)
+from ocean_connection.connections.ocean_connection.jobs import (
+    ComputeJobTracker,
+    TrackedJob,
+)
+from ocean_connection.connections.ocean_connection.multicall import (
+    BatchReader,
+    contract_call,
+)
+from ocean_connection.connections.ocean_connection.nonce import NonceManager
+from ocean_connection.connections.ocean_connection.retry import (
+    NONCE,
+    PROVIDER,
+    REVERT,
+    Retrier,
+    RetryBudget,
+    RetryPolicy,
+)
+from ocean_connection.connections.ocean_connection.startup import StartupProfile
+from ocean_connection.connections.ocean_connection.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    ChunkedFileReader,
+    resolve_downloaded_file,
+)
 from ocean_connection.connections.ocean_connection.utils import (
     convert_to_bytes_format,
+    encode_message,
     get_tx_dict,
-    validate_args,
+    tx_id_to_str,
 )
-from ocean_lib.example_config import get_config_dict
-from ocean_lib.models.compute_input import ComputeInput
-from ocean_lib.models.fixed_rate_exchange import OneExchange
-from ocean_lib.ocean.ocean import Ocean
-from ocean_lib.ocean.util import to_wei
-from ocean_lib.web3_internal.constants import ZERO_ADDRESS
-from ocean_lib.web3_internal.utils import connect_to_network
-from web3.main import Web3
+from ocean_connection.connections.ocean_connection.wallets import (
+    WalletPool,
+    asset_key,
+)
+
+# web3 takes seconds to import, so it is only imported when first used.
+Web3 = lazy_import("web3.main", "Web3")
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 
 
 """
@@ -62,6 +145,27 @@ class OceanConnection(BaseSyncConnection):
 
     MAX_WORKER_THREADS = 5
 
+    # Concurrency limits of the slow actions, so that a burst of them leaves
+    # workers to the other ones. Overridden by the `action_limits` option.
+    ACTION_LIMITS = {"C2D_JOB": 2, "DOWNLOAD_JOB": 2, "DOWNLOAD_ASSET": 2}
+
+    # Whether the deployments wait for Aquarius to index the asset before returning,
+    # see `_wait_for_indexing`.
+    WAIT_FOR_INDEXING = True
+
+    # Attempts of the actions that differ from the default of 2.
+    RETRY_ATTEMPTS = {"C2D_JOB": 4}
+
+    # Actions that skip their journaled steps when resumed after a restart.
+    RESUMABLE_ACTIONS = ("C2D_JOB", "DOWNLOAD_JOB", "DOWNLOAD_ASSET")
+
+    # Actions only the owner of the asset may send, with the kwarg naming the asset.
+    OWNER_PINNED_ACTIONS = {
+        "PERMISSION_DATASET": "data_did",
+        "CREATE_DISPENSER": "datatoken_address",
+        "CREATE_FIXED_RATE_EXCHANGE": "datatoken_address",
+    }
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:  # pragma: no cover
         """
         Initialize the connection.
@@ -82,71 +186,349 @@ class OceanConnection(BaseSyncConnection):
         """
         super().__init__(*args, **kwargs)
         self.logger.setLevel(10)
+        self.executor: Optional[ActionExecutor] = None
+        self._journal_context = threading.local()
+        self.metrics = ConnectionMetrics()
+        self.metrics_server: Optional[MetricsServer] = None
+        self.metrics_reporter: Optional[PeriodicTask] = None
+        self.nonce_checker: Optional[PeriodicTask] = None
+        self.wallets: Optional[WalletPool] = None
+
+    @property
+    def wallet(self) -> Any:
+        """The wallet of the running action, the default wallet outside of the actions."""
+        wallet = getattr(self._journal_context, "wallet", None)
+        return self.wallets.default if wallet is None else wallet
 
     def main(self) -> None:
         """
         Run synchronous code in background.
 
-        SyncConnection `main()` usage:
-        The idea of the `main` method in the sync connection
-        is to provide for a way to actively generate messages by the connection via the `put_envelope` method.
-
-        A simple example is the generation of a message every second:
-        ```
-        while self.is_connected:
-            envelope = make_envelope_for_current_time()
-            self.put_envelope(envelope)
-            time.sleep(1)
-        ```
-        In this case, the connection will generate a message every second
-        regardless of envelopes sent to the connection by the agent.
-        For instance, this way one can implement periodically polling some internet resources
-        and generate envelopes for the agent if some updates are available.
-        Another example is the case where there is some framework that runs blocking
-        code and provides a callback on some internal event.
-        This blocking code can be executed in the main function and new envelops
-        can be created in the event callback.
-        """
-
-    def on_send(self, **kwargs) -> None:
+        Starts tracking the compute jobs started by the connection: their status
+        is polled from a thread of the tracker, rather than one of the agent's
+        pool, and their results are delivered to the agent via `put_envelope`
+        once they finish.
+        """
+        self.job_tracker.start()
+
+    def on_send(self, **kwargs) -> Union[Optional[dict], Future]:
         """
         Send a message.
 
+        When `concurrent_actions` is enabled in the configuration, the action is
+        scheduled on the worker pool and a future is returned instead of the result.
+        The result is also delivered to the agent through `put_envelope`.
+
         param kwargs: the kwargs to use.
+        return: the result message of the action, or a future of it.
         """
-        if "type" not in kwargs or kwargs["type"] not in [
-            "DEPLOY_C2D",
-            "DEPLOY_ALGORITHM",
-            "PERMISSION_DATASET",
-            "C2D_JOB",
-            "DEPLOY_DATA_DOWNLOAD",
-            "CREATE_DISPENSER",
-            "CREATE_FIXED_RATE_EXCHANGE",
-            "DOWNLOAD_JOB",
-        ]:
-            raise Exception(
-                "Message type is not correctly provided. Please add the message type according to your action."
-            )
+        if ACTIONS.get(kwargs.get("type")) is None:
+            raise InvalidRequest(UNKNOWN_ACTION)
         message_type = kwargs["type"]
         self.logger.debug(f"Received {message_type} in connection")
 
-        if message_type == "DEPLOY_C2D":
-            self._deploy_data_for_C2D(**kwargs)
-        if message_type == "DEPLOY_ALGORITHM":
-            self._deploy_algorithm(**kwargs)
-        if message_type == "PERMISSION_DATASET":
-            self._permission_dataset(**kwargs)
-        if message_type == "C2D_JOB":
-            self._create_C2D_job(**kwargs)
-        if message_type == "DEPLOY_DATA_DOWNLOAD":
-            self._deploy_data_to_download(**kwargs)
-        if message_type == "CREATE_DISPENSER":
-            self._create_dispenser(**kwargs)
-        if message_type == "CREATE_FIXED_RATE_EXCHANGE":
-            self._create_fixed_rate(**kwargs)
-        if message_type == "DOWNLOAD_JOB":
-            self._purchase_datatoken(**kwargs)
+        if self.executor is None:
+            return self._handle(**kwargs)
+
+        future = self.executor.submit(message_type, self._handle, **kwargs)
+        future.add_done_callback(
+            lambda done: self._on_action_done(done, message_type, kwargs)
+        )
+        return future
+
+    def _handle(self, **kwargs):
+        """
+        Runs the handler of the action, recording it in the journal.
+
+        param kwargs: the message kwargs, including its `type`.
+        """
+        action_id = self.journal.begin(kwargs["type"], kwargs)
+        return self._run_journaled(action_id, kwargs)
+
+    def _run_journaled(self, action_id: str, request: dict):
+        """
+        Runs the handler of a journaled action.
+
+        Steps the action already completed, e.g. before a restart, are skipped.
+
+        param action_id: the id of the action in the journal.
+        param request: the message kwargs, including its `type`.
+        """
+        start = time.perf_counter()
+        msg, wallet, transactions = self._run_steps(action_id, request, start)
+        try:
+            # The transactions of the action were only waited for until mined.
+            wait_confirmed(transactions)
+        except Exception as e:
+            self._fail_action(action_id, request, start, e)
+            raise
+
+        return self._complete_action(action_id, request, start, msg, wallet)
+
+    def _run_steps(
+        self, action_id: str, request: dict, start: float
+    ) -> Tuple[Any, Any, List[PendingTransaction]]:
+        """
+        Runs the handler of a journaled action, without waiting for confirmations.
+
+        param action_id: the id of the action in the journal.
+        param request: the message kwargs, including its `type`.
+        param start: when the action started, from `time.perf_counter`.
+        return: the result message, the wallet that ran the action and its transactions.
+        """
+        self._journal_context.action_id = action_id
+        self._journal_context.action_type = request["type"]
+        self._journal_context.transactions = []
+        try:
+            # A resumed action keeps the wallet that paid for its journaled steps.
+            wallet = self.wallets.get(
+                self._journaled("wallet", lambda: self._select_wallet(request).address)
+            )
+            self._journal_context.wallet = wallet
+            with self.wallets.using(wallet):
+                msg = self._dispatch(**request)
+            return msg, wallet, self._action_transactions()
+        except Exception as e:
+            self._fail_action(action_id, request, start, e)
+            raise
+        finally:
+            self._journal_context.action_id = None
+            self._journal_context.action_type = None
+            self._journal_context.wallet = None
+            self._journal_context.transactions = []
+
+    def _fail_action(
+        self, action_id: str, request: dict, start: float, error: Exception
+    ) -> None:
+        """Records a failed action in the metrics and the journal."""
+        self.metrics.observe_action(
+            request["type"], time.perf_counter() - start, succeeded=False
+        )
+        self.journal.fail(action_id, str(error))
+
+    def _complete_action(
+        self, action_id: str, request: dict, start: float, msg: Any, wallet: Any
+    ) -> Any:
+        """Records a completed action, once its transactions are confirmed."""
+        self.metrics.observe_action(
+            request["type"], time.perf_counter() - start, succeeded=True
+        )
+        self._record_ownership(msg, wallet)
+        if self.wallets.min_balance:
+            self.wallets.refresh_balance(wallet)
+        self.journal.complete(action_id)
+        return msg
+
+    def _select_wallet(self, request: dict) -> Any:
+        """
+        Selects the wallet running an action.
+
+        A `wallet` address in the request selects it explicitly. Actions only the
+        owner of the asset may send are pinned to the owning wallet, the others
+        follow the policy of the wallet pool.
+
+        param request: the message kwargs, including its `type`.
+        """
+        if request.get("wallet"):
+            return self.wallets.get(request["wallet"])
+
+        pinned_kwarg = self.OWNER_PINNED_ACTIONS.get(request["type"])
+        if pinned_kwarg is not None and request.get(pinned_kwarg):
+            return self.wallets.get(self._owner_of(request[pinned_kwarg]))
+
+        return self.wallets.select(asset_key(request))
+
+    def _owner_of(self, asset: str) -> str:
+        """
+        Returns the address of the wallet owning an asset.
+
+        Assets published by the connection are known, others are looked up:
+        DIDs by the owner of their data NFT, datatokens by their minter.
+
+        param asset: the DID or the datatoken address of the asset.
+        raises ValueError: if none of the wallets owns the asset.
+        """
+        owner = self.wallets.owner_of(asset)
+        if owner is None and len(self.wallets) == 1:
+            owner = self.wallets.default.address
+        elif owner is None and asset.startswith("did:"):
+            ddo = self.ddo_cache.get(asset)
+            owner = None if ddo is None else (ddo.nft or {}).get("owner")
+        elif owner is None:
+            datatoken = self.ocean.get_datatoken(asset)
+            owner = next(
+                (
+                    wallet.address
+                    for wallet in self.wallets
+                    if datatoken.getPermissions(wallet.address)[0]
+                ),
+                None,
+            )
+
+        if owner is None or owner not in {wallet.address for wallet in self.wallets}:
+            raise ValueError(f"None of the wallets of the connection owns {asset}.")
+
+        self.wallets.assign(asset, owner)
+        return owner
+
+    def _record_ownership(self, msg: Any, wallet: Any) -> None:
+        """
+        Records the assets an action published as owned by its wallet.
+
+        param msg: the result message of the action.
+        param wallet: the wallet that ran the action.
+        """
+        if not isinstance(msg, dict):
+            return
+
+        for receipt in msg.get("receipts") or [msg]:
+            for key in ("did", "datatoken_contract_address"):
+                if receipt.get(key):
+                    self.wallets.assign(receipt[key], wallet.address)
+
+    def _journaled(
+        self,
+        step: str,
+        fn: Callable[[], Any],
+        to_record: Callable[[Any], Any] = lambda value: value,
+        from_record: Callable[[Any], Any] = lambda data: data,
+        reuse_if: Callable[[Any], bool] = lambda data: True,
+    ) -> Any:
+        """
+        Runs a step of the current action, unless the journal has it completed already.
+
+        param step: the name of the step.
+        param fn: runs the step.
+        param to_record: turns the result of the step into what is journaled.
+        param from_record: turns what was journaled back into the result of the step.
+        param reuse_if: tells whether a journaled step is still usable, e.g. unexpired.
+        return: the result of the step.
+        """
+        action_id = getattr(self._journal_context, "action_id", None)
+        data = self._journal_step(step)
+        if data is not None and reuse_if(data):
+            self.logger.info(f"Reusing the {step} step of action {action_id}.")
+            return from_record(data)
+
+        value = fn()
+        if action_id is not None:
+            # A journaled step must not refer to a transaction that could still be dropped.
+            wait_mined(self._action_transactions())
+            self.journal.record(action_id, step, to_record(value))
+
+        return value
+
+    def _journal_step(self, step: str) -> Any:
+        """
+        Returns what the journal has for a completed step of the current action.
+
+        param step: the name of the step.
+        return: the journaled data, None if the step wasn't completed.
+        """
+        action_id = getattr(self._journal_context, "action_id", None)
+        if action_id is None:
+            return None
+
+        return self.journal.step(action_id, step)
+
+    def _resume_actions(self) -> None:
+        """
+        Resumes the actions the journal has as still running, i.e. interrupted by a restart.
+
+        Their results are delivered to the agent via `put_envelope`.
+        """
+        for entry in self.journal.incomplete():
+            if entry.action_type not in self.RESUMABLE_ACTIONS:
+                self.logger.warning(
+                    f"{entry.action_type} {entry.action_id} was interrupted and can't be resumed."
+                )
+                self.journal.fail(entry.action_id, "Interrupted by a restart.")
+                continue
+
+            self.logger.info(
+                f"Resuming {entry.action_type} {entry.action_id} after step {entry.last_step}."
+            )
+            if self.executor is not None:
+                future = self.executor.submit(
+                    entry.action_type,
+                    self._run_journaled,
+                    action_id=entry.action_id,
+                    request=entry.request,
+                )
+            else:
+                future = Future()
+
+                def run(future=future, entry=entry):
+                    try:
+                        future.set_result(
+                            self._run_journaled(entry.action_id, entry.request)
+                        )
+                    except Exception as e:  # pylint: disable=broad-except
+                        future.set_exception(e)
+
+                threading.Thread(target=run, daemon=True).start()
+
+            future.add_done_callback(
+                lambda done, entry=entry: self._on_action_done(
+                    done, entry.action_type, entry.request
+                )
+            )
+
+    def _dispatch(self, **kwargs):
+        """
+        Validates the request and runs the handler of the action, see `actions.ACTIONS`.
+
+        param kwargs: the message kwargs, including its `type`.
+        """
+        spec, request = ACTIONS.parse(kwargs)
+        return spec.handler(self, request)
+
+    def _on_action_done(self, future: Future, message_type: str, request: dict):
+        """
+        Delivers the outcome of a pooled action to the agent.
+
+        param future: the finished future of the action.
+        param message_type: the type of the action.
+        param request: the kwargs the action was sent with.
+        """
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"{message_type} failed with error: {error}")
+            msg = {"type": "ERROR", "action": message_type, "error": str(error)}
+        else:
+            msg = future.result()
+
+        if msg is None:
+            return
+
+        try:
+            self.put_envelope(self._make_envelope(msg, request))
+        except Exception as e:
+            self.logger.error(f"Couldn't deliver the result of {message_type}: {e}")
+
+    def _make_envelope(self, msg: dict, request: dict) -> Envelope:
+        """
+        Wraps a result message in an envelope addressed to the requester.
+
+        param msg: the result message.
+        param request: the kwargs of the originating action.
+        """
+        # Vendored protocols are only importable from within an agent project.
+        from packages.fetchai.protocols.default.message import DefaultMessage
 
+        message = DefaultMessage(
+            performative=DefaultMessage.Performative.BYTES,
+            content=encode_message(msg),
+        )
+        # Envelopes go between two agents or between two components, never across.
+        to = request.get("sender") or self.address
+        sender = str(self.connection_id) if PublicId.is_valid_str(to) else self.address
+        return Envelope(to=to, sender=sender, message=message)
+
+    @action("DOWNLOAD_JOB", DownloadRequest)
     def _purchase_datatoken(self, **kwargs):
         """
         Buys datatokens available on the fixed rate exchange in order to consume services.
@@ -159,60 +541,64 @@ class OceanConnection(BaseSyncConnection):
         - optional: `exchange_id` if there exists a fixed rate exchange attached to the datatoken
         - optional: `max_cost_ocean` if there exists a fixed rate exchange attached to the datatoken
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
-            try:
-                datatoken_address = kwargs["datatoken_address"]
-                asset_did = kwargs["asset_did"]
-                datatoken_amt = kwargs["datatoken_amt"]
-
-                if "exchange_id" in kwargs:
-                    self.logger.info("Starting to buy DTs from fixed rate exchange...")
-                    exchange_id = kwargs["exchange_id"]
-                    max_cost_ocean = kwargs["max_cost_ocean"]
-                    self._buy_dt_from_fre(
+        try:
+            datatoken_address = kwargs["datatoken_address"]
+            asset_did = kwargs["asset_did"]
+            datatoken_amt = kwargs["datatoken_amt"]
+
+            if "exchange_id" in kwargs:
+                self.logger.info("Starting to buy DTs from fixed rate exchange...")
+                exchange_id = kwargs["exchange_id"]
+                max_cost_ocean = kwargs["max_cost_ocean"]
+                self._journaled(
+                    "bought",
+                    lambda: self._buy_dt_from_fre(
                         exchange_id=exchange_id,
                         datatoken_amt=datatoken_amt,
                         max_cost_ocean=max_cost_ocean,
-                    )
-                    msg = {
-                        "type": "DOWNLOAD_JOB",
-                        "datatoken_address": datatoken_address,
-                        "datatoken_amt": datatoken_amt,
-                        "max_cost_ocean": max_cost_ocean,
-                        "asset_did": asset_did,
-                        "exchange_id": str(exchange_id),
-                        "has_pricing_schema": True,
-                    }
-                else:
-                    self.logger.info("Request DTs from the dispenser")
-                    tx = self._dispense(
+                    ),
+                    to_record=lambda value: True,
+                )
+                msg = {
+                    "type": "DOWNLOAD_JOB",
+                    "datatoken_address": datatoken_address,
+                    "datatoken_amt": datatoken_amt,
+                    "max_cost_ocean": max_cost_ocean,
+                    "asset_did": asset_did,
+                    "exchange_id": str(exchange_id),
+                    "has_pricing_schema": True,
+                }
+            else:
+                self.logger.info("Request DTs from the dispenser")
+                order_tx_id = self._journaled(
+                    "dispensed",
+                    lambda: self._dispense(
                         datatoken_address=datatoken_address,
                         datatoken_amt=datatoken_amt,
-                    )
-                    msg = {
-                        "type": "DOWNLOAD_JOB",
-                        "datatoken_address": datatoken_address,
-                        "datatoken_amt": datatoken_amt,
-                        "asset_did": asset_did,
-                        "order_tx_id": tx.txid,
-                        "has_pricing_schema": False,
-                    }
+                    ).txid,
+                )
+                msg = {
+                    "type": "DOWNLOAD_JOB",
+                    "datatoken_address": datatoken_address,
+                    "datatoken_amt": datatoken_amt,
+                    "asset_did": asset_did,
+                    "order_tx_id": order_tx_id,
+                    "has_pricing_schema": False,
+                }
 
-                self.logger.info(f"Purchased datatokens successfully!")
-                return msg
+            self.logger.info(f"Purchased datatokens successfully!")
+            return msg
 
-            except Exception as e:
-                self.logger.error("Couldn't purchase datatokens")
-                self.logger.error(e)
+        except Exception as e:
+            self.logger.error("Couldn't purchase datatokens")
+            self.logger.error(e)
+            raise
 
-    def _download_asset(self, retries: int = 2, **kwargs):
+    @action("DOWNLOAD_ASSET", DownloadAssetRequest)
+    def _download_asset(self, **kwargs):
         """
-        Downloads files from the asset.
+        Downloads files from the asset, buying datatokens and ordering access if needed.
 
-        param retries: number of retries for downloading the asset.
         param kwargs: necessary parameters to use.
         They are:
         - `datatoken_address`;
@@ -220,274 +606,556 @@ class OceanConnection(BaseSyncConnection):
         - `datatoken_amt`;
         - optional: `exchange_id` if there exists a fixed rate exchange attached to the datatoken
         - optional: `max_cost_ocean` if there exists a fixed rate exchange attached to the datatoken
-        - optional: `order_tx_id` if there exists a dispenser attached to the datatoken
+        - optional: `order_tx_id` of an access order paid already, the access service
+        is paid for otherwise
+        - optional: `delivery`, one of `inline` (default, the file content is returned),
+        `path` (a reference to the file is returned) or `chunks` (the file is streamed
+        in `RESULTS_CHUNK` envelopes), see `_stream_file` for the related options
+        - optional: `file_index` of the file to deliver if the asset has several
+        - optional: `compress`, False to not compress the file even if the
+        `compression` option of the connection is set. A compressed file comes with
+        its `encoding` and original `size`, see `compression.decompress`
+        - optional: `checksum`, the expected SHA-256 of the file
+
+        Downloaded files are kept in the download cache, see `_order_verified` for
+        when a cached file is delivered without buying nor downloading it again.
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
+        did = kwargs["asset_did"]
+        asset = self.ddo_cache.get(did)
+
+        access_service = next(
+            (service for service in asset.services if service.type == "access"),
+            asset.services[0],
+        )
+        order_key = (did, access_service.id, self.wallet.address)
+        file_key = (did, access_service.id, kwargs.get("file_index", 0))
+        checksum = kwargs.get("checksum")
+
+        with self.download_cache.lease(*file_key, checksum=checksum) as cached:
+            if cached is not None and self._order_verified(order_key, cached, kwargs):
+                self.logger.info(f"Delivering {did} from the download cache.")
+                return self._deliver_file(cached.path, kwargs)
+
+        datatoken = self.ocean.get_datatoken(kwargs["datatoken_address"])
+        datatoken_amt = kwargs["datatoken_amt"]
+
+        exchange_details = None
+        if "exchange_id" in kwargs:
+            # Read everything the purchase needs in one round-trip.
+            balance, exchange_details = self._read_exchange_state(
+                kwargs["exchange_id"], datatoken
+            )
         else:
-            did = kwargs["asset_did"]
-            datatoken = self.ocean.get_datatoken(kwargs["datatoken_address"])
-            datatoken_amt = kwargs["datatoken_amt"]
+            balance = datatoken.balanceOf(self.wallet.address)
+
+        if balance < datatoken_amt:
+            self.logger.info(f"Insufficient datatokens. Purchasing right now ...")
+            if "exchange_id" in kwargs:
+                exchange_id = kwargs["exchange_id"]
+                max_cost_ocean = kwargs["max_cost_ocean"]
+                self._buy_dt_from_fre(
+                    exchange_id=exchange_id,
+                    datatoken_amt=datatoken_amt,
+                    max_cost_ocean=max_cost_ocean,
+                    exchange_details=exchange_details,
+                )
+            else:
+                self._dispense(
+                    datatoken_address=kwargs["datatoken_address"],
+                    datatoken_amt=datatoken_amt,
+                )
+        else:
+            self.logger.info(f"Already has sufficient datatokens.")
 
-            if datatoken.balanceOf(self.wallet.address) < datatoken_amt:
-                self.logger.info(f"Insufficient datatokens. Purchasing right now ...")
-                if "exchange_id" in kwargs:
-                    exchange_id = kwargs["exchange_id"]
-                    max_cost_ocean = kwargs["max_cost_ocean"]
-                    self._buy_dt_from_fre(
-                        exchange_id=exchange_id,
-                        datatoken_amt=datatoken_amt,
-                        max_cost_ocean=max_cost_ocean,
-                    )
-                else:
-                    self._dispense(
-                        datatoken_address=kwargs["datatoken_address"],
-                        datatoken_amt=datatoken_amt,
+        def pay_for_access():
+            with self._single_tx() as tx_dict:
+                order_tx_id = tx_id_to_str(
+                    self.ocean.assets.pay_for_access_service(
+                        asset=asset,
+                        tx_dict=tx_dict,
                     )
-            else:
-                self.logger.info(f"Already has sufficient datatokens.")
+                )
+            self.order_cache.put(*order_key, order_tx_id, access_service.timeout or 0)
+            return order_tx_id
+
+        order_reused = False
 
-            asset = self.ocean.assets.resolve(did)
-            if retries == 0:
-                raise ValueError("Failed to pay for compute service after retrying.")
+        def order():
+            nonlocal order_reused
+            # A still valid order of the same asset makes the download a pure provider call.
+            order_tx_id = self.order_cache.get(*order_key)
+            if order_tx_id is not None:
+                self.logger.info(f"Reusing order {order_tx_id} of {did}.")
+                order_reused = True
+                return order_tx_id
+
+            return self._retry("DOWNLOAD_JOB", pay_for_access)
+
+        if "exchange_id" in kwargs or "order_tx_id" not in kwargs:
+            # A paid order is journaled, so that a restarted download reuses it.
+            order_tx_id = self._journaled("paid", order)
+        else:
+            order_tx_id = kwargs["order_tx_id"]
+        self.logger.info(f"Order tx: '{order_tx_id}'")
 
+        # Download has begun for the agent. If the connection breaks, agent can request again by showing order_tx_id.
+        with self.download_cache.staging() as destination:
             try:
-                if "exchange_id" in kwargs:
-                    tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-                    order_tx_id = self.ocean.assets.pay_for_access_service(
+                with self.metrics.timed("provider"):
+                    file_path = self.ocean.assets.download(
                         asset=asset,
-                        tx_dict=tx_dict,
+                        consumer_wallet=self.wallet,
+                        destination=destination,
+                        order_tx_id=order_tx_id,
                     )
-                else:
-                    order_tx_id = kwargs["order_tx_id"]
-                self.logger.info(f"Order tx: '{order_tx_id}'")
             except Exception as e:
-                self.logger.error(
-                    f"Failed to pay for access service with error: {e}\n Retrying..."
+                if not order_reused:
+                    raise
+                # The provider may consider the order expired sooner than us.
+                self.logger.warning(
+                    f"Reused order {order_tx_id} was refused: {e}. Paying again..."
                 )
-                self._download_asset(retries - 1, **kwargs)
+                self.order_cache.invalidate(*order_key)
+                order_tx_id = self._retry("DOWNLOAD_JOB", pay_for_access)
+                self.logger.info(f"Order tx: '{order_tx_id}'")
+                with self.metrics.timed("provider"):
+                    file_path = self.ocean.assets.download(
+                        asset=asset,
+                        consumer_wallet=self.wallet,
+                        destination=destination,
+                        order_tx_id=order_tx_id,
+                    )
+            file_path = resolve_downloaded_file(file_path, file_key[2])
+            with self.download_cache.put(
+                *file_key, file_path, order_tx_id, checksum=checksum
+            ) as cached:
+                self.logger.info(f"file_path = {cached.path}")
+                msg = self._deliver_file(cached.path, kwargs)
 
-            # Download has begun for the agent. If the connection breaks, agent can request again by showing order_tx_id.
-            file_path = self.ocean.assets.download(
-                asset=asset,
-                consumer_wallet=self.wallet,
-                destination="./downloads/",
-                order_tx_id=order_tx_id,
-            )
-            self.logger.info(f"file_path = {file_path}")
-            data = open(file_path, "rb").read()
+        self.logger.info(f"Download completed!")
 
-            self.logger.info(f"Download completed!")
-            msg = {"type": "RESULTS", "data": data}
+        return msg
 
-            return msg
+    def _order_verified(
+        self, order_key: tuple, cached: CachedFile, request: dict
+    ) -> bool:
+        """
+        Whether the requester may be given a cached file without any chain or provider call.
+
+        It may if the order cache holds a valid order of the file's service for the
+        wallet, or if the request shows the order the file was downloaded with.
 
-    def _create_dispenser(self, retries: int = 2, **kwargs):
+        param order_key: the (DID, service id, consumer address) of the order.
+        param cached: the cached file.
+        param request: the kwargs of the download request.
         """
-        Deploys a dispenser.
+        if "order_tx_id" in request:
+            return request["order_tx_id"] == cached.order_tx_id
 
-        param retries: number of retries for creating the dispenser.
-        param kwargs: necessary parameters to use.
-        They are:
-        - `datatoken_address`
+        return self.order_cache.get(*order_key) is not None
+
+    def _deliver_file(self, file_path: str, request: dict) -> dict:
+        """
+        Delivers a downloaded file as the request asks for, see `_download_asset`.
+
+        param file_path: the path of the file.
+        param request: the kwargs of the download request.
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
+        delivery = request.get("delivery", "inline")
+        if delivery != "inline":
+            return self._stream_file(file_path, **request)
+
+        msg = {"type": "RESULTS"}
+        compressed = None
+        if request.get("compress", True):
+            compressed = self.compression.compress_file(file_path)
+        if compressed is None:
+            with open(file_path, "rb") as f:
+                msg["data"] = f.read()
         else:
-            if retries == 0:
-                raise ValueError("Failed to deploy dispenser after retrying.")
-            try:
-                datatoken_address = kwargs["datatoken_address"]
-                self._create_dispenser_helper(datatoken_address)
-                datatoken = self.ocean.get_datatoken(datatoken_address)
-                dispenser_status = datatoken.dispenser_status().active
-                self.logger.info(f"Dispenser status: {dispenser_status}")
+            msg["data"] = compressed
+            msg["encoding"] = self.compression.encoding
+            msg["size"] = os.path.getsize(file_path)
+
+        return msg
+
+    def _stream_file(self, file_path: str, delivery: str, **kwargs) -> dict:
+        """
+        Delivers a downloaded file without loading it into memory.
+
+        With the `path` delivery, only a reference to the file is returned. The
+        file is exported out of the download cache, so it stays until the agent
+        deletes it.
+        With the `chunks` delivery, the file is sent to the agent as a sequence
+        of `RESULTS_CHUNK` envelopes and a summary is returned.
+
+        param file_path: the path of the downloaded file.
+        param delivery: `path` or `chunks`.
+        param kwargs: the kwargs of the download request, with the optional:
+        - `chunk_size`: the size of the chunks in bytes;
+        - `offset` & `end`: the byte range to send, to resume an interrupted transfer;
+        - `checksum`: expected SHA-256 of the whole file.
+        """
+        if delivery not in ("path", "chunks"):
+            raise ValueError(
+                f"Unknown delivery '{delivery}'. Use 'inline', 'path' or 'chunks'."
+            )
+
+        reader = ChunkedFileReader(
+            file_path,
+            chunk_size=kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            start=kwargs.get("offset", 0),
+            end=kwargs.get("end"),
+        )
+        checksum = kwargs.get("checksum")
+        if checksum is not None and not reader.is_whole_file:
+            raise ValueError("A checksum can only be verified for the whole file.")
+
+        # Each chunk is compressed on its own, so that a resumed transfer can be decoded.
+        compress = None if kwargs.get("compress", True) else False
+        chunks = 0
+        for chunk in reader:
+            if delivery == "chunks":
+                if compress is None:
+                    compress = self.compression.should_compress(
+                        reader.length, guess_content_type(chunk.data, file_path)
+                    )
                 msg = {
-                    "type": "DISPENSER_DEPLOYMENT_RECEIPT",
-                    "datatoken_address": datatoken.address,
-                    "dispenser_status": dispenser_status,
-                    "has_pricing_schema": False,
+                    "type": "RESULTS_CHUNK",
+                    "did": kwargs["asset_did"],
+                    "offset": chunk.offset,
+                    "data": chunk.data,
                 }
-                self.logger.info(f"Dispenser created!")
-
-                return msg
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to deploy dispenser with the following error: {e}. Retrying..."
-                )
-                self._create_dispenser(retries - 1, **kwargs)
+                compressed = self.compression.shrink(chunk.data) if compress else None
+                if compressed is not None:
+                    msg["data"] = compressed
+                    msg["encoding"] = self.compression.encoding
+                    msg["size"] = len(chunk.data)
+                self.put_envelope(self._make_envelope(msg, kwargs))
+            chunks += 1
+            if delivery == "path" and checksum is None:
+                # Nothing to verify, the file doesn't need to be read.
+                break
+
+        reader.verify(checksum)
+        if delivery == "path":
+            file_path = self.download_cache.export(file_path)
+        msg = {
+            "type": "RESULTS" if delivery == "path" else "RESULTS_STREAMED",
+            "did": kwargs["asset_did"],
+            "path": os.path.abspath(file_path),
+            "size": reader.file_size,
+            "start": reader.start,
+            "end": reader.end,
+        }
+        if delivery == "chunks":
+            msg["chunks"] = chunks
+        if delivery == "chunks" or checksum is not None:
+            msg["sha256"] = reader.hexdigest()
+
+        return msg
+
+    @action("CREATE_DISPENSER", CreateDispenserRequest)
+    def _create_dispenser(self, **kwargs):
+        """
+        Deploys a dispenser.
 
-    def _create_fixed_rate(self, retries: int = 2, **kwargs):
+        param kwargs: necessary parameters to use.
+        They are:
+        - `datatoken_address`
+        """
+        datatoken_address = kwargs["datatoken_address"]
+        self._retry(
+            "CREATE_DISPENSER",
+            lambda: self._create_dispenser_helper(datatoken_address),
+        )
+        datatoken = self.ocean.get_datatoken(datatoken_address)
+        dispenser_status = datatoken.dispenser_status().active
+        self.logger.info(f"Dispenser status: {dispenser_status}")
+        msg = {
+            "type": "DISPENSER_DEPLOYMENT_RECEIPT",
+            "datatoken_address": datatoken.address,
+            "dispenser_status": dispenser_status,
+            "has_pricing_schema": False,
+        }
+        self.logger.info(f"Dispenser created!")
+
+        return msg
+
+    @action("CREATE_FIXED_RATE_EXCHANGE", CreateFixedRateExchangeRequest)
+    def _create_fixed_rate(self, **kwargs):
         """
         Creates a fixed rate exchange with OCEAN as base tokens.
 
-        param retries: number of retries for creating the FRE.
         param kwargs: necessary parameters to use.
         They are:
         - `datatoken_address`;
         - `rate`;
         - `ocean_amt`
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
-            if retries == 0:
-                raise ValueError("Failed to deploy fixed rate exchange after retrying.")
-            try:
-                datatoken_address = kwargs["datatoken_address"]
-                ocean_amt = kwargs["ocean_amt"]
-                rate = kwargs["rate"]
-                exchange_id = self._create_fixed_rate_helper(
-                    datatoken_address=datatoken_address, ocean_amt=ocean_amt, rate=rate
-                )
-                self.logger.info(f"Deployed fixed rate exchange: {exchange_id}")
-                msg = {
-                    "type": "EXCHANGE_DEPLOYMENT_RECEIPT",
-                    "exchange_id": str(exchange_id),
-                    "has_pricing_schema": True,
-                }
-                self.logger.info(f"Fixed rate exchange created!")
-
-                return msg
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to deploy fixed rate exchange with the following error {e}. Retrying..."
-                )
-                self._create_fixed_rate(retries - 1, **kwargs)
-
-    def _create_C2D_job(self, retries: int = 4, **kwargs):
+        exchange_id = self._retry(
+            "CREATE_FIXED_RATE_EXCHANGE",
+            lambda: self._create_fixed_rate_helper(
+                datatoken_address=kwargs["datatoken_address"],
+                ocean_amt=kwargs["ocean_amt"],
+                rate=kwargs["rate"],
+            ),
+        )
+        self.logger.info(f"Deployed fixed rate exchange: {exchange_id}")
+        msg = {
+            "type": "EXCHANGE_DEPLOYMENT_RECEIPT",
+            "exchange_id": str(exchange_id),
+            "has_pricing_schema": True,
+        }
+        self.logger.info(f"Fixed rate exchange created!")
+
+        return msg
+
+    @action("C2D_JOB", DatasetAlgorithmRequest)
+    def _create_C2D_job(self, **kwargs):
         """
         Pays for compute service & starts the compute job.
 
-        param retries: number of retries for starting a compute job.
         param kwargs: necessary parameters to use.
         They are:
         - `data_did`;
-        - `algo_did`
+        - `algo_did`;
+        - optional: `environment_policy` to select the compute environment, one of
+        `first`, `free_slots`, `price` or `max_duration`
+        - optional: `min_job_duration` in seconds the compute environment must allow
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
-            DATA_did = kwargs["data_did"]
-            ALG_did = kwargs["algo_did"]
-            DATA_DDO = self.ocean.assets.resolve(DATA_did)
-            ALG_DDO = self.ocean.assets.resolve(ALG_did)
-
+        DATA_did = kwargs["data_did"]
+        ALG_did = kwargs["algo_did"]
+        DATA_DDO = ALG_DDO = compute_service = algo_service = None
+
+        def resolve():
+            nonlocal DATA_DDO, ALG_DDO, compute_service, algo_service
+            DATA_DDO = self.ddo_cache.get(DATA_did)
+            ALG_DDO = self.ddo_cache.get(ALG_did)
             compute_service = DATA_DDO.services[1]
             algo_service = ALG_DDO.services[0]
 
-            self.logger.info(f"Paying for dataset {DATA_did}...")
-            if retries == 0:
-                raise ValueError("Failed to pay for compute service after retrying.")
-            try:
-                c2d_env = self.ocean.compute.get_c2d_environments(
-                    service_endpoint=compute_service.service_endpoint,
-                    chain_id=DATA_DDO.chain_id,
-                )[0]
-                self.logger.info(f"c2d env: {c2d_env}")
-
-                if "feeToken" in c2d_env.keys():
-                    fee_datatoken = self.ocean.get_datatoken(c2d_env["feeToken"])
-                    fee_datatoken.approve(
-                        compute_service.datatoken, to_wei(100), {"from": self.wallet}
-                    )
-                    fee_datatoken.approve(
-                        c2d_env["consumerAddress"], to_wei(100), {"from": self.wallet}
-                    )
+        def on_retry(error: BaseException, error_class: str) -> None:
+            self.c2d_environments.invalidate(
+                compute_service.service_endpoint, DATA_DDO.chain_id
+            )
+            if error_class in (PROVIDER, REVERT):
+                # The order may have failed on a stale DDO, e.g. an updated service.
+                self.ddo_cache.invalidate(DATA_did)
+                self.ddo_cache.invalidate(ALG_did)
+
+        resolve()
+        self.logger.info(f"Paying for dataset {DATA_did}...")
+
+        def pay_for_compute():
+            # Resolved again, in case a failed attempt invalidated the DDOs.
+            resolve()
+            c2d_env = self.c2d_environments.select(
+                compute_service.service_endpoint,
+                DATA_DDO.chain_id,
+                policy=kwargs.get("environment_policy"),
+                min_job_duration=kwargs.get("min_job_duration", 0),
+            )
+            self.logger.info(f"c2d env: {c2d_env}")
+
+            if "feeToken" in c2d_env.keys():
+                fee_datatoken = self.ocean.get_datatoken(c2d_env["feeToken"])
+                self._ensure_allowance(
+                    fee_datatoken,
+                    compute_service.datatoken,
+                    Web3.toWei(100, "ether"),
+                )
+                self._ensure_allowance(
+                    fee_datatoken,
+                    c2d_env["consumerAddress"],
+                    Web3.toWei(100, "ether"),
+                )
 
-                DATA_compute_input = ComputeInput(DATA_DDO, compute_service)
-                ALGO_compute_input = ComputeInput(ALG_DDO, algo_service)
+            DATA_compute_input = self.backend.ComputeInput(DATA_DDO, compute_service)
+            ALGO_compute_input = self.backend.ComputeInput(ALG_DDO, algo_service)
 
-                tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
+            # Orders for the dataset and the algorithm share the same tx dict.
+            with self._exclusive_txs():
+                tx_dict = self._get_tx_dict()
                 datasets, algorithm = self.ocean.assets.pay_for_compute_service(
                     datasets=[DATA_compute_input],
                     algorithm_data=ALGO_compute_input,
                     compute_environment=c2d_env["id"],
-                    valid_until=int(
-                        (datetime.now(timezone.utc) + timedelta(hours=1)).timestamp()
-                    ),
+                    valid_until=valid_until,
                     consume_market_order_fee_address=compute_service.datatoken,
                     tx_dict=tx_dict,
                     consumer_address=c2d_env["consumerAddress"],
                 )
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to pay for compute service with error: {e}\n Retrying..."
-                )
-                self._create_C2D_job(retries - 1, **kwargs)
+            if "feeToken" in c2d_env.keys():
+                # The fees actually charged are unknown, read them again next time.
+                for spender in [
+                    compute_service.datatoken,
+                    c2d_env["consumerAddress"],
+                ]:
+                    self.allowances.invalidate(
+                        c2d_env["feeToken"], self.wallet.address, spender
+                    )
 
-            self.logger.info(
-                f"Paid for dataset {DATA_did} receipt: {[dataset.as_dictionary() for dataset in datasets]} with algorithm {algorithm.as_dictionary()}"
+            return c2d_env, datasets, algorithm
+
+        def to_record(paid) -> dict:
+            c2d_env, datasets, algorithm = paid
+            return {
+                "c2d_env": c2d_env,
+                "dataset_tx_id": tx_id_to_str(datasets[0].transfer_tx_id),
+                "algorithm_tx_id": tx_id_to_str(algorithm.transfer_tx_id),
+                "valid_until": valid_until,
+            }
+
+        def from_record(data: dict):
+            return (
+                data["c2d_env"],
+                [
+                    self.backend.ComputeInput(
+                        DATA_DDO,
+                        compute_service,
+                        transfer_tx_id=data["dataset_tx_id"],
+                    )
+                ],
+                self.backend.ComputeInput(
+                    ALG_DDO, algo_service, transfer_tx_id=data["algorithm_tx_id"]
+                ),
             )
 
-            self.logger.info(f"Starting compute job....")
-            job_id = self.ocean.compute.start(
+        # Paid orders are journaled, so that a restarted job reuses them while valid.
+        valid_until = int((datetime.now(timezone.utc) + timedelta(hours=1)).timestamp())
+        c2d_env, datasets, algorithm = self._journaled(
+            "paid",
+            lambda: self._retry("C2D_JOB", pay_for_compute, on_retry=on_retry),
+            to_record=to_record,
+            from_record=from_record,
+            # Once the job started, the orders are only needed to read it back.
+            reuse_if=lambda data: data["valid_until"] > time.time() + 60
+            or self._journal_step("started") is not None,
+        )
+
+        self.logger.info(
+            f"Paid for dataset {DATA_did} receipt: {[dataset.as_dictionary() for dataset in datasets]} with algorithm {algorithm.as_dictionary()}"
+        )
+
+        self.logger.info(f"Starting compute job....")
+        job_id = self._journaled(
+            "started",
+            lambda: self.compute.start(
                 consumer_wallet=self.wallet,
                 dataset=datasets[0],
                 compute_environment=c2d_env["id"],
                 algorithm=algorithm,
-            )
+            ),
+        )
 
-            self.logger.info(f"Started compute job with job id: {job_id}")
+        if self.configuration.config.get("track_compute_jobs", True):
+            self._track_job(job_id, DATA_DDO, compute_service, kwargs)
+        self.logger.info(f"Started compute job with job id: {job_id}")
 
-            msg = {"type": "RESULTS", "job_id": job_id}
+        msg = {"type": "RESULTS", "job_id": job_id}
 
-            return msg
+        return msg
+
+    def _track_job(self, job_id: str, ddo: Any, service: Any, request: dict) -> None:
+        """
+        Tracks a started compute job until its results are delivered.
+
+        param job_id: the id of the job.
+        param ddo: the DDO of the dataset the job runs on.
+        param service: the compute service of the dataset.
+        param request: the kwargs of the request that started the job.
+        """
+        self.job_tracker.track(job_id, ddo, service, self.wallet, request)
+
+    def _on_job_finished(self, job: TrackedJob, results: List[bytes]) -> None:
+        """
+        Delivers the results of a finished compute job to the agent.
 
-    def _permission_dataset(self, retries: int = 2, **kwargs):
+        param job: the finished job.
+        param results: the output files of the job.
+        """
+        self.logger.info(f"Compute job {job.job_id} finished.")
+        msg = {"type": "C2D_RESULTS", "job_id": job.job_id, "results": results}
+        if self.compression.enabled and job.request.get("compress", True):
+            compressed = [self.compression.compress(result) for result in results]
+            msg["results"] = [
+                result if data is None else data
+                for result, data in zip(results, compressed)
+            ]
+            msg["encodings"] = [
+                None if data is None else self.compression.encoding
+                for data in compressed
+            ]
+        try:
+            self.put_envelope(self._make_envelope(msg, job.request))
+        except Exception as e:  # pylint: disable=broad-except
+            self.logger.error(f"Couldn't deliver the results of job {job.job_id}: {e}")
+
+    def _on_job_failed(self, job: TrackedJob, reason: str) -> None:
+        """
+        Notifies the agent that a compute job failed.
+
+        param job: the failed job.
+        param reason: why the job failed.
+        """
+        self.logger.error(f"Compute job {job.job_id} failed: {reason}")
+        msg = {
+            "type": "ERROR",
+            "action": "C2D_JOB",
+            "job_id": job.job_id,
+            "error": reason,
+        }
+        try:
+            self.put_envelope(self._make_envelope(msg, job.request))
+        except Exception as e:  # pylint: disable=broad-except
+            self.logger.error(f"Couldn't report the failure of job {job.job_id}: {e}")
+
+    @action("PERMISSION_DATASET", DatasetAlgorithmRequest)
+    def _permission_dataset(self, **kwargs):
         """
         Updates the trusted algorithm publishers list in order to start a compute job.
 
-        param retries: number of retries for updating trusted algorithm publishers list.
         param kwargs: necessary parameters to use.
         They are:
         - `data_did`;
         - `algo_did`
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
+        # The data DDO gets modified below, so it doesn't come from the cache.
+        with self.metrics.timed("aquarius"):
             data_ddo = self.ocean.assets.resolve(kwargs["data_did"])
-            algo_ddo = self.ocean.assets.resolve(kwargs["algo_did"])
+        algo_ddo = self.ddo_cache.get(kwargs["algo_did"])
 
-            if data_ddo is None or algo_ddo is None:
-                raise ValueError(
-                    f"Unable to loaded the assets from their DIDs. Please confirm correct deployment on Ocean!"
-                )
+        if data_ddo is None or algo_ddo is None:
+            raise ValueError(
+                f"Unable to loaded the assets from their DIDs. Please confirm correct deployment on Ocean!"
+            )
 
-            compute_service = data_ddo.services[1]
-            compute_service.add_publisher_trusted_algorithm(algo_ddo)
+        compute_service = data_ddo.services[1]
+        compute_service.add_publisher_trusted_algorithm(algo_ddo)
 
-            if retries == 0:
-                raise ValueError("Failed to create data asset after retrying.")
-            try:
-                tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-                data_ddo = self.ocean.assets.update(
+        def update():
+            with self._single_tx() as tx_dict:
+                return self.ocean.assets.update(
                     data_ddo,
                     tx_dict,
                 )
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to update asset permissions with error: {e}\n Retrying..."
-                )
-                self._permission_dataset(retries - 1, **kwargs)
 
-            msg = {
-                "type": "DEPLOYMENT_RECEIPT",
-                "did": data_ddo.did,
-                "datatoken_contract_address": data_ddo.datatokens[0].get("address"),
-            }
+        data_ddo = self._retry("PERMISSION_DATASET", update)
+        self.ddo_cache.invalidate(kwargs["data_did"])
 
-            self.logger.info(f"Permissions of dataset configured successfully.")
+        msg = {
+            "type": "DEPLOYMENT_RECEIPT",
+            "did": data_ddo.did,
+            "datatoken_contract_address": data_ddo.datatokens[0].get("address"),
+        }
 
-            return msg
+        self.logger.info(f"Permissions of dataset configured successfully.")
+
+        return msg
 
-    def _deploy_data_to_download(self, retries: int = 2, **kwargs):
+    @action("DEPLOY_DATA_DOWNLOAD", DeployDataRequest)
+    def _deploy_data_to_download(self, **kwargs):
         """
         Creates an Ocean asset with access service.
 
@@ -499,56 +1167,43 @@ class OceanConnection(BaseSyncConnection):
         - `license`;
         - `dataset_url`;
         - `has_pricing_schema`
+        - optional: `wait_for_indexing`, False to return before Aquarius indexed the asset
+        - optional: `indexing_timeout` in seconds
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
-            if retries == 0:
-                raise ValueError("Failed to create data asset after retrying.")
-
-            DATA_metadata = {
-                "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "description": kwargs["description"],
-                "name": kwargs["name"],
-                "type": "dataset",
-                "author": kwargs["author"],
-                "license": kwargs["license"],
-            }
-            try:
-                tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-                (
-                    DATA_data_nft,
-                    DATA_datatoken,
-                    DATA_ddo,
-                ) = self.ocean.assets.create_url_asset(
+        DATA_metadata = self._data_metadata(**kwargs)
+
+        def create():
+            with self._exclusive_txs():
+                tx_dict = self._get_tx_dict()
+                return self.ocean.assets.create_url_asset(
                     kwargs["name"],
                     kwargs["dataset_url"],
                     tx_dict,
                     metadata=DATA_metadata,
-                    wait_for_aqua=True,
+                    wait_for_aqua=False,
                 )
 
-                self.logger.info(f"DATA did = '{DATA_ddo.did}'")
-            except Exception as error:
-                self.logger.error(f"Error with creating asset. {error}. Retrying...")
-                self._deploy_data_to_download(retries - 1, **kwargs)
+        DATA_data_nft, DATA_datatoken, DATA_ddo = self._retry(
+            "DEPLOY_DATA_DOWNLOAD", create
+        )
+        self.logger.info(f"DATA did = '{DATA_ddo.did}'")
 
-            msg = {
-                "type": "DEPLOYMENT_RECEIPT",
-                "did": DATA_ddo.did,
-                "datatoken_contract_address": DATA_datatoken.address,
-                "has_pricing_schema": kwargs["has_pricing_schema"],
-            }
+        msg = {
+            "type": "DEPLOYMENT_RECEIPT",
+            "did": DATA_ddo.did,
+            "datatoken_contract_address": DATA_datatoken.address,
+            "has_pricing_schema": kwargs["has_pricing_schema"],
+        }
+        if self.WAIT_FOR_INDEXING:
+            self._wait_for_indexing(msg, kwargs)
 
-            return msg
+        return msg
 
-    def _deploy_data_for_C2D(self, retries: int = 2, **kwargs):
+    @action("DEPLOY_C2D", DeployDataRequest)
+    def _deploy_data_for_C2D(self, **kwargs):
         """
         Creates data NFT, datatoken & data asset for compute.
 
-        param retries: number of retries for creating data for compute.
         param kwargs: necessary parameters to use.
         They are:
         - `description`;
@@ -557,60 +1212,202 @@ class OceanConnection(BaseSyncConnection):
         - `license`;
         - `dataset_url`;
         - `has_pricing_schema`
+        - optional: `wait_for_indexing`, False to return before Aquarius indexed the asset
+        - optional: `indexing_timeout` in seconds
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
-            if retries == 0:
-                raise ValueError("Failed to create data asset after retrying.")
-
-            DATA_metadata = {
-                "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "description": kwargs["description"],
-                "name": kwargs["name"],
-                "type": "dataset",
-                "author": kwargs["author"],
-                "license": kwargs["license"],
-            }
+        DATA_metadata = self._data_metadata(**kwargs)
 
-            try:
-                tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-                (
-                    DATA_data_nft,
-                    DATA_datatoken,
-                    DATA_ddo,
-                ) = self.ocean.assets.create_url_asset(
+        def create():
+            with self._exclusive_txs():
+                tx_dict = self._get_tx_dict()
+                return self.ocean.assets.create_url_asset(
                     kwargs["name"],
                     kwargs["dataset_url"],
                     tx_dict,
                     metadata=DATA_metadata,
                     with_compute=True,
-                    wait_for_aqua=True,
+                    wait_for_aqua=False,
                 )
 
-                self.logger.info(f"DATA did = '{DATA_ddo.did}'")
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to deploy a data NFT and a datatoken with error: {e}\n Retrying..."
+        DATA_data_nft, DATA_datatoken, DATA_ddo = self._retry("DEPLOY_C2D", create)
+        self.logger.info(f"DATA did = '{DATA_ddo.did}'")
+
+        msg = {
+            "type": "DEPLOYMENT_RECEIPT",
+            "did": DATA_ddo.did,
+            "datatoken_contract_address": DATA_datatoken.address,
+            "has_pricing_schema": kwargs["has_pricing_schema"],
+        }
+        if self.WAIT_FOR_INDEXING:
+            self._wait_for_indexing(msg, kwargs)
+
+        return msg
+
+    @action("DEPLOY_C2D_BATCH", DeployBatchRequest, with_compute=True)
+    @action("DEPLOY_DATA_DOWNLOAD_BATCH", DeployBatchRequest, with_compute=False)
+    def _deploy_data_batch(self, with_compute: bool, **kwargs):
+        """
+        Creates data NFTs, datatokens & data assets for a list of datasets.
+
+        The transactions of all the datasets are sent back-to-back, without waiting
+        for Aquarius in between, then the whole set is waited for at once.
+
+        param with_compute: whether the assets get a compute service.
+        param kwargs: necessary parameters to use.
+        They are:
+        - `datasets`: list of dicts with the arguments of `DEPLOY_C2D`;
+        - optional: `indexing_timeout` in seconds, for the whole batch
+        """
+        item_type = "DEPLOY_C2D" if with_compute else "DEPLOY_DATA_DOWNLOAD"
+        receipts = []
+        with self._exclusive_txs():
+            for index, dataset in enumerate(kwargs["datasets"]):
+                receipt = {"index": index}
+                receipts.append(receipt)
+
+                try:
+                    DeployDataRequest.from_kwargs({**dataset, "type": item_type})
+                except InvalidRequest as e:
+                    receipt.update({"status": "FAILED", "error": str(e)})
+                    continue
+
+                try:
+                    (
+                        DATA_data_nft,
+                        DATA_datatoken,
+                        DATA_ddo,
+                    ) = self.ocean.assets.create_url_asset(
+                        dataset["name"],
+                        dataset["dataset_url"],
+                        self._get_tx_dict(),
+                        metadata=self._data_metadata(**dataset),
+                        with_compute=with_compute,
+                        wait_for_aqua=False,
+                    )
+                except Exception as e:
+                    self.logger.error(
+                        f"Failed to deploy dataset {index} of the batch with error: {e}"
+                    )
+                    receipt.update({"status": "FAILED", "error": str(e)})
+                    continue
+
+                receipt.update(
+                    {
+                        "status": "SUBMITTED",
+                        "did": DATA_ddo.did,
+                        "datatoken_contract_address": DATA_datatoken.address,
+                        "has_pricing_schema": dataset["has_pricing_schema"],
+                    }
+                )
+
+        submitted = [receipt for receipt in receipts if receipt["status"] != "FAILED"]
+        indexed = self.indexing.wait(
+            [receipt["did"] for receipt in submitted],
+            timeout=kwargs.get("indexing_timeout", 300),
+        )
+        for receipt in submitted:
+            if receipt["did"] in indexed:
+                receipt["status"] = "INDEXED"
+            else:
+                receipt.update(
+                    {"status": "FAILED", "error": "Asset was not indexed in time."}
                 )
-                self._deploy_data_for_C2D(retries - 1, **kwargs)
 
+        failed = sum(receipt["status"] == "FAILED" for receipt in receipts)
+        self.logger.info(
+            f"Deployed {len(receipts) - failed} of {len(receipts)} datasets of the batch."
+        )
+
+        return {
+            "type": "BATCH_DEPLOYMENT_RECEIPT",
+            "receipts": receipts,
+            "succeeded": len(receipts) - failed,
+            "failed": failed,
+        }
+
+    def _wait_for_indexing(self, msg: dict, request: dict) -> None:
+        """
+        Waits for Aquarius to index a deployed asset, unless the request asks to
+        be told later, see `_watch_indexing`.
+
+        param msg: the deployment receipt, with the `did` of the asset.
+        param request: the kwargs of the deployment.
+        raises IndexingTimeout: if the asset wasn't indexed in time.
+        """
+        indexing = self._watch_indexing(msg, request)
+        if indexing is not None:
+            indexing.result()
+
+    def _watch_indexing(self, msg: dict, request: dict) -> Optional[Future]:
+        """
+        Starts waiting for Aquarius to index a deployed asset.
+
+        With `wait_for_indexing: False` in the request, or in the configuration,
+        the receipt is marked `indexed: False` and an `INDEXING_RECEIPT` is sent
+        to the agent once the asset is indexed.
+
+        param msg: the deployment receipt, with the `did` of the asset.
+        param request: the kwargs of the deployment, optionally with `indexing_timeout`.
+        return: the future of the indexing to wait for, None if it is signalled later.
+        """
+        did = msg["did"]
+        indexing = self.indexing.watch(did, timeout=request.get("indexing_timeout"))
+        if request.get(
+            "wait_for_indexing",
+            self.configuration.config.get("wait_for_indexing", True),
+        ):
+            return indexing
+
+        msg["indexed"] = False
+        indexing.add_done_callback(lambda done: self._on_indexed(done, did, request))
+        return None
+
+    def _on_indexed(self, future: Future, did: str, request: dict) -> None:
+        """
+        Tells the agent that a deployed asset was indexed, or wasn't in time.
+
+        param future: the settled future of the indexing.
+        param did: the DID of the asset.
+        param request: the kwargs of the deployment.
+        """
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"{did} failed to be indexed: {error}")
             msg = {
-                "type": "DEPLOYMENT_RECEIPT",
-                "did": DATA_ddo.did,
-                "datatoken_contract_address": DATA_datatoken.address,
-                "has_pricing_schema": kwargs["has_pricing_schema"],
+                "type": "ERROR",
+                "action": request["type"],
+                "did": did,
+                "error": str(error),
             }
+        else:
+            msg = {"type": "INDEXING_RECEIPT", "did": did, "indexed": True}
 
-            return msg
+        try:
+            self.put_envelope(self._make_envelope(msg, request))
+        except Exception as e:
+            self.logger.error(f"Couldn't deliver the indexing of {did}: {e}")
+
+    def _data_metadata(self, **kwargs) -> dict:
+        """
+        Builds the metadata of a dataset.
 
-    def _deploy_algorithm(self, retries: int = 2, **kwargs):
+        param kwargs: the `description`, `name`, `author` & `license` of the dataset.
+        """
+        return {
+            "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "description": kwargs["description"],
+            "name": kwargs["name"],
+            "type": "dataset",
+            "author": kwargs["author"],
+            "license": kwargs["license"],
+        }
+
+    @action("DEPLOY_ALGORITHM", DeployAlgorithmRequest)
+    def _deploy_algorithm(self, **kwargs):
         """
         Creates data NFT, datatoken & asset for the algorithm for compute.
 
-        param retries: number of retries for creating data for compute.
         param kwargs: necessary parameters to use.
         They are:
         - `description`;
@@ -626,63 +1423,56 @@ class OceanConnection(BaseSyncConnection):
         - `checksum`;
         - `files_url`;
         - `has_pricing_schema`
+        - optional: `wait_for_indexing`, False to return before Aquarius indexed the asset
+        - optional: `indexing_timeout` in seconds
         """
-        valid, validation_message = validate_args(**kwargs)
-        if not valid:
-            raise Exception(f"{validation_message}")
-        else:
-            if retries == 0:
-                raise ValueError("Failed to deploy an algorithm after retrying.")
-            ALGO_metadata = {
-                "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "description": kwargs["description"],
-                "name": kwargs["name"],
-                "type": "algorithm",
-                "author": kwargs["author"],
-                "license": kwargs["license"],
-                "algorithm": {
-                    "language": kwargs["language"],
-                    "format": kwargs["format"],
-                    "version": kwargs["version"],
-                    "container": {
-                        "entrypoint": kwargs["entrypoint"],
-                        "image": kwargs["image"],
-                        "tag": kwargs["tag"],
-                        "checksum": kwargs["checksum"],
-                    },
+        ALGO_metadata = {
+            "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "description": kwargs["description"],
+            "name": kwargs["name"],
+            "type": "algorithm",
+            "author": kwargs["author"],
+            "license": kwargs["license"],
+            "algorithm": {
+                "language": kwargs["language"],
+                "format": kwargs["format"],
+                "version": kwargs["version"],
+                "container": {
+                    "entrypoint": kwargs["entrypoint"],
+                    "image": kwargs["image"],
+                    "tag": kwargs["tag"],
+                    "checksum": kwargs["checksum"],
                 },
-            }
+            },
+        }
 
-            try:
-                tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-                (
-                    ALGO_data_nft,
-                    ALGO_datatoken,
-                    ALGO_ddo,
-                ) = self.ocean.assets.create_algo_asset(
+        def create():
+            with self._exclusive_txs():
+                tx_dict = self._get_tx_dict()
+                return self.ocean.assets.create_algo_asset(
                     kwargs["name"],
                     kwargs["files_url"],
                     tx_dict,
                     metadata=ALGO_metadata,
-                    wait_for_aqua=True,
+                    wait_for_aqua=False,
                 )
 
-                self.logger.info(f"ALGO did = '{ALGO_ddo.did}'")
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to create an ALGO asset with error: {e}\n Retrying..."
-                )
-                self._deploy_algorithm(retries - 1, **kwargs)
+        ALGO_data_nft, ALGO_datatoken, ALGO_ddo = self._retry(
+            "DEPLOY_ALGORITHM", create
+        )
+        self.logger.info(f"ALGO did = '{ALGO_ddo.did}'")
 
-            msg = {
-                "type": "DEPLOYMENT_RECEIPT",
-                "did": ALGO_ddo.did,
-                "datatoken_contract_address": ALGO_datatoken.address,
-                "has_pricing_schema": kwargs["has_pricing_schema"],
-            }
+        msg = {
+            "type": "DEPLOYMENT_RECEIPT",
+            "did": ALGO_ddo.did,
+            "datatoken_contract_address": ALGO_datatoken.address,
+            "has_pricing_schema": kwargs["has_pricing_schema"],
+        }
+        if self.WAIT_FOR_INDEXING:
+            self._wait_for_indexing(msg, kwargs)
 
-            return msg
+        return msg
 
     def _create_dispenser_helper(self, datatoken_address):
         """
@@ -692,40 +1482,32 @@ class OceanConnection(BaseSyncConnection):
         """
         datatoken = self.ocean.get_datatoken(datatoken_address)
         self.logger.info(f"Datatoken: {datatoken.address}")
-        tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
 
-        try:
-            datatoken.create_dispenser(tx_dict=tx_dict)
-        except Exception as e:
-            self.logger.error(f"Failed to deploy dispenser in helper! {e}")
+        self._send_tx(
+            lambda tx_dict: datatoken.create_dispenser(tx_dict=tx_dict)
+        ).wait_mined()
 
-    def _dispense(self, datatoken_address, datatoken_amt, retries: int = 2):
+    def _dispense(self, datatoken_address, datatoken_amt):
         """
         Helper function for requesting datatokens from the dispenser depending on the datatoken template.
 
         param datatoken_address: the contract address of the datatoken.
         param datatoken_amt: the amount of the datatoken.
-        param retries: number of retries for dispensing.
+        return: the pending dispense transaction, mined.
         """
         datatoken = self.ocean.get_datatoken(datatoken_address)
 
-        tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-        if retries == 0:
-            raise ValueError("Failed to request datatokens after retrying.")
-        try:
-            return datatoken.dispense(
-                amount=Web3.toWei(datatoken_amt, "ether"),
-                tx_dict=tx_dict,
-            )
-        except (
-            ValueError,
-            brownie.exceptions.VirtualMachineError,
-            brownie.exceptions.ContractNotFound,
-        ) as e:
-            self.logger.error(
-                f"Failed to buy datatokens from FRE with error: {e}\n Retrying..."
+        def dispense():
+            pending = self._send_tx(
+                lambda tx_dict: datatoken.dispense(
+                    amount=Web3.toWei(datatoken_amt, "ether"),
+                    tx_dict=tx_dict,
+                )
             )
-            self._dispense(datatoken_address, datatoken_amt, retries - 1)
+            pending.wait_mined()
+            return pending
+
+        return self._retry("DISPENSE", dispense)
 
     def _create_fixed_rate_helper(self, datatoken_address, ocean_amt, rate) -> bytes:
         """
@@ -737,14 +1519,13 @@ class OceanConnection(BaseSyncConnection):
         """
         datatoken = self.ocean.get_datatoken(datatoken_address)
         self.logger.info(f"Approving ocean tokens to the FRE...")
-        tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
-        self.ocean.OCEAN_token.approve(
+        self._ensure_allowance(
+            self.ocean.OCEAN_token,
             self.ocean.fixed_rate_exchange.address,
             Web3.toWei(ocean_amt, "ether"),
-            tx_dict,
         )
         self.logger.info(f"Approved ocean tokens to the FRE")
-        try:
+        with self._single_tx() as tx_dict:
             exchange, tx = datatoken.create_exchange(
                 rate=Web3.toWei(rate, "ether"),
                 base_token_addr=self.ocean.OCEAN_address,
@@ -757,12 +1538,14 @@ class OceanConnection(BaseSyncConnection):
                 tx_dict=tx_dict,
             )
 
-            return exchange.exchange_id
-        except Exception as e:
-            self.logger.error(f"Failed to deploy fixed rate exchange in helper! {e}")
+        return exchange.exchange_id
 
     def _buy_dt_from_fre(
-        self, exchange_id, datatoken_amt, max_cost_ocean, retries: int = 2
+        self,
+        exchange_id,
+        datatoken_amt,
+        max_cost_ocean,
+        exchange_details=None,
     ):
         """
         Helper function for approving tokens from the fixed rate exchange & buying datatokens.
@@ -770,58 +1553,306 @@ class OceanConnection(BaseSyncConnection):
         param exchange_id: the identifier of exchange.
         param datatoken_amt: the amount of the datatoken.
         param max_cost_ocean: the maximum amount of the OCEAN tokens in the exchange.
-        param retries: number of retries for buying DTs.
+        param exchange_details: the result of `getExchange` if already read.
         """
-        exchange_id = convert_to_bytes_format(web3, str(exchange_id))
-        exchange_details = self.ocean.fixed_rate_exchange.getExchange(exchange_id)
+        exchange_id = convert_to_bytes_format(self.backend.web3, str(exchange_id))
+        if exchange_details is None:
+            exchange_details = self.ocean.fixed_rate_exchange.getExchange(exchange_id)
         datatoken = self.ocean.get_datatoken(exchange_details[1])
-        exchange = OneExchange(self.ocean.fixed_rate_exchange, exchange_id)
+        exchange = self.backend.OneExchange(self.ocean.fixed_rate_exchange, exchange_id)
         OCEAN_token = self.ocean.OCEAN_token
-        tx_dict = get_tx_dict(self.ocean_config, self.wallet, chain)
 
-        if retries == 0:
-            raise ValueError("Failed to buy datatokens after retrying.")
-        try:
-            datatoken.approve(
+        def buy():
+            # Both approvals are in flight at once, the buy is estimated once they are mined.
+            approvals = [
+                self._ensure_allowance(
+                    datatoken, exchange.address, Web3.toWei(datatoken_amt, "ether")
+                ),
+                self._ensure_allowance(
+                    OCEAN_token, exchange.address, Web3.toWei(max_cost_ocean, "ether")
+                ),
+            ]
+            wait_mined(approvals)
+
+            self._send_tx(
+                lambda tx_dict: exchange.buy_DT(
+                    datatoken_amt=Web3.toWei(datatoken_amt, "ether"),
+                    tx_dict=tx_dict,
+                    max_basetoken_amt=Web3.toWei(max_cost_ocean, "ether"),
+                    consume_market_fee=Web3.toWei("0.01", "ether"),
+                )
+            ).wait_mined()
+            self.allowances.spend(
+                OCEAN_token.address,
+                self.wallet.address,
                 exchange.address,
-                Web3.toWei(datatoken_amt, "ether"),
-                tx_dict,
+                Web3.toWei(max_cost_ocean, "ether"),
             )
-            OCEAN_token.approve(exchange.address, Web3.toWei(100, "ether"), tx_dict)
 
-            exchange.buy_DT(
-                datatoken_amt=Web3.toWei(datatoken_amt, "ether"),
-                tx_dict=tx_dict,
-                max_basetoken_amt=Web3.toWei(max_cost_ocean, "ether"),
-                consume_market_fee=Web3.toWei("0.01", "ether"),
-            )
-            self.logger.info(f"balance: {self.wallet.balance()}")
-        except Exception as e:
-            self.logger.error(
-                f"Failed to buy datatokens from FRE with error: {e}\n Retrying..."
-            )
-            self._buy_dt_from_fre(
-                exchange_id, datatoken_amt, max_cost_ocean, retries - 1
+        self._retry("BUY_DATATOKENS", buy)
+        self.logger.info(f"balance: {self.wallet.balance()}")
+
+    def _retry(
+        self,
+        action: str,
+        fn: Callable[[], Any],
+        on_retry: Optional[Callable[[BaseException, str], None]] = None,
+    ) -> Any:
+        """
+        Runs a step of an action, retrying it according to the retry policy of the action.
+
+        Nonce errors resynchronise the wallet's nonces before the next attempt.
+
+        param action: the action type, e.g. `C2D_JOB`, selecting the retry policy.
+        param fn: the step to run.
+        param on_retry: called with the error and its class before each retry.
+        return: the result of the step.
+        raises RetryError: if the step didn't succeed.
+        """
+        attempts = self.configuration.config.get("retry_attempts") or {}
+        policy = RetryPolicy(
+            max_attempts=attempts.get(action, self.RETRY_ATTEMPTS.get(action, 2)),
+            base_delay=self.configuration.config.get("retry_base_delay", 1.0),
+            max_delay=self.configuration.config.get("retry_max_delay", 30.0),
+        )
+
+        def before_retry(error: BaseException, error_class: str) -> None:
+            self.metrics.count_retry(action, error_class)
+            if error_class == NONCE:
+                self.nonces.resync(self.wallet.address)
+            if on_retry is not None:
+                on_retry(error, error_class)
+
+        return self.retrier.run(fn, policy, name=action, on_retry=before_retry).unwrap()
+
+    def _read_exchange_state(self, exchange_id, datatoken):
+        """
+        Reads the wallet's datatoken balance and the exchange details in one batch.
+
+        The allowances of the datatoken and OCEAN to the exchange are read in the
+        same batch and primed into the allowance cache.
+
+        param exchange_id: the identifier of exchange.
+        param datatoken: the datatoken sold by the exchange.
+        return: the datatoken balance in wei and the result of `getExchange`.
+        """
+        fixed_rate_exchange = self.ocean.fixed_rate_exchange
+        OCEAN_token = self.ocean.OCEAN_token
+        owner = self.wallet.address
+        (
+            balance,
+            exchange_details,
+            datatoken_allowance,
+            ocean_allowance,
+        ) = self.batch_reader.execute(
+            [
+                contract_call(datatoken.balanceOf, owner),
+                contract_call(
+                    fixed_rate_exchange.getExchange,
+                    convert_to_bytes_format(self.backend.web3, str(exchange_id)),
+                ),
+                contract_call(datatoken.allowance, owner, fixed_rate_exchange.address),
+                contract_call(
+                    OCEAN_token.allowance, owner, fixed_rate_exchange.address
+                ),
+            ]
+        )
+        self.allowances.prime(
+            datatoken.address, owner, fixed_rate_exchange.address, datatoken_allowance
+        )
+        self.allowances.prime(
+            OCEAN_token.address, owner, fixed_rate_exchange.address, ocean_allowance
+        )
+
+        return balance, exchange_details
+
+    def _ensure_allowance(
+        self, token, spender: str, amount: int
+    ) -> Optional[PendingTransaction]:
+        """
+        Approves the spender for the wallet's tokens, unless the current allowance covers the amount.
+
+        The approval isn't waited for: transactions that depend on it wait for it
+        to be mined, see `_single_tx`.
+
+        param token: the token contract.
+        param spender: the address of the spender.
+        param amount: the amount in wei the spender needs.
+        return: the pending approval transaction, None if no approval was needed.
+        """
+        owner = self.wallet.address
+        approval = None
+
+        def approve(value: int):
+            nonlocal approval
+            approval = self._send_tx(
+                lambda tx_dict: token.approve(spender, value, tx_dict)
             )
+            approval.mined.add_done_callback(on_mined)
+
+        def on_mined(mined: Future) -> None:
+            # The cache assumed the approval would succeed.
+            if mined.exception() is not None:
+                self.allowances.invalidate(token.address, owner, spender)
+
+        self.allowances.ensure(token, owner, spender, amount, approve)
+        return approval
+
+    @contextmanager
+    def _single_tx(self) -> Iterator[dict]:
+        """
+        Yields the tx dict for a single transaction of the wallet,
+        with a nonce allocated locally by the nonce manager.
+
+        The transactions the action has in flight are mined first, as the gas
+        estimation of the transaction may depend on them.
+        """
+        wait_mined(self._action_transactions())
+        with self.nonces.reserve(self.wallet.address) as nonce:
+            with self._recording_gas(nonce=nonce):
+                yield self._get_tx_dict(nonce=nonce)
+
+    def _send_tx(self, send: Callable[[dict], Any]) -> PendingTransaction:
+        """
+        Broadcasts a single transaction of the wallet without waiting for it to be mined.
+
+        The transaction is followed by the confirmation watcher: its nonce is
+        confirmed and its gas recorded once it is mined, and the action waits for
+        its confirmations before completing.
+
+        param send: sends the transaction with the given tx dict, returning its receipt.
+        return: the pending transaction.
+        """
+        address = self.wallet.address
+        action_type = getattr(self._journal_context, "action_type", None)
+        nonce = self.nonces.allocate(address)
+        tx_dict = self._get_tx_dict(nonce=nonce)
+        required_confs = tx_dict.get("required_confs", 1)
+        tx_dict["required_confs"] = 0
+        try:
+            tx = send(tx_dict)
+        except BaseException:
+            self.nonces.fail(address, nonce)
+            raise
+
+        pending = self.confirmations.watch(tx.txid, address, nonce, required_confs)
+
+        def on_mined(mined: Future) -> None:
+            if mined.exception() is not None:
+                self.nonces.fail(address, nonce)
+                return
+            self.nonces.confirm(address, nonce)
+            if action_type is not None:
+                self.metrics.add_gas(action_type, mined.result()["gasUsed"])
+
+        pending.mined.add_done_callback(on_mined)
+        self._action_transactions().append(pending)
+        return pending
+
+    def _action_transactions(self) -> List[PendingTransaction]:
+        """The transactions sent by the current action that it hasn't seen confirmed."""
+        if not hasattr(self._journal_context, "transactions"):
+            self._journal_context.transactions = []
+        return self._journal_context.transactions
+
+    @contextmanager
+    def _exclusive_txs(self) -> Iterator[None]:
+        """
+        Blocks the wallet's nonce allocation while the block sends transactions
+        with node-assigned nonces, see `NonceManager.exclusive`.
+        """
+        wait_mined(self._action_transactions())
+        with self.nonces.exclusive(self.wallet.address):
+            with self._recording_gas():
+                yield
+
+    @contextmanager
+    def _recording_gas(self, nonce: Optional[int] = None) -> Iterator[None]:
+        """
+        Adds the gas used by the wallet's transactions sent in the block to the
+        metrics of the current action.
+
+        param nonce: the nonce of the only transaction to count, all of them if None.
+        """
+        start = self.backend.tx_count()
+        try:
+            yield
+        finally:
+            action_type = getattr(self._journal_context, "action_type", None)
+            if action_type is not None:
+                gas = sum(
+                    gas_used
+                    for sender, tx_nonce, gas_used in self.backend.receipts_since(start)
+                    if sender == self.wallet.address
+                    and (nonce is None or tx_nonce == nonce)
+                )
+                self.metrics.add_gas(action_type, gas)
+
+    def _get_tx_dict(self, nonce: Optional[int] = None) -> dict:
+        """
+        Builds the tx dict of the wallet, with fees from the gas oracle.
+
+        param nonce: the nonce of the transaction, assigned by the node if None.
+        """
+        return get_tx_dict(
+            self.ocean_config,
+            self.wallet,
+            self.backend.chain,
+            nonce=nonce,
+            gas_oracle=self.gas_oracle,
+        )
 
     def on_connect(self) -> None:
         """
         Tear down the connection.
 
+        The local state, i.e. the private key, the journal and the order cache,
+        is loaded in the background while connecting to the network. The time
+        taken by each phase is kept in `startup_profile`.
+
         Connection status set automatically.
         """
-        network_name = os.environ["OCEAN_NETWORK_NAME"]
-        connect_to_network(network_name)
-        if network_name != "development":
-            priority_fee(chain.priority_fee)
+        profile = self.startup_profile = StartupProfile()
+        self.backend = create_backend(
+            self.configuration.config.get("backend", "ocean"),
+            self.configuration.config,
+        )
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocean-startup")
+        local_state = loader.submit(self._load_local_state, profile)
+        loader.shutdown(wait=False)
+
+        with profile.phase("connect_to_network"):
+            network_name = self.backend.connect()
+            self.backend.instrument_rpc(self.metrics.observe_dependency)
 
-        self.ocean_config = get_config_dict(network_name)
-        self.ocean = Ocean(self.ocean_config)
+        with profile.phase("ocean"):
+            self.ocean_config = self.backend.config_dict(network_name)
+            self.ocean = self.backend.create_ocean(self.ocean_config)
 
-        accounts.clear()
-        with open(self.configuration.config.get("key_path"), "r") as f:
-            key = f.read()
-        self.wallet = accounts.add(key)
+        with profile.phase("helpers"):
+            self._create_helpers()
+
+        with profile.phase("wallet"):
+            self.nonces = NonceManager(
+                self.backend.web3,
+                drop_timeout=self.configuration.config.get("nonce_drop_timeout", 120),
+            )
+            min_balance = self.configuration.config.get("wallet_min_balance")
+            self.wallets = WalletPool(
+                self.backend.add_accounts(local_state.result()),
+                self.nonces,
+                policy=self.configuration.config.get("wallet_policy", "sticky"),
+                min_balance=Web3.toWei(min_balance, "ether") if min_balance else 0,
+            )
+            if len(self.wallets) > 1:
+                self.wallets.refresh_balances()
+            # Transactions dropped by the node would otherwise leave a nonce gap
+            # that blocks every later transaction of the wallet.
+            self.nonce_checker = PeriodicTask(
+                self.configuration.config.get("nonce_check_interval", 30),
+                self.nonces.detect_all_gaps,
+                name="ocean-nonce-check",
+            )
 
         self.logger.info(
             f"connected to Ocean with config.network_name = '{self.ocean_config['NETWORK_NAME']}'"
@@ -833,7 +1864,200 @@ class OceanConnection(BaseSyncConnection):
         self.logger.info(
             f"connected to Ocean with config.provider_url = '{self.ocean_config['PROVIDER_URL']}'"
         )
-        self.logger.info(f"Address used: {self.wallet.address}")
+        for wallet in self.wallets:
+            self.logger.info(f"Address used: {wallet.address}")
+
+        self.executor = self._create_executor()
+
+        with profile.phase("action_plugins"):
+            # Plugins register their actions on import, see `actions.register_action`.
+            ACTIONS.load_plugins(self.configuration.config.get("action_plugins", []))
+
+        with profile.phase("resume_actions"):
+            self._resume_actions()
+
+        self._start_metrics_export()
+
+        self.logger.debug(f"Startup timings:\n{profile.report(import_times())}")
+        budget = self.configuration.config.get("startup_budget")
+        if profile.exceeds(budget):
+            self.logger.warning(
+                f"Connecting took {profile.total:.2f}s, over the startup budget of {budget}s."
+            )
+
+    def _state_path(self, option: str, name: str) -> str:
+        """
+        Returns where to keep a local state of the connection.
+
+        param option: the configuration option giving the path.
+        param name: the file or folder name in the data directory of the agent,
+        used if the option isn't set.
+        """
+        path = self.configuration.config.get(option)
+        return os.path.join(self.data_dir, name) if path is None else path
+
+    def _create_executor(self) -> Optional[ActionExecutor]:
+        """Creates the worker pool of the actions, if `concurrent_actions` is enabled."""
+        if not self.configuration.config.get("concurrent_actions", False):
+            return None
+
+        return ActionExecutor(
+            max_workers=self.configuration.config.get(
+                "max_worker_threads", self.MAX_WORKER_THREADS
+            ),
+            action_limits={
+                **self.ACTION_LIMITS,
+                **(self.configuration.config.get("action_limits") or {}),
+            },
+        )
+
+    def _start_metrics_export(self) -> None:
+        """
+        Exports the metrics as configured: on a local Prometheus endpoint with
+        `metrics_port`, and in periodic state updates to the agent with `metrics_interval`.
+        """
+        port = self.configuration.config.get("metrics_port")
+        if port is not None:
+            self.metrics_server = MetricsServer(
+                self.metrics,
+                host=self.configuration.config.get("metrics_host", "127.0.0.1"),
+                port=port,
+            )
+            self.logger.info(
+                f"Serving metrics on port {self.metrics_server.port} at /metrics"
+            )
+
+        interval = self.configuration.config.get("metrics_interval")
+        if interval:
+            self.metrics_reporter = PeriodicTask(interval, self._report_metrics)
+
+    def _report_metrics(self) -> None:
+        """Sends a snapshot of the metrics to the agent."""
+        msg = {"type": "STATE_UPDATE", "metrics": self.metrics.snapshot()}
+        try:
+            self.put_envelope(self._make_envelope(msg, {}))
+        except Exception as e:  # pylint: disable=broad-except
+            self.logger.error(f"Failed to report metrics with error: {e}")
+
+    def _load_local_state(self, profile: StartupProfile) -> List[Optional[str]]:
+        """
+        Loads what the connection keeps on disk, independently of the network.
+
+        param profile: the profile to time the loading with.
+        return: the private keys of the wallets, from `key_paths` or `key_path`.
+        """
+        key_paths = self.configuration.config.get("key_paths") or [
+            self.configuration.config.get("key_path")
+        ]
+        keys: List[Optional[str]] = []
+        with profile.phase("load_key"):
+            for key_path in key_paths:
+                if key_path is None:
+                    keys.append(None)
+                    continue
+                with open(key_path, "r") as f:
+                    keys.append(f.read())
+
+        with profile.phase("journal"):
+            self.journal = ActionJournal(
+                self._state_path("journal_path", "ocean_journal.db"),
+                flush_interval=self.configuration.config.get(
+                    "journal_flush_interval", 0.05
+                ),
+            )
+            self.journal.prune(
+                self.configuration.config.get("journal_retention", 7 * 24 * 3600)
+            )
+
+        with profile.phase("order_cache"):
+            self.order_cache = OrderCache(
+                max_size=self.configuration.config.get("order_cache_size", 1024),
+                persist_path=self.configuration.config.get("order_cache_path"),
+            )
+
+        return keys
+
+    def _create_helpers(self) -> None:
+        """Creates the helpers that need the Ocean instance."""
+        self.gas_oracle = GasOracle(
+            gas_station_url=self.configuration.config.get(
+                "gas_station_url", POLYGON_GAS_STATION_URL
+            ),
+            web3=self.backend.web3,
+            chain=self.backend.chain,
+            ttl=self.configuration.config.get("gas_price_ttl", 15.0),
+            metrics=self.metrics,
+        )
+
+        # The compute calls all go to the provider.
+        self.compute = self.metrics.instrument(self.ocean.compute, "provider")
+        self.job_tracker = ComputeJobTracker(
+            self.compute,
+            on_finished=self._on_job_finished,
+            on_failed=self._on_job_failed,
+            min_interval=self.configuration.config.get("job_poll_interval", 5),
+            max_interval=self.configuration.config.get("job_poll_max_interval", 120),
+        )
+        self.c2d_environments = ComputeEnvironmentRegistry(
+            lambda service_endpoint, chain_id: self.compute.get_c2d_environments(
+                service_endpoint=service_endpoint, chain_id=chain_id
+            ),
+            ttl=self.configuration.config.get("c2d_environments_ttl", 60),
+            policy=self.configuration.config.get("c2d_environment_policy", "first"),
+        )
+        standing_allowance = self.configuration.config.get("standing_allowance")
+        self.allowances = AllowanceManager(
+            standing_amount=Web3.toWei(standing_allowance, "ether")
+            if standing_allowance
+            else 0
+        )
+        self.retrier = Retrier(
+            budget=RetryBudget(
+                max_retries=self.configuration.config.get("retry_budget", 50),
+                window=self.configuration.config.get("retry_budget_window", 60.0),
+            ),
+            logger=self.logger,
+        )
+        self.confirmations = ConfirmationWatcher(
+            self.backend.web3,
+            poll_interval=self.configuration.config.get(
+                "confirmation_poll_interval", 1.0
+            ),
+            timeout=self.configuration.config.get("confirmation_timeout", 600.0),
+        )
+        self.confirmations.start()
+        self.indexing = IndexingWatcher(
+            self.metrics.wrap(
+                self.backend.Aquarius.get_instance(
+                    self.ocean_config["METADATA_CACHE_URI"]
+                ).query_search,
+                "aquarius",
+            ),
+            min_interval=self.configuration.config.get("indexing_poll_interval", 0.5),
+            max_interval=self.configuration.config.get(
+                "indexing_poll_max_interval", 5.0
+            ),
+            timeout=self.configuration.config.get("indexing_timeout", 300.0),
+        )
+        self.indexing.start()
+        self.compression = CompressionPolicy.from_config(
+            self.configuration.config.get("compression")
+        )
+        self.download_cache = DownloadCache(
+            self._state_path("download_cache_path", "downloads"),
+            max_bytes=self.configuration.config.get("download_cache_size", 1024**3),
+        )
+        self.batch_reader = BatchReader(
+            self.backend.web3,
+            strategy=self.configuration.config.get("read_batch_strategy"),
+        )
+        self.ddo_cache = DDOCache(
+            self.metrics.wrap(self.ocean.assets.resolve, "aquarius"),
+            max_size=self.configuration.config.get("ddo_cache_size", 256),
+            ttl=self.configuration.config.get("ddo_cache_ttl", 300),
+            persist_path=self.configuration.config.get("ddo_cache_path"),
+            from_dict=self.backend.ddo_from_dict,
+        )
 
     def on_disconnect(self) -> None:
         """
@@ -841,3 +2065,23 @@ class OceanConnection(BaseSyncConnection):
 
         Connection status set automatically.
         """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+        if self.metrics_reporter is not None:
+            self.metrics_reporter.stop()
+            self.metrics_reporter = None
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if self.nonce_checker is not None:
+            self.nonce_checker.stop()
+            self.nonce_checker = None
+
+        self.job_tracker.stop()
+        self.confirmations.stop()
+        self.indexing.stop()
+        self.gas_oracle.close()
+        self.download_cache.close()
+        self.journal.close()
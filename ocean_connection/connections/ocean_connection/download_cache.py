@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Content-addressed cache of the downloaded files."""
+import contextlib
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from ocean_connection.connections.ocean_connection.streaming import DEFAULT_CHUNK_SIZE
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    did TEXT NOT NULL,
+    service_id TEXT NOT NULL,
+    file_index INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    order_tx_id TEXT,
+    PRIMARY KEY (did, service_id, file_index)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+"""
+
+
+class CachedFile(NamedTuple):
+    """A file of the cache and the order it was downloaded with."""
+
+    path: str
+    sha256: str
+    size: int
+    order_tx_id: Optional[str]
+
+
+class DownloadCache:
+    """
+    Caches the files downloaded from the providers, keyed by (DID, service id, file index).
+
+    Each file is stored once under its SHA-256, whatever the number of assets it
+    belongs to, and the least recently used files are evicted once the cache
+    exceeds `max_bytes`.
+
+    Files are downloaded to a staging folder of the cache and moved into it with an
+    atomic rename, so a cached file is always complete. A file leased by a reader
+    is never evicted by this process; other processes sharing the folder may
+    evict it, which unlinks the file without affecting the readers that opened it.
+    Files handed over beyond a lease are exported out of the cache, see `export`.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1024**3) -> None:
+        """
+        Initialize the cache.
+
+        param root: the folder of the cache, created if needed.
+        param max_bytes: the maximum total size of the cached files.
+        """
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._objects = os.path.join(self.root, "objects")
+        self._staging = os.path.join(self.root, "staging")
+        self._exported = os.path.join(self.root, "exported")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._staging, exist_ok=True)
+        os.makedirs(self._exported, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._leases: Counter = Counter()
+        self._db = sqlite3.connect(
+            os.path.join(self.root, "index.db"),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def staging(self) -> Iterator[str]:
+        """Yields a new folder to download files to, deleted on exit."""
+        folder = tempfile.mkdtemp(dir=self._staging)
+        try:
+            yield folder
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    @contextlib.contextmanager
+    def lease(
+        self,
+        did: str,
+        service_id: str,
+        file_index: int = 0,
+        checksum: Optional[str] = None,
+    ) -> Iterator[Optional[CachedFile]]:
+        """
+        Yields the cached file of an asset, None on a miss.
+
+        The file isn't evicted before the end of the lease.
+
+        param did: the DID of the asset.
+        param service_id: the id of the access service.
+        param file_index: the index of the file in the asset.
+        param checksum: the expected SHA-256 of the file, optionally prefixed with
+            `sha256:`. A cached file with another checksum is a miss.
+        """
+        cached = None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT b.path, b.sha256, b.size, f.order_tx_id FROM files f "
+                "JOIN blobs b ON b.sha256 = f.sha256 "
+                "WHERE f.did = ? AND f.service_id = ? AND f.file_index = ?",
+                (did, service_id, file_index),
+            ).fetchone()
+            if row is not None and os.path.exists(os.path.join(self.root, row[0])):
+                cached = CachedFile(os.path.join(self.root, row[0]), *row[1:])
+                if checksum is not None and cached.sha256 != _digest(checksum):
+                    cached = None
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._leases[cached.sha256] += 1
+                self._db.execute(
+                    "UPDATE blobs SET last_access = ? WHERE sha256 = ?",
+                    (time.time(), cached.sha256),
+                )
+
+        try:
+            yield cached
+        finally:
+            if cached is not None:
+                self._release(cached.sha256)
+
+    @contextlib.contextmanager
+    def put(
+        self,
+        did: str,
+        service_id: str,
+        file_index: int,
+        path: str,
+        order_tx_id: Optional[str] = None,
+        checksum: Optional[str] = None,
+    ) -> Iterator[CachedFile]:
+        """
+        Moves a downloaded file into the cache and yields it, leased like by `lease`.
+
+        param did: the DID of the asset.
+        param service_id: the id of the access service.
+        param file_index: the index of the file in the asset.
+        param path: the downloaded file, preferably in a `staging` folder so that
+            it is moved rather than copied.
+        param order_tx_id: the order the file was downloaded with.
+        param checksum: the expected SHA-256 of the file, see `lease`.
+        raises ValueError: if the file doesn't match the checksum, it isn't cached then.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for data in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b""):
+                digest.update(data)
+        sha256 = digest.hexdigest()
+        if checksum is not None and sha256 != _digest(checksum):
+            raise ValueError(
+                f"Checksum mismatch for {path}: expected {_digest(checksum)}, got {sha256}."
+            )
+        size = os.path.getsize(path)
+        relative_path = os.path.join("objects", sha256, os.path.basename(path))
+
+        with self._lock:
+            with self._db:
+                # Taking the write lock first serializes the processes sharing the cache.
+                self._db.execute("BEGIN IMMEDIATE")
+                row = self._db.execute(
+                    "SELECT path FROM blobs WHERE sha256 = ?", (sha256,)
+                ).fetchone()
+                if row is not None and os.path.exists(os.path.join(self.root, row[0])):
+                    relative_path = row[0]
+                else:
+                    self._store(path, relative_path)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)",
+                    (sha256, relative_path, size, time.time()),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (did, service_id, file_index, sha256, order_tx_id),
+                )
+            self._leases[sha256] += 1
+            self._evict()
+
+        try:
+            yield CachedFile(
+                os.path.join(self.root, relative_path), sha256, size, order_tx_id
+            )
+        finally:
+            self._release(sha256)
+
+    def export(self, path: str) -> str:
+        """
+        Hard-links a leased file out of the cache, or copies it on file systems without links.
+
+        The exported file belongs to the caller, who deletes it when done: it
+        isn't evicted nor counted in the size of the cache.
+
+        param path: the path of the leased file.
+        return: the path of the exported file, in a new folder of the cache.
+        """
+        folder = tempfile.mkdtemp(dir=self._exported)
+        target = os.path.join(folder, os.path.basename(path))
+        try:
+            os.link(path, target)
+        except OSError:
+            shutil.copyfile(path, target)
+        return target
+
+    def invalidate(self, did: str, service_id: str, file_index: int = 0) -> None:
+        """
+        Forgets the cached file of an asset, e.g. after it failed its checksum.
+
+        Files no asset refers to are the first evicted.
+
+        param did: the DID of the asset.
+        param service_id: the id of the access service.
+        param file_index: the index of the file in the asset.
+        """
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM files WHERE did = ? AND service_id = ? AND file_index = ?",
+                (did, service_id, file_index),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters, the number of cached files and their total size."""
+        with self._lock:
+            files, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "files": files,
+                "bytes": size,
+            }
+
+    def close(self) -> None:
+        """Closes the index of the cache."""
+        with self._lock:
+            self._db.close()
+
+    def _release(self, sha256: str) -> None:
+        with self._lock:
+            self._leases[sha256] -= 1
+            if not self._leases[sha256]:
+                del self._leases[sha256]
+            if not self._leases:
+                # Leased files may have kept the cache over the limit.
+                self._evict()
+
+    def _store(self, path: str, relative_path: str) -> None:
+        target = os.path.join(self.root, relative_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:
+            # Another file system: copy next to the target, then swap it in.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp, open(path, "rb") as f:
+                shutil.copyfileobj(f, tmp, DEFAULT_CHUNK_SIZE)
+            os.replace(tmp_path, target)
+
+    def _evict(self) -> None:
+        """Deletes the least recently used files, unreferenced ones first, down to `max_bytes`."""
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT sha256, path, size FROM blobs ORDER BY "
+            "EXISTS (SELECT 1 FROM files WHERE files.sha256 = blobs.sha256), last_access"
+        ).fetchall()
+        for sha256, relative_path, size in rows:
+            if total <= self.max_bytes:
+                break
+            if self._leases[sha256]:
+                continue
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute("DELETE FROM files WHERE sha256 = ?", (sha256,))
+                self._db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+            shutil.rmtree(
+                os.path.dirname(os.path.join(self.root, relative_path)),
+                ignore_errors=True,
+            )
+            total -= size
+
+
+def _digest(checksum: str) -> str:
+    checksum = checksum.lower()
+    return checksum[len("sha256:") :] if checksum.startswith("sha256:") else checksum
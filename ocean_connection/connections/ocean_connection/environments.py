@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Cached discovery and selection of compute-to-data environments."""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+SELECTION_POLICIES = ("first", "free_slots", "price", "max_duration")
+
+
+def _free_slots(env: dict) -> int:
+    return env.get("maxJobs", 0) - env.get("currentJobs", 0)
+
+
+class ComputeEnvironmentRegistry:
+    """
+    Caches the compute environments of providers, keyed by (provider endpoint, chain id).
+
+    Environments are fetched again once older than `ttl` seconds. `select` picks an
+    environment according to a policy, the first one by default:
+    - `first`: the first environment returned by the provider;
+    - `free_slots`: the environment with the most free job slots. Each selection
+      counts as a job started in the cached environment, so that concurrent
+      actions spread over the environments until they are fetched again;
+    - `price`: the cheapest environment;
+    - `max_duration`: the environment allowing the longest jobs.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int], List[dict]],
+        ttl: float = 60.0,
+        policy: str = "first",
+    ) -> None:
+        """
+        Initialize the registry.
+
+        param fetch: returns the environments of a provider endpoint and a chain id,
+        e.g. `ocean.compute.get_c2d_environments`.
+        param ttl: seconds after which the environments of a provider are fetched again.
+        param policy: the default selection policy.
+        """
+        if policy not in SELECTION_POLICIES:
+            raise ValueError(
+                f"Unknown policy '{policy}', use one of {SELECTION_POLICIES}."
+            )
+
+        self.fetch = fetch
+        self.ttl = ttl
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[dict]]] = {}
+
+    def environments(self, service_endpoint: str, chain_id: int) -> List[dict]:
+        """
+        Returns the environments of a provider, fetching them if they are stale.
+
+        param service_endpoint: the provider endpoint of the compute service.
+        param chain_id: the chain id of the asset.
+        """
+        key = (service_endpoint, chain_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        environments = self.fetch(service_endpoint, chain_id)
+        if not environments:
+            raise ValueError(f"No compute environment available at {service_endpoint}.")
+
+        # Copies, as the selections update their job counts.
+        environments = [dict(env) for env in environments]
+        with self._lock:
+            self._entries[key] = (time.monotonic(), environments)
+
+        return environments
+
+    def select(
+        self,
+        service_endpoint: str,
+        chain_id: int,
+        policy: Optional[str] = None,
+        min_job_duration: int = 0,
+    ) -> dict:
+        """
+        Returns the best environment of a provider according to the policy.
+
+        Environments without free slots, or not allowing jobs of `min_job_duration`
+        seconds, are only used if there are no other ones.
+
+        param service_endpoint: the provider endpoint of the compute service.
+        param chain_id: the chain id of the asset.
+        param policy: the selection policy, the default one if None.
+        param min_job_duration: the minimum job duration in seconds the environment must allow.
+        """
+        policy = policy or self.policy
+        if policy not in SELECTION_POLICIES:
+            raise ValueError(
+                f"Unknown policy '{policy}', use one of {SELECTION_POLICIES}."
+            )
+
+        environments = self.environments(service_endpoint, chain_id)
+        with self._lock:
+            if policy == "first":
+                env = environments[0]
+            else:
+                candidates = [
+                    env
+                    for env in environments
+                    if _free_slots(env) > 0
+                    and env.get("maxJobDuration", min_job_duration) >= min_job_duration
+                ] or environments
+                if policy == "free_slots":
+                    env = max(candidates, key=_free_slots)
+                elif policy == "price":
+                    env = min(candidates, key=lambda env: env.get("priceMin", 0))
+                else:
+                    env = max(candidates, key=lambda env: env.get("maxJobDuration", 0))
+            env["currentJobs"] = env.get("currentJobs", 0) + 1
+
+        return env
+
+    def invalidate(self, service_endpoint: str, chain_id: int) -> None:
+        """
+        Drops the cached environments of a provider, e.g. after a failed job start.
+
+        param service_endpoint: the provider endpoint of the compute service.
+        param chain_id: the chain id of the asset.
+        """
+        with self._lock:
+            self._entries.pop((service_endpoint, chain_id), None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters. Every hit is a provider round-trip saved.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "saved_round_trips": self.hits,
+            }
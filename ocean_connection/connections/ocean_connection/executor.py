@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Thread pool used by the connection to run actions concurrently."""
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class ActionExecutor:
+    """
+    Runs connection actions on a shared pool of worker threads.
+
+    Every action type can be given a concurrency limit. Submissions above the
+    limit wait in a per-action queue instead of occupying a worker, so a burst
+    of slow actions (e.g. compute jobs) can never hold every thread while fast
+    ones (e.g. dispenser requests) are waiting.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        action_limits: Optional[Dict[str, int]] = None,
+        thread_name_prefix: str = "ocean_connection",
+    ) -> None:
+        """
+        Initialize the executor.
+
+        param max_workers: the number of worker threads.
+        param action_limits: maximum number of concurrently running actions per action type.
+        Action types without a limit may use every worker.
+        param thread_name_prefix: prefix of the worker thread names.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be greater than 0.")
+
+        self.max_workers = max_workers
+        self.action_limits = dict(action_limits or {})
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._queued: Dict[str, Deque[Tuple[Future, Callable, dict]]] = defaultdict(
+            deque
+        )
+        self._shutdown = False
+
+    def limit_for(self, action_type: str) -> int:
+        """Return the concurrency limit of an action type."""
+        return max(
+            1,
+            min(
+                self.action_limits.get(action_type, self.max_workers), self.max_workers
+            ),
+        )
+
+    def submit(self, action_type: str, fn: Callable, **kwargs) -> Future:
+        """
+        Schedule `fn(**kwargs)` as an action of the given type.
+
+        param action_type: the message type of the action.
+        param fn: the handler to run.
+        return: a future resolved with the result of the handler.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(
+                    "Cannot submit actions after the executor is shut down."
+                )
+            if self._running[action_type] < self.limit_for(action_type):
+                self._running[action_type] += 1
+                start = True
+            else:
+                self._queued[action_type].append((future, fn, kwargs))
+                start = False
+
+        if start:
+            self._start(action_type, future, fn, kwargs)
+
+        return future
+
+    def pending(self, action_type: Optional[str] = None) -> int:
+        """Return the number of queued (not yet running) actions."""
+        with self._lock:
+            if action_type is not None:
+                return len(self._queued[action_type])
+            return sum(len(queue) for queue in self._queued.values())
+
+    def running(self, action_type: Optional[str] = None) -> int:
+        """Return the number of running actions."""
+        with self._lock:
+            if action_type is not None:
+                return self._running[action_type]
+            return sum(self._running.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting actions and cancel the queued ones.
+
+        param wait: whether to wait for the running actions to finish.
+        """
+        with self._lock:
+            self._shutdown = True
+            queued = [item for queue in self._queued.values() for item in queue]
+            self._queued.clear()
+
+        for future, _, _ in queued:
+            future.cancel()
+
+        self._pool.shutdown(wait=wait)
+
+    def _start(self, action_type: str, future: Future, fn: Callable, kwargs: dict):
+        if not future.set_running_or_notify_cancel():
+            self._on_done(action_type)
+            return
+
+        def run():
+            # the slot is released before the future resolves, so a caller
+            # waiting on the result can submit again without seeing it taken
+            try:
+                result = fn(**kwargs)
+            except BaseException as e:  # pylint: disable=broad-except
+                self._on_done(action_type)
+                future.set_exception(e)
+            else:
+                self._on_done(action_type)
+                future.set_result(result)
+
+        try:
+            self._pool.submit(run)
+        except RuntimeError as e:
+            self._on_done(action_type)
+            future.set_exception(e)
+
+    def _on_done(self, action_type: str) -> None:
+        with self._lock:
+            queue = self._queued[action_type]
+            if queue and not self._shutdown:
+                future, fn, kwargs = queue.popleft()
+            else:
+                self._running[action_type] -= 1
+                return
+
+        self._start(action_type, future, fn, kwargs)
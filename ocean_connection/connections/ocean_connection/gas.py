@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Cached gas price oracle used to build EIP-1559 tx dicts."""
+import logging
+import statistics
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+POLYGON_GAS_STATION_URL = "https://gasstation-mainnet.matic.network/v2"
+
+_logger = logging.getLogger(__name__)
+
+
+class GasPrice(NamedTuple):
+    """EIP-1559 fees, in wei."""
+
+    priority_fee: int
+    max_fee: int
+    source: str
+
+
+class GasOracle:
+    """
+    Serves gas prices from a TTL cache.
+
+    Prices are fetched from the gas station first, then derived from the node's
+    `eth_feeHistory`, and finally taken from brownie's `chain`. Values older than
+    `refresh_after` seconds are refreshed in the background while the cached value
+    is still served, and concurrent callers share a single in-flight fetch.
+    """
+
+    def __init__(
+        self,
+        gas_station_url: Optional[str] = POLYGON_GAS_STATION_URL,
+        web3=None,
+        chain=None,
+        ttl: float = 15.0,
+        refresh_after: Optional[float] = None,
+        timeout: float = 3.0,
+        speed: str = "fast",
+        fee_history_blocks: int = 5,
+        fee_history_percentile: int = 75,
+        session: Optional[requests.Session] = None,
+        metrics=None,
+    ) -> None:
+        """
+        Initialize the oracle.
+
+        param gas_station_url: the URL of the gas station, None to skip it.
+        param web3: the web3 instance used for `eth_feeHistory`, None to skip it.
+        param chain: brownie's `chain`, used as last resort.
+        param ttl: seconds after which a cached price is not served anymore.
+        param refresh_after: age in seconds after which a cached price is refreshed
+        in the background, defaults to 3/4 of the TTL.
+        param timeout: timeout in seconds of the gas station requests.
+        param speed: the gas station speed tier to use (`safeLow`, `standard` or `fast`).
+        param fee_history_blocks: number of blocks to use from `eth_feeHistory`.
+        param fee_history_percentile: priority fee percentile to use from `eth_feeHistory`.
+        param session: the HTTP session to reuse, a pooled one is created by default.
+        param metrics: the `ConnectionMetrics` recording the gas station requests, if any.
+        """
+        self.gas_station_url = gas_station_url
+        self.web3 = web3
+        self.chain = chain
+        self.ttl = ttl
+        self.refresh_after = ttl * 0.75 if refresh_after is None else refresh_after
+        self.timeout = timeout
+        self.speed = speed
+        self.fee_history_blocks = fee_history_blocks
+        self.fee_history_percentile = fee_history_percentile
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.metrics = metrics
+
+        self.fetches = 0
+        self._lock = threading.Lock()
+        self._cached: Optional[GasPrice] = None
+        self._fetched_at = 0.0
+        self._in_flight: Optional[threading.Event] = None
+
+    def get(self) -> GasPrice:
+        """Returns the current gas price, fetching it if the cache is stale."""
+        with self._lock:
+            cached, age = self._cached, time.monotonic() - self._fetched_at
+
+        if cached is not None and age < self.ttl:
+            if age >= self.refresh_after:
+                self._refresh_in_background()
+            return cached
+
+        return self.refresh()
+
+    def refresh(self) -> GasPrice:
+        """
+        Fetches a new gas price, joining the fetch already in progress if any.
+        """
+        with self._lock:
+            in_flight = self._in_flight
+            if in_flight is None:
+                in_flight = self._in_flight = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            in_flight.wait()
+            with self._lock:
+                if self._cached is not None:
+                    return self._cached
+            return self.refresh()
+
+        try:
+            price = self._fetch()
+            with self._lock:
+                self._cached = price
+                self._fetched_at = time.monotonic()
+            return price
+        finally:
+            with self._lock:
+                self._in_flight = None
+            in_flight.set()
+
+    def invalidate(self) -> None:
+        """Drops the cached gas price."""
+        with self._lock:
+            self._cached = None
+
+    def close(self) -> None:
+        """Closes the HTTP session."""
+        self.session.close()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._in_flight is not None:
+                return
+
+        threading.Thread(
+            target=self._safe_refresh, name="gas_oracle_refresh", daemon=True
+        ).start()
+
+    def _safe_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:  # pylint: disable=broad-except
+            _logger.warning(f"Background gas price refresh failed: {e}")
+
+    def _fetch(self) -> GasPrice:
+        self.fetches += 1
+        sources: List[Callable[[], Optional[GasPrice]]] = [
+            self._from_gas_station,
+            self._from_fee_history,
+            self._from_chain,
+        ]
+        errors = []
+        for source in sources:
+            try:
+                price = source()
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(f"{source.__name__}: {e}")
+                continue
+            if price is not None:
+                return price
+
+        raise ValueError(f"No gas price source available. Errors: {errors}")
+
+    def _from_gas_station(self) -> Optional[GasPrice]:
+        if not self.gas_station_url:
+            return None
+
+        if self.metrics is None:
+            gas_resp = self.session.get(self.gas_station_url, timeout=self.timeout)
+        else:
+            with self.metrics.timed("gas_station"):
+                gas_resp = self.session.get(self.gas_station_url, timeout=self.timeout)
+        if gas_resp.status_code != 200:
+            raise ValueError(
+                f"Invalid response from gas station: {gas_resp.status_code}"
+            )
+
+        # web3 is slow to import and only needed once a gas station answered.
+        from web3.main import Web3
+
+        fees = gas_resp.json()[self.speed]
+        return GasPrice(
+            priority_fee=Web3.toWei(fees["maxPriorityFee"], "gwei"),
+            max_fee=Web3.toWei(fees["maxFee"], "gwei"),
+            source="gas_station",
+        )
+
+    def _from_fee_history(self) -> Optional[GasPrice]:
+        if self.web3 is None:
+            return None
+
+        history = self.web3.eth.fee_history(
+            self.fee_history_blocks, "latest", [self.fee_history_percentile]
+        )
+        rewards = [reward[0] for reward in history["reward"] if reward]
+        if not rewards:
+            return None
+
+        priority_fee = int(statistics.median(rewards))
+        # The last entry is the base fee of the next block.
+        base_fee = history["baseFeePerGas"][-1]
+        return GasPrice(
+            priority_fee=priority_fee,
+            max_fee=2 * base_fee + priority_fee,
+            source="fee_history",
+        )
+
+    def _from_chain(self) -> Optional[GasPrice]:
+        if self.chain is None:
+            return None
+
+        priority_fee = self.chain.priority_fee
+        return GasPrice(
+            priority_fee=priority_fee,
+            max_fee=self.chain.base_fee + 2 * priority_fee,
+            source="chain",
+        )
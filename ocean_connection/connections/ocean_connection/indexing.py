@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Waiting for Aquarius to index published assets."""
+import concurrent.futures
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+_logger = logging.getLogger(__name__)
+
+
+class IndexingTimeout(TimeoutError):
+    """A watched asset wasn't indexed in time."""
+
+
+class _WatchedAsset:
+    """An asset waiting to be indexed."""
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        self.future: Future = Future()
+
+
+class IndexingWatcher:
+    """
+    Waits for Aquarius to index published assets, for all of them from a single thread.
+
+    Each poll queries all the pending DIDs at once, in batches of `max_batch_size`.
+    A newly watched DID is polled for right away, as Aquarius often has it already.
+    After a poll missing every DID, the interval between polls starts at
+    `min_interval` and grows geometrically while nothing gets indexed. Every watched DID
+    gets a future, resolved with the DID once it is indexed or failed with an
+    `IndexingTimeout`.
+    """
+
+    def __init__(
+        self,
+        query_search: Callable[[dict], List[dict]],
+        min_interval: float = 0.5,
+        max_interval: float = 5.0,
+        backoff: float = 2.0,
+        timeout: float = 300.0,
+        max_batch_size: int = 100,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the watcher.
+
+        param query_search: Aquarius' `query_search`, returning the hits of a query.
+        param min_interval: seconds between polls after the first miss.
+        param max_interval: maximum seconds between two polls.
+        param backoff: factor applied to the interval while nothing gets indexed.
+        param timeout: default seconds after which a DID is given up.
+        param max_batch_size: the maximum number of DIDs per query.
+        param clock: the clock of the polls and timeouts.
+        """
+        self.query_search = query_search
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.clock = clock
+        self.queries = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, _WatchedAsset] = {}
+        self._interval = 0.0
+        self._next_poll_at = clock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, did: str, timeout: Optional[float] = None) -> Future:
+        """
+        Starts waiting for a DID to be indexed.
+
+        A DID already watched shares its future, with the later of both deadlines.
+
+        param did: the DID of the published asset.
+        param timeout: seconds after which the DID is given up, the default one if None.
+        return: the future of the DID.
+        """
+        now = self.clock()
+        deadline = now + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            watched = self._pending.get(did)
+            if watched is None:
+                watched = self._pending[did] = _WatchedAsset(deadline)
+                # DIDs watched while a poll runs are queried together by the next one.
+                self._interval = 0.0
+                self._next_poll_at = now
+            watched.deadline = max(watched.deadline, deadline)
+        self._wakeup.set()
+
+        return watched.future
+
+    def wait(self, dids: Iterable[str], timeout: Optional[float] = None) -> Set[str]:
+        """
+        Waits for DIDs to be indexed, or for their timeout. The watcher must be started.
+
+        param dids: the DIDs to wait for.
+        param timeout: seconds after which the DIDs are given up, the default one if None.
+        return: the DIDs that got indexed.
+        """
+        futures = {did: self.watch(did, timeout) for did in dids}
+        concurrent.futures.wait(futures.values())
+        return {did for did, future in futures.items() if future.exception() is None}
+
+    @property
+    def outstanding(self) -> List[str]:
+        """The DIDs not indexed yet."""
+        with self._lock:
+            return list(self._pending)
+
+    def poll_once(self) -> float:
+        """
+        Queries all the pending DIDs, settling the indexed and the expired ones.
+
+        return: seconds until the next poll.
+        """
+        with self._lock:
+            dids = sorted(self._pending)
+
+        indexed: Set[str] = set()
+        for start in range(0, len(dids), self.max_batch_size):
+            batch = dids[start : start + self.max_batch_size]
+            self.queries += 1
+            try:
+                hits = self.query_search(
+                    {"query": {"terms": {"_id": batch}}, "size": len(batch)}
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                _logger.warning(f"Failed to query Aquarius for {len(batch)} DIDs: {e}")
+                continue
+            indexed.update(hit["_id"] for hit in hits)
+
+        now = self.clock()
+        with self._lock:
+            found = [
+                (did, self._pending.pop(did)) for did in indexed if did in self._pending
+            ]
+            expired = [
+                (did, watched)
+                for did, watched in self._pending.items()
+                if now >= watched.deadline
+            ]
+            for did, _ in expired:
+                del self._pending[did]
+
+            if found:
+                self._interval = self.min_interval
+            else:
+                self._interval = min(
+                    max(self._interval * self.backoff, self.min_interval),
+                    self.max_interval,
+                )
+            self._next_poll_at = now + self._interval
+
+        for did, watched in found:
+            watched.future.set_result(did)
+        for did, watched in expired:
+            watched.future.set_exception(
+                IndexingTimeout(f"Asset {did} was not indexed in time.")
+            )
+
+        return self._interval
+
+    def start(self) -> None:
+        """Starts polling from a background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="ocean-indexing", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops polling, failing the DIDs still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+        for did, watched in pending:
+            watched.future.set_exception(
+                IndexingTimeout(f"Stopped waiting for asset {did}.")
+            )
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            with self._lock:
+                delay = (
+                    None
+                    if not self._pending
+                    else max(0.0, self._next_poll_at - self.clock())
+                )
+            if delay is None or delay > 0:
+                # Sleep until the next poll, or until a DID is watched.
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+
+            self.poll_once()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Tracking of running compute-to-data jobs."""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Status code of a C2D job whose results are published.
+JOB_FINISHED = 70
+
+_logger = logging.getLogger(__name__)
+
+
+class TrackedJob:
+    """A compute job waiting for its results."""
+
+    def __init__(
+        self,
+        job_id: str,
+        ddo: Any,
+        service: Any,
+        consumer_wallet: Any,
+        request: dict,
+        interval: float,
+        now: float,
+    ) -> None:
+        self.job_id = job_id
+        self.ddo = ddo
+        self.service = service
+        self.consumer_wallet = consumer_wallet
+        self.request = request
+        self.interval = interval
+        self.started_at = now
+        self.next_poll_at = now + interval
+        self.last_status: Optional[dict] = None
+        self.polls = 0
+
+
+class ComputeJobTracker:
+    """
+    Polls the status of all the outstanding compute jobs from a single thread.
+
+    Each job is polled with its own interval, growing geometrically while its
+    status doesn't change and reset when it does. When a job finishes, its output
+    files are fetched and handed to `on_finished`. Jobs failing or running longer
+    than `job_timeout` are handed to `on_failed`.
+    """
+
+    def __init__(
+        self,
+        compute: Any,
+        on_finished: Callable[[TrackedJob, List[bytes]], None],
+        on_failed: Callable[[TrackedJob, str], None],
+        min_interval: float = 5.0,
+        max_interval: float = 120.0,
+        backoff: float = 1.5,
+        job_timeout: float = 6 * 3600.0,
+    ) -> None:
+        """
+        Initialize the tracker.
+
+        param compute: the `ocean.compute` API, providing `status` and `result`.
+        param on_finished: called with the job and its output files.
+        param on_failed: called with the job and the reason of the failure.
+        param min_interval: seconds between the first polls of a job.
+        param max_interval: maximum seconds between two polls of a job.
+        param backoff: factor applied to the interval while the status doesn't change.
+        param job_timeout: seconds after which a job is given up.
+        """
+        self.compute = compute
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.job_timeout = job_timeout
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, TrackedJob] = {}
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(
+        self, job_id: str, ddo: Any, service: Any, consumer_wallet: Any, request: dict
+    ) -> None:
+        """
+        Starts tracking a compute job.
+
+        param job_id: the id of the job.
+        param ddo: the DDO of the dataset the job runs on.
+        param service: the compute service of the dataset.
+        param consumer_wallet: the wallet that started the job.
+        param request: the kwargs of the request that started the job.
+        """
+        job = TrackedJob(
+            job_id,
+            ddo,
+            service,
+            consumer_wallet,
+            request,
+            self.min_interval,
+            time.monotonic(),
+        )
+        with self._lock:
+            self._jobs[job_id] = job
+        self._wakeup.set()
+
+    def untrack(self, job_id: str) -> None:
+        """Stops tracking a compute job."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    @property
+    def outstanding(self) -> List[str]:
+        """The ids of the tracked jobs."""
+        with self._lock:
+            return list(self._jobs)
+
+    def poll_once(self) -> float:
+        """
+        Polls every job that is due.
+
+        return: seconds until the next job is due.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [job for job in self._jobs.values() if job.next_poll_at <= now]
+
+        for job in due:
+            self._poll(job)
+
+        with self._lock:
+            if not self._jobs:
+                return self.max_interval
+            next_poll_at = min(job.next_poll_at for job in self._jobs.values())
+
+        return max(0.0, next_poll_at - time.monotonic())
+
+    def run(self, is_running: Callable[[], bool]) -> None:
+        """
+        Polls the jobs until `is_running` returns False.
+
+        param is_running: tells whether to keep polling.
+        """
+        while is_running():
+            delay = self.poll_once()
+            # Wake up early when a job is added, and regularly to check is_running.
+            self._wakeup.wait(min(delay, 1.0))
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Starts polling from a background thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self.run,
+            args=(lambda: not self._stopped.is_set(),),
+            name="ocean-compute-jobs",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops polling. The jobs stay tracked."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self, job: TrackedJob) -> None:
+        self.polls += 1
+        job.polls += 1
+        try:
+            status = self.compute.status(
+                job.ddo, job.service, job.job_id, job.consumer_wallet
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            _logger.warning(f"Failed to get the status of job {job.job_id}: {e}")
+            status = job.last_status
+
+        now = time.monotonic()
+        if status and status.get("status") == JOB_FINISHED:
+            self.untrack(job.job_id)
+            self._finish(job, status)
+            return
+
+        if now - job.started_at > self.job_timeout:
+            self.untrack(job.job_id)
+            self._notify(
+                self.on_failed, job, f"Job did not finish within {self.job_timeout}s."
+            )
+            return
+
+        if (
+            status
+            and job.last_status
+            and status.get("status") != job.last_status.get("status")
+        ):
+            job.interval = self.min_interval
+        else:
+            job.interval = min(job.interval * self.backoff, self.max_interval)
+        job.last_status = status
+        job.next_poll_at = now + job.interval
+
+    def _finish(self, job: TrackedJob, status: dict) -> None:
+        try:
+            results = [
+                self.compute.result(
+                    job.ddo, job.service, job.job_id, index, job.consumer_wallet
+                )
+                for index, result in enumerate(status.get("results") or [])
+                if result.get("type") == "output"
+            ]
+        except Exception as e:  # pylint: disable=broad-except
+            self._notify(self.on_failed, job, f"Failed to fetch the results: {e}")
+            return
+
+        if not results:
+            self._notify(self.on_failed, job, f"Job finished without output: {status}")
+            return
+
+        self._notify(self.on_finished, job, results)
+
+    @staticmethod
+    def _notify(
+        callback: Callable[[TrackedJob, Any], None], job: TrackedJob, outcome: Any
+    ) -> None:
+        # A failing callback must not stop the polling of the other jobs.
+        try:
+            callback(job, outcome)
+        except Exception as e:  # pylint: disable=broad-except
+            _logger.error(f"Failed to hand over the outcome of job {job.job_id}: {e}")
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Write-ahead journal of the actions run by the connection."""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    action_id TEXT PRIMARY KEY,
+    action_type TEXT NOT NULL,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    action_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    data TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (action_id, step)
+);
+CREATE INDEX IF NOT EXISTS actions_status ON actions (status);
+"""
+
+
+class JournalEntry(NamedTuple):
+    """An action of the journal with the steps it completed, in order."""
+
+    action_id: str
+    action_type: str
+    request: dict
+    status: str
+    steps: Dict[str, Any]
+
+    @property
+    def last_step(self) -> Optional[str]:
+        """The last step the action completed, None if it completed none."""
+        return next(reversed(self.steps), None) if self.steps else None
+
+
+class ActionJournal:
+    """
+    Records each action and the steps it completes in a SQLite database.
+
+    Every step is committed before the action moves on, so after a crash the
+    actions still `running` can be resumed from their last completed step, e.g.
+    reusing a paid order instead of paying for it again.
+
+    The writes are group-committed: the start and the end of the actions are
+    queued and committed by a background thread within `flush_interval`, or
+    with the next step, and concurrent steps share a single commit. An action
+    that completed just before a crash may thus be found running after it.
+    """
+
+    def __init__(self, path: str = ":memory:", flush_interval: float = 0.05) -> None:
+        """
+        Initialize the journal.
+
+        param path: the SQLite database file, `:memory:` to not persist the journal.
+        param flush_interval: seconds the queued writes wait to be committed together.
+        """
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+        self.flush_interval = flush_interval
+        self.commits = 0
+        self._pending_lock = threading.Lock()
+        self._pending: List[Tuple[int, str, tuple]] = []
+        self._queued = 0
+        self._committed = 0
+        self._dirty = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(
+            target=self._run_flusher, name="ocean-journal", daemon=True
+        )
+        self._flusher.start()
+
+    def begin(self, action_type: str, request: dict) -> str:
+        """
+        Records the start of an action.
+
+        param action_type: the type of the action.
+        param request: the kwargs of the action, must be JSON serializable.
+        return: the id of the action in the journal.
+        """
+        action_id = uuid.uuid4().hex
+        now = time.time()
+        self._write(
+            [
+                (
+                    "INSERT INTO actions VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                    (
+                        action_id,
+                        action_type,
+                        json.dumps(request, default=str),
+                        RUNNING,
+                        now,
+                        now,
+                    ),
+                )
+            ]
+        )
+
+        return action_id
+
+    def record(self, action_id: str, step: str, data: Any) -> None:
+        """
+        Records a completed step of an action.
+
+        param action_id: the id of the action.
+        param step: the name of the step.
+        param data: what the next steps need to resume, must be JSON serializable.
+        """
+        now = time.time()
+        self._write(
+            [
+                (
+                    "INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?)",
+                    (action_id, step, json.dumps(data), now),
+                ),
+                (
+                    "UPDATE actions SET updated_at = ? WHERE action_id = ?",
+                    (now, action_id),
+                ),
+            ],
+            durable=True,
+        )
+
+    def step(self, action_id: str, step: str) -> Optional[Any]:
+        """
+        Returns the data of a completed step, None if the step wasn't completed.
+
+        param action_id: the id of the action.
+        param step: the name of the step.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM steps WHERE action_id = ? AND step = ?",
+                (action_id, step),
+            ).fetchone()
+
+        return None if row is None else json.loads(row[0])
+
+    def complete(self, action_id: str) -> None:
+        """Records that an action completed."""
+        self._finish(action_id, COMPLETED, None)
+
+    def fail(self, action_id: str, error: str) -> None:
+        """Records that an action failed for good."""
+        self._finish(action_id, FAILED, error)
+
+    def get(self, action_id: str) -> Optional[JournalEntry]:
+        """Returns an action of the journal, None if it is unknown."""
+        self.flush()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT action_id, action_type, request, status FROM actions WHERE action_id = ?",
+                (action_id,),
+            ).fetchone()
+            return None if row is None else self._entry(row)
+
+    def incomplete(self) -> List[JournalEntry]:
+        """Returns the actions that were running when the journal was last closed."""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT action_id, action_type, request, status FROM actions "
+                "WHERE status = ? ORDER BY created_at",
+                (RUNNING,),
+            ).fetchall()
+            return [self._entry(row) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """
+        Deletes the finished actions last updated more than `older_than` seconds ago.
+
+        return: the number of deleted actions.
+        """
+        cutoff = time.time() - older_than
+        self.flush()
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute(
+                    "DELETE FROM steps WHERE action_id IN (SELECT action_id FROM actions "
+                    "WHERE status != ? AND updated_at < ?)",
+                    (RUNNING, cutoff),
+                )
+                deleted = self._db.execute(
+                    "DELETE FROM actions WHERE status != ? AND updated_at < ?",
+                    (RUNNING, cutoff),
+                ).rowcount
+
+        return deleted
+
+    def flush(self) -> None:
+        """Commits the queued writes."""
+        self._commit(None)
+
+    def close(self) -> None:
+        """Commits the queued writes and closes the database."""
+        self._closed = True
+        self._dirty.set()
+        self._flusher.join()
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def _finish(self, action_id: str, status: str, error: Optional[str]) -> None:
+        self._write(
+            [
+                (
+                    "UPDATE actions SET status = ?, error = ?, updated_at = ? WHERE action_id = ?",
+                    (status, error, time.time(), action_id),
+                )
+            ]
+        )
+
+    def _write(
+        self, statements: List[Tuple[str, tuple]], durable: bool = False
+    ) -> None:
+        """
+        Queues statements to be committed together.
+
+        param statements: the SQL statements and their parameters.
+        param durable: whether to wait for them to be committed.
+        """
+        with self._pending_lock:
+            self._queued += 1
+            queued = self._queued
+            self._pending.extend((queued, sql, params) for sql, params in statements)
+
+        if durable:
+            self._commit(queued)
+        else:
+            self._dirty.set()
+
+    def _commit(self, queued: Optional[int]) -> None:
+        """
+        Commits the queued statements in a single transaction.
+
+        param queued: the write to commit, returns at once if a concurrent commit
+            included it already. None to commit all the queued writes.
+        """
+        with self._lock:
+            if queued is not None and self._committed >= queued:
+                return
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            with self._db:
+                self._db.execute("BEGIN")
+                for _, sql, params in batch:
+                    self._db.execute(sql, params)
+            self._committed = batch[-1][0]
+            self.commits += 1
+
+    def _run_flusher(self) -> None:
+        while not self._closed:
+            self._dirty.wait()
+            # Lets the writes of the concurrent actions queue up.
+            time.sleep(self.flush_interval)
+            self._dirty.clear()
+            if not self._closed:
+                self.flush()
+
+    def _entry(self, row: tuple) -> JournalEntry:
+        action_id, action_type, request, status = row
+        steps = self._db.execute(
+            "SELECT step, data FROM steps WHERE action_id = ? ORDER BY recorded_at, rowid",
+            (action_id,),
+        ).fetchall()
+        return JournalEntry(
+            action_id,
+            action_type,
+            json.loads(request),
+            status,
+            {step: json.loads(data) for step, data in steps},
+        )
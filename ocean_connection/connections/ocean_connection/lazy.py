@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Imports of the heavy dependencies deferred until their first use."""
+import importlib
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+_UNRESOLVED = object()
+_lock = threading.RLock()
+_import_times: Dict[str, float] = {}
+
+
+class LazyObject:
+    """
+    Stands for a module, or an attribute of it, until it is first used.
+
+    Importing brownie, web3 and ocean_lib takes seconds, so the connection
+    module only refers to them through lazy objects: the import happens on the
+    first attribute access or call, typically while connecting.
+    """
+
+    def __init__(self, module: str, attribute: Optional[str] = None) -> None:
+        """
+        Initialize the lazy object.
+
+        param module: the dotted name of the module to import.
+        param attribute: the attribute of the module to stand for, None for the module itself.
+        """
+        self.__dict__["_lazy_module"] = module
+        self.__dict__["_lazy_attribute"] = attribute
+        self.__dict__["_lazy_target"] = _UNRESOLVED
+
+    def resolve(self) -> Any:
+        """Imports the module if needed and returns the object stood for."""
+        target = self.__dict__["_lazy_target"]
+        if target is _UNRESOLVED:
+            with _lock:
+                target = self.__dict__["_lazy_target"]
+                if target is _UNRESOLVED:
+                    target = import_module(self._lazy_module)
+                    if self._lazy_attribute is not None:
+                        target = getattr(target, self._lazy_attribute)
+                    self.__dict__["_lazy_target"] = target
+
+        return target
+
+    @property
+    def resolved(self) -> bool:
+        """Whether the object was imported already."""
+        return self.__dict__["_lazy_target"] is not _UNRESOLVED
+
+    def __getattr__(self, name: str) -> Any:
+        """Forwards attribute reads to the object stood for."""
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Forwards attribute writes to the object stood for."""
+        setattr(self.resolve(), name, value)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Calls the object stood for."""
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        """Returns a representation that doesn't trigger the import."""
+        name = self._lazy_module
+        if self._lazy_attribute is not None:
+            name = f"{name}.{self._lazy_attribute}"
+        state = "resolved" if self.resolved else "unresolved"
+        return f"<LazyObject {name} ({state})>"
+
+
+def lazy_import(module: str, attribute: Optional[str] = None) -> LazyObject:
+    """
+    Returns a lazy object for a module or an attribute of it.
+
+    param module: the dotted name of the module.
+    param attribute: the attribute of the module, None for the module itself.
+    """
+    return LazyObject(module, attribute)
+
+
+def import_module(module: str) -> Any:
+    """
+    Imports a module, recording how long the import took if it wasn't imported yet.
+
+    param module: the dotted name of the module.
+    """
+    with _lock:
+        start = time.perf_counter()
+        imported = importlib.import_module(module)
+        elapsed = time.perf_counter() - start
+        _import_times.setdefault(module, elapsed)
+
+    return imported
+
+
+def import_times() -> Dict[str, float]:
+    """Returns the seconds taken by the deferred imports, in the order they happened."""
+    with _lock:
+        return dict(_import_times)
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Latency, outcome and gas metrics of the connection, exported for Prometheus."""
+import asyncio
+import bisect
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+# The external dependencies of the connection.
+DEPENDENCIES = ("rpc", "aquarius", "provider", "gas_station")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Counts observations in buckets, like a Prometheus histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        Initialize the histogram.
+
+        param buckets: the upper bounds of the buckets, the `+Inf` one is implicit.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Adds an observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Returns the cumulative count of each bucket, keyed by its `le` label."""
+        total = 0
+        cumulative = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            cumulative.append((_format_value(bound), total))
+        return cumulative
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile as the upper bound of the bucket it falls into.
+
+        return: the estimate, None without observations, `inf` beyond the last bucket.
+        """
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the count, the sum and the main quantiles."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class ConnectionMetrics:
+    """
+    Metrics of the actions of the connection, and of the dependencies they call.
+
+    For each action type: a latency histogram, the number of actions that
+    succeeded or failed, the retries of its steps and the gas it used. For each
+    of the `DEPENDENCIES`: a latency histogram and the number of failed calls.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """
+        Initialize the metrics.
+
+        param buckets: the buckets of the latency histograms, in seconds.
+        param clock: the clock the latencies are measured with.
+        """
+        self.buckets = buckets
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._actions: Dict[str, Histogram] = {}
+        self._outcomes: Counter = Counter()
+        self._retries: Counter = Counter()
+        self._gas: Counter = Counter()
+        self._dependencies: Dict[str, Histogram] = {}
+        self._dependency_errors: Counter = Counter()
+
+    def observe_action(self, action: str, seconds: float, succeeded: bool) -> None:
+        """
+        Records a finished action.
+
+        param action: the action type.
+        param seconds: how long the action took.
+        param succeeded: whether the action succeeded.
+        """
+        with self._lock:
+            self._histogram(self._actions, action).observe(seconds)
+            self._outcomes[(action, "succeeded" if succeeded else "failed")] += 1
+
+    def count_retry(self, step: str, error_class: str) -> None:
+        """
+        Records the retry of a step of an action.
+
+        param step: the name of the step, e.g. `BUY_DATATOKENS`.
+        param error_class: the class of the error retried, see `retry.classify_error`.
+        """
+        with self._lock:
+            self._retries[(step, error_class)] += 1
+
+    def add_gas(self, action: str, gas: int) -> None:
+        """Adds gas used by the transactions of an action."""
+        with self._lock:
+            self._gas[action] += gas
+
+    def observe_dependency(
+        self, dependency: str, seconds: float, failed: bool = False
+    ) -> None:
+        """
+        Records a call to an external dependency.
+
+        param dependency: one of `DEPENDENCIES`.
+        param seconds: how long the call took.
+        param failed: whether the call failed.
+        """
+        with self._lock:
+            self._histogram(self._dependencies, dependency).observe(seconds)
+            if failed:
+                self._dependency_errors[dependency] += 1
+
+    @contextmanager
+    def timed(self, dependency: str) -> Iterator[None]:
+        """Records the call to a dependency made in the block, failed if it raises."""
+        start = self.clock()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.observe_dependency(dependency, self.clock() - start, failed)
+
+    def wrap(self, fn: Callable, dependency: str) -> Callable:
+        """Returns the function, recording its calls as calls to a dependency."""
+        if asyncio.iscoroutinefunction(fn):
+
+            async def timed_coroutine(*args: Any, **kwargs: Any) -> Any:
+                with self.timed(dependency):
+                    return await fn(*args, **kwargs)
+
+            return timed_coroutine
+
+        def timed_fn(*args: Any, **kwargs: Any) -> Any:
+            with self.timed(dependency):
+                return fn(*args, **kwargs)
+
+        return timed_fn
+
+    def instrument(self, target: Any, dependency: str) -> Any:
+        """Returns a proxy of the object recording its method calls as calls to a dependency."""
+        return _Instrumented(target, self, dependency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the current values of the metrics, e.g. for a state update."""
+        with self._lock:
+            actions = {
+                action: {
+                    **histogram.as_dict(),
+                    "succeeded": self._outcomes[(action, "succeeded")],
+                    "failed": self._outcomes[(action, "failed")],
+                    "gas_used": self._gas[action],
+                }
+                for action, histogram in self._actions.items()
+            }
+            for action, gas in self._gas.items():
+                actions.setdefault(action, {"gas_used": gas})
+
+            retries: Dict[str, Dict[str, int]] = {}
+            for (step, error_class), count in self._retries.items():
+                retries.setdefault(step, {})[error_class] = count
+
+            dependencies = {
+                dependency: {
+                    **histogram.as_dict(),
+                    "errors": self._dependency_errors[dependency],
+                }
+                for dependency, histogram in self._dependencies.items()
+            }
+
+        return {"actions": actions, "retries": retries, "dependencies": dependencies}
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            _histogram_lines(
+                lines,
+                "ocean_connection_action_duration_seconds",
+                "Duration of the actions of the connection.",
+                "action",
+                self._actions,
+            )
+            _counter_lines(
+                lines,
+                "ocean_connection_actions_total",
+                "Finished actions of the connection, by outcome.",
+                ("action", "outcome"),
+                self._outcomes,
+            )
+            _counter_lines(
+                lines,
+                "ocean_connection_retries_total",
+                "Retries of the steps of the actions, by error class.",
+                ("step", "error_class"),
+                self._retries,
+            )
+            _counter_lines(
+                lines,
+                "ocean_connection_gas_used_total",
+                "Gas used by the transactions of the actions.",
+                ("action",),
+                {(action,): gas for action, gas in self._gas.items()},
+            )
+            _histogram_lines(
+                lines,
+                "ocean_connection_dependency_duration_seconds",
+                "Duration of the calls to the external dependencies.",
+                "dependency",
+                self._dependencies,
+            )
+            _counter_lines(
+                lines,
+                "ocean_connection_dependency_errors_total",
+                "Failed calls to the external dependencies.",
+                ("dependency",),
+                {
+                    (dependency,): count
+                    for dependency, count in self._dependency_errors.items()
+                },
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def _histogram(self, histograms: Dict[str, Histogram], key: str) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        return histogram
+
+
+class _Instrumented:
+    """Proxy recording the method calls of an object as calls to a dependency."""
+
+    def __init__(
+        self, target: Any, metrics: ConnectionMetrics, dependency: str
+    ) -> None:
+        self._target = target
+        self._metrics = metrics
+        self._dependency = dependency
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+        if callable(value):
+            return self._metrics.wrap(value, self._dependency)
+        return value
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else f"{value:.1f}"
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+def _histogram_lines(
+    lines: List[str],
+    name: str,
+    help_text: str,
+    label: str,
+    histograms: Dict[str, Histogram],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        labels = _labels([label], [key])
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def _counter_lines(
+    lines: List[str],
+    name: str,
+    help_text: str,
+    label_names: Sequence[str],
+    counts: Dict[Tuple, int],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for key, count in sorted(counts.items()):
+        lines.append(f"{name}{{{_labels(label_names, key)}}} {count}")
+
+
+class MetricsServer:
+    """Serves the metrics in the Prometheus text format on `/metrics`, from a background thread."""
+
+    def __init__(
+        self, metrics: ConnectionMetrics, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        """
+        Initialize the server and start serving.
+
+        param metrics: the metrics to serve.
+        param host: the interface to listen on, only the local one by default.
+        param port: the port to listen on, 0 to pick a free one.
+        """
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="ocean-metrics", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on."""
+        return self._server.server_address[1]
+
+    def close(self) -> None:
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class PeriodicTask:
+    """Calls a function at a fixed interval from a background thread, until stopped."""
+
+    def __init__(
+        self,
+        interval: float,
+        fn: Callable[[], None],
+        name: str = "ocean-metrics-report",
+    ) -> None:
+        """
+        Initialize the task and start it.
+
+        param interval: seconds between the calls.
+        param fn: the function to call.
+        param name: the name of the background thread.
+        """
+        self.interval = interval
+        self._fn = fn
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops calling the function."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._fn()
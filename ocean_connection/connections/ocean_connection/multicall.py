@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Batching of read-only contract calls."""
+import itertools
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+import requests
+from hexbytes import HexBytes
+
+
+# Multicall3 is deployed at the same address on most chains.
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+# aggregate3((address,bool,bytes)[])
+AGGREGATE3_SELECTOR = HexBytes("0x82ad56cb")
+# balanceOf(address)
+BALANCE_OF_SELECTOR = HexBytes("0x70a08231")
+
+STRATEGIES = ("multicall", "rpc_batch", "sequential")
+
+
+class Call(NamedTuple):
+    """A read-only call to `target`, `decode` turning the returned bytes into the result."""
+
+    target: str
+    data: bytes
+    decode: Callable[[bytes], Any]
+
+
+class CallFailed(Exception):
+    """A batched call reverted."""
+
+
+def contract_call(method: Any, *args: Any) -> Call:
+    """
+    Builds a call from a brownie contract method, e.g. `contract_call(token.balanceOf, owner)`.
+
+    param method: the contract method.
+    param args: the arguments of the method.
+    """
+    return Call(
+        method._address, HexBytes(method.encode_input(*args)), method.decode_output
+    )
+
+
+def balance_of_call(token_address: str, owner: str) -> Call:
+    """
+    Builds an ERC20 `balanceOf` call without needing the token contract.
+
+    param token_address: the address of the token.
+    param owner: the address whose balance is read.
+    """
+    from eth_abi import decode_abi, encode_abi
+
+    return Call(
+        token_address,
+        bytes(BALANCE_OF_SELECTOR) + encode_abi(["address"], [owner]),
+        lambda data: decode_abi(["uint256"], data)[0],
+    )
+
+
+class BatchReader:
+    """
+    Executes many read-only calls in as few round-trips as possible.
+
+    The calls go through the Multicall3 contract when it is deployed on the chain,
+    otherwise through JSON-RPC batch requests when the provider is reached over HTTP,
+    otherwise one by one.
+    """
+
+    def __init__(
+        self,
+        web3: Any,
+        strategy: Optional[str] = None,
+        max_batch_size: int = 500,
+        multicall_address: str = MULTICALL3_ADDRESS,
+        session: Optional[requests.Session] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        """
+        Initialize the reader.
+
+        param web3: the web3 instance of the chain.
+        param strategy: one of `STRATEGIES`, detected from the chain if None.
+        param max_batch_size: the maximum number of calls per round-trip.
+        param multicall_address: the address of the Multicall3 contract.
+        param session: the HTTP session used for JSON-RPC batches.
+        param timeout: seconds to wait for a JSON-RPC batch response.
+        """
+        if strategy is not None and strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', use one of {STRATEGIES}.")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be greater than 0.")
+
+        self.web3 = web3
+        self.max_batch_size = max_batch_size
+        self.multicall_address = multicall_address
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.round_trips = 0
+        self._strategy = strategy
+        self._request_ids = itertools.count(1)
+
+    @property
+    def strategy(self) -> str:
+        """The strategy used, detected on first use."""
+        if self._strategy is None:
+            self._strategy = self._detect_strategy()
+        return self._strategy
+
+    def execute(self, calls: Sequence[Call], allow_failure: bool = False) -> List[Any]:
+        """
+        Executes the calls and returns their decoded results, in order.
+
+        param calls: the calls to execute.
+        param allow_failure: return a `CallFailed` in place of the result of a
+        reverted call instead of raising it.
+        """
+        results: List[Any] = []
+        for start in range(0, len(calls), self.max_batch_size):
+            batch = calls[start : start + self.max_batch_size]
+            if self.strategy == "multicall":
+                outputs = self._multicall(batch)
+            elif self.strategy == "rpc_batch":
+                outputs = self._rpc_batch(batch)
+            else:
+                outputs = self._sequential(batch)
+
+            for call, output in zip(batch, outputs):
+                if isinstance(output, CallFailed):
+                    if not allow_failure:
+                        raise output
+                    results.append(output)
+                else:
+                    results.append(call.decode(output))
+
+        return results
+
+    def _detect_strategy(self) -> str:
+        try:
+            if len(self.web3.eth.get_code(self.multicall_address)) > 0:
+                return "multicall"
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+        if getattr(self.web3.provider, "endpoint_uri", None):
+            return "rpc_batch"
+        return "sequential"
+
+    def _multicall(self, batch: Sequence[Call]) -> List[Any]:
+        from eth_abi import decode_abi, encode_abi
+
+        data = bytes(AGGREGATE3_SELECTOR) + encode_abi(
+            ["(address,bool,bytes)[]"],
+            [[(call.target, True, bytes(call.data)) for call in batch]],
+        )
+        self.round_trips += 1
+        returned = self.web3.eth.call({"to": self.multicall_address, "data": data})
+        (outputs,) = decode_abi(["(bool,bytes)[]"], HexBytes(returned))
+
+        return [
+            output if success else CallFailed(f"Call to {call.target} reverted.")
+            for call, (success, output) in zip(batch, outputs)
+        ]
+
+    def _rpc_batch(self, batch: Sequence[Call]) -> List[Any]:
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": next(self._request_ids),
+                "method": "eth_call",
+                "params": [
+                    {"to": call.target, "data": HexBytes(call.data).hex()},
+                    "latest",
+                ],
+            }
+            for call in batch
+        ]
+        self.round_trips += 1
+        response = self.session.post(
+            self.web3.provider.endpoint_uri, json=payload, timeout=self.timeout
+        )
+        response.raise_for_status()
+        replies = response.json()
+        if not isinstance(replies, list):
+            # Providers not supporting batches answer with a single error.
+            raise ValueError(f"JSON-RPC batch rejected: {replies}")
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        outputs = []
+        for call, request in zip(batch, payload):
+            reply = by_id.get(request["id"], {})
+            if "result" in reply:
+                outputs.append(HexBytes(reply["result"]))
+            else:
+                outputs.append(
+                    CallFailed(f"Call to {call.target} failed: {reply.get('error')}")
+                )
+
+        return outputs
+
+    def _sequential(self, batch: Sequence[Call]) -> List[Any]:
+        outputs = []
+        for call in batch:
+            self.round_trips += 1
+            try:
+                outputs.append(
+                    HexBytes(self.web3.eth.call({"to": call.target, "data": call.data}))
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                outputs.append(CallFailed(f"Call to {call.target} failed: {e}"))
+
+        return outputs
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Local nonce allocation for wallets sending transactions concurrently."""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Set
+
+
+_logger = logging.getLogger(__name__)
+
+
+class _WalletNonces:
+    """Nonce bookkeeping of a single wallet."""
+
+    def __init__(self, next_nonce: int) -> None:
+        self.next_nonce = next_nonce
+        self.in_flight: Dict[int, float] = {}
+        self.free: Set[int] = set()
+        self.exclusive = threading.RLock()
+
+
+class NonceManager:
+    """
+    Hands out transaction nonces locally, keyed by wallet address.
+
+    The first allocation for a wallet reads the pending transaction count from the
+    node. Later allocations are served from memory, so several transactions of the
+    same wallet can be broadcast back-to-back without waiting for each other.
+    Nonces of transactions that failed are handed out again, and the state is
+    reconciled with the node whenever a gap or a dropped transaction is detected.
+    """
+
+    def __init__(self, web3, drop_timeout: float = 120.0) -> None:
+        """
+        Initialize the nonce manager.
+
+        param web3: the web3 instance used to read transaction counts.
+        param drop_timeout: seconds after which an unmined transaction that the
+        node does not know about is considered dropped.
+        """
+        self.web3 = web3
+        self.drop_timeout = drop_timeout
+        self._lock = threading.Lock()
+        self._settled = threading.Condition(self._lock)
+        self._wallets: Dict[str, _WalletNonces] = {}
+
+    def allocate(self, address: str) -> int:
+        """
+        Returns the next nonce to use for a transaction of the wallet.
+
+        param address: the address of the wallet.
+        """
+        wallet = self._wallet(address)
+        with wallet.exclusive:
+            with self._lock:
+                if wallet.free:
+                    nonce = min(wallet.free)
+                    wallet.free.discard(nonce)
+                else:
+                    nonce = wallet.next_nonce
+                    wallet.next_nonce += 1
+                wallet.in_flight[nonce] = time.monotonic()
+
+        return nonce
+
+    def confirm(self, address: str, nonce: int) -> None:
+        """
+        Marks the transaction with the given nonce as mined.
+
+        param address: the address of the wallet.
+        param nonce: the nonce of the mined transaction.
+        """
+        wallet = self._wallet(address)
+        with self._lock:
+            wallet.in_flight.pop(nonce, None)
+            self._settled.notify_all()
+
+    def fail(self, address: str, nonce: int) -> None:
+        """
+        Marks the transaction with the given nonce as failed and resyncs the wallet.
+
+        The transaction might or might not have consumed its nonce (e.g. an on-chain
+        revert does, a failed gas estimation does not), so the node is asked.
+
+        param address: the address of the wallet.
+        param nonce: the nonce of the failed transaction.
+        """
+        wallet = self._wallet(address)
+        with self._lock:
+            wallet.in_flight.pop(nonce, None)
+        self.resync(address)
+
+    def resync(self, address: str) -> None:
+        """
+        Reconciles the local state of the wallet with the node.
+
+        Nonces below the pending transaction count of the node are known to it and
+        stop being tracked. Unused nonces between the pending count and the locally
+        allocated ones are gaps and get handed out first.
+
+        param address: the address of the wallet.
+        """
+        pending = self.web3.eth.get_transaction_count(address, "pending")
+        wallet = self._wallet(address)
+        with self._lock:
+            for nonce in [n for n in wallet.in_flight if n < pending]:
+                del wallet.in_flight[nonce]
+            self._settled.notify_all()
+
+            if not wallet.in_flight:
+                wallet.next_nonce = pending
+                wallet.free.clear()
+                return
+
+            wallet.next_nonce = max(wallet.next_nonce, pending)
+            wallet.free = {
+                n
+                for n in range(pending, wallet.next_nonce)
+                if n not in wallet.in_flight
+            }
+
+    def detect_gaps(self, address: str) -> List[int]:
+        """
+        Checks the wallet for dropped transactions and resyncs if any are found.
+
+        A transaction counts as dropped when it has been in flight for longer than
+        `drop_timeout` and the node's pending count has not moved past its nonce.
+
+        param address: the address of the wallet.
+        return: the nonces of the dropped transactions.
+        """
+        wallet = self._wallet(address)
+        pending = self.web3.eth.get_transaction_count(address, "pending")
+        now = time.monotonic()
+        with self._lock:
+            dropped = sorted(
+                nonce
+                for nonce, sent_at in wallet.in_flight.items()
+                if nonce >= pending and now - sent_at > self.drop_timeout
+            )
+            for nonce in dropped:
+                del wallet.in_flight[nonce]
+
+        if dropped or wallet.free:
+            self.resync(address)
+
+        return dropped
+
+    def detect_all_gaps(self) -> Dict[str, List[int]]:
+        """
+        Runs `detect_gaps` for every wallet with transactions in flight.
+
+        return: the nonces of the dropped transactions, by wallet address.
+        """
+        with self._lock:
+            addresses = [
+                address
+                for address, wallet in self._wallets.items()
+                if wallet.in_flight or wallet.free
+            ]
+
+        dropped = {}
+        for address in addresses:
+            try:
+                nonces = self.detect_gaps(address)
+            except Exception as e:  # pylint: disable=broad-except
+                _logger.warning(f"Failed to check the nonces of {address}: {e}")
+                continue
+            if nonces:
+                _logger.warning(
+                    f"Transactions of {address} with nonces {nonces} were dropped, resynced."
+                )
+                dropped[address] = nonces
+        return dropped
+
+    def in_flight(self, address: str) -> int:
+        """Returns the number of allocated nonces not yet confirmed for the wallet."""
+        wallet = self._wallet(address)
+        with self._lock:
+            return len(wallet.in_flight)
+
+    @contextmanager
+    def reserve(self, address: str) -> Iterator[int]:
+        """
+        Allocates a nonce for a single transaction.
+
+        The nonce is confirmed when the block exits normally, and released with a
+        resync when it raises.
+
+        param address: the address of the wallet.
+        """
+        nonce = self.allocate(address)
+        try:
+            yield nonce
+        except BaseException:
+            self.fail(address, nonce)
+            raise
+        else:
+            self.confirm(address, nonce)
+
+    @contextmanager
+    def exclusive(self, address: str) -> Iterator[None]:
+        """
+        Blocks nonce allocation for the wallet while a block sends transactions
+        with node-assigned nonces, e.g. library calls sending several transactions
+        with one tx dict. Waits for the locally allocated nonces to settle first,
+        and resyncs the wallet afterwards.
+
+        param address: the address of the wallet.
+        """
+        wallet = self._wallet(address)
+        with wallet.exclusive:
+            with self._settled:
+                settled = self._settled.wait_for(
+                    lambda: not wallet.in_flight, timeout=self.drop_timeout
+                )
+            if not settled:
+                _logger.warning(
+                    f"Nonces of {address} still in flight after {self.drop_timeout}s, resyncing."
+                )
+                self.detect_gaps(address)
+            try:
+                yield
+            finally:
+                self.resync(address)
+
+    def _wallet(self, address: str) -> _WalletNonces:
+        with self._lock:
+            wallet = self._wallets.get(address)
+        if wallet is not None:
+            return wallet
+
+        pending = self.web3.eth.get_transaction_count(address, "pending")
+        with self._lock:
+            return self._wallets.setdefault(address, _WalletNonces(pending))
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Retrying of failed actions with error classification and backoff."""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+
+# Timeouts, dropped connections and rate limiting of the RPC node.
+TRANSIENT = "transient"
+# The nonce of the transaction was already used or is out of sync.
+NONCE = "nonce"
+# The transaction or the call reverted.
+REVERT = "revert"
+# Errors of the Ocean provider, Aquarius or the compute environment.
+PROVIDER = "provider"
+# Anything else, e.g. invalid arguments: retrying can't help.
+FATAL = "fatal"
+
+_NONCE_PATTERNS = (
+    "nonce too low",
+    "nonce too high",
+    "invalid nonce",
+    "replacement transaction underpriced",
+    "already known",
+    "known transaction",
+    "incorrect nonce",
+)
+_REVERT_PATTERNS = ("revert", "vm exception", "out of gas", "invalid opcode")
+_TRANSIENT_PATTERNS = (
+    "timeout",
+    "timed out",
+    "connection",
+    "too many requests",
+    "429",
+    "502",
+    "503",
+    "504",
+    "header not found",
+    "temporarily unavailable",
+)
+_PROVIDER_PATTERNS = ("provider", "aquarius", "c2d", "compute job", "environment")
+
+_TRANSIENT_TYPES = ("Timeout", "ConnectionError", "ConnectTimeout", "ReadTimeout")
+_REVERT_TYPES = ("VirtualMachineError", "ContractLogicError")
+_PROVIDER_TYPES = ("HTTPError", "DataProviderException", "AquariusError")
+
+_logger = logging.getLogger(__name__)
+
+
+def _type_names(error: BaseException) -> Iterable[str]:
+    return (cls.__name__ for cls in type(error).__mro__)
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classifies an error to decide whether and how to retry.
+
+    The error types are matched by name, so that brownie, web3 and requests
+    exceptions are recognised without importing those libraries.
+
+    param error: the error raised by the action.
+    return: one of `TRANSIENT`, `NONCE`, `REVERT`, `PROVIDER` or `FATAL`.
+    """
+    names = set(_type_names(error))
+    message = str(error).lower()
+
+    if any(pattern in message for pattern in _NONCE_PATTERNS):
+        return NONCE
+    if names.intersection(_REVERT_TYPES) or any(
+        pattern in message for pattern in _REVERT_PATTERNS
+    ):
+        return REVERT
+    if (
+        isinstance(error, (TimeoutError, ConnectionError))
+        or names.intersection(_TRANSIENT_TYPES)
+        or any(pattern in message for pattern in _TRANSIENT_PATTERNS)
+    ):
+        return TRANSIENT
+    if names.intersection(_PROVIDER_TYPES) or any(
+        pattern in message for pattern in _PROVIDER_PATTERNS
+    ):
+        return PROVIDER
+    return FATAL
+
+
+class RetryPolicy:
+    """
+    How an action is retried.
+
+    Each error class has its own number of retries: reverts are usually retried
+    once at most, as the same transaction is likely to revert again and burn gas.
+    The delay before retry `n` is `base_delay * multiplier ** (n - 1)`, capped at
+    `max_delay`, with full jitter.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retries: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Initialize the policy.
+
+        param max_attempts: the maximum number of attempts, whatever the errors.
+        param base_delay: seconds to wait before the first retry.
+        param max_delay: maximum seconds to wait before a retry.
+        param multiplier: factor applied to the delay after each retry.
+        param jitter: whether to pick the delay at random between 0 and its value.
+        param retries: the maximum number of retries per error class.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be greater than 0.")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retries = {
+            TRANSIENT: max_attempts - 1,
+            NONCE: max_attempts - 1,
+            PROVIDER: max_attempts - 1,
+            REVERT: min(1, max_attempts - 1),
+            FATAL: 0,
+        }
+        self.retries.update(retries or {})
+
+    def delay(self, retry: int) -> float:
+        """
+        Returns the seconds to wait before a retry.
+
+        param retry: the number of the retry, starting at 1.
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)  # nosec
+
+        return delay
+
+
+class RetryBudget:
+    """
+    Limits the number of retries within a sliding time window.
+
+    Shared by all the actions of a connection, it keeps a struggling node from
+    being hammered by the retries of many actions at once.
+    """
+
+    def __init__(self, max_retries: int = 50, window: float = 60.0) -> None:
+        """
+        Initialize the budget.
+
+        param max_retries: the number of retries allowed within the window.
+        param window: the length of the window in seconds.
+        """
+        self.max_retries = max_retries
+        self.window = window
+        self.exhausted = 0
+        self._lock = threading.Lock()
+        self._retries: Deque[float] = deque()
+
+    def acquire(self) -> bool:
+        """Takes a retry from the budget, returns False if there is none left."""
+        now = time.monotonic()
+        with self._lock:
+            while self._retries and now - self._retries[0] >= self.window:
+                self._retries.popleft()
+            if len(self._retries) >= self.max_retries:
+                self.exhausted += 1
+                return False
+            self._retries.append(now)
+            return True
+
+
+class Outcome:
+    """The result of an action run by the `Retrier`."""
+
+    def __init__(
+        self,
+        succeeded: bool,
+        value: Any = None,
+        error: Optional[BaseException] = None,
+        error_class: Optional[str] = None,
+        attempts: int = 0,
+    ) -> None:
+        self.succeeded = succeeded
+        self.value = value
+        self.error = error
+        self.error_class = error_class
+        self.attempts = attempts
+
+    def unwrap(self) -> Any:
+        """Returns the value of a successful action, raises a `RetryError` otherwise."""
+        if not self.succeeded:
+            raise RetryError(self)
+        return self.value
+
+
+class RetryError(Exception):
+    """An action failed after its retries."""
+
+    def __init__(self, outcome: Outcome) -> None:
+        super().__init__(
+            f"Failed after {outcome.attempts} attempt(s) with {outcome.error_class} error: {outcome.error}"
+        )
+        self.outcome = outcome
+
+
+class Retrier:
+    """
+    Runs actions, retrying them in a loop according to their policy.
+
+    A retry happens only if the policy allows another one for the error class and
+    the shared budget isn't exhausted.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[RetryBudget] = None,
+        classify: Callable[[BaseException], str] = classify_error,
+        sleep: Callable[[float], None] = time.sleep,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        """
+        Initialize the retrier.
+
+        param budget: the retry budget shared by all actions, unlimited if None.
+        param classify: classifies the errors.
+        param sleep: waits between attempts.
+        param logger: the logger to report failures to.
+        """
+        self.budget = budget
+        self.classify = classify
+        self.sleep = sleep
+        self.logger = logger or _logger
+
+    def run(
+        self,
+        fn: Callable[[], Any],
+        policy: RetryPolicy,
+        name: str = "action",
+        on_retry: Optional[Callable[[BaseException, str], None]] = None,
+    ) -> Outcome:
+        """
+        Runs `fn` until it succeeds or may not be retried anymore.
+
+        param fn: the action, without arguments.
+        param policy: the retry policy of the action.
+        param name: the name of the action, for logging.
+        param on_retry: called with the error and its class before each retry,
+        e.g. to resynchronise nonces or drop cached state.
+        return: the outcome of the action.
+        """
+        retries: Dict[str, int] = {}
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return Outcome(True, value=fn(), attempts=attempt)
+            except Exception as e:  # pylint: disable=broad-except
+                error_class = self.classify(e)
+                retries[error_class] = retries.get(error_class, 0) + 1
+                can_retry = (
+                    attempt < policy.max_attempts
+                    and retries[error_class] <= policy.retries.get(error_class, 0)
+                    and (self.budget is None or self.budget.acquire())
+                )
+                if not can_retry:
+                    self.logger.error(
+                        f"{name} failed after {attempt} attempt(s) with {error_class} error: {e}"
+                    )
+                    return Outcome(
+                        False, error=e, error_class=error_class, attempts=attempt
+                    )
+
+                delay = policy.delay(attempt)
+                self.logger.error(
+                    f"{name} failed with {error_class} error: {e}\n Retrying in {delay:.1f}s..."
+                )
+                if on_retry is not None:
+                    on_retry(e, error_class)
+                self.sleep(delay)
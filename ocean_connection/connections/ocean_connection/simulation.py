@@ -0,0 +1,1572 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""In-memory simulation of the Ocean stack, to exercise the connection offline."""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import pickle  # nosec
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+
+OPERATIONS = ("rpc", "tx", "aquarius", "provider")
+DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+FAILURE_KINDS = ("transient", "nonce", "revert", "provider")
+
+JOB_RUNNING = 40
+JOB_FINISHED = 70
+
+
+def _to_wei(amount: Any) -> int:
+    return int(Decimal(str(amount)) * 10**18)
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class SimulatedTimeout(TimeoutError):
+    """An injected timeout of the simulated network."""
+
+
+class SimulatedNonceError(ValueError):
+    """A simulated transaction was sent with a nonce already used."""
+
+
+class SimulatedTransactionNotFound(Exception):
+    """The requested transaction isn't mined, like web3's `TransactionNotFound`."""
+
+
+class SimulatedRevert(Exception):
+    """A simulated transaction or call reverted."""
+
+
+class SimulatedProviderError(Exception):
+    """The simulated provider refused a request."""
+
+
+_FAILURES: Dict[str, Callable[[str], Exception]] = {
+    "transient": lambda operation: SimulatedTimeout(
+        f"Simulated {operation} request timed out."
+    ),
+    "nonce": lambda operation: SimulatedNonceError("nonce too low"),
+    "revert": lambda operation: SimulatedRevert(
+        "execution reverted: simulated failure"
+    ),
+    "provider": lambda operation: SimulatedProviderError(
+        f"Simulated provider error on {operation}."
+    ),
+}
+
+
+class LatencyModel:
+    """
+    A distribution of latencies, in seconds.
+
+    Supported distributions and their parameters:
+    - `constant`: `value`;
+    - `uniform`: `low` & `high`;
+    - `normal`: `mean` & `stddev`, truncated at 0;
+    - `lognormal`: `median` & `sigma`, for the long tails of real networks;
+    - `exponential`: `mean`.
+    """
+
+    def __init__(self, distribution: str = "constant", **params: float) -> None:
+        """
+        Initialize the model.
+
+        param distribution: one of `DISTRIBUTIONS`.
+        param params: the parameters of the distribution.
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown distribution '{distribution}', use one of {DISTRIBUTIONS}."
+            )
+        self.distribution = distribution
+        self.params = params
+
+    @classmethod
+    def from_spec(cls, spec: Any) -> "LatencyModel":
+        """
+        Builds a model from the configuration, a number of seconds or a dict.
+
+        param spec: e.g. `0.05` or `{"distribution": "lognormal", "median": 0.05, "sigma": 0.5}`.
+        """
+        if isinstance(spec, LatencyModel):
+            return spec
+        if isinstance(spec, dict):
+            return cls(**spec)
+        return cls("constant", value=float(spec or 0))
+
+    def sample(self, rng: random.Random) -> float:
+        """Draws a latency in seconds."""
+        get = self.params.get
+        if self.distribution == "constant":
+            return get("value", 0.0)
+        if self.distribution == "uniform":
+            return rng.uniform(get("low", 0.0), get("high", 0.0))
+        if self.distribution == "normal":
+            return max(0.0, rng.gauss(get("mean", 0.0), get("stddev", 0.0)))
+        if self.distribution == "lognormal":
+            return get("median", 0.0) * math.exp(rng.gauss(0.0, get("sigma", 0.0)))
+        mean = get("mean", 0.0)
+        return rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+class SimulationConfig:
+    """The behaviour of the simulated network, read from the `simulation` config of the connection."""
+
+    def __init__(
+        self,
+        latency: Optional[Dict[str, Any]] = None,
+        failure_rates: Optional[Dict[str, Any]] = None,
+        block_time: float = 0.0,
+        time_scale: float = 1.0,
+        indexing_delay: float = 0.0,
+        job_duration: float = 0.0,
+        environments: int = 1,
+        file_size: int = 1024,
+        initial_ocean: float = 1000,
+        gas_per_transaction: int = 150000,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the configuration.
+
+        param latency: the latency of each of the `OPERATIONS`, see `LatencyModel.from_spec`.
+        param failure_rates: the rate of injected failures of each of the `OPERATIONS`,
+        either a probability of transient failures or a dict of probabilities by `FAILURE_KINDS`.
+        param block_time: seconds between blocks, 0 to mine each transaction immediately.
+        param time_scale: multiplies all the simulated durations, 0 to never sleep.
+        param indexing_delay: seconds before a published asset is returned by Aquarius.
+        param job_duration: seconds a compute job runs for.
+        param environments: the number of compute environments of the provider.
+        param file_size: the size in bytes of the downloaded files.
+        param initial_ocean: the OCEAN balance of the wallets.
+        param gas_per_transaction: the gas used by each transaction.
+        param seed: seeds the random draws, for reproducible runs.
+        """
+        unknown = set(latency or {}).union(failure_rates or {}) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown operations {sorted(unknown)}, use some of {OPERATIONS}."
+            )
+
+        self.latency = {
+            operation: LatencyModel.from_spec((latency or {}).get(operation, 0))
+            for operation in OPERATIONS
+        }
+        self.failure_rates = {
+            operation: self._failure_rates((failure_rates or {}).get(operation, 0))
+            for operation in OPERATIONS
+        }
+        self.block_time = block_time
+        self.time_scale = time_scale
+        self.indexing_delay = indexing_delay
+        self.job_duration = job_duration
+        self.environments = environments
+        self.file_size = file_size
+        self.initial_ocean = initial_ocean
+        self.gas_per_transaction = gas_per_transaction
+        self.seed = seed
+
+    @classmethod
+    def from_dict(cls, config: Optional[dict]) -> "SimulationConfig":
+        """Builds the configuration from a dict of its parameters."""
+        return cls(**(config or {}))
+
+    @staticmethod
+    def _failure_rates(spec: Any) -> Dict[str, float]:
+        rates = spec if isinstance(spec, dict) else {"transient": float(spec or 0)}
+        unknown = set(rates) - set(FAILURE_KINDS)
+        if unknown:
+            raise ValueError(
+                f"Unknown failure kinds {sorted(unknown)}, use some of {FAILURE_KINDS}."
+            )
+        return {kind: rate for kind, rate in rates.items() if rate > 0}
+
+
+class Receipt(NamedTuple):
+    """The receipt of a simulated transaction, like a brownie `TransactionReceipt`."""
+
+    txid: str
+    block_number: int
+    return_value: Any
+    sender: str
+    nonce: int
+    gas_used: int
+
+
+class SimulatedNetwork:
+    """
+    The state of the simulated chain and the timing of the requests made to it.
+
+    All the contract state is guarded by a single lock, and every request pays
+    its sampled latency and may fail according to the configuration.
+    """
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Initialize the network.
+
+        param config: the behaviour of the network.
+        param clock: the clock of the simulation.
+        param sleep: waits for the given number of seconds.
+        """
+        self.config = config
+        self.clock = clock
+        self._sleep = sleep
+        self.lock = threading.RLock()
+        self._rng = random.Random(config.seed)
+        self._genesis = clock()
+        self._addresses = itertools.count(1)
+        self._contracts: Dict[str, Any] = {}
+        self._next_nonces: Dict[str, int] = {}
+        self._queued_nonces: Dict[str, Set[int]] = {}
+        self._eth_balances: Dict[str, int] = {}
+        self._blocks_mined = 0
+        self.transactions = 0
+        self.receipts: List[Receipt] = []
+        self._receipts_by_txid: Dict[str, Receipt] = {}
+        self.requests: Counter = Counter()
+        self.failures: Counter = Counter()
+        # Called with `rpc`, the duration and the outcome of the node requests.
+        self.rpc_observer: Optional[Callable[[str, float, bool], None]] = None
+
+    def request(self, operation: str) -> None:
+        """
+        Simulates a request: waits for its latency, then fails if a failure is drawn.
+
+        param operation: one of `OPERATIONS`.
+        """
+        with self.lock:
+            self.requests[operation] += 1
+            latency = self.config.latency[operation].sample(self._rng)
+            failure = self._draw_failure(operation)
+            if failure is not None:
+                self.failures[operation] += 1
+
+        start = time.perf_counter()
+        self.wait(latency)
+        if operation in ("rpc", "tx") and self.rpc_observer is not None:
+            self.rpc_observer("rpc", time.perf_counter() - start, failure is not None)
+        if failure is not None:
+            raise _FAILURES[failure](operation)
+
+    def wait(self, seconds: float) -> None:
+        """Waits for a simulated duration, scaled by the time scale."""
+        seconds *= self.config.time_scale
+        if seconds > 0:
+            self._sleep(seconds)
+
+    def send_transaction(self, tx_dict: dict, apply: Callable[[], Any]) -> Receipt:
+        """
+        Simulates a transaction: the nonce of the sender is used, then the
+        transaction is mined and its effects applied.
+
+        param tx_dict: the tx dict, with the sending wallet as `from` and an optional `nonce`.
+        param apply: applies the effects of the transaction under the lock,
+        raises `SimulatedRevert` if the transaction reverts.
+        return: the receipt of the transaction.
+        """
+        self.request("tx")
+        sender = tx_dict["from"].address
+        with self.lock:
+            nonce = self._use_nonce(sender, tx_dict.get("nonce"))
+            self.transactions += 1
+            txid = "0x" + _hash(sender, nonce, self.transactions)
+
+        block_number = self._wait_for_block(tx_dict.get("required_confs", 1))
+        with self.lock:
+            receipt = Receipt(
+                txid,
+                block_number,
+                apply(),
+                sender,
+                nonce,
+                self.config.gas_per_transaction,
+            )
+            self.receipts.append(receipt)
+            self._receipts_by_txid[txid] = receipt
+            return receipt
+
+    @property
+    def block_number(self) -> int:
+        """The number of the last block."""
+        period = self.config.block_time * self.config.time_scale
+        if period <= 0:
+            return self._blocks_mined
+        return int((self.clock() - self._genesis) / period)
+
+    def receipt(self, txid: str) -> Optional[Receipt]:
+        """Returns the receipt of a transaction, None until it is mined."""
+        with self.lock:
+            receipt = self._receipts_by_txid.get(txid)
+        if receipt is None or receipt.block_number > self.block_number:
+            return None
+        return receipt
+
+    def pending_nonce(self, address: str) -> int:
+        """Returns the next nonce of an address, counting the pending transactions."""
+        with self.lock:
+            return self._next_nonces.get(address, 0)
+
+    def new_address(self) -> str:
+        """Returns a fresh contract address."""
+        with self.lock:
+            return f"0x{next(self._addresses):040x}"
+
+    def register(self, contract: Any) -> str:
+        """
+        Deploys a contract, so that it can be called by address.
+
+        return: the address of the contract.
+        """
+        address = self.new_address()
+        with self.lock:
+            self._contracts[address] = contract
+        return address
+
+    def contract(self, address: str) -> Any:
+        """Returns the contract deployed at an address."""
+        with self.lock:
+            try:
+                return self._contracts[address]
+            except KeyError:
+                raise ValueError(f"No contract at {address}.") from None
+
+    def eth_balance(self, address: str) -> int:
+        """Returns the native balance of an address, in wei."""
+        with self.lock:
+            return self._eth_balances.get(address, 0)
+
+    def fund(self, address: str, amount: int) -> None:
+        """Credits native tokens to an address."""
+        with self.lock:
+            self._eth_balances[address] = self._eth_balances.get(address, 0) + amount
+
+    def stats(self) -> dict:
+        """Returns the counters of the simulation."""
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "failures": dict(self.failures),
+                "transactions": self.transactions,
+                "block_number": self.block_number,
+            }
+
+    def _draw_failure(self, operation: str) -> Optional[str]:
+        draw = self._rng.random()
+        for kind, rate in self.config.failure_rates[operation].items():
+            if draw < rate:
+                return kind
+            draw -= rate
+        return None
+
+    def _use_nonce(self, sender: str, nonce: Optional[int]) -> int:
+        next_nonce = self._next_nonces.get(sender, 0)
+        queued = self._queued_nonces.setdefault(sender, set())
+        if nonce is None:
+            nonce = next_nonce
+        elif nonce < next_nonce:
+            raise SimulatedNonceError(f"nonce too low: {nonce} < {next_nonce}")
+        elif nonce in queued:
+            raise SimulatedNonceError(f"already known: nonce {nonce}")
+
+        # Like a node, transactions after a gap are queued until the gap is filled.
+        queued.add(nonce)
+        while next_nonce in queued:
+            queued.discard(next_nonce)
+            next_nonce += 1
+        self._next_nonces[sender] = next_nonce
+        return nonce
+
+    def _wait_for_block(self, confirmations: int) -> int:
+        """Waits for the confirmations of a transaction, returns the block it is mined in."""
+        period = self.config.block_time * self.config.time_scale
+        if period <= 0:
+            with self.lock:
+                self._blocks_mined += 1
+                return self._blocks_mined
+
+        if confirmations <= 0:
+            # Like brownie with `required_confs: 0`, return as soon as it is broadcast.
+            return self.block_number + 1
+
+        elapsed = self.clock() - self._genesis
+        self._sleep(period - elapsed % period + (confirmations - 1) * period)
+        return self.block_number - (confirmations - 1)
+
+
+class _BoundView:
+    """A view of a simulated contract, also usable in batched reads like a brownie `ContractCall`."""
+
+    def __init__(self, contract: Any, fn: Callable) -> None:
+        self._contract = contract
+        self._fn = fn
+        self._address = contract.address
+
+    def __call__(self, *args: Any) -> Any:
+        self._contract.network.request("rpc")
+        return self.call_locally(*args)
+
+    def call_locally(self, *args: Any) -> Any:
+        with self._contract.network.lock:
+            return self._fn(self._contract, *args)
+
+    def encode_input(self, *args: Any) -> bytes:
+        # The calls never leave the process, so pickle is a faithful encoding.
+        return pickle.dumps((self._fn.__name__, args))
+
+    @staticmethod
+    def decode_output(data: bytes) -> Any:
+        return pickle.loads(bytes(data))  # nosec
+
+
+class view:  # pylint: disable=invalid-name
+    """Marks a method of a simulated contract as a view."""
+
+    def __init__(self, fn: Callable) -> None:
+        self.fn = fn
+
+    def __get__(self, contract: Any, owner: Any = None) -> Any:
+        if contract is None:
+            return self
+        return _BoundView(contract, self.fn)
+
+
+class SimulatedToken:
+    """An ERC20 token."""
+
+    def __init__(self, network: SimulatedNetwork, symbol: str) -> None:
+        """
+        Initialize the token.
+
+        param network: the simulated network.
+        param symbol: the symbol of the token.
+        """
+        self.network = network
+        self.symbol = symbol
+        self._balances: Dict[str, int] = {}
+        self._allowances: Dict[Tuple[str, str], int] = {}
+        self.address = network.register(self)
+
+    @view
+    def balanceOf(self, owner: str) -> int:  # pylint: disable=invalid-name
+        """Returns the balance of an address."""
+        return self._balances.get(owner, 0)
+
+    @view
+    def allowance(self, owner: str, spender: str) -> int:
+        """Returns the amount the spender may transfer from the owner."""
+        return self._allowances.get((owner, spender), 0)
+
+    def approve(self, spender: str, amount: int, tx_dict: dict) -> Receipt:
+        """Allows the spender to transfer an amount of the sender's tokens."""
+        owner = tx_dict["from"].address
+
+        def apply():
+            self._allowances[(owner, spender)] = amount
+
+        return self.network.send_transaction(tx_dict, apply)
+
+    def mint(self, to: str, amount: int) -> None:
+        """Creates tokens, under the lock of the network."""
+        self._balances[to] = self._balances.get(to, 0) + amount
+
+    def burn(self, owner: str, amount: int) -> None:
+        """Destroys tokens, under the lock of the network."""
+        if self._balances.get(owner, 0) < amount:
+            raise SimulatedRevert(
+                f"execution reverted: {self.symbol}: burn amount exceeds balance"
+            )
+        self._balances[owner] -= amount
+
+    def transfer_from(self, spender: str, owner: str, to: str, amount: int) -> None:
+        """Transfers tokens on behalf of their owner, under the lock of the network."""
+        allowed = self._allowances.get((owner, spender), 0)
+        if allowed < amount:
+            raise SimulatedRevert(
+                f"execution reverted: {self.symbol}: insufficient allowance"
+            )
+        self.burn(owner, amount)
+        self._allowances[(owner, spender)] = allowed - amount
+        self.mint(to, amount)
+
+
+class DispenserStatus(NamedTuple):
+    """The status of the dispenser of a datatoken."""
+
+    active: bool
+
+
+class SimulatedDatatoken(SimulatedToken):
+    """A datatoken, with an optional dispenser."""
+
+    def __init__(
+        self,
+        network: SimulatedNetwork,
+        symbol: str,
+        minter: str,
+        fixed_rate_exchange: "SimulatedFixedRateExchange",
+    ) -> None:
+        """
+        Initialize the datatoken.
+
+        param network: the simulated network.
+        param symbol: the symbol of the datatoken.
+        param minter: the address allowed to mint, i.e. the publisher.
+        param fixed_rate_exchange: the exchange where the datatoken can be sold.
+        """
+        super().__init__(network, symbol)
+        self.minter = minter
+        self.fixed_rate_exchange = fixed_rate_exchange
+        self.dispenser_active = False
+
+    def create_dispenser(self, tx_dict: dict) -> Receipt:
+        """Creates a dispenser minting datatokens for free, only by the minter."""
+        sender = tx_dict["from"].address
+
+        def apply():
+            if sender != self.minter:
+                raise SimulatedRevert("execution reverted: NOT MINTER")
+            self.dispenser_active = True
+
+        return self.network.send_transaction(tx_dict, apply)
+
+    @view
+    def getPermissions(
+        self, user: str
+    ) -> Tuple[bool, bool]:  # pylint: disable=invalid-name
+        """Returns whether the user is minter and payment manager of the datatoken."""
+        return user == self.minter, user == self.minter
+
+    def dispenser_status(self) -> DispenserStatus:
+        """Returns the status of the dispenser."""
+        self.network.request("rpc")
+        return DispenserStatus(self.dispenser_active)
+
+    def dispense(self, amount: int, tx_dict: dict) -> Receipt:
+        """Dispenses datatokens to the sender."""
+        receiver = tx_dict["from"].address
+
+        def apply():
+            if not self.dispenser_active:
+                raise SimulatedRevert("execution reverted: Dispenser not active")
+            self.mint(receiver, amount)
+
+        return self.network.send_transaction(tx_dict, apply)
+
+    def create_exchange(
+        self,
+        rate: int,
+        base_token_addr: str,
+        owner_addr: Optional[str] = None,
+        full_info: bool = False,
+        tx_dict: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Creates a fixed rate exchange selling the datatoken, minted on demand.
+
+        return: the exchange, and the receipt if `full_info`.
+        """
+        owner = owner_addr or tx_dict["from"].address
+        receipt = self.network.send_transaction(
+            tx_dict,
+            lambda: self.fixed_rate_exchange.create(self, base_token_addr, owner, rate),
+        )
+        exchange = SimulatedOneExchange(self.fixed_rate_exchange, receipt.return_value)
+        return (exchange, receipt) if full_info else exchange
+
+
+class SimulatedFixedRateExchange:
+    """The fixed rate exchange contract, shared by all the exchanges."""
+
+    def __init__(self, network: SimulatedNetwork) -> None:
+        """
+        Initialize the contract.
+
+        param network: the simulated network.
+        """
+        self.network = network
+        self._exchanges: Dict[bytes, dict] = {}
+        self.address = network.register(self)
+
+    def create(
+        self, datatoken: SimulatedDatatoken, base_token: str, owner: str, rate: int
+    ) -> str:
+        """Creates an exchange, under the lock of the network, and returns its id."""
+        exchange_id = "0x" + _hash(datatoken.address, base_token, len(self._exchanges))
+        self._exchanges[_exchange_key(exchange_id)] = {
+            "owner": owner,
+            "datatoken": datatoken,
+            "base_token": base_token,
+            "rate": rate,
+        }
+        return exchange_id
+
+    @view
+    def getExchange(self, exchange_id: Any) -> tuple:  # pylint: disable=invalid-name
+        """Returns the details of an exchange, in the order of the contract."""
+        exchange = self._exchange(exchange_id)
+        return (
+            exchange["owner"],
+            exchange["datatoken"].address,
+            18,
+            exchange["base_token"],
+            18,
+            exchange["rate"],
+            True,
+            2**256 - 1,
+            0,
+            0,
+            0,
+            True,
+        )
+
+    def buy(
+        self,
+        exchange_id: Any,
+        buyer: str,
+        datatoken_amt: int,
+        max_basetoken_amt: int,
+        consume_market_fee: int = 0,
+    ) -> None:
+        """Sells minted datatokens for base tokens, under the lock of the network."""
+        exchange = self._exchange(exchange_id)
+        cost = datatoken_amt * exchange["rate"] // 10**18
+        cost += cost * consume_market_fee // 10**18
+        if cost > max_basetoken_amt:
+            raise SimulatedRevert(
+                "execution reverted: FixedRateExchange: Too many base tokens"
+            )
+
+        base_token = self.network.contract(exchange["base_token"])
+        base_token.transfer_from(self.address, buyer, exchange["owner"], cost)
+        exchange["datatoken"].mint(buyer, datatoken_amt)
+
+    def _exchange(self, exchange_id: Any) -> dict:
+        try:
+            return self._exchanges[_exchange_key(exchange_id)]
+        except KeyError:
+            raise SimulatedRevert(
+                "execution reverted: FixedRateExchange: Exchange does not exist"
+            ) from None
+
+
+def _exchange_key(exchange_id: Any) -> bytes:
+    if isinstance(exchange_id, str):
+        return bytes.fromhex(
+            exchange_id[2:] if exchange_id.startswith("0x") else exchange_id
+        )
+    return bytes(exchange_id)
+
+
+class SimulatedOneExchange:
+    """An exchange of the fixed rate exchange contract, like `ocean_lib`'s `OneExchange`."""
+
+    def __init__(
+        self, fixed_rate_exchange: SimulatedFixedRateExchange, exchange_id: Any
+    ) -> None:
+        """
+        Initialize the exchange.
+
+        param fixed_rate_exchange: the fixed rate exchange contract.
+        param exchange_id: the id of the exchange.
+        """
+        self._FRE = fixed_rate_exchange  # pylint: disable=invalid-name
+        self.exchange_id = exchange_id
+        self.address = fixed_rate_exchange.address
+
+    def buy_DT(  # pylint: disable=invalid-name
+        self,
+        datatoken_amt: int,
+        tx_dict: dict,
+        max_basetoken_amt: int = 2**256 - 1,
+        consume_market_fee: int = 0,
+        **kwargs: Any,
+    ) -> Receipt:
+        """Buys datatokens, paying with the base tokens the exchange is allowed to transfer."""
+        buyer = tx_dict["from"].address
+        return self._FRE.network.send_transaction(
+            tx_dict,
+            lambda: self._FRE.buy(
+                self.exchange_id,
+                buyer,
+                datatoken_amt,
+                max_basetoken_amt,
+                consume_market_fee,
+            ),
+        )
+
+
+class DataNFT(NamedTuple):
+    """The data NFT of a published asset."""
+
+    address: str
+
+
+class SimulatedService:
+    """A service of an asset."""
+
+    def __init__(
+        self,
+        service_id: str,
+        service_type: str,
+        datatoken: str,
+        service_endpoint: str,
+        timeout: int = 3600,
+        trusted_algorithm_publishers: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Initialize the service.
+
+        param service_id: the id of the service.
+        param service_type: `access` or `compute`.
+        param datatoken: the address of the datatoken of the service.
+        param service_endpoint: the URL of the provider.
+        param timeout: seconds an order of the service stays valid.
+        param trusted_algorithm_publishers: the publishers whose algorithms may run on the dataset.
+        """
+        self.id = service_id
+        self.type = service_type
+        self.datatoken = datatoken
+        self.service_endpoint = service_endpoint
+        self.timeout = timeout
+        self.trusted_algorithm_publishers = list(trusted_algorithm_publishers or [])
+
+    def add_publisher_trusted_algorithm(self, algo_ddo: "SimulatedDDO") -> None:
+        """Trusts the algorithms published by the publisher of the given algorithm."""
+        if algo_ddo.publisher not in self.trusted_algorithm_publishers:
+            self.trusted_algorithm_publishers.append(algo_ddo.publisher)
+
+    def as_dictionary(self) -> dict:
+        """Returns the service as a dict."""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "datatokenAddress": self.datatoken,
+            "serviceEndpoint": self.service_endpoint,
+            "timeout": self.timeout,
+            "trustedAlgorithmPublishers": list(self.trusted_algorithm_publishers),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimulatedService":
+        """Builds a service from its dict."""
+        return cls(
+            data["id"],
+            data["type"],
+            data["datatokenAddress"],
+            data["serviceEndpoint"],
+            data["timeout"],
+            data["trustedAlgorithmPublishers"],
+        )
+
+
+class SimulatedDDO:
+    """The DDO of a published asset."""
+
+    def __init__(
+        self,
+        did: str,
+        chain_id: int,
+        publisher: str,
+        metadata: dict,
+        services: List[SimulatedService],
+        datatokens: List[dict],
+    ) -> None:
+        """
+        Initialize the DDO.
+
+        param did: the DID of the asset.
+        param chain_id: the id of the chain the asset is published on.
+        param publisher: the address of the publisher.
+        param metadata: the metadata of the asset.
+        param services: the services of the asset.
+        param datatokens: the datatokens of the services, as dicts with their `address`.
+        """
+        self.did = did
+        self.chain_id = chain_id
+        self.publisher = publisher
+        self.metadata = metadata
+        self.services = services
+        self.datatokens = datatokens
+
+    @property
+    def nft(self) -> dict:
+        """The data NFT of the asset as indexed by Aquarius, with its `owner`."""
+        return {"owner": self.publisher}
+
+    def as_dictionary(self) -> dict:
+        """Returns the DDO as a dict."""
+        return {
+            "id": self.did,
+            "chainId": self.chain_id,
+            "publisher": self.publisher,
+            "metadata": self.metadata,
+            "services": [service.as_dictionary() for service in self.services],
+            "datatokens": self.datatokens,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimulatedDDO":
+        """Builds a DDO from its dict."""
+        return cls(
+            data["id"],
+            data["chainId"],
+            data["publisher"],
+            data["metadata"],
+            [SimulatedService.from_dict(service) for service in data["services"]],
+            data["datatokens"],
+        )
+
+
+class SimulatedComputeInput:
+    """A dataset or an algorithm of a compute job, like `ocean_lib`'s `ComputeInput`."""
+
+    def __init__(
+        self,
+        ddo: SimulatedDDO,
+        service: SimulatedService,
+        transfer_tx_id: Optional[str] = None,
+        userdata: Optional[dict] = None,
+    ) -> None:
+        """
+        Initialize the input.
+
+        param ddo: the DDO of the asset.
+        param service: the service of the asset used by the job.
+        param transfer_tx_id: the order of the service.
+        param userdata: the parameters of the job.
+        """
+        self.ddo = ddo
+        self.did = ddo.did
+        self.service = service
+        self.service_id = service.id
+        self.transfer_tx_id = transfer_tx_id
+        self.userdata = userdata
+
+    def as_dictionary(self) -> dict:
+        """Returns the input as a dict."""
+        data = {"documentId": self.did, "serviceId": self.service_id}
+        if self.transfer_tx_id:
+            data["transferTxId"] = self.transfer_tx_id
+        if self.userdata:
+            data["userdata"] = self.userdata
+        return data
+
+
+class SimulatedAquarius:
+    """The metadata cache, indexing published assets after the configured delay."""
+
+    def __init__(self, network: SimulatedNetwork) -> None:
+        """
+        Initialize Aquarius.
+
+        param network: the simulated network.
+        """
+        self.network = network
+        # The pending version of each DDO, with the version served until it is indexed.
+        self._ddos: Dict[str, Tuple[float, SimulatedDDO, Optional[SimulatedDDO]]] = {}
+
+    def get_instance(self, metadata_cache_uri: str) -> "SimulatedAquarius":
+        """Returns the Aquarius instance, like `Aquarius.get_instance`."""
+        return self
+
+    def index(self, ddo: SimulatedDDO) -> None:
+        """
+        Schedules the indexing of a published or updated DDO. The previous version
+        of an updated DDO is served until then.
+        """
+        delay = self.network.config.indexing_delay * self.network.config.time_scale
+        with self.network.lock:
+            previous = self._indexed(ddo.did)
+            self._ddos[ddo.did] = (self.network.clock() + delay, ddo, previous)
+
+    def get_ddo(self, did: str) -> Optional[SimulatedDDO]:
+        """Returns a copy of the DDO of a DID, None if it isn't indexed yet."""
+        self.network.request("aquarius")
+        ddo = self._indexed(did)
+        return None if ddo is None else SimulatedDDO.from_dict(ddo.as_dictionary())
+
+    def query_search(self, query: dict) -> List[dict]:
+        """Searches the indexed DDOs by id, with the `terms` query of the connection."""
+        self.network.request("aquarius")
+        dids = query["query"]["terms"]["_id"]
+        hits = [self._indexed(did) for did in dids]
+        return [{**ddo.as_dictionary(), "_id": ddo.did} for ddo in hits if ddo]
+
+    def wait_for_ddo(self, did: str, timeout: float = 60) -> SimulatedDDO:
+        """Waits until a DDO is indexed."""
+        deadline = self.network.clock() + timeout * self.network.config.time_scale
+        while True:
+            ddo = self.get_ddo(did)
+            if ddo is not None:
+                return ddo
+            if self.network.clock() >= deadline:
+                raise SimulatedProviderError(f"Aquarius didn't index {did} in time.")
+            self.network.wait(0.1)
+
+    def _indexed(self, did: str) -> Optional[SimulatedDDO]:
+        with self.network.lock:
+            indexed_at, ddo, previous = self._ddos.get(did, (None, None, None))
+        if ddo is None or self.network.clock() < indexed_at:
+            return previous
+        return ddo
+
+
+class SimulatedAssets:
+    """Publishing, ordering and downloading assets, like `ocean.assets`."""
+
+    def __init__(self, ocean: "SimulatedOcean") -> None:
+        """
+        Initialize the assets API.
+
+        param ocean: the simulated Ocean instance.
+        """
+        self.ocean = ocean
+        self.network = ocean.network
+        self._orders: Dict[str, Tuple[str, str, str, float]] = {}
+
+    def create_url_asset(
+        self,
+        name: str,
+        url: str,
+        tx_dict: dict,
+        metadata: Optional[dict] = None,
+        with_compute: bool = False,
+        wait_for_aqua: bool = True,
+    ) -> Tuple[DataNFT, SimulatedDatatoken, SimulatedDDO]:
+        """Publishes a dataset with an access service, and a compute one if `with_compute`."""
+        service_types = ["access", "compute"] if with_compute else ["access"]
+        return self._create(name, tx_dict, metadata, service_types, wait_for_aqua)
+
+    def create_algo_asset(
+        self,
+        name: str,
+        url: str,
+        tx_dict: dict,
+        metadata: Optional[dict] = None,
+        wait_for_aqua: bool = True,
+    ) -> Tuple[DataNFT, SimulatedDatatoken, SimulatedDDO]:
+        """Publishes an algorithm with an access service."""
+        return self._create(name, tx_dict, metadata, ["access"], wait_for_aqua)
+
+    def resolve(self, did: str) -> Optional[SimulatedDDO]:
+        """Returns the DDO of a DID from Aquarius."""
+        return self.ocean.aquarius.get_ddo(did)
+
+    def update(self, ddo: SimulatedDDO, tx_dict: dict) -> SimulatedDDO:
+        """Publishes the updated DDO of an asset, only by its publisher."""
+
+        def apply():
+            if tx_dict["from"].address != ddo.publisher:
+                raise SimulatedRevert("execution reverted: NOT METADATA_ROLE")
+
+        self.network.send_transaction(tx_dict, apply)
+        self.ocean.aquarius.index(SimulatedDDO.from_dict(ddo.as_dictionary()))
+        # Like `ocean_lib`, waits for Aquarius to index the update.
+        self.network.wait(self.network.config.indexing_delay)
+        return ddo
+
+    def pay_for_access_service(
+        self, asset: SimulatedDDO, tx_dict: dict, **kwargs: Any
+    ) -> str:
+        """Orders the access service of an asset, spending one datatoken."""
+        service = next(
+            service for service in asset.services if service.type == "access"
+        )
+        return self._order(asset, service, tx_dict)
+
+    def pay_for_compute_service(
+        self,
+        datasets: List[SimulatedComputeInput],
+        algorithm_data: SimulatedComputeInput,
+        compute_environment: str,
+        valid_until: int,
+        consume_market_order_fee_address: str,
+        tx_dict: dict,
+        consumer_address: Optional[str] = None,
+    ) -> Tuple[List[SimulatedComputeInput], SimulatedComputeInput]:
+        """Orders the services of the datasets and the algorithm of a compute job."""
+        self.ocean.compute.environment(compute_environment)
+        for compute_input in [*datasets, algorithm_data]:
+            compute_input.transfer_tx_id = self._order(
+                compute_input.ddo, compute_input.service, tx_dict
+            )
+        return datasets, algorithm_data
+
+    def download(
+        self,
+        asset: SimulatedDDO,
+        consumer_wallet: Any,
+        destination: str,
+        order_tx_id: str,
+        **kwargs: Any,
+    ) -> str:
+        """Downloads the file of an asset, returning the folder it was downloaded to."""
+        self.network.request("provider")
+        service = next(
+            service for service in asset.services if service.type == "access"
+        )
+        self.check_order(order_tx_id, asset.did, service.id, consumer_wallet.address)
+
+        folder = os.path.join(destination, f"datafile.{asset.did},0")
+        path = os.path.join(folder, "file0")
+        if not os.path.exists(path):
+            os.makedirs(folder, exist_ok=True)
+            pattern = hashlib.sha256(asset.did.encode()).digest()
+            size = self.network.config.file_size
+            content = (pattern * (size // len(pattern) + 1))[:size]
+            with open(f"{path}.{uuid.uuid4().hex}", "wb") as f:
+                f.write(content)
+                temporary = f.name
+            os.replace(temporary, path)
+
+        return folder
+
+    def check_order(
+        self, order_tx_id: str, did: str, service_id: str, consumer: str
+    ) -> None:
+        """Raises if the order isn't a valid order of the service for the consumer."""
+        with self.network.lock:
+            order = self._orders.get(order_tx_id)
+        if order is None or order[:3] != (did, service_id, consumer):
+            raise SimulatedProviderError(
+                f"Order {order_tx_id} is not an order of {did}."
+            )
+        if self.network.clock() > order[3]:
+            raise SimulatedProviderError(f"Order {order_tx_id} expired.")
+
+    def _create(
+        self,
+        name: str,
+        tx_dict: dict,
+        metadata: Optional[dict],
+        service_types: List[str],
+        wait_for_aqua: bool,
+    ) -> Tuple[DataNFT, SimulatedDatatoken, SimulatedDDO]:
+        publisher = tx_dict["from"].address
+        data_nft = DataNFT(self.network.new_address())
+        datatoken = SimulatedDatatoken(
+            self.network, f"DT-{name}", publisher, self.ocean.fixed_rate_exchange
+        )
+        chain_id = self.ocean.config_dict["CHAIN_ID"]
+        ddo = SimulatedDDO(
+            did="did:op:" + _hash(data_nft.address, chain_id),
+            chain_id=chain_id,
+            publisher=publisher,
+            metadata=dict(metadata or {}, name=name),
+            services=[
+                SimulatedService(
+                    str(index),
+                    service_type,
+                    datatoken.address,
+                    self.ocean.config_dict["PROVIDER_URL"],
+                )
+                for index, service_type in enumerate(service_types)
+            ],
+            datatokens=[{"address": datatoken.address, "name": datatoken.symbol}],
+        )
+
+        self.network.send_transaction(tx_dict, lambda: None)
+        self.ocean.aquarius.index(ddo)
+        if wait_for_aqua:
+            self.ocean.aquarius.wait_for_ddo(ddo.did)
+
+        return data_nft, datatoken, ddo
+
+    def _order(
+        self, ddo: SimulatedDDO, service: SimulatedService, tx_dict: dict
+    ) -> str:
+        consumer = tx_dict["from"].address
+        datatoken = self.ocean.get_datatoken(service.datatoken)
+
+        def apply():
+            # The publisher can mint the datatokens of its own assets.
+            if (
+                datatoken.minter == consumer
+                and datatoken.balanceOf.call_locally(consumer) < 10**18
+            ):
+                datatoken.mint(consumer, 10**18)
+            datatoken.burn(consumer, 10**18)
+
+        receipt = self.network.send_transaction(tx_dict, apply)
+        expires_at = (
+            self.network.clock() + service.timeout * self.network.config.time_scale
+        )
+        with self.network.lock:
+            self._orders[receipt.txid] = (ddo.did, service.id, consumer, expires_at)
+
+        return receipt.txid
+
+
+class SimulatedCompute:
+    """The compute-to-data API of the provider, like `ocean.compute`."""
+
+    def __init__(self, ocean: "SimulatedOcean") -> None:
+        """
+        Initialize the compute API.
+
+        param ocean: the simulated Ocean instance.
+        """
+        self.ocean = ocean
+        self.network = ocean.network
+        self._environments = [
+            {
+                "id": f"simulated-env-{index}",
+                "consumerAddress": self.network.new_address(),
+                "maxJobs": 10,
+                "maxJobDuration": 3600,
+                "priceMin": index,
+            }
+            for index in range(ocean.network.config.environments)
+        ]
+        self._jobs: Dict[str, Tuple[float, str]] = {}
+
+    def get_c2d_environments(self, service_endpoint: str, chain_id: int) -> List[dict]:
+        """Returns the compute environments of the provider."""
+        self.network.request("provider")
+        now = self.network.clock()
+        with self.network.lock:
+            running = Counter(
+                env for ends_at, env in self._jobs.values() if ends_at > now
+            )
+        return [
+            dict(environment, currentJobs=running[environment["id"]])
+            for environment in self._environments
+        ]
+
+    def environment(self, environment_id: str) -> dict:
+        """Returns a compute environment by id."""
+        for environment in self._environments:
+            if environment["id"] == environment_id:
+                return environment
+        raise SimulatedProviderError(f"Unknown compute environment {environment_id}.")
+
+    def start(
+        self,
+        consumer_wallet: Any,
+        dataset: SimulatedComputeInput,
+        compute_environment: str,
+        algorithm: Optional[SimulatedComputeInput] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Starts a compute job on paid orders and returns its id."""
+        self.network.request("provider")
+        self.environment(compute_environment)
+        for compute_input in filter(None, [dataset, algorithm]):
+            self.ocean.assets.check_order(
+                compute_input.transfer_tx_id,
+                compute_input.did,
+                compute_input.service_id,
+                consumer_wallet.address,
+            )
+
+        job_id = uuid.uuid4().hex
+        duration = self.network.config.job_duration * self.network.config.time_scale
+        with self.network.lock:
+            self._jobs[job_id] = (self.network.clock() + duration, compute_environment)
+        return job_id
+
+    def status(
+        self,
+        ddo: SimulatedDDO,
+        service: SimulatedService,
+        job_id: str,
+        consumer_wallet: Any,
+    ) -> dict:
+        """Returns the status of a compute job."""
+        self.network.request("provider")
+        ends_at, _ = self._job(job_id)
+        if self.network.clock() < ends_at:
+            return {
+                "jobId": job_id,
+                "status": JOB_RUNNING,
+                "statusText": "Running algorithm",
+            }
+        return {
+            "jobId": job_id,
+            "status": JOB_FINISHED,
+            "statusText": "Job finished",
+            "results": [{"type": "output", "filename": "output.txt"}],
+        }
+
+    def result(
+        self,
+        ddo: SimulatedDDO,
+        service: SimulatedService,
+        job_id: str,
+        index: int,
+        consumer_wallet: Any,
+    ) -> bytes:
+        """Returns an output file of a finished compute job."""
+        self.network.request("provider")
+        self._job(job_id)
+        return f"Simulated output {index} of job {job_id}".encode()
+
+    def _job(self, job_id: str) -> Tuple[float, str]:
+        with self.network.lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise SimulatedProviderError(f"Unknown compute job {job_id}.")
+        return job
+
+
+class SimulatedOcean:
+    """The subset of `ocean_lib`'s `Ocean` the connection uses."""
+
+    def __init__(self, network: SimulatedNetwork, config_dict: dict) -> None:
+        """
+        Initialize Ocean.
+
+        param network: the simulated network.
+        param config_dict: the config dict of the simulated network.
+        """
+        self.network = network
+        self.config_dict = config_dict
+        self.OCEAN_token = SimulatedToken(
+            network, "OCEAN"
+        )  # pylint: disable=invalid-name
+        self.OCEAN_address = self.OCEAN_token.address  # pylint: disable=invalid-name
+        self.fixed_rate_exchange = SimulatedFixedRateExchange(network)
+        self.aquarius = SimulatedAquarius(network)
+        self.assets = SimulatedAssets(self)
+        self.compute = SimulatedCompute(self)
+
+    def get_datatoken(self, address: str) -> SimulatedDatatoken:
+        """Returns the datatoken deployed at an address."""
+        datatoken = self.network.contract(address)
+        if not isinstance(datatoken, SimulatedDatatoken):
+            raise ValueError(f"{address} is not a datatoken.")
+        return datatoken
+
+
+class SimulatedWallet:
+    """A wallet of the simulated network, like a brownie `LocalAccount`."""
+
+    def __init__(self, network: SimulatedNetwork, address: str) -> None:
+        """
+        Initialize the wallet.
+
+        param network: the simulated network.
+        param address: the address of the wallet.
+        """
+        self.network = network
+        self.address = address
+
+    def balance(self) -> int:
+        """Returns the native balance of the wallet, in wei."""
+        self.network.request("rpc")
+        return self.network.eth_balance(self.address)
+
+    def __str__(self) -> str:
+        """Returns the address of the wallet."""
+        return self.address
+
+
+class _SimulatedEth:
+    """The `eth` module of `SimulatedWeb3`."""
+
+    def __init__(self, network: SimulatedNetwork) -> None:
+        self.network = network
+
+    @property
+    def block_number(self) -> int:
+        self.network.request("rpc")
+        return self.network.block_number
+
+    def get_transaction_count(
+        self, address: str, block_identifier: str = "latest"
+    ) -> int:
+        self.network.request("rpc")
+        return self.network.pending_nonce(address)
+
+    def get_transaction_receipt(self, txid: str) -> dict:
+        self.network.request("rpc")
+        receipt = self.network.receipt(txid)
+        if receipt is None:
+            raise SimulatedTransactionNotFound(f"Transaction {txid} not found.")
+        return {
+            "transactionHash": receipt.txid,
+            "blockNumber": receipt.block_number,
+            "blockHash": "0x" + _hash("block", receipt.block_number),
+            "from": receipt.sender,
+            "gasUsed": receipt.gas_used,
+            "status": 1,
+        }
+
+    def get_code(self, address: str) -> bytes:
+        # No Multicall3 contract: batched reads fall back to sequential calls.
+        self.network.request("rpc")
+        return b""
+
+    def call(self, transaction: dict) -> bytes:
+        self.network.request("rpc")
+        name, args = pickle.loads(bytes(transaction["data"]))  # nosec
+        method = getattr(self.network.contract(transaction["to"]), name)
+        return pickle.dumps(method.call_locally(*args))
+
+
+class _SimulatedProvider:
+    """A provider without an endpoint, so that reads aren't sent as JSON-RPC batches."""
+
+    endpoint_uri = None
+
+
+class SimulatedWeb3:
+    """The subset of web3 the connection and its helpers use."""
+
+    def __init__(self, network: SimulatedNetwork) -> None:
+        """
+        Initialize web3.
+
+        param network: the simulated network.
+        """
+        self.eth = _SimulatedEth(network)
+        self.provider = _SimulatedProvider()
+
+    @staticmethod
+    def toBytes(hexstr: str) -> bytes:  # pylint: disable=invalid-name
+        """Converts a hex string into bytes."""
+        return bytes.fromhex(hexstr[2:] if hexstr.startswith("0x") else hexstr)
+
+
+class SimulatedChain:
+    """The subset of brownie's `chain` the connection and its helpers use."""
+
+    def __init__(self, network: SimulatedNetwork) -> None:
+        """
+        Initialize the chain.
+
+        param network: the simulated network.
+        """
+        self.network = network
+        self.priority_fee = 30 * 10**9
+        self.base_fee = 10**9
+
+    @property
+    def height(self) -> int:
+        """The number of the last block."""
+        return self.network.block_number
+
+
+class SimulatedBackend:
+    """
+    Stands for the Ocean stack with an in-memory simulation of it.
+
+    Selected by the `backend: simulation` config of the connection, with the
+    `simulation` config read by `SimulationConfig`.
+    """
+
+    name = "simulation"
+    ComputeInput = SimulatedComputeInput
+    OneExchange = SimulatedOneExchange
+    ddo_from_dict = staticmethod(SimulatedDDO.from_dict)
+
+    def __init__(self, config: SimulationConfig) -> None:
+        """
+        Initialize the backend.
+
+        param config: the behaviour of the simulated network.
+        """
+        self.network = SimulatedNetwork(config)
+        self.web3 = SimulatedWeb3(self.network)
+        self.chain = SimulatedChain(self.network)
+        self.ocean: Optional[SimulatedOcean] = None
+        self.Aquarius: Optional[
+            SimulatedAquarius
+        ] = None  # pylint: disable=invalid-name
+
+    def connect(self) -> str:
+        """Connects to the network and returns its name."""
+        return "simulation"
+
+    def config_dict(self, network_name: str) -> dict:
+        """Returns the config dict of the network."""
+        return {
+            "NETWORK_NAME": network_name,
+            "CHAIN_ID": 8996,
+            "METADATA_CACHE_URI": "simulated://aquarius",
+            "PROVIDER_URL": "simulated://provider",
+        }
+
+    def create_ocean(self, config: dict) -> SimulatedOcean:
+        """Creates the Ocean instance."""
+        self.ocean = SimulatedOcean(self.network, config)
+        self.Aquarius = self.ocean.aquarius
+        return self.ocean
+
+    def add_account(self, key: Optional[str]) -> SimulatedWallet:
+        """
+        Creates the wallet of a private key, funded with OCEAN and native tokens.
+
+        param key: the private key, None for a default wallet.
+        """
+        address = "0x" + _hash(key or "simulation")[:40]
+        with self.network.lock:
+            self.ocean.OCEAN_token.mint(
+                address, _to_wei(self.network.config.initial_ocean)
+            )
+        self.network.fund(address, _to_wei(100))
+        return SimulatedWallet(self.network, address)
+
+    def add_accounts(self, keys: List[Optional[str]]) -> List[SimulatedWallet]:
+        """
+        Creates the wallets of private keys, see `add_account`.
+
+        param keys: the private keys, none for a default wallet.
+        """
+        return [self.add_account(key) for key in keys or [None]]
+
+    def tx_count(self) -> int:
+        """Returns the number of transactions mined so far, to read their receipts later."""
+        with self.network.lock:
+            return len(self.network.receipts)
+
+    def receipts_since(self, start: int) -> List[Tuple[str, int, int]]:
+        """
+        Returns the sender, nonce and gas used of the transactions mined since `start`.
+
+        param start: a previous `tx_count()`.
+        """
+        with self.network.lock:
+            return [
+                (receipt.sender, receipt.nonce, receipt.gas_used)
+                for receipt in self.network.receipts[start:]
+            ]
+
+    def instrument_rpc(self, observe: Callable[[str, float, bool], None]) -> None:
+        """
+        Reports every simulated node request.
+
+        param observe: called with `rpc`, the duration and whether the request failed.
+        """
+        self.network.rpc_observer = observe
+
+    def stats(self) -> dict:
+        """Returns the counters of the simulation."""
+        return self.network.stats()
+
+
+LOAD_TEST_REQUEST = {
+    "type": "DEPLOY_DATA_DOWNLOAD",
+    "dataset_url": "https://example.com/data.csv",
+    "name": "load-test",
+    "description": "load-test",
+    "author": "load-test",
+    "license": "CC0",
+    "has_pricing_schema": False,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Drives the connection against the simulation and prints its throughput.
+
+    param argv: the command line arguments.
+    return: the exit code.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--actions", type=int, default=1000, help="Number of actions to send."
+    )
+    parser.add_argument(
+        "--threads", type=int, default=1, help="Threads sending the actions."
+    )
+    parser.add_argument(
+        "--request",
+        type=json.loads,
+        default=LOAD_TEST_REQUEST,
+        help="The JSON request sent, a DEPLOY_DATA_DOWNLOAD by default.",
+    )
+    parser.add_argument(
+        "--simulation",
+        type=json.loads,
+        default={},
+        help="The JSON simulation config, e.g. latencies and failure rates.",
+    )
+    args = parser.parse_args(argv)
+
+    from aea.configurations.base import (  # pylint: disable=import-outside-toplevel
+        ConnectionConfig,
+    )
+
+    from ocean_connection.connections.ocean_connection.connection import (  # pylint: disable=import-outside-toplevel
+        OceanConnection,
+    )
+
+    # Nothing the load test writes is kept: the files go to a temporary folder.
+    with tempfile.TemporaryDirectory(prefix="ocean-simulation-") as state_dir:
+        connection = OceanConnection(
+            ConnectionConfig(
+                "ocean_connection",
+                "ocean_protocol",
+                "0.1.5",
+                backend="simulation",
+                simulation=args.simulation,
+                journal_path=":memory:",
+                track_compute_jobs=False,
+            ),
+            state_dir,
+        )
+        connection.logger.setLevel("WARNING")
+        connection.on_connect()
+
+        def send(_):
+            try:
+                connection.on_send(**args.request)
+                return True
+            except Exception:  # pylint: disable=broad-except
+                return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            succeeded = sum(pool.map(send, range(args.actions)))
+        elapsed = time.perf_counter() - start
+        connection.on_disconnect()
+
+    print(
+        f"{args.actions} actions in {elapsed:.2f}s: {args.actions / elapsed:.0f} actions/s, "
+        f"{args.actions - succeeded} failed"
+    )
+    print(json.dumps(connection.backend.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
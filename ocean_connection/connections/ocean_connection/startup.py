@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Per-phase timings of the connection startup, and a CLI to report them."""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# Modules the connection module must not import until it is connected.
+HEAVY_MODULES = ("brownie", "ocean_lib", "web3", "eth_abi", "eth_account")
+
+
+class StartupProfile:
+    """Records how long each phase of the connection startup takes."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        """
+        Initialize the profile.
+
+        param clock: the clock the phases are timed with.
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._start = clock()
+        self._end = self._start
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times a phase of the startup; phases may run concurrently in several threads.
+
+        param name: the name of the phase.
+        """
+        start = self._clock()
+        try:
+            yield
+        finally:
+            end = self._clock()
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + end - start
+                self._end = max(self._end, end)
+
+    @property
+    def total(self) -> float:
+        """Wall-clock seconds from the start of the profile to the end of its last phase."""
+        with self._lock:
+            return self._end - self._start
+
+    def merge(self, other: "StartupProfile", prefix: str) -> None:
+        """
+        Adds the phases of a nested profile, e.g. the ones of `on_connect`.
+
+        param other: the nested profile.
+        param prefix: prepended to the names of its phases.
+        """
+        with self._lock:
+            for name, seconds in other.phases.items():
+                self.phases[prefix + name] = seconds
+
+    def exceeds(self, budget: Optional[float]) -> bool:
+        """
+        Whether the startup took longer than a budget.
+
+        param budget: the budget in seconds, None for no budget.
+        """
+        return budget is not None and self.total > budget
+
+    def report(self, imports: Optional[Dict[str, float]] = None) -> str:
+        """
+        Formats the timings as a table.
+
+        param imports: the seconds taken by the deferred imports, to list as well.
+        """
+        with self._lock:
+            rows = [(f"phase {name}", seconds) for name, seconds in self.phases.items()]
+        rows += [
+            (f"import {name}", seconds) for name, seconds in (imports or {}).items()
+        ]
+        rows.append(("total", self.total))
+
+        width = max(len(name) for name, _ in rows)
+        return "\n".join(
+            f"{name:<{width}}  {seconds * 1000:10.1f} ms" for name, seconds in rows
+        )
+
+
+def loaded_heavy_modules() -> List[str]:
+    """Returns the heavy modules that are imported already."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Profiles a cold start of the connection and prints the per-phase timings.
+
+    param argv: the command line arguments.
+    return: the exit code, 1 if the startup exceeded the budget.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--connect",
+        action="store_true",
+        help="Also connect to the network named by OCEAN_NETWORK_NAME.",
+    )
+    parser.add_argument(
+        "--key-path",
+        default=os.environ.get("SELLER_AEA_KEY_ETHEREUM_PATH"),
+        help="The private key file used when connecting.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=os.environ.get("OCEAN_STARTUP_BUDGET"),
+        help="Fail if the startup takes more seconds than this.",
+    )
+    args = parser.parse_args(argv)
+
+    profile = StartupProfile()
+    with profile.phase("import connection"):
+        from ocean_connection.connections.ocean_connection import (  # pylint: disable=import-outside-toplevel
+            connection,
+        )
+    eager = loaded_heavy_modules()
+
+    if args.connect:
+        from aea.configurations.base import (  # pylint: disable=import-outside-toplevel
+            ConnectionConfig,
+        )
+
+        with tempfile.TemporaryDirectory(prefix="ocean-startup-") as data_dir:
+            ocean = connection.OceanConnection(
+                ConnectionConfig(
+                    "ocean_connection",
+                    "ocean_protocol",
+                    "0.1.5",
+                    key_path=args.key_path,
+                ),
+                data_dir,
+            )
+            with profile.phase("on_connect"):
+                ocean.on_connect()
+            profile.merge(ocean.startup_profile, prefix="on_connect/")
+            ocean.on_disconnect()
+
+    from ocean_connection.connections.ocean_connection.lazy import (  # pylint: disable=import-outside-toplevel
+        import_times,
+    )
+
+    print(profile.report(import_times()))
+    if eager:
+        print(f"eagerly imported: {', '.join(eager)}")
+    if profile.exceeds(args.budget):
+        print(f"startup took {profile.total:.2f}s, over the {args.budget:.2f}s budget")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
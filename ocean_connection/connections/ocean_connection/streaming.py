@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Chunked reading of downloaded files."""
+import hashlib
+import os
+from typing import Iterator, NamedTuple, Optional
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class FileChunk(NamedTuple):
+    """A chunk of a file, `offset` being the position of its first byte."""
+
+    offset: int
+    data: bytes
+
+
+def resolve_downloaded_file(path: str, file_index: int = 0) -> str:
+    """
+    Returns the path of a downloaded file.
+
+    `ocean.assets.download` may return the folder it downloaded the asset files to,
+    in which case the file at `file_index`, in name order, is picked.
+
+    param path: the path returned by the download.
+    param file_index: index of the file inside a download folder.
+    """
+    if not os.path.isdir(path):
+        return path
+
+    files = sorted(
+        entry for entry in os.listdir(path) if os.path.isfile(os.path.join(path, entry))
+    )
+    if file_index >= len(files):
+        raise ValueError(f"No file with index {file_index} in {path}.")
+
+    return os.path.join(path, files[file_index])
+
+
+class ChunkedFileReader:
+    """
+    Reads a byte range of a file in fixed-size chunks.
+
+    The SHA-256 of the range is computed while the chunks are read, so the file is
+    never held in memory as a whole nor read twice.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the reader.
+
+        param path: the path of the file.
+        param chunk_size: the maximum size of a chunk in bytes.
+        param start: offset of the first byte to read, to resume an interrupted transfer.
+        param end: offset after the last byte to read, the end of the file if None.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be greater than 0.")
+
+        self.path = path
+        self.chunk_size = chunk_size
+        self.file_size = os.path.getsize(path)
+        self.start = start
+        self.end = self.file_size if end is None else min(end, self.file_size)
+        if not 0 <= self.start <= self.end:
+            raise ValueError(
+                f"Invalid byte range {start}-{end} for a file of {self.file_size} bytes."
+            )
+
+        self.bytes_read = 0
+        self._digest = hashlib.sha256()
+
+    @property
+    def length(self) -> int:
+        """The number of bytes of the range."""
+        return self.end - self.start
+
+    @property
+    def is_whole_file(self) -> bool:
+        """Whether the range covers the whole file."""
+        return self.start == 0 and self.end == self.file_size
+
+    def hexdigest(self) -> str:
+        """The SHA-256 of the bytes read so far."""
+        return self._digest.hexdigest()
+
+    def __iter__(self) -> Iterator[FileChunk]:
+        with open(self.path, "rb") as f:
+            f.seek(self.start)
+            offset = self.start
+            while offset < self.end:
+                data = f.read(min(self.chunk_size, self.end - offset))
+                if not data:
+                    raise ValueError(f"{self.path} got truncated while being read.")
+                self._digest.update(data)
+                self.bytes_read += len(data)
+                yield FileChunk(offset, data)
+                offset += len(data)
+
+    def verify(self, checksum: Optional[str]) -> None:
+        """
+        Compares the SHA-256 of the range with the expected one.
+
+        param checksum: the expected hex digest, optionally prefixed with `sha256:`.
+        Nothing is checked if None.
+        """
+        if checksum is None:
+            return
+
+        expected = checksum.lower()
+        if expected.startswith("sha256:"):
+            expected = expected[len("sha256:") :]
+
+        if self.hexdigest() != expected:
+            raise ValueError(
+                f"Checksum mismatch for {self.path}: expected {expected}, got {self.hexdigest()}."
+            )
+
+
+def file_sha256(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Returns the SHA-256 of a file, reading it in chunks."""
+    reader = ChunkedFileReader(path, chunk_size=chunk_size)
+    for _ in reader:
+        pass
+
+    return reader.hexdigest()
@@ -17,36 +17,58 @@
 #
 # ------------------------------------------------------------------------------
 
-import requests
-from web3.main import Web3
+import base64
+import importlib
+import json
+import threading
+from typing import Union
 
+from ocean_connection.connections.ocean_connection.actions import (
+    ACTIONS,
+    InvalidRequest,
+)
+from ocean_connection.connections.ocean_connection.gas import GasOracle
 
-def get_tx_dict(ocean_config: dict, wallet, chain) -> dict:
-    if "polygon" in ocean_config["NETWORK_NAME"]:
-        gas_resp = requests.get("https://gasstation-mainnet.matic.network/v2")
 
-        if not gas_resp or gas_resp.status_code != 200:
-            print(
-                f"Invalid response from Polygon gas station. Retry with brownie values..."
-            )
+# The module registering the actions of the connection when imported.
+_CONNECTION_MODULE = "ocean_connection.connections.ocean_connection.connection"
+
 
-            return {
-                "from": wallet,
-                "priority_fee": chain.priority_fee,
-                "max_fee": chain.base_fee + 2 * chain.priority_fee,
+def get_tx_dict(
+    ocean_config: dict, wallet, chain, nonce: int = None, gas_oracle=None
+) -> dict:
+    tx_dict = {"from": wallet}
+    if "polygon" in ocean_config["NETWORK_NAME"]:
+        gas_price = (gas_oracle or default_gas_oracle(chain)).get()
+        tx_dict.update(
+            {
+                "priority_fee": gas_price.priority_fee,
+                "max_fee": gas_price.max_fee,
                 "required_confs": 3,
             }
+        )
+
+    if nonce is not None:
+        tx_dict["nonce"] = nonce
+
+    return tx_dict
+
+
+_default_gas_oracle = None
+_default_gas_oracle_lock = threading.Lock()
 
-        return {
-            "from": wallet,
-            "priority_fee": Web3.toWei(
-                gas_resp.json()["fast"]["maxPriorityFee"], "gwei"
-            ),
-            "max_fee": Web3.toWei(gas_resp.json()["fast"]["maxFee"], "gwei"),
-            "required_confs": 3,
-        }
 
-    return {"from": wallet}
+def default_gas_oracle(chain) -> GasOracle:
+    """Returns the gas oracle shared by callers that don't bring their own."""
+    global _default_gas_oracle
+
+    with _default_gas_oracle_lock:
+        if _default_gas_oracle is None:
+            from brownie.network import web3
+
+            _default_gas_oracle = GasOracle(web3=web3, chain=chain)
+
+    return _default_gas_oracle
 
 
 def convert_to_bytes_format(web3, data: str) -> bytes:
@@ -59,67 +81,80 @@ def convert_to_bytes_format(web3, data: str) -> bytes:
     return bytes_data
 
 
+def tx_id_to_str(tx_id) -> str:
+    """Converts a transaction id, bytes or str, into a 0x-prefixed hex string."""
+
+    if isinstance(tx_id, (bytes, bytearray)):
+        return "0x" + bytes(tx_id).hex()
+
+    return str(tx_id)
+
+
+# Binary values from this size on are sent raw after the JSON of the message,
+# instead of in base64 within it.
+RAW_CONTENT_THRESHOLD = 64 * 1024
+
+# The first byte of a message with raw content, which JSON never starts with.
+_RAW_CONTENT_MARKER = b"\x00"
+_RAW_HEADER_SIZE = 4
+
+
+def encode_message(msg: dict) -> bytes:
+    """Encodes a result message as JSON bytes.
+    Binary values are carried as `{"__bytes__": <base64>}` objects. When a
+    message has values of `RAW_CONTENT_THRESHOLD` bytes or more, they are
+    appended raw to the JSON instead, see `decode_message`."""
+    raw = []
+    offset = 0
+
+    def _default(value):
+        nonlocal offset
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = memoryview(value).cast("B")
+            if len(value) >= RAW_CONTENT_THRESHOLD:
+                raw.append(value)
+                offset += len(value)
+                return {"__raw__": [offset - len(value), len(value)]}
+            return {"__bytes__": base64.b64encode(value).decode("ascii")}
+        return str(value)
+
+    encoded = json.dumps(msg, default=_default).encode("utf-8")
+    if not raw:
+        return encoded
+
+    header = _RAW_CONTENT_MARKER + len(encoded).to_bytes(_RAW_HEADER_SIZE, "big")
+    return b"".join([header, encoded, *raw])
+
+
+def decode_message(data: Union[bytes, memoryview]) -> dict:
+    """Decodes a message produced by `encode_message`.
+    Binary values are returned as bytes, raw ones copied once out of `data`."""
+    data = memoryview(data).cast("B")
+    raw = None
+    if data[:1] == _RAW_CONTENT_MARKER:
+        start = 1 + _RAW_HEADER_SIZE
+        end = start + int.from_bytes(data[1:start], "big")
+        data, raw = data[start:end], data[end:]
+
+    def _object_hook(obj):
+        if set(obj) == {"__bytes__"}:
+            return base64.b64decode(obj["__bytes__"])
+        if raw is not None and set(obj) == {"__raw__"}:
+            offset, size = obj["__raw__"]
+            return bytes(raw[offset : offset + size])
+        return obj
+
+    return json.loads(bytes(data), object_hook=_object_hook)
+
+
 def validate_args(**kwargs) -> (bool, str):
-    required_args_per_action = {
-        "DEPLOY_C2D": [
-            "description",
-            "name",
-            "author",
-            "license",
-            "dataset_url",
-            "has_pricing_schema",
-        ],
-        "DEPLOY_ALGORITHM": [
-            "description",
-            "name",
-            "author",
-            "license",
-            "language",
-            "format",
-            "version",
-            "entrypoint",
-            "image",
-            "tag",
-            "checksum",
-            "files_url",
-            "has_pricing_schema",
-        ],
-        "PERMISSION_DATASET": [
-            "data_did",
-            "algo_did",
-        ],
-        "C2D_JOB": [
-            "data_did",
-            "algo_did",
-        ],
-        "DEPLOY_DATA_DOWNLOAD": [
-            "description",
-            "name",
-            "author",
-            "license",
-            "dataset_url",
-            "has_pricing_schema",
-        ],
-        "CREATE_DISPENSER": [
-            "datatoken_address",
-        ],
-        "CREATE_FIXED_RATE_EXCHANGE": [
-            "datatoken_address",
-            "rate",
-            "ocean_amt",
-        ],
-        "DOWNLOAD_JOB": [
-            "datatoken_address",
-            "asset_did",
-            "datatoken_amt",
-        ],
-    }
-
-    for arg in required_args_per_action[kwargs["type"]]:
-        if arg not in kwargs:
-            return (
-                False,
-                f"'{arg}' is missing from the required arguments for {kwargs['type']}. Please add it.",
-            )
+    """Checks that a message has the required arguments of its action, of the right types.
+    The actions validate their requests themselves, see `actions.ActionRegistry.parse`."""
+
+    importlib.import_module(_CONNECTION_MODULE)
+    try:
+        ACTIONS.parse(kwargs)
+    except InvalidRequest as e:
+        return False, str(e)
 
     return True, ""
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2023 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+"""Pool of the wallets the connection shards its actions across."""
+import itertools
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+POLICIES = ("round_robin", "least_pending", "sticky")
+
+# The request kwargs naming the asset an action is about, in order of precedence.
+ASSET_KEYS = ("data_did", "asset_did", "did", "datatoken_address")
+
+
+def asset_key(request: dict) -> Optional[str]:
+    """Returns the asset a request is about, None if it names none."""
+    return next((request[key] for key in ASSET_KEYS if request.get(key)), None)
+
+
+class WalletPool:
+    """
+    The wallets of the connection, and the policy spreading actions across them.
+
+    Each wallet has its own nonces, so sharding the actions lifts the cap that
+    the nonce ordering of a single account puts on the transaction throughput.
+    The policies are:
+    - `round_robin`: the wallets take turns;
+    - `least_pending`: the wallet with the fewest running actions and in-flight nonces;
+    - `sticky`: the actions about an asset go to the wallet owning it, or to a
+    wallet chosen by hashing the asset, so they share balances and orders.
+    """
+
+    def __init__(
+        self,
+        wallets: List[Any],
+        nonces=None,
+        policy: str = "sticky",
+        min_balance: int = 0,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        param wallets: the wallets, the first one is the default.
+        param nonces: the `NonceManager` of the wallets, to count their in-flight nonces.
+        param policy: one of `POLICIES`.
+        param min_balance: the native balance in wei under which a wallet is skipped,
+        as long as another one has enough.
+        """
+        if not wallets:
+            raise ValueError("The wallet pool needs at least one wallet.")
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown wallet policy '{policy}', use one of {POLICIES}."
+            )
+
+        self.wallets = list(wallets)
+        self.nonces = nonces
+        self.policy = policy
+        self.min_balance = min_balance
+        self._by_address = {wallet.address: wallet for wallet in self.wallets}
+        self._lock = threading.Lock()
+        self._turns = itertools.count()
+        self._active: Counter = Counter()
+        self._balances: Dict[str, int] = {}
+        self._owners: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of wallets."""
+        return len(self.wallets)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterates over the wallets."""
+        return iter(self.wallets)
+
+    @property
+    def default(self) -> Any:
+        """The first wallet, used outside of the actions."""
+        return self.wallets[0]
+
+    def get(self, address: str) -> Any:
+        """
+        Returns the wallet of an address.
+
+        raises ValueError: if the address isn't one of the pool.
+        """
+        try:
+            return self._by_address[address]
+        except KeyError:
+            raise ValueError(f"{address} is not a wallet of the connection.") from None
+
+    def select(self, key: Optional[str] = None) -> Any:
+        """
+        Selects the wallet for an action according to the policy.
+
+        param key: the asset the action is about, used by the `sticky` policy.
+        """
+        with self._lock:
+            if self.policy == "sticky" and key is not None:
+                owner = self._owners.get(key)
+                if owner is not None:
+                    return self._by_address[owner]
+
+            candidates = [
+                wallet
+                for wallet in self.wallets
+                if self._balances.get(wallet.address, self.min_balance)
+                >= self.min_balance
+            ] or self.wallets
+
+            if self.policy == "sticky" and key is not None:
+                return candidates[zlib.crc32(key.encode()) % len(candidates)]
+            if self.policy != "least_pending":
+                return candidates[next(self._turns) % len(candidates)]
+            active = {
+                wallet.address: self._active[wallet.address] for wallet in candidates
+            }
+
+        # The in-flight nonces may be read from the node, so not while holding the pool.
+        return min(
+            candidates,
+            key=lambda wallet: active[wallet.address] + self._in_flight(wallet),
+        )
+
+    @contextmanager
+    def using(self, wallet: Any) -> Iterator[Any]:
+        """Counts the block as a running action of the wallet, for the `least_pending` policy."""
+        with self._lock:
+            self._active[wallet.address] += 1
+        try:
+            yield wallet
+        finally:
+            with self._lock:
+                self._active[wallet.address] -= 1
+
+    def assign(self, key: str, address: str) -> None:
+        """
+        Records the wallet owning an asset, e.g. the one that published it.
+
+        param key: the DID or the datatoken address of the asset.
+        param address: the address of the owning wallet.
+        """
+        with self._lock:
+            self._owners[key] = address
+
+    def owner_of(self, key: str) -> Optional[str]:
+        """Returns the address of the wallet recorded as owning an asset, None if unknown."""
+        with self._lock:
+            return self._owners.get(key)
+
+    def refresh_balance(self, wallet: Any) -> int:
+        """Reads the native balance of a wallet, in wei."""
+        balance = wallet.balance()
+        with self._lock:
+            self._balances[wallet.address] = balance
+        return balance
+
+    def refresh_balances(self) -> Dict[str, int]:
+        """Reads the native balances of all the wallets, in wei, by address."""
+        return {wallet.address: self.refresh_balance(wallet) for wallet in self.wallets}
+
+    def balances(self) -> Dict[str, int]:
+        """Returns the last read native balances of the wallets, by address."""
+        with self._lock:
+            return dict(self._balances)
+
+    def _in_flight(self, wallet: Any) -> int:
+        return 0 if self.nonces is None else self.nonces.in_flight(wallet.address)
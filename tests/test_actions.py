@@ -0,0 +1,173 @@
+import subprocess
+import sys
+from typing import List, Optional
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.actions import (
+    UNKNOWN_ACTION,
+    ActionRegistry,
+    ActionRequest,
+    CreateFixedRateExchangeRequest,
+    DatasetAlgorithmRequest,
+    InvalidRequest,
+    action,
+)
+
+
+class EchoRequest(ActionRequest):
+    __slots__ = ("text", "times")
+
+    DEFAULTS = {"times": 1}
+
+    text: str
+    times: int
+
+
+def test_request_models_are_compiled_from_their_slots():
+    """Tests the validation and defaults of the request models."""
+
+    request = EchoRequest.from_kwargs({"type": "ECHO", "text": "hi", "sender": "a"})
+    assert (request.type, request.text, request.times) == ("ECHO", "hi", 1)
+    assert request.kwargs["sender"] == "a"
+    assert EchoRequest.FIELDS == ("text", "times")
+    with pytest.raises(AttributeError):
+        request.other = 1
+
+    with pytest.raises(InvalidRequest) as e:
+        DatasetAlgorithmRequest.from_kwargs(
+            {"type": "PERMISSION_DATASET", "data_did": "did:op:1"}
+        )
+    assert (
+        str(e.value)
+        == "'algo_did' is missing from the required arguments for PERMISSION_DATASET. Please add it."
+    )
+
+
+def test_request_models_check_the_types_of_their_fields():
+    """Tests that the fields must have their annotated types."""
+
+    class TaggedRequest(ActionRequest):
+        __slots__ = ("tags", "note", "anything")
+
+        DEFAULTS = {"note": None}
+
+        tags: List[str]
+        note: Optional[str]
+        anything: object
+
+    request = CreateFixedRateExchangeRequest.from_kwargs(
+        {
+            "type": "CREATE_FIXED_RATE_EXCHANGE",
+            "datatoken_address": "0x1",
+            "rate": 1,
+            "ocean_amt": 2.5,
+        }
+    )
+    assert (request.rate, request.ocean_amt) == (1, 2.5)
+    with pytest.raises(InvalidRequest) as e:
+        CreateFixedRateExchangeRequest.from_kwargs(
+            {
+                "type": "CREATE_FIXED_RATE_EXCHANGE",
+                "datatoken_address": "0x1",
+                "rate": "abc",
+                "ocean_amt": [],
+            }
+        )
+    assert (
+        str(e.value)
+        == "'rate' must be a float or int for CREATE_FIXED_RATE_EXCHANGE, not a str."
+    )
+    with pytest.raises(InvalidRequest):
+        EchoRequest.from_kwargs({"type": "ECHO", "text": "hi", "times": True})
+    with pytest.raises(InvalidRequest):
+        EchoRequest.from_kwargs({"type": "ECHO", "text": "hi", "times": "2"})
+
+    assert TaggedRequest.from_kwargs({"tags": ["a"], "anything": None}).note is None
+    assert (
+        TaggedRequest.from_kwargs({"tags": [], "note": "n", "anything": 1}).note == "n"
+    )
+    with pytest.raises(InvalidRequest):
+        TaggedRequest.from_kwargs({"tags": [], "note": 1, "anything": 1})
+    with pytest.raises(InvalidRequest):
+        TaggedRequest.from_kwargs({"tags": "a", "anything": 1})
+
+
+def test_actions_are_called_with_the_validated_request(monkeypatch):
+    """Tests that the methods registered with `action` get the defaults of the model."""
+
+    registry = ActionRegistry()
+    monkeypatch.setattr(
+        "ocean_connection.connections.ocean_connection.actions.ACTIONS", registry
+    )
+
+    @action("ECHO", EchoRequest, suffix="!")
+    def echo(connection, text, times, suffix, **kwargs):
+        return text * times + suffix
+
+    spec, request = registry.parse({"type": "ECHO", "text": "a", "sender": "b"})
+    assert spec.handler(None, request) == "a!"
+    assert request.to_kwargs() == {
+        "type": "ECHO",
+        "text": "a",
+        "sender": "b",
+        "times": 1,
+    }
+
+
+def test_validate_args_knows_the_actions_of_the_connection():
+    """Tests that the built-in actions are validated without importing the connection first."""
+
+    script = (
+        "from ocean_connection.connections.ocean_connection.utils import validate_args\n"
+        "print(validate_args(type='CREATE_DISPENSER', datatoken_address='0x1'))\n"
+        "print(validate_args(type='CREATE_DISPENSER'))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+
+    assert output == [
+        "(True, '')",
+        "(False, \"'datatoken_address' is missing from the required arguments for CREATE_DISPENSER. Please add it.\")",
+    ]
+
+
+def test_registry_dispatch_and_plugins(tmp_path, monkeypatch):
+    """Tests registering, dispatching and loading actions from a plugin module."""
+
+    registry = ActionRegistry()
+    registry.register(
+        "ECHO", EchoRequest, lambda connection, request: request.text * request.times
+    )
+    with pytest.raises(ValueError):
+        registry.register("ECHO", EchoRequest, lambda connection, request: None)
+    with pytest.raises(TypeError):
+        registry.register("OTHER", dict, lambda connection, request: None)
+
+    spec, request = registry.parse({"type": "ECHO", "text": "a", "times": 3})
+    assert spec.handler(None, request) == "aaa"
+    with pytest.raises(InvalidRequest) as e:
+        registry.parse({"type": "UNKNOWN"})
+    assert str(e.value) == UNKNOWN_ACTION
+
+    (tmp_path / "echo_plugin.py").write_text(
+        "from ocean_connection.connections.ocean_connection.actions import (\n"
+        "    ACTIONS, DatasetAlgorithmRequest)\n"
+        "\n"
+        "@ACTIONS.register('PLUGGED', DatasetAlgorithmRequest)\n"
+        "def plugged(connection, request):\n"
+        "    return {'type': 'PLUGGED', 'did': request.data_did}\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    registry.load_plugins(["echo_plugin"])
+    try:
+        from ocean_connection.connections.ocean_connection.actions import ACTIONS
+
+        spec, request = ACTIONS.parse(
+            {"type": "PLUGGED", "data_did": "1", "algo_did": "2"}
+        )
+        assert spec.handler(None, request) == {"type": "PLUGGED", "did": "1"}
+    finally:
+        ACTIONS.unregister("PLUGGED")
+        sys.modules.pop("echo_plugin", None)
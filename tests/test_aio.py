@@ -0,0 +1,161 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+import pytest
+
+from ocean_connection.connections.ocean_connection.aio import (
+    AsyncComputeJobTracker,
+    AsyncProvider,
+    ThreadedClient,
+)
+from ocean_connection.connections.ocean_connection.jobs import JOB_FINISHED
+from ocean_connection.connections.ocean_connection.metrics import ConnectionMetrics
+
+
+class _FakeOcean(BaseHTTPRequestHandler):
+    """The compute endpoints of a provider."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            return self._reply(
+                200,
+                {
+                    "serviceEndpoints": {
+                        "computeStatus": ["GET", "/api/services/compute"],
+                        "computeResult": ["GET", "/api/services/computeResult"],
+                    }
+                },
+            )
+        if url.path == "/api/services/compute":
+            query = parse_qs(url.query)
+            return self._reply(200, [{"jobId": query["jobId"][0], "status": 40}])
+        if url.path == "/api/services/computeResult":
+            body = b"output"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return None
+        return self._reply(404, {})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_ocean():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOcean)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_provider_client(fake_ocean, monkeypatch):
+    """Tests the signed compute status and result requests."""
+
+    class _Signer:
+        @staticmethod
+        def sign_message(wallet, msg):
+            return "1", f"signed:{msg}"
+
+    monkeypatch.setattr(
+        "ocean_connection.connections.ocean_connection.aio.DataServiceProvider",
+        _Signer,
+    )
+
+    class _Obj:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    ddo = _Obj(did="did:op:1")
+    service = _Obj(service_endpoint=f"{fake_ocean}/api/services/compute")
+    wallet = _Obj(address="0xa")
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            provider = AsyncProvider(session)
+            status = await provider.status(ddo, service, "job-1", wallet)
+            result = await provider.result(ddo, service, "job-1", 0, wallet)
+        return status, result
+
+    status, result = asyncio.run(run())
+    assert status == {"jobId": "job-1", "status": 40, "ok": True}
+    assert result == b"output"
+
+
+def test_job_tracker_polls_with_coroutines():
+    """Tests that many jobs are tracked concurrently and their results delivered."""
+
+    class _Compute:
+        def __init__(self):
+            self.polls = {}
+
+        async def status(self, ddo, service, job_id, wallet):
+            self.polls[job_id] = self.polls.get(job_id, 0) + 1
+            if self.polls[job_id] < 3:
+                return {"status": 40}
+            return {"status": JOB_FINISHED, "results": [{"type": "output"}]}
+
+        async def result(self, ddo, service, job_id, index, wallet):
+            return job_id.encode()
+
+    finished, failed = [], []
+
+    async def run():
+        tracker = AsyncComputeJobTracker(
+            _Compute(),
+            on_finished=lambda job, results: finished.append(results),
+            on_failed=lambda job, reason: failed.append(reason),
+            min_interval=0.01,
+            max_interval=0.02,
+        )
+        for index in range(500):
+            tracker.track(f"job-{index}", None, None, None, {})
+        while tracker.outstanding:
+            await asyncio.sleep(0.01)
+        return tracker
+
+    tracker = asyncio.run(run())
+    assert len(finished) == 500
+    assert [b"job-0"] in finished
+    assert failed == []
+    assert tracker.polls == 1500
+
+
+def test_threaded_client_and_async_metrics():
+    """Tests that blocking clients are awaited through the pool, and coroutines are timed."""
+
+    class _Blocking:
+        def status(self, did):
+            return {"id": did}
+
+    async def run_blocking(fn, *args, **kwargs):
+        return await asyncio.get_event_loop().run_in_executor(
+            None, lambda: fn(*args, **kwargs)
+        )
+
+    metrics = ConnectionMetrics()
+
+    async def run():
+        client = metrics.instrument(
+            ThreadedClient(_Blocking(), run_blocking), "compute"
+        )
+        return await client.status("did:op:1")
+
+    assert asyncio.run(run()) == {"id": "did:op:1"}
+    assert metrics.snapshot()["dependencies"]["compute"]["count"] == 1
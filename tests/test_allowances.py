@@ -0,0 +1,51 @@
+from ocean_connection.connections.ocean_connection.allowances import AllowanceManager
+
+
+class _Token:
+    address = "0xToken"
+
+    def __init__(self, allowance=0):
+        self.on_chain = allowance
+        self.reads = 0
+
+    def allowance(self, owner, spender):
+        self.reads += 1
+        return self.on_chain
+
+    def approve(self, value):
+        self.on_chain = value
+
+
+def test_approval_is_sent_only_when_needed():
+    """Tests that covered operations don't send approvals."""
+
+    token = _Token(allowance=5)
+    allowances = AllowanceManager()
+
+    assert not allowances.ensure(token, "0xOwner", "0xExchange", 5, token.approve)
+    assert allowances.ensure(token, "0xOwner", "0xExchange", 8, token.approve)
+    assert token.on_chain == 8
+    assert not allowances.ensure(token, "0xOwner", "0xExchange", 8, token.approve)
+    assert token.reads == 2
+    assert allowances.stats() == {"approvals": 1, "skipped": 2}
+
+    # After spending, the on-chain allowance is read again before approving.
+    allowances.spend(token.address, "0xOwner", "0xExchange", 4)
+    token.on_chain = 8
+    assert not allowances.ensure(token, "0xOwner", "0xExchange", 6, token.approve)
+    assert token.reads == 3
+
+
+def test_standing_allowance_policy():
+    """Tests approving a larger standing amount."""
+
+    token = _Token()
+    allowances = AllowanceManager(standing_amount=100)
+
+    assert allowances.ensure(token, "0xOwner", "0xExchange", 10, token.approve)
+    assert token.on_chain == 100
+    for _ in range(9):
+        allowances.ensure(token, "0xOwner", "0xExchange", 10, token.approve)
+        allowances.spend(token.address, "0xOwner", "0xExchange", 10)
+
+    assert allowances.stats()["approvals"] == 1
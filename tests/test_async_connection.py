@@ -0,0 +1,166 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from aea.components.base import perform_load_aea_package
+from aea.configurations.base import ConnectionConfig
+from aea.mail.base import Envelope
+
+from ocean_connection.connections.ocean_connection.async_connection import (
+    AsyncOceanConnection,
+)
+from ocean_connection.connections.ocean_connection.utils import (
+    decode_message,
+    encode_message,
+)
+
+
+# The requests and results are sent with the vendored default protocol,
+# importable as `packages.fetchai.protocols.default` like in an agent project.
+perform_load_aea_package(
+    Path(__file__).parents[1] / "ocean_connection/vendor/fetchai/protocols/default",
+    "fetchai",
+    "protocols",
+    "default",
+)
+
+from packages.fetchai.protocols.default.message import (  # noqa: E402
+    DefaultMessage,
+)
+
+SENDER = "fetchai/echo:0.1.0"
+
+DATASET = {
+    "type": "DEPLOY_C2D",
+    "dataset_url": "https://example.com/data.csv",
+    "name": "example",
+    "description": "example",
+    "author": "Trent",
+    "license": "CCO",
+    "has_pricing_schema": True,
+}
+
+
+def _envelope(**request):
+    return Envelope(
+        to=str(AsyncOceanConnection.connection_id),
+        sender=SENDER,
+        message=DefaultMessage(
+            performative=DefaultMessage.Performative.BYTES,
+            content=encode_message(request),
+        ),
+    )
+
+
+def _connection(tmp_path, **config):
+    return AsyncOceanConnection(
+        ConnectionConfig(
+            "ocean_connection",
+            "ocean_protocol",
+            "0.1.5",
+            backend="simulation",
+            journal_path=":memory:",
+            confirmation_poll_interval=0.01,
+            **config,
+        ),
+        str(tmp_path),
+    )
+
+
+async def _results(connection, count):
+    results = []
+    for _ in range(count):
+        envelope = await asyncio.wait_for(connection.receive(), 10)
+        assert envelope.to == SENDER
+        results.append(decode_message(envelope.message.content))
+    return results
+
+
+def test_actions_run_concurrently_and_report_errors(tmp_path):
+    """Tests that deployments are delivered to the sender, and unknown actions fail."""
+
+    connection = _connection(tmp_path, simulation={"seed": 1, "indexing_delay": 0.05})
+
+    async def run():
+        await connection.connect()
+        for _ in range(20):
+            await connection.send(_envelope(**DATASET))
+        await connection.send(_envelope(type="BOGUS"))
+        results = await _results(connection, 21)
+        await connection.disconnect()
+        return results
+
+    results = asyncio.run(run())
+    assert connection.is_disconnected
+
+    errors = [result for result in results if result["type"] == "ERROR"]
+    assert errors == [{"type": "ERROR", "action": "BOGUS", "error": errors[0]["error"]}]
+    deployments = [result for result in results if result["type"] != "ERROR"]
+    assert len({result["did"] for result in deployments}) == 20
+
+    metrics = connection.engine.metrics.snapshot()["actions"]["DEPLOY_C2D"]
+    assert metrics["succeeded"] == 20
+
+
+def test_confirmations_do_not_hold_a_thread(tmp_path):
+    """Tests that actions waiting for their confirmations leave the pool to the other ones."""
+
+    connection = _connection(
+        tmp_path, simulation={"seed": 1, "block_time": 0.1}, max_blocking_calls=1
+    )
+    get_tx_dict = connection.engine._get_tx_dict
+    # Like on Polygon, the transactions need a few blocks after the one they are mined in.
+    connection.engine._get_tx_dict = lambda **kwargs: {
+        **get_tx_dict(**kwargs),
+        "required_confs": 5,
+    }
+
+    async def run():
+        await connection.connect()
+        await connection.send(_envelope(**DATASET))
+        (deployment,) = await _results(connection, 1)
+
+        start = time.monotonic()
+        for _ in range(3):
+            await connection.send(
+                _envelope(
+                    type="CREATE_DISPENSER",
+                    datatoken_address=deployment["datatoken_contract_address"],
+                )
+            )
+        results = await _results(connection, 3)
+        elapsed = time.monotonic() - start
+        await connection.disconnect()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    assert [result["type"] for result in results] == [
+        "DISPENSER_DEPLOYMENT_RECEIPT"
+    ] * 3
+    # Mining holds the thread, about a block per action. Waiting for the four
+    # confirmation blocks of each action in turn as well would take 1.5 seconds.
+    assert elapsed < 1.1
+
+
+def test_failed_connections_are_released(tmp_path):
+    """Tests that a connection failing to connect closes what it created, and disconnects."""
+
+    connection = _connection(tmp_path)
+
+    def fail():
+        raise RuntimeError("no clients")
+
+    connection._create_clients = fail
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await connection.connect()
+        await connection.disconnect()
+
+    asyncio.run(run())
+    assert connection.is_disconnected
+    assert connection._pool is None
+    assert connection.job_tracker is None
+    assert connection.engine.journal._closed
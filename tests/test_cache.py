@@ -0,0 +1,136 @@
+import threading
+import time
+
+from ocean_connection.connections.ocean_connection.cache import DDOCache, OrderCache
+
+
+class _DDO:
+    def __init__(self, did, name="example"):
+        self.did = did
+        self.name = name
+
+    def as_dictionary(self):
+        return {"id": self.did, "name": self.name}
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        return cls(dictionary["id"], dictionary["name"])
+
+
+def test_ddo_cache_hits_misses_and_eviction():
+    """Tests LRU eviction, TTL expiry and invalidation of the DDO cache."""
+
+    resolved = []
+
+    def resolve(did):
+        resolved.append(did)
+        return _DDO(did)
+
+    cache = DDOCache(resolve, max_size=2, ttl=60)
+
+    cache.get("did:op:1")
+    cache.get("did:op:1")
+    cache.get("did:op:2")
+    cache.get("did:op:3")  # evicts did:op:1
+    cache.get("did:op:1")
+
+    assert resolved == ["did:op:1", "did:op:2", "did:op:3", "did:op:1"]
+    assert cache.stats() == {"hits": 1, "misses": 4, "size": 2}
+
+    cache.invalidate("did:op:1")
+    assert "did:op:1" not in cache
+
+    cache.ttl = 0
+    cache.get("did:op:3")
+    assert resolved[-1] == "did:op:3"
+
+
+def test_ddo_cache_is_not_filled_with_unknown_dids():
+    """Tests that failed resolutions are not cached."""
+
+    cache = DDOCache(lambda did: None)
+
+    assert cache.get("did:op:unknown") is None
+    assert len(cache) == 0
+
+
+def test_ddo_cache_persistence(tmp_path):
+    """Tests that a restarted cache is warm."""
+
+    path = str(tmp_path / "ddos.json")
+    cache = DDOCache(_DDO, persist_path=path, from_dict=_DDO.from_dict)
+    cache.get("did:op:1")
+
+    def unreachable(did):
+        raise AssertionError("Should have been served from disk.")
+
+    restarted = DDOCache(unreachable, persist_path=path, from_dict=_DDO.from_dict)
+    assert restarted.get("did:op:1").did == "did:op:1"
+    assert restarted.hits == 1
+
+    expired = DDOCache(unreachable, ttl=0, persist_path=path, from_dict=_DDO.from_dict)
+    assert len(expired) == 0
+
+
+def test_order_cache_validity_window(tmp_path):
+    """Tests that orders are reused within the timeout of their service only."""
+
+    path = str(tmp_path / "orders.json")
+    orders = OrderCache(safety_margin=60, persist_path=path)
+    orders.put("did:op:1", "access", "0xConsumer", "0xorder", timeout=3600)
+    orders.put("did:op:2", "access", "0xConsumer", "0xold", timeout=3600, ordered_at=0)
+    orders.put("did:op:3", "access", "0xConsumer", "0xforever", timeout=0, ordered_at=0)
+
+    assert orders.get("did:op:1", "access", "0xConsumer") == "0xorder"
+    assert orders.get("did:op:1", "access", "0xOther") is None
+    assert orders.get("did:op:2", "access", "0xConsumer") is None
+    assert orders.get("did:op:3", "access", "0xConsumer") == "0xforever"
+
+    # Orders about to expire aren't reused either.
+    orders.put("did:op:4", "access", "0xConsumer", "0xsoon", 3600, time.time() - 3590)
+    assert orders.get("did:op:4", "access", "0xConsumer") is None
+
+    reloaded = OrderCache(persist_path=path)
+    assert reloaded.get("did:op:1", "access", "0xConsumer") == "0xorder"
+    reloaded.invalidate("did:op:1", "access", "0xConsumer")
+    assert reloaded.get("did:op:1", "access", "0xConsumer") is None
+    assert orders.stats()["hits"] == 2
+
+
+def test_ddo_cache_is_written_outside_of_its_lock(tmp_path):
+    """Tests that cached DDOs are served while the cache is written, and writes coalesce."""
+
+    writing, release = threading.Event(), threading.Event()
+    written = []
+
+    def to_dict(ddo):
+        written.append(ddo.did)
+        if ddo.did == "did:op:2":
+            writing.set()
+            release.wait(5)
+        return ddo.as_dictionary()
+
+    path = str(tmp_path / "ddos.json")
+    cache = DDOCache(_DDO, persist_path=path, to_dict=to_dict, from_dict=_DDO.from_dict)
+    cache.get("did:op:1")
+
+    first = threading.Thread(target=cache.get, args=("did:op:2",))
+    first.start()
+    assert writing.wait(5)
+    start = time.monotonic()
+    assert cache.get("did:op:1").did == "did:op:1"
+    assert time.monotonic() - start < 1
+
+    others = [threading.Thread(target=cache.get, args=(f"did:op:{i}",)) for i in (3, 4)]
+    for thread in others:
+        thread.start()
+    while "did:op:3" not in cache or "did:op:4" not in cache:
+        time.sleep(0.01)
+    release.set()
+    for thread in [first, *others]:
+        thread.join(5)
+
+    restarted = DDOCache(_DDO, persist_path=path, from_dict=_DDO.from_dict)
+    assert len(restarted) == 4
+    # The DDOs added during the slow write were saved together by one writer.
+    assert written.count("did:op:1") == 3
@@ -0,0 +1,68 @@
+import gzip
+import os
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.compression import (
+    CompressionPolicy,
+    available_codecs,
+    compress_chunks,
+    decompress,
+    decompress_chunks,
+    get_codec,
+    guess_content_type,
+)
+
+TEXT = b"".join(b"%d,%d,%f\n" % (i, i * i, i / 7) for i in range(50_000))
+
+
+@pytest.mark.parametrize("name", list(available_codecs()))
+def test_streaming_round_trip(name):
+    """Tests compressing and decompressing a payload chunk by chunk."""
+
+    codec = get_codec(name)
+    chunks = [TEXT[i : i + 4096] for i in range(0, len(TEXT), 4096)]
+
+    compressed = list(compress_chunks(codec, chunks))
+    assert sum(map(len, compressed)) < len(TEXT) * 0.9
+    assert b"".join(decompress_chunks(codec, compressed)) == TEXT
+    assert decompress(codec.compress(TEXT), name) == TEXT
+
+    with pytest.raises(ValueError):
+        b"".join(decompress_chunks(codec, [b"".join(compressed)[:-10]]))
+
+
+def test_codec_fallback():
+    """Tests that `auto` picks the preferred installed codec and zlib is always there."""
+
+    assert get_codec("zlib").name == "zlib"
+    assert get_codec("auto").name == next(available_codecs())
+    with pytest.raises(ValueError):
+        get_codec("brotli")
+
+
+def test_policy_thresholds_and_content_types(tmp_path):
+    """Tests which payloads the policy compresses."""
+
+    policy = CompressionPolicy(codec="zlib", min_size=1024)
+    assert policy.compress(TEXT[:1000]) is None
+    assert decompress(policy.compress(TEXT), policy.encoding) == TEXT
+
+    # Compressed formats are recognized by their content or their name.
+    assert guess_content_type(gzip.compress(TEXT)) == "application/gzip"
+    assert policy.compress(gzip.compress(TEXT)) is None
+    assert not policy.should_compress(10**6, "video/mp4")
+    assert policy.should_compress(10**6, "text/csv")
+    # Random bytes don't shrink, they are sent as they are.
+    assert policy.compress(os.urandom(10_000)) is None
+
+    path = tmp_path / "data.csv"
+    path.write_bytes(TEXT)
+    assert decompress(policy.compress_file(str(path), chunk_size=1000), "zlib") == TEXT
+    archive = tmp_path / "data.zip"
+    archive.write_bytes(TEXT)
+    assert policy.compress_file(str(archive)) is None
+
+    assert not CompressionPolicy.from_config(None).enabled
+    assert CompressionPolicy.from_config(True).encoding == get_codec("auto").name
+    assert CompressionPolicy.from_config({"codec": "zlib", "min_size": 1}).min_size == 1
@@ -8,7 +8,7 @@ from aea.configurations.base import ConnectionConfig
 from ocean_connection.connections.ocean_connection.connection import OceanConnection
 
 
-def test_compute_flow(caplog, consumer_wallet):
+def test_compute_flow(caplog, consumer_wallet, tmp_path):
     """Tests compute flow."""
 
     ocean = OceanConnection(
@@ -19,7 +19,7 @@ def test_compute_flow(caplog, consumer_wallet):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
@@ -100,7 +100,7 @@ def test_compute_flow(caplog, consumer_wallet):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["BUYER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
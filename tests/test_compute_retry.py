@@ -0,0 +1,78 @@
+from aea.configurations.base import ConnectionConfig
+
+from ocean_connection.connections.ocean_connection.connection import OceanConnection
+
+
+DATASET = {
+    "type": "DEPLOY_C2D",
+    "dataset_url": "https://example.com/branin.arff",
+    "name": "example",
+    "description": "example",
+    "author": "Trent",
+    "license": "CCO",
+    "has_pricing_schema": True,
+}
+
+ALGORITHM = {
+    "type": "DEPLOY_ALGORITHM",
+    "language": "python",
+    "format": "docker-image",
+    "version": "0.1",
+    "entrypoint": "python $ALGO",
+    "image": "oceanprotocol/algo_dockers",
+    "checksum": "sha256:0",
+    "tag": "python-branin",
+    "files_url": "https://example.com/gpr.py",
+    "name": "gpr",
+    "description": "gpr",
+    "author": "Trent",
+    "license": "CCO",
+    "date_created": "2019-12-28T10:55:11Z",
+    "has_pricing_schema": True,
+}
+
+
+def test_failed_order_resolves_the_ddos_again(tmp_path):
+    """Tests that a C2D order failing on the provider side retries with fresh DDOs."""
+
+    ocean = OceanConnection(
+        ConnectionConfig(
+            "ocean_connection",
+            "ocean_protocol",
+            "0.1.5",
+            backend="simulation",
+            simulation={"seed": 1},
+            journal_path=":memory:",
+            track_compute_jobs=False,
+            retry_base_delay=0,
+        ),
+        str(tmp_path),
+    )
+    ocean.on_connect()
+    data_did = ocean.on_send(**DATASET)["did"]
+    algo_did = ocean.on_send(**ALGORITHM)["did"]
+    ocean.on_send(type="PERMISSION_DATASET", data_did=data_did, algo_did=algo_did)
+
+    assets = ocean.ocean.assets
+    pay_for_compute_service = assets.pay_for_compute_service
+    paid = []
+
+    def fail_once(**kwargs):
+        paid.append(kwargs["datasets"][0].ddo)
+        if len(paid) == 1:
+            raise ValueError("provider refused the order: unknown service")
+        return pay_for_compute_service(**kwargs)
+
+    assets.pay_for_compute_service = fail_once
+    ocean.ddo_cache.get(data_did)
+    ocean.ddo_cache.get(algo_did)
+    resolved = []
+    resolver = ocean.ddo_cache.resolver
+    ocean.ddo_cache.resolver = lambda did: resolved.append(did) or resolver(did)
+
+    msg = ocean.on_send(type="C2D_JOB", data_did=data_did, algo_did=algo_did)
+
+    assert msg["type"] == "RESULTS"
+    assert sorted(resolved) == sorted([data_did, algo_did])
+    assert paid[0] is not paid[1]
+    ocean.on_disconnect()
@@ -0,0 +1,164 @@
+import time
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.confirmations import (
+    ConfirmationWatcher,
+    TransactionFailed,
+    wait_confirmed,
+    wait_mined,
+)
+from ocean_connection.connections.ocean_connection.simulation import (
+    SimulatedBackend,
+    SimulationConfig,
+    SimulatedWallet,
+)
+
+
+class _FakeEth:
+    """A chain whose head and receipts are set by the test."""
+
+    def __init__(self):
+        self.block_number = 0
+        self.receipts = {}
+        self.mined_counts = {}
+        self.receipt_reads = 0
+        self.count_reads = 0
+
+    def get_transaction_count(self, address, block_identifier):
+        assert block_identifier == "latest"
+        self.count_reads += 1
+        return self.mined_counts.get(address, 0)
+
+    def get_transaction_receipt(self, txid):
+        self.receipt_reads += 1
+        if txid not in self.receipts:
+            raise ValueError("TransactionNotFound")
+        return self.receipts[txid]
+
+    def mine(self, txid, sender, status=1, block_hash="0xa"):
+        self.block_number += 1
+        self.mined_counts[sender] = self.mined_counts.get(sender, 0) + 1
+        self.receipts[txid] = {
+            "blockNumber": self.block_number,
+            "blockHash": block_hash,
+            "status": status,
+            "gasUsed": 21000,
+        }
+
+
+class _FakeWeb3:
+    def __init__(self):
+        self.eth = _FakeEth()
+
+
+def test_transactions_are_confirmed_after_their_blocks():
+    """Tests that transactions settle as blocks arrive, reading receipts only when due."""
+
+    # The watcher isn't started: the test polls.
+    web3 = _FakeWeb3()
+    watcher = ConfirmationWatcher(web3)
+    first = watcher.watch("0x1", "0xa", 0, required_confs=3)
+    second = watcher.watch("0x2", "0xa", 1, required_confs=1)
+
+    watcher.poll_once()
+    assert web3.eth.receipt_reads == 0
+    assert not first.mined.done()
+
+    web3.eth.mine("0x1", "0xa")
+    watcher.poll_once()
+    assert first.wait_mined(0) == web3.eth.receipts["0x1"]
+    assert not first.confirmed.done()
+    assert not second.mined.done()
+    # The nonce of the second transaction isn't used yet, its receipt isn't read.
+    assert web3.eth.receipt_reads == 1
+
+    # Polls within the same block read nothing but the head.
+    watcher.poll_once()
+    assert web3.eth.receipt_reads == 1
+
+    web3.eth.mine("0x2", "0xa")
+    watcher.poll_once()
+    assert second.wait(0)["blockNumber"] == 2
+    assert not first.confirmed.done()
+
+    web3.eth.block_number += 1
+    watcher.poll_once()
+    assert wait_confirmed([first, None, second], 0)[0]["blockNumber"] == 1
+    assert watcher.outstanding == []
+
+
+def test_reverted_and_dropped_transactions_fail():
+    """Tests that reverts and transactions never mined fail both futures."""
+
+    web3 = _FakeWeb3()
+    now = [0.0]
+    watcher = ConfirmationWatcher(web3, timeout=10, clock=lambda: now[0])
+    reverted = watcher.watch("0x1", "0xa", 0)
+    dropped = watcher.watch("0x2", "0xb", 0)
+
+    web3.eth.mine("0x1", "0xa", status=0)
+    watcher.poll_once()
+    with pytest.raises(TransactionFailed, match="reverted"):
+        wait_mined([reverted], 0)
+    with pytest.raises(TransactionFailed):
+        reverted.wait(0)
+
+    now[0] = 11
+    watcher.poll_once()
+    with pytest.raises(TransactionFailed, match="timed out"):
+        dropped.wait(0)
+    assert watcher.outstanding == []
+    watcher.stop()
+
+
+def test_reorganised_transactions_wait_again():
+    """Tests that a transaction moved to another block counts its confirmations again."""
+
+    web3 = _FakeWeb3()
+    watcher = ConfirmationWatcher(web3)
+    pending = watcher.watch("0x1", required_confs=2)
+
+    web3.eth.mine("0x1", "0xa", block_hash="0xa")
+    watcher.poll_once()
+    assert pending.mined.done()
+
+    # Block 1 is replaced, the transaction is mined again in block 2.
+    web3.eth.mine("0x1", "0xa", block_hash="0xb")
+    watcher.poll_once()
+    assert not pending.confirmed.done()
+    assert pending.block_number == 2
+
+    web3.eth.block_number += 1
+    watcher.poll_once()
+    assert pending.wait(0)["blockHash"] == "0xb"
+    watcher.stop()
+
+
+def test_simulated_transactions_are_watched():
+    """Tests that transactions sent without waiting are confirmed by the background thread."""
+
+    backend = SimulatedBackend(SimulationConfig(block_time=0.05))
+    ocean = backend.create_ocean(backend.config_dict("simulation"))
+    wallet = SimulatedWallet(backend.network, "0xa")
+    watcher = ConfirmationWatcher(backend.web3, poll_interval=0.01)
+    watcher.start()
+
+    start = time.monotonic()
+    pending = [
+        watcher.watch(
+            ocean.OCEAN_token.approve(
+                f"0x{index}", 1, {"from": wallet, "required_confs": 0}
+            ).txid,
+            wallet.address,
+            index,
+            required_confs=2,
+        )
+        for index in range(5)
+    ]
+    assert time.monotonic() - start < 0.05
+
+    receipts = wait_confirmed(pending, timeout=5)
+    assert receipts[-1]["blockNumber"] - receipts[0]["blockNumber"] <= 1
+    assert ocean.OCEAN_token.allowance(wallet.address, "0x4") == 1
+    watcher.stop()
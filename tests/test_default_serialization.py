@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+
+from aea.components.base import perform_load_aea_package
+
+from ocean_connection.connections.ocean_connection.utils import (
+    RAW_CONTENT_THRESHOLD,
+    decode_message,
+    encode_message,
+)
+
+
+# The vendored protocol is importable as `packages.fetchai.protocols.default`,
+# like in an agent project.
+perform_load_aea_package(
+    Path(__file__).parents[1] / "ocean_connection/vendor/fetchai/protocols/default",
+    "fetchai",
+    "protocols",
+    "default",
+)
+
+from packages.fetchai.protocols import default  # noqa: E402
+
+DefaultMessage = default.DefaultMessage
+DefaultSerializer = default.DefaultSerializer
+
+
+def test_large_results_are_sent_raw():
+    """Tests that large binary values skip base64 and go through the serializer as they are."""
+
+    data = os.urandom(1 << 20)
+    content = encode_message({"type": "DOWNLOAD", "data": data, "small": b"\x01"})
+    assert len(content) < len(data) + 200
+
+    msg = DefaultMessage(
+        performative=DefaultMessage.Performative.BYTES,
+        content=content,
+    )
+    encoded = DefaultSerializer.encode(msg)
+    decoded = decode_message(DefaultSerializer.decode(encoded).content)
+
+    assert decoded == {"type": "DOWNLOAD", "data": data, "small": b"\x01"}
+    assert isinstance(decoded["data"], bytes)
+
+
+def test_small_results_stay_json():
+    """Tests that messages without large binary values are plain JSON."""
+
+    data = os.urandom(RAW_CONTENT_THRESHOLD - 1)
+    content = encode_message({"type": "DOWNLOAD", "data": data})
+
+    assert content.startswith(b"{")
+    assert decode_message(content) == {"type": "DOWNLOAD", "data": data}
@@ -0,0 +1,58 @@
+import json
+import os
+
+from brownie.network import accounts
+from ocean_lib.example_config import get_config_dict
+from ocean_lib.ocean.ocean import Ocean
+from ocean_lib.web3_internal.utils import connect_to_network
+from web3.main import Web3
+
+from distribute_OCEAN_tokens import (
+    distribute_ocean_tokens_bulk,
+    load_progress,
+    load_recipients,
+)
+
+
+def test_load_recipients(tmp_path):
+    """Tests reading recipients from CSV and JSONL files."""
+
+    address = "0x" + "ab" * 20
+    csv_path = tmp_path / "recipients.csv"
+    csv_path.write_text(f"address,amount\n{address},1.5\n{address},\n")
+    jsonl_path = tmp_path / "recipients.jsonl"
+    jsonl_path.write_text(json.dumps({"address": address, "amount": 2}) + "\n")
+
+    assert load_recipients(str(csv_path), default_amount=7) == [
+        (Web3.toChecksumAddress(address), Web3.toWei("1.5", "ether")),
+        (Web3.toChecksumAddress(address), 7),
+    ]
+    assert load_recipients(str(jsonl_path)) == [
+        (Web3.toChecksumAddress(address), Web3.toWei(2, "ether"))
+    ]
+
+
+def test_bulk_distribution_on_ganache(tmp_path):
+    """Tests funding many wallets and resuming from the progress file."""
+
+    connect_to_network("development")
+    ocean = Ocean(get_config_dict("development"))
+    deployer_wallet = accounts.add(os.environ["FACTORY_DEPLOYER_PRIVATE_KEY"])
+    wallets = [accounts.add() for _ in range(5)]
+    recipients = [(w.address, Web3.toWei(3, "ether")) for w in wallets]
+    progress_path = str(tmp_path / "progress.jsonl")
+
+    counts = distribute_ocean_tokens_bulk(
+        ocean, recipients[:3], deployer_wallet, progress_path, batch_size=2
+    )
+    assert counts == {"funded": 3, "skipped": 0, "failed": 0}
+
+    counts = distribute_ocean_tokens_bulk(
+        ocean, recipients, deployer_wallet, progress_path, batch_size=2
+    )
+    assert counts == {"funded": 2, "skipped": 3, "failed": 0}
+
+    progress = load_progress(progress_path)
+    assert all(progress[w.address]["status"] == "confirmed" for w in wallets)
+    for w in wallets:
+        assert ocean.OCEAN_token.balanceOf(w.address) == Web3.toWei(3, "ether")
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.download_cache import (
+    DownloadCache,
+)
+
+
+def _download(cache, data, name="data.csv"):
+    with cache.staging() as folder:
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        yield path
+
+
+def _put(cache, did, data, order_tx_id="0x01", **kwargs):
+    for path in _download(cache, data):
+        with cache.put(did, "0", 0, path, order_tx_id, **kwargs) as cached:
+            return cached
+
+
+def test_files_are_stored_once_and_survive_a_restart(tmp_path):
+    """Tests that files are content-addressed and found again after reopening."""
+
+    cache = DownloadCache(str(tmp_path))
+    data = os.urandom(1000)
+    first = _put(cache, "did:op:1", data)
+    second = _put(cache, "did:op:2", data, order_tx_id="0x02")
+
+    assert first.path == second.path
+    assert first.sha256 == hashlib.sha256(data).hexdigest()
+    assert cache.stats()["files"] == 1
+    assert os.listdir(tmp_path / "staging") == []
+    cache.close()
+
+    cache = DownloadCache(str(tmp_path))
+    with cache.lease("did:op:2", "0") as cached:
+        assert cached.order_tx_id == "0x02"
+        with open(cached.path, "rb") as f:
+            assert f.read() == data
+    with cache.lease("did:op:2", "0", checksum="sha256:" + "0" * 64) as cached:
+        assert cached is None
+    with cache.lease("did:op:3", "0") as cached:
+        assert cached is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_checksum_mismatch_is_not_cached(tmp_path):
+    """Tests that a file not matching the expected checksum isn't cached."""
+
+    cache = DownloadCache(str(tmp_path))
+    with pytest.raises(ValueError):
+        _put(cache, "did:op:1", b"data", checksum="0" * 64)
+
+    with cache.lease("did:op:1", "0") as cached:
+        assert cached is None
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    """Tests eviction by total size, skipping the leased files."""
+
+    cache = DownloadCache(str(tmp_path), max_bytes=2500)
+    _put(cache, "did:op:1", os.urandom(1000))
+    _put(cache, "did:op:2", os.urandom(1000))
+    with cache.lease("did:op:1", "0"):
+        pass
+    _put(cache, "did:op:3", os.urandom(1000))
+
+    with cache.lease("did:op:2", "0") as cached:
+        assert cached is None
+    assert cache.stats()["bytes"] == 2000
+
+    with cache.lease("did:op:1", "0") as leased:
+        _put(cache, "did:op:4", os.urandom(2000))
+        assert os.path.exists(leased.path)
+        assert cache.stats()["bytes"] == 3000
+    assert not os.path.exists(leased.path)
+    assert cache.stats()["bytes"] == 2000
+
+
+def test_exported_files_outlive_their_lease(tmp_path):
+    """Tests that an exported file stays once the cached one is evicted."""
+
+    cache = DownloadCache(str(tmp_path), max_bytes=50)
+    data = os.urandom(100)
+    for path in _download(cache, data):
+        with cache.put("did:op:1", "0", 0, path) as cached:
+            exported = cache.export(cached.path)
+            again = cache.export(cached.path)
+
+    assert not os.path.exists(cached.path)
+    assert exported != again
+    with open(exported, "rb") as f:
+        assert f.read() == data
+    assert cache.stats()["bytes"] == 0
+
+
+def test_concurrent_readers_and_writers(tmp_path):
+    """Tests that readers only ever see complete files while others write and evict."""
+
+    cache = DownloadCache(str(tmp_path), max_bytes=20_000)
+    contents = {f"did:op:{i}": os.urandom(5000) for i in range(10)}
+    errors = []
+
+    def run(did):
+        try:
+            for _ in range(20):
+                with cache.lease(did, "0") as cached:
+                    if cached is None:
+                        _put(cache, did, contents[did])
+                        continue
+                    with open(cached.path, "rb") as f:
+                        assert f.read() == contents[did]
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(did,)) for did in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.stats()["bytes"] <= 20_000
@@ -0,0 +1,124 @@
+import hashlib
+from pathlib import Path
+
+from aea.components.base import perform_load_aea_package
+from aea.configurations.base import ConnectionConfig
+
+from ocean_connection.connections.ocean_connection.connection import OceanConnection
+from ocean_connection.connections.ocean_connection.utils import decode_message
+
+
+# The results are sent with the vendored default protocol, importable as
+# `packages.fetchai.protocols.default` like in an agent project.
+perform_load_aea_package(
+    Path(__file__).parents[1] / "ocean_connection/vendor/fetchai/protocols/default",
+    "fetchai",
+    "protocols",
+    "default",
+)
+
+FILE_SIZE = 100_000
+
+
+def _connect(tmp_path, **config):
+    ocean = OceanConnection(
+        ConnectionConfig(
+            "ocean_connection",
+            "ocean_protocol",
+            "0.1.5",
+            backend="simulation",
+            simulation={"seed": 1, "file_size": FILE_SIZE},
+            journal_path=":memory:",
+            track_compute_jobs=False,
+            **config,
+        ),
+        str(tmp_path),
+    )
+    ocean.on_connect()
+    ocean.envelopes = []
+    ocean.put_envelope = ocean.envelopes.append
+    return ocean
+
+
+def _publish(ocean):
+    """Publishes a dataset with a dispenser and returns the base of its download requests."""
+
+    receipt = ocean.on_send(
+        type="DEPLOY_DATA_DOWNLOAD",
+        dataset_url="https://example.com/branin.arff",
+        name="example",
+        description="example",
+        author="Trent",
+        license="CCO",
+        has_pricing_schema=False,
+    )
+    ocean.on_send(
+        type="CREATE_DISPENSER",
+        datatoken_address=receipt["datatoken_contract_address"],
+    )
+    return {
+        "type": "DOWNLOAD_ASSET",
+        "datatoken_address": receipt["datatoken_contract_address"],
+        "asset_did": receipt["did"],
+        "datatoken_amt": 1,
+        "sender": "fetchai/echo:0.1.0",
+    }
+
+
+def _expected_content(did):
+    pattern = hashlib.sha256(did.encode()).digest()
+    return (pattern * (FILE_SIZE // len(pattern) + 1))[:FILE_SIZE]
+
+
+def test_download_asset_deliveries(tmp_path):
+    """Tests downloading an asset with each of the deliveries."""
+
+    ocean = _connect(tmp_path)
+    assert ocean.download_cache.root == str(tmp_path / "downloads")
+    request = _publish(ocean)
+    content = _expected_content(request["asset_did"])
+
+    msg = ocean.on_send(**request)
+    assert msg["type"] == "RESULTS"
+    assert bytes(msg["data"]) == content
+
+    msg = ocean.on_send(**request, delivery="path")
+    assert msg["type"] == "RESULTS"
+    assert msg["size"] == FILE_SIZE
+    with open(msg["path"], "rb") as f:
+        assert f.read() == content
+
+    msg = ocean.on_send(**request, delivery="chunks", chunk_size=30_000)
+    chunks = [decode_message(envelope.message.content) for envelope in ocean.envelopes]
+    assert msg["type"] == "RESULTS_STREAMED"
+    assert msg["chunks"] == len(chunks) == 4
+    assert [chunk["offset"] for chunk in chunks] == [0, 30_000, 60_000, 90_000]
+    assert b"".join(bytes(chunk["data"]) for chunk in chunks) == content
+    assert msg["sha256"] == hashlib.sha256(content).hexdigest()
+
+    # Only the first download paid for the access, the others reused its order.
+    assert ocean.backend.stats()["failures"] == {}
+    assert ocean.metrics.snapshot()["actions"]["DOWNLOAD_ASSET"]["succeeded"] == 3
+    ocean.on_disconnect()
+
+
+def test_delivered_paths_outlive_the_cache(tmp_path):
+    """Tests that a file delivered by path stays once the cache has evicted it."""
+
+    ocean = _connect(tmp_path, download_cache_size=FILE_SIZE)
+    request = _publish(ocean)
+    content = _expected_content(request["asset_did"])
+
+    first = ocean.on_send(**request, delivery="path")
+    second = ocean.on_send(**request, delivery="path")
+    assert ocean.download_cache.stats()["hits"] == 1
+
+    other = _publish(ocean)
+    ocean.on_send(**other, delivery="path")
+    assert ocean.download_cache.stats()["files"] == 1
+
+    assert first["path"] != second["path"]
+    for msg in (first, second):
+        with open(msg["path"], "rb") as f:
+            assert f.read() == content
+    ocean.on_disconnect()
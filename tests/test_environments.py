@@ -0,0 +1,81 @@
+import pytest
+
+from ocean_connection.connections.ocean_connection.environments import (
+    ComputeEnvironmentRegistry,
+)
+
+ENVIRONMENTS = [
+    {"id": "busy", "maxJobs": 2, "currentJobs": 2, "priceMin": 0, "maxJobDuration": 60},
+    {
+        "id": "cheap",
+        "maxJobs": 5,
+        "currentJobs": 4,
+        "priceMin": 1,
+        "maxJobDuration": 600,
+    },
+    {
+        "id": "large",
+        "maxJobs": 9,
+        "currentJobs": 1,
+        "priceMin": 3,
+        "maxJobDuration": 3600,
+    },
+]
+
+
+def test_environments_are_cached_per_provider_and_chain():
+    """Tests that providers are only asked once per TTL."""
+
+    calls = []
+
+    def fetch(service_endpoint, chain_id):
+        calls.append((service_endpoint, chain_id))
+        return ENVIRONMENTS
+
+    registry = ComputeEnvironmentRegistry(fetch, ttl=60)
+    for _ in range(3):
+        registry.select("http://provider", 8996)
+    registry.select("http://provider", 137)
+
+    assert calls == [("http://provider", 8996), ("http://provider", 137)]
+    assert registry.stats() == {"hits": 2, "misses": 2, "saved_round_trips": 2}
+
+    registry.invalidate("http://provider", 8996)
+    registry.select("http://provider", 8996)
+    assert len(calls) == 3
+
+
+def test_environment_selection_policies():
+    """Tests picking environments by free slots, price and duration."""
+
+    registry = ComputeEnvironmentRegistry(lambda endpoint, chain_id: ENVIRONMENTS)
+
+    def select(**kwargs):
+        return registry.select("http://provider", 8996, **kwargs)["id"]
+
+    assert select() == "busy"
+    assert select(policy="free_slots") == "large"
+    assert select(policy="price") == "cheap"
+    assert select(policy="price", min_job_duration=1000) == "large"
+    assert select(policy="max_duration") == "large"
+
+    with pytest.raises(ValueError):
+        select(policy="random")
+
+
+def test_selections_count_as_started_jobs():
+    """Tests that concurrent selections by free slots spread over the environments."""
+
+    environments = [
+        {"id": "a", "maxJobs": 3, "currentJobs": 0},
+        {"id": "b", "maxJobs": 2, "currentJobs": 0},
+    ]
+    registry = ComputeEnvironmentRegistry(
+        lambda endpoint, chain_id: environments, policy="free_slots"
+    )
+
+    picked = [registry.select("http://provider", 8996)["id"] for _ in range(5)]
+
+    assert sorted(picked) == ["a", "a", "a", "b", "b"]
+    # The provider's answer isn't modified.
+    assert environments[0]["currentJobs"] == 0
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.connection import OceanConnection
+from ocean_connection.connections.ocean_connection.executor import ActionExecutor
+
+
+def test_action_limits_do_not_starve_other_actions():
+    """Tests that a saturated action type leaves workers for the other ones."""
+
+    executor = ActionExecutor(max_workers=3, action_limits={"C2D_JOB": 1})
+    release = threading.Event()
+
+    slow = [
+        executor.submit("C2D_JOB", lambda i: release.wait(5) and i, i=i)
+        for i in range(3)
+    ]
+    fast = [executor.submit("CREATE_DISPENSER", lambda i: i, i=i) for i in range(5)]
+
+    assert [future.result(timeout=5) for future in fast] == list(range(5))
+    assert executor.running("C2D_JOB") == 1
+    assert executor.pending("C2D_JOB") == 2
+
+    release.set()
+    assert [future.result(timeout=5) for future in slow] == list(range(3))
+    executor.shutdown()
+
+
+def test_executor_propagates_errors_and_cancels_on_shutdown():
+    """Tests error propagation and cancellation of queued actions."""
+
+    executor = ActionExecutor(max_workers=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        executor.submit("DEPLOY_C2D", fail).result(timeout=5)
+
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    blocker = executor.submit("DEPLOY_C2D", block)
+    queued = executor.submit("DEPLOY_C2D", lambda: None)
+    assert started.wait(5)
+    assert executor.pending("DEPLOY_C2D") == 1
+
+    threading.Timer(0.1, release.set).start()
+    executor.shutdown(wait=True)
+
+    assert blocker.done() and blocker.exception() is None
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        executor.submit("DEPLOY_C2D", lambda: None)
+
+
+def test_executor_frees_the_slot_before_resolving():
+    """Tests that a caller waiting on a result can submit straight away."""
+
+    executor = ActionExecutor(max_workers=2, action_limits={"DEPLOY_C2D": 1})
+
+    for i in range(20):
+        assert executor.submit("DEPLOY_C2D", lambda i: i, i=i).result(timeout=5) == i
+        assert executor.running("DEPLOY_C2D") == 0
+
+    executor.shutdown()
+
+
+def test_connection_limits_slow_actions_by_default():
+    """Tests that the compute jobs can't take every worker of the connection."""
+
+    limits = OceanConnection.ACTION_LIMITS
+    executor = ActionExecutor(
+        max_workers=OceanConnection.MAX_WORKER_THREADS, action_limits=limits
+    )
+    release = threading.Event()
+
+    slow = [executor.submit("C2D_JOB", release.wait, timeout=5) for _ in range(10)]
+    assert executor.running("C2D_JOB") == limits["C2D_JOB"]
+    assert executor.submit("CREATE_DISPENSER", lambda: 1).result(timeout=5) == 1
+
+    release.set()
+    assert all(future.result(timeout=5) for future in slow)
+    executor.shutdown()
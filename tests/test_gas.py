@@ -0,0 +1,142 @@
+import json
+import sys
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ocean_connection.connections.ocean_connection import backends
+from ocean_connection.connections.ocean_connection.gas import GasOracle
+from ocean_connection.connections.ocean_connection.lazy import lazy_import
+from ocean_connection.connections.ocean_connection.utils import get_tx_dict
+from web3.main import Web3
+
+
+class _FakeGasStation(BaseHTTPRequestHandler):
+    hits = 0
+    status = 200
+    release = threading.Event()
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.release.wait(5)
+        body = json.dumps({"fast": {"maxPriorityFee": 31.5, "maxFee": 120.25}}).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gas_station():
+    _FakeGasStation.hits = 0
+    _FakeGasStation.status = 200
+    _FakeGasStation.release.set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGasStation)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v2", _FakeGasStation
+    server.shutdown()
+    server.server_close()
+
+
+class _Chain:
+    priority_fee = 2
+    base_fee = 10
+
+
+class _Eth:
+    def fee_history(self, block_count, newest_block, reward_percentiles):
+        return {"baseFeePerGas": [7, 8, 9], "reward": [[1], [3], [5]]}
+
+
+class _Web3:
+    eth = _Eth()
+
+
+def test_gas_price_is_cached(gas_station):
+    """Tests that the gas station is queried once per TTL."""
+
+    url, station = gas_station
+    oracle = GasOracle(gas_station_url=url, ttl=60)
+
+    for _ in range(5):
+        price = oracle.get()
+
+    assert station.hits == 1
+    assert price.source == "gas_station"
+    assert price.priority_fee == Web3.toWei(31.5, "gwei")
+    assert price.max_fee == Web3.toWei(120.25, "gwei")
+
+    tx_dict = get_tx_dict(
+        {"NETWORK_NAME": "polygon"}, "wallet", _Chain, gas_oracle=oracle
+    )
+    assert tx_dict == {
+        "from": "wallet",
+        "priority_fee": price.priority_fee,
+        "max_fee": price.max_fee,
+        "required_confs": 3,
+    }
+    assert station.hits == 1
+
+
+def test_concurrent_callers_share_one_fetch(gas_station):
+    """Tests the single-flight guard."""
+
+    url, station = gas_station
+    station.release.clear()
+    oracle = GasOracle(gas_station_url=url, ttl=60)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(oracle.get) for _ in range(8)]
+        station.release.set()
+        prices = {future.result(timeout=5) for future in futures}
+
+    assert len(prices) == 1
+    assert station.hits == 1
+
+
+def test_fallback_chain(gas_station):
+    """Tests falling back to eth_feeHistory, then to brownie's chain."""
+
+    url, station = gas_station
+    station.status = 500
+
+    oracle = GasOracle(gas_station_url=url, web3=_Web3(), chain=_Chain)
+    price = oracle.get()
+    assert price.source == "fee_history"
+    assert price.priority_fee == 3
+    assert price.max_fee == 2 * 9 + 3
+
+    oracle = GasOracle(gas_station_url=url, chain=_Chain)
+    price = oracle.get()
+    assert price.source == "chain"
+    assert (price.priority_fee, price.max_fee) == (2, 14)
+
+
+def test_ocean_backend_reads_the_brownie_history(monkeypatch):
+    """Tests that the gas used by the transactions is read through the lazily imported history."""
+
+    sent = [
+        types.SimpleNamespace(sender="0xa", nonce=0, gas_used=21000),
+        types.SimpleNamespace(sender="0xb", nonce=4, gas_used=None),
+    ]
+    network = types.ModuleType("brownie.network")
+    network.history = [types.SimpleNamespace(sender="0xa", nonce=None, gas_used=1)]
+    monkeypatch.setitem(sys.modules, "brownie", types.ModuleType("brownie"))
+    monkeypatch.setitem(sys.modules, "brownie.network", network)
+    monkeypatch.setattr(backends, "history", lazy_import("brownie.network", "history"))
+
+    backend = backends.OceanBackend()
+    start = backend.tx_count()
+    network.history.extend(sent)
+
+    assert start == 1
+    assert backend.tx_count() == 3
+    assert backend.receipts_since(start) == [("0xa", 0, 21000), ("0xb", 4, 0)]
@@ -0,0 +1,110 @@
+import pytest
+
+from ocean_connection.connections.ocean_connection.indexing import (
+    IndexingTimeout,
+    IndexingWatcher,
+)
+
+
+class _FakeAquarius:
+    """Aquarius indexing the DIDs the test adds, recording the queries."""
+
+    def __init__(self):
+        self.indexed = set()
+        self.queries = []
+
+    def query_search(self, query):
+        dids = query["query"]["terms"]["_id"]
+        self.queries.append(dids)
+        return [{"_id": did} for did in dids if did in self.indexed]
+
+
+def test_pending_dids_are_queried_together():
+    """Tests that one poll queries all the pending DIDs, in batches."""
+
+    aquarius = _FakeAquarius()
+    watcher = IndexingWatcher(aquarius.query_search, max_batch_size=2)
+    futures = {did: watcher.watch(did) for did in ["did:1", "did:2", "did:3"]}
+    # A DID watched twice shares its future.
+    assert watcher.watch("did:1") is futures["did:1"]
+
+    aquarius.indexed = {"did:1", "did:3"}
+    watcher.poll_once()
+
+    assert aquarius.queries == [["did:1", "did:2"], ["did:3"]]
+    assert futures["did:1"].result(0) == "did:1"
+    assert futures["did:3"].result(0) == "did:3"
+    assert not futures["did:2"].done()
+    assert watcher.outstanding == ["did:2"]
+
+
+def test_poll_interval_adapts():
+    """Tests that the interval grows from the first miss and resets on indexing."""
+
+    aquarius = _FakeAquarius()
+    watcher = IndexingWatcher(
+        aquarius.query_search, min_interval=1, max_interval=5, backoff=2
+    )
+    watcher.watch("did:1")
+
+    assert [watcher.poll_once() for _ in range(4)] == [1, 2, 4, 5]
+
+    watcher.watch("did:2")
+    aquarius.indexed = {"did:2"}
+    assert watcher.poll_once() == 1
+
+
+def test_dids_time_out():
+    """Tests that DIDs not indexed in time fail, and failed queries are survived."""
+
+    now = [0.0]
+    queries = []
+
+    def query_search(query):
+        queries.append(query)
+        if len(queries) == 1:
+            raise ConnectionError("aquarius is down")
+        return []
+
+    watcher = IndexingWatcher(query_search, timeout=10, clock=lambda: now[0])
+    short = watcher.watch("did:1", timeout=1)
+    default = watcher.watch("did:2")
+
+    now[0] = 2
+    watcher.poll_once()
+    with pytest.raises(IndexingTimeout, match="did:1"):
+        short.result(0)
+    assert not default.done()
+
+    now[0] = 11
+    watcher.poll_once()
+    assert isinstance(default.exception(0), IndexingTimeout)
+    assert watcher.outstanding == []
+
+
+def test_wait_returns_the_indexed_dids():
+    """Tests waiting for a set of DIDs with the background thread."""
+
+    aquarius = _FakeAquarius()
+    aquarius.indexed = {"did:1"}
+    watcher = IndexingWatcher(aquarius.query_search, min_interval=0.01)
+    watcher.start()
+
+    assert watcher.wait(["did:1", "did:2"], timeout=0.1) == {"did:1"}
+
+    pending = watcher.watch("did:3")
+    watcher.stop()
+    assert isinstance(pending.exception(0), IndexingTimeout)
+
+
+def test_new_dids_are_polled_for_right_away():
+    """Tests that a DID Aquarius has indexed already doesn't wait for the poll interval."""
+
+    aquarius = _FakeAquarius()
+    aquarius.indexed = {"did:1", "did:2"}
+    watcher = IndexingWatcher(aquarius.query_search, min_interval=60)
+    watcher.start()
+
+    assert watcher.watch("did:1").result(timeout=5) == "did:1"
+    assert watcher.watch("did:2").result(timeout=5) == "did:2"
+    watcher.stop()
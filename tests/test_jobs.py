@@ -0,0 +1,141 @@
+import threading
+
+from ocean_connection.connections.ocean_connection.jobs import (
+    JOB_FINISHED,
+    ComputeJobTracker,
+)
+
+
+class _Compute:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    def status(self, ddo, service, job_id, wallet):
+        self.calls.append(job_id)
+        return self.statuses[job_id].pop(0)
+
+    def result(self, ddo, service, job_id, index, wallet):
+        return f"{job_id}-{index}".encode()
+
+
+def test_tracker_backs_off_and_delivers_results():
+    """Tests adaptive polling and result delivery of compute jobs."""
+
+    running = {"status": 40, "statusText": "Running algorithm"}
+    finished = {
+        "status": JOB_FINISHED,
+        "statusText": "Job finished",
+        "results": [{"type": "algorithmLog"}, {"type": "output"}],
+    }
+    compute = _Compute({"job-1": [running, running, running, finished]})
+    finished_jobs, failed_jobs = [], []
+    tracker = ComputeJobTracker(
+        compute,
+        on_finished=lambda job, results: finished_jobs.append((job.job_id, results)),
+        on_failed=lambda job, reason: failed_jobs.append((job.job_id, reason)),
+        min_interval=0,
+        max_interval=0,
+    )
+
+    tracker.track("job-1", "ddo", "service", "wallet", {"type": "C2D_JOB"})
+    for _ in range(4):
+        tracker.poll_once()
+
+    assert compute.calls == ["job-1"] * 4
+    assert finished_jobs == [("job-1", [b"job-1-1"])]
+    assert failed_jobs == []
+    assert tracker.outstanding == []
+
+
+def test_tracker_interval_grows_while_status_is_unchanged():
+    """Tests the geometric backoff and its reset on status changes."""
+
+    statuses = [{"status": 40}, {"status": 40}, {"status": 50}, {"status": 50}]
+    compute = _Compute({"job-1": statuses})
+    tracker = ComputeJobTracker(
+        compute,
+        on_finished=None,
+        on_failed=None,
+        min_interval=1,
+        max_interval=10,
+        backoff=2,
+    )
+    tracker.track("job-1", "ddo", "service", "wallet", {})
+    job = tracker._jobs["job-1"]
+
+    intervals = []
+    for _ in range(4):
+        job.next_poll_at = 0
+        tracker.poll_once()
+        intervals.append(job.interval)
+
+    assert intervals == [2, 4, 1, 2]
+
+
+def test_tracker_gives_up_on_jobs_without_output():
+    """Tests that jobs finishing without output are reported as failed."""
+
+    compute = _Compute({"job-1": [{"status": JOB_FINISHED, "results": []}]})
+    failed_jobs = []
+    tracker = ComputeJobTracker(
+        compute,
+        on_finished=None,
+        on_failed=lambda job, reason: failed_jobs.append(job.job_id),
+        min_interval=0,
+    )
+    tracker.track("job-1", "ddo", "service", "wallet", {})
+    tracker.poll_once()
+
+    assert failed_jobs == ["job-1"]
+
+
+def test_failing_callback_does_not_stop_the_other_jobs():
+    """Tests that a callback raising is logged and the other jobs keep being polled."""
+
+    finished = {"status": JOB_FINISHED, "results": [{"type": "output"}]}
+    compute = _Compute({"job-1": [finished], "job-2": [{"status": 40}, finished]})
+    finished_jobs = []
+
+    def on_finished(job, results):
+        finished_jobs.append(job.job_id)
+        if job.job_id == "job-1":
+            raise ConnectionError("the agent is gone")
+
+    tracker = ComputeJobTracker(
+        compute,
+        on_finished=on_finished,
+        on_failed=None,
+        min_interval=0,
+        max_interval=0,
+    )
+    tracker.track("job-1", "ddo", "service", "wallet", {})
+    tracker.track("job-2", "ddo", "service", "wallet", {})
+
+    polls = iter(range(2))
+    tracker.run(lambda: next(polls, None) is not None)
+
+    assert finished_jobs == ["job-1", "job-2"]
+    assert tracker.outstanding == []
+
+
+def test_tracker_polls_from_its_own_thread():
+    """Tests that a started tracker delivers results until it is stopped."""
+
+    finished = {"status": JOB_FINISHED, "results": [{"type": "output"}]}
+    compute = _Compute({"job-1": [finished], "job-2": [finished]})
+    delivered = threading.Event()
+    tracker = ComputeJobTracker(
+        compute,
+        on_finished=lambda job, results: delivered.set(),
+        on_failed=lambda job, reason: None,
+        min_interval=0,
+    )
+
+    tracker.start()
+    tracker.track("job-1", "ddo", "service", "wallet", {"type": "C2D_JOB"})
+    assert delivered.wait(5)
+    tracker.stop()
+
+    tracker.track("job-2", "ddo", "service", "wallet", {"type": "C2D_JOB"})
+    assert tracker.outstanding == ["job-2"]
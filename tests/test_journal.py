@@ -0,0 +1,100 @@
+import sqlite3
+import time
+
+from ocean_connection.connections.ocean_connection.journal import (
+    COMPLETED,
+    FAILED,
+    RUNNING,
+    ActionJournal,
+)
+
+
+def test_steps_survive_a_restart(tmp_path):
+    """Tests that running actions and their steps are found after reopening."""
+
+    path = str(tmp_path / "journal.db")
+    journal = ActionJournal(path)
+    request = {"type": "C2D_JOB", "data_did": "did:op:1", "algo_did": "did:op:2"}
+    running = journal.begin("C2D_JOB", request)
+    journal.record(running, "paid", {"dataset_tx_id": "0x01"})
+    done = journal.begin("DOWNLOAD_JOB", {"type": "DOWNLOAD_JOB"})
+    journal.complete(done)
+    journal.close()
+
+    journal = ActionJournal(path)
+    (entry,) = journal.incomplete()
+    assert entry.action_id == running
+    assert entry.request == request
+    assert entry.status == RUNNING
+    assert entry.last_step == "paid"
+    assert journal.step(running, "paid") == {"dataset_tx_id": "0x01"}
+    assert journal.step(running, "started") is None
+    assert journal.get(done).status == COMPLETED
+
+
+def test_steps_are_kept_in_order():
+    """Tests that the last step is the last one recorded."""
+
+    journal = ActionJournal()
+    action_id = journal.begin("C2D_JOB", {})
+    journal.record(action_id, "paid", {})
+    journal.record(action_id, "started", "job-1")
+
+    entry = journal.get(action_id)
+    assert list(entry.steps) == ["paid", "started"]
+    assert entry.last_step == "started"
+
+    journal.fail(action_id, "boom")
+    assert journal.get(action_id).status == FAILED
+    assert journal.incomplete() == []
+
+
+def test_prune_keeps_running_actions():
+    """Tests that only old finished actions are pruned."""
+
+    journal = ActionJournal()
+    finished = journal.begin("DEPLOY_C2D", {})
+    journal.record(finished, "created", {})
+    journal.complete(finished)
+    running = journal.begin("C2D_JOB", {})
+
+    time.sleep(0.01)
+    assert journal.prune(older_than=0) == 1
+    assert journal.get(finished) is None
+    assert journal.get(running) is not None
+
+
+def test_writes_are_committed_together(tmp_path):
+    """Tests that the start and end of actions are committed with the next step, or on close."""
+
+    path = str(tmp_path / "journal.db")
+    journal = ActionJournal(path, flush_interval=60)
+    actions = [journal.begin("DEPLOY_C2D", {}) for _ in range(20)]
+    assert journal.commits == 0
+
+    journal.record(actions[0], "created", {})
+    assert journal.commits == 1
+    (started,) = (
+        sqlite3.connect(path).execute("SELECT COUNT(*) FROM actions").fetchone()
+    )
+    assert started == 20
+
+    for action_id in actions:
+        journal.complete(action_id)
+    assert journal.commits == 1
+    journal.close()
+    assert journal.commits == 2
+
+    assert ActionJournal(path).incomplete() == []
+
+
+def test_queued_writes_are_committed_in_the_background():
+    """Tests that the end of an action is committed without another write."""
+
+    journal = ActionJournal(flush_interval=0.01)
+    journal.complete(journal.begin("DEPLOY_C2D", {}))
+
+    deadline = time.monotonic() + 5
+    while journal.commits == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert journal.commits == 1
@@ -0,0 +1,143 @@
+import threading
+import urllib.request
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.metrics import (
+    ConnectionMetrics,
+    Histogram,
+    MetricsServer,
+    PeriodicTask,
+)
+from ocean_connection.connections.ocean_connection.simulation import (
+    SimulatedBackend,
+    SimulationConfig,
+)
+
+
+def test_histogram_buckets_and_quantiles():
+    """Tests that observations land in cumulative buckets."""
+
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(5.65)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(0.99) == float("inf")
+    assert Histogram().quantile(0.5) is None
+
+
+def test_prometheus_text():
+    """Tests the exposition of the action and dependency metrics."""
+
+    metrics = ConnectionMetrics(buckets=(1.0,))
+    metrics.observe_action("C2D_JOB", 0.5, succeeded=True)
+    metrics.observe_action("C2D_JOB", 2.0, succeeded=False)
+    metrics.count_retry("C2D_JOB", "nonce")
+    metrics.add_gas("C2D_JOB", 21000)
+    metrics.observe_dependency("aquarius", 0.2, failed=True)
+
+    text = metrics.to_prometheus()
+    assert "# TYPE ocean_connection_action_duration_seconds histogram" in text
+    assert (
+        'ocean_connection_action_duration_seconds_bucket{action="C2D_JOB",le="1.0"} 1'
+        in text
+    )
+    assert (
+        'ocean_connection_action_duration_seconds_bucket{action="C2D_JOB",le="+Inf"} 2'
+        in text
+    )
+    assert 'ocean_connection_actions_total{action="C2D_JOB",outcome="failed"} 1' in text
+    assert (
+        'ocean_connection_retries_total{step="C2D_JOB",error_class="nonce"} 1' in text
+    )
+    assert 'ocean_connection_gas_used_total{action="C2D_JOB"} 21000' in text
+    assert 'ocean_connection_dependency_errors_total{dependency="aquarius"} 1' in text
+
+    snapshot = metrics.snapshot()
+    assert snapshot["actions"]["C2D_JOB"]["succeeded"] == 1
+    assert snapshot["actions"]["C2D_JOB"]["gas_used"] == 21000
+    assert snapshot["retries"] == {"C2D_JOB": {"nonce": 1}}
+    assert snapshot["dependencies"]["aquarius"]["errors"] == 1
+
+
+def test_timed_calls():
+    """Tests that wrapped and instrumented calls are recorded, failed when raising."""
+
+    class Provider:
+        def status(self, job_id):
+            return job_id
+
+        def fail(self):
+            raise ConnectionError()
+
+    metrics = ConnectionMetrics()
+    provider = metrics.instrument(Provider(), "provider")
+    assert provider.status("job-1") == "job-1"
+    with pytest.raises(ConnectionError):
+        provider.fail()
+    assert metrics.wrap(len, "aquarius")([1, 2]) == 2
+
+    dependencies = metrics.snapshot()["dependencies"]
+    assert dependencies["provider"]["count"] == 2
+    assert dependencies["provider"]["errors"] == 1
+    assert dependencies["aquarius"]["errors"] == 0
+
+
+def test_metrics_server():
+    """Tests that the metrics are served on a local port."""
+
+    metrics = ConnectionMetrics()
+    metrics.observe_action("DEPLOY_C2D", 1.0, succeeded=True)
+    server = MetricsServer(metrics, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert b'action="DEPLOY_C2D"' in response.read()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+    finally:
+        server.close()
+
+
+def test_periodic_task_stops():
+    """Tests that the task runs until stopped."""
+
+    calls = []
+    called_twice = threading.Event()
+
+    def call():
+        calls.append(1)
+        if len(calls) == 2:
+            called_twice.set()
+
+    task = PeriodicTask(0.01, call)
+    assert called_twice.wait(5)
+    task.stop()
+    count = len(calls)
+    assert not task._thread.is_alive()
+    assert len(calls) == count
+
+
+def test_simulated_gas_and_rpc():
+    """Tests that the simulation reports its node requests and the gas of its transactions."""
+
+    backend = SimulatedBackend(SimulationConfig(seed=1, gas_per_transaction=50000))
+    ocean = backend.create_ocean(backend.config_dict(backend.connect()))
+    wallet = backend.add_account("0x01")
+    metrics = ConnectionMetrics()
+    backend.instrument_rpc(metrics.observe_dependency)
+
+    start = backend.tx_count()
+    ocean.OCEAN_token.approve(wallet.address, 1, {"from": wallet})
+    ((sender, nonce, gas_used),) = backend.receipts_since(start)
+
+    assert sender == wallet.address
+    assert nonce == 0
+    assert gas_used == 50000
+    assert metrics.snapshot()["dependencies"]["rpc"]["count"] >= 1
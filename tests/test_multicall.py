@@ -0,0 +1,172 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from eth_abi import decode_abi, encode_abi
+from hexbytes import HexBytes
+
+from ocean_connection.connections.ocean_connection.multicall import (
+    AGGREGATE3_SELECTOR,
+    BALANCE_OF_SELECTOR,
+    MULTICALL3_ADDRESS,
+    BatchReader,
+    CallFailed,
+    balance_of_call,
+)
+
+TOKEN = "0x" + "11" * 20
+OWNERS = ["0x" + f"{i:040x}" for i in range(1, 8)]
+BALANCES = {owner.lower(): i * 10**18 for i, owner in enumerate(OWNERS)}
+
+
+def _eth_call(to, data):
+    """Executes a call against the fake chain, raising if it reverts."""
+    data = HexBytes(data)
+    if to.lower() == TOKEN.lower() and data[:4] == BALANCE_OF_SELECTOR:
+        (owner,) = decode_abi(["address"], data[4:])
+        return encode_abi(["uint256"], [BALANCES[owner.lower()]])
+    if to.lower() == MULTICALL3_ADDRESS.lower() and data[:4] == AGGREGATE3_SELECTOR:
+        (calls,) = decode_abi(["(address,bool,bytes)[]"], data[4:])
+        results = []
+        for target, _, call_data in calls:
+            try:
+                results.append((True, _eth_call(target, call_data)))
+            except ValueError:
+                results.append((False, b""))
+        return encode_abi(["(bool,bytes)[]"], [results])
+    raise ValueError("execution reverted")
+
+
+class _Eth:
+    def __init__(self, multicall_deployed):
+        self.multicall_deployed = multicall_deployed
+        self.calls = 0
+
+    def get_code(self, address):
+        return b"\x60\x80" if self.multicall_deployed else b""
+
+    def call(self, tx):
+        self.calls += 1
+        return HexBytes(_eth_call(tx["to"], tx["data"]))
+
+
+class _Provider:
+    endpoint_uri = None
+
+
+class _Web3:
+    def __init__(self, multicall_deployed=False, endpoint_uri=None):
+        self.eth = _Eth(multicall_deployed)
+        self.provider = _Provider()
+        self.provider.endpoint_uri = endpoint_uri
+
+
+class _FakeNode(BaseHTTPRequestHandler):
+    posts = 0
+
+    def do_POST(self):
+        type(self).posts += 1
+        requests = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        replies = []
+        for request in requests:
+            tx = request["params"][0]
+            try:
+                result = {"result": HexBytes(_eth_call(tx["to"], tx["data"])).hex()}
+            except ValueError as e:
+                result = {"error": {"code": -32000, "message": str(e)}}
+            replies.append({"jsonrpc": "2.0", "id": request["id"], **result})
+        body = json.dumps(replies).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def node_url():
+    _FakeNode.posts = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeNode)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_strategy_detection(node_url):
+    """Tests that Multicall3 is preferred, then JSON-RPC batches."""
+
+    assert BatchReader(_Web3(multicall_deployed=True)).strategy == "multicall"
+    assert BatchReader(_Web3(endpoint_uri=node_url)).strategy == "rpc_batch"
+    assert BatchReader(_Web3()).strategy == "sequential"
+    with pytest.raises(ValueError):
+        BatchReader(_Web3(), strategy="unknown")
+
+
+def test_multicall_batches_reads():
+    """Tests that the reads are aggregated into Multicall3 calls."""
+
+    web3 = _Web3(multicall_deployed=True)
+    reader = BatchReader(web3, max_batch_size=4)
+
+    balances = reader.execute([balance_of_call(TOKEN, owner) for owner in OWNERS])
+
+    assert balances == [BALANCES[owner.lower()] for owner in OWNERS]
+    assert web3.eth.calls == 2
+    assert reader.round_trips == 2
+
+
+def test_rpc_batch_reads(node_url):
+    """Tests that the reads are sent as a single JSON-RPC batch."""
+
+    reader = BatchReader(_Web3(endpoint_uri=node_url))
+
+    balances = reader.execute([balance_of_call(TOKEN, owner) for owner in OWNERS])
+
+    assert balances == [BALANCES[owner.lower()] for owner in OWNERS]
+    assert _FakeNode.posts == 1
+
+
+@pytest.mark.parametrize("strategy", ["multicall", "sequential"])
+def test_failed_calls(strategy):
+    """Tests that reverted calls raise, unless failures are allowed."""
+
+    reader = BatchReader(_Web3(multicall_deployed=True), strategy=strategy)
+    calls = [
+        balance_of_call(TOKEN, OWNERS[1]),
+        balance_of_call("0x" + "22" * 20, OWNERS[1]),
+    ]
+
+    with pytest.raises(CallFailed):
+        reader.execute(calls)
+
+    results = reader.execute(calls, allow_failure=True)
+    assert results[0] == BALANCES[OWNERS[1].lower()]
+    assert isinstance(results[1], CallFailed)
+
+
+def test_batch_reader_on_ganache(publisher_wallet, consumer_wallet):
+    """Tests batched balance reads against the local development chain."""
+
+    from brownie.network import web3
+    from ocean_lib.example_config import get_config_dict
+    from ocean_lib.ocean.ocean import Ocean
+    from ocean_lib.web3_internal.utils import connect_to_network
+
+    connect_to_network("development")
+    ocean = Ocean(get_config_dict("development"))
+    OCEAN_token = ocean.OCEAN_token
+    owners = [publisher_wallet.address, consumer_wallet.address]
+
+    reader = BatchReader(web3)
+    balances = reader.execute(
+        [balance_of_call(OCEAN_token.address, owner) for owner in owners]
+    )
+
+    assert balances == [OCEAN_token.balanceOf(owner) for owner in owners]
+    assert reader.round_trips == (len(owners) if reader.strategy == "sequential" else 1)
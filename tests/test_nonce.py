@@ -0,0 +1,92 @@
+from ocean_connection.connections.ocean_connection.nonce import NonceManager
+
+
+class _Eth:
+    def __init__(self):
+        self.pending = {}
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.pending.get(address, 0)
+
+
+class _Web3:
+    def __init__(self):
+        self.eth = _Eth()
+
+
+def test_nonces_are_allocated_locally_per_wallet():
+    """Tests that nonces are handed out without asking the node each time."""
+
+    web3 = _Web3()
+    web3.eth.pending = {"0xA": 7, "0xB": 0}
+    nonces = NonceManager(web3)
+
+    assert [nonces.allocate("0xA") for _ in range(3)] == [7, 8, 9]
+    assert nonces.allocate("0xB") == 0
+    assert nonces.in_flight("0xA") == 3
+
+
+def test_failed_nonce_is_reused_and_dropped_nonces_resynced():
+    """Tests gap filling after a failure and resync after dropped transactions."""
+
+    web3 = _Web3()
+    web3.eth.pending = {"0xA": 0}
+    nonces = NonceManager(web3, drop_timeout=0)
+
+    first, second, third = (nonces.allocate("0xA") for _ in range(3))
+    # `second` failed before being broadcast, the node only knows `first`.
+    web3.eth.pending["0xA"] = 1
+    nonces.fail("0xA", second)
+    assert nonces.allocate("0xA") == second
+
+    # Nothing got mined past `first`, everything else was dropped.
+    assert nonces.detect_gaps("0xA") == [second, third]
+    assert nonces.allocate("0xA") == 1
+
+
+def test_reserve_confirms_or_releases():
+    """Tests the reserve context manager."""
+
+    web3 = _Web3()
+    nonces = NonceManager(web3)
+
+    with nonces.reserve("0xA") as nonce:
+        assert nonce == 0
+    web3.eth.pending["0xA"] = 1
+    assert nonces.in_flight("0xA") == 0
+
+    try:
+        with nonces.reserve("0xA") as nonce:
+            raise ValueError("gas estimation failed")
+    except ValueError:
+        pass
+    assert nonces.allocate("0xA") == 1
+
+
+def test_detect_all_gaps_only_checks_wallets_in_flight():
+    """Tests the periodic check of every wallet with transactions in flight."""
+
+    web3 = _Web3()
+    web3.eth.pending = {"0xA": 0, "0xB": 3}
+    nonces = NonceManager(web3, drop_timeout=0)
+
+    dropped = nonces.allocate("0xA")
+    nonces.allocate("0xB")
+    nonces.confirm("0xB", 3)
+    web3.eth.pending["0xB"] = 4
+
+    assert nonces.detect_all_gaps() == {"0xA": [dropped]}
+    assert nonces.in_flight("0xA") == 0
+    assert nonces.allocate("0xA") == dropped
+
+
+def test_exclusive_resyncs_when_nonces_do_not_settle():
+    """Tests that exclusive() drops the unsettled nonces once it stops waiting."""
+
+    web3 = _Web3()
+    nonces = NonceManager(web3, drop_timeout=0.05)
+    nonces.allocate("0xA")
+
+    with nonces.exclusive("0xA"):
+        assert nonces.in_flight("0xA") == 0
+    assert nonces.allocate("0xA") == 0
@@ -1,6 +1,9 @@
 import asyncio
 import os
+import subprocess
+import sys
 
+import pytest
 from aea.configurations.base import ConnectionConfig
 
 from ocean_connection.connections.ocean_connection.connection import OceanConnection
@@ -11,7 +14,7 @@ from brownie.network import accounts
 from distribute_OCEAN_tokens import distribute_ocean_tokens
 
 
-def test_deploy_c2d_data_asset(caplog):
+def test_deploy_c2d_data_asset(caplog, tmp_path):
     """Tests deploying correctly a data asset for C2D."""
 
     ocean = OceanConnection(
@@ -22,7 +25,7 @@ def test_deploy_c2d_data_asset(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     ocean.on_connect()
@@ -46,7 +49,7 @@ def test_deploy_c2d_data_asset(caplog):
     assert did.startswith("did:op:")
 
 
-def test_deploy_algorithm(caplog):
+def test_deploy_algorithm(caplog, tmp_path):
     """Tests deploying correctly a data algorithm for C2D."""
 
     ocean = OceanConnection(
@@ -57,7 +60,7 @@ def test_deploy_algorithm(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     ocean.on_connect()
@@ -89,7 +92,7 @@ def test_deploy_algorithm(caplog):
     assert did.startswith("did:op:")
 
 
-def test_deploy_fixed_rate_exchange(caplog):
+def test_deploy_fixed_rate_exchange(caplog, tmp_path):
     """Tests deploying correctly a fixed rate exchange."""
     seller_wallet = accounts.add(os.environ["SELLER_AEA_KEY_ETHEREUM"])
     buyer_wallet = accounts.add(os.environ["BUYER_AEA_KEY_ETHEREUM"])
@@ -103,7 +106,7 @@ def test_deploy_fixed_rate_exchange(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
@@ -163,7 +166,7 @@ def test_deploy_fixed_rate_exchange(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["BUYER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
@@ -187,7 +190,7 @@ def test_deploy_fixed_rate_exchange(caplog):
     assert datatoken.balanceOf(buyer_wallet.address) == Web3.toWei(1, "ether")
 
 
-def test_deploy_dispenser(caplog):
+def test_deploy_dispenser(caplog, tmp_path):
     """Tests deploying correctly a dispenser and dispense funds from it."""
 
     ocean = OceanConnection(
@@ -198,7 +201,7 @@ def test_deploy_dispenser(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
@@ -245,7 +248,7 @@ def test_deploy_dispenser(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["BUYER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
@@ -266,7 +269,7 @@ def test_deploy_dispenser(caplog):
     assert datatoken.balanceOf(buyer_wallet.address) == Web3.toWei(1, "ether")
 
 
-def test_permission_dataset(caplog):
+def test_permission_dataset(caplog, tmp_path):
     """Tests updating datasets permissions."""
 
     ocean = OceanConnection(
@@ -277,7 +280,7 @@ def test_permission_dataset(caplog):
             ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     loop = asyncio.get_event_loop()
@@ -330,3 +333,184 @@ def test_permission_dataset(caplog):
     ocean.on_send(**permission)
 
     assert "Permissions of dataset configured successfully." in caplog.text
+
+
+def test_deploy_c2d_batch(caplog, tmp_path):
+    """Tests deploying a batch of data assets for C2D with a partial failure."""
+
+    ocean = OceanConnection(
+        ConnectionConfig(
+            "ocean_connection",
+            "ocean_protocol",
+            "0.1.5",
+            ocean_network_name=os.environ["OCEAN_NETWORK_NAME"],
+            key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
+        ),
+        str(tmp_path),
+    )
+
+    ocean.on_connect()
+
+    dataset = {
+        "dataset_url": "https://raw.githubusercontent.com/oceanprotocol/c2d-examples/main/branin_and_gpr/branin.arff",
+        "name": "example",
+        "description": "example",
+        "author": "Trent",
+        "license": "CCO",
+        "has_pricing_schema": True,
+    }
+    invalid_dataset = {key: dataset[key] for key in dataset if key != "dataset_url"}
+
+    batch = {
+        "type": "DEPLOY_C2D_BATCH",
+        "datasets": [dataset, invalid_dataset, dataset],
+    }
+
+    receipt = ocean.on_send(**batch)
+
+    assert "Received DEPLOY_C2D_BATCH in connection" in caplog.text
+    assert receipt["type"] == "BATCH_DEPLOYMENT_RECEIPT"
+    assert receipt["succeeded"] == 2
+    assert receipt["failed"] == 1
+
+    first, invalid, last = receipt["receipts"]
+    assert invalid["status"] == "FAILED"
+    assert "'dataset_url' is missing" in invalid["error"]
+    for item in [first, last]:
+        assert item["status"] == "INDEXED"
+        assert item["did"].startswith("did:op:")
+        assert ocean.ocean.assets.resolve(item["did"]) is not None
+
+
+def test_cold_start_stays_within_budget():
+    """Tests that importing and connecting from a cold interpreter stays within the startup budget."""
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "ocean_connection.connections.ocean_connection.startup",
+            "--connect",
+            "--budget",
+            os.environ.get("OCEAN_STARTUP_BUDGET", "60"),
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "phase on_connect/connect_to_network" in result.stdout
+    assert "eagerly imported" not in result.stdout
+
+
+def test_simulated_backend(caplog, tmp_path):
+    """Tests the C2D and dispenser flows against the in-memory simulation of Ocean."""
+
+    ocean = OceanConnection(
+        ConnectionConfig(
+            "ocean_connection",
+            "ocean_protocol",
+            "0.1.5",
+            backend="simulation",
+            simulation={"seed": 1},
+            journal_path=":memory:",
+            track_compute_jobs=False,
+        ),
+        str(tmp_path),
+    )
+    ocean.on_connect()
+
+    data_did = ocean.on_send(
+        type="DEPLOY_C2D",
+        dataset_url="https://example.com/branin.arff",
+        name="example",
+        description="example",
+        author="Trent",
+        license="CCO",
+        has_pricing_schema=False,
+    )["did"]
+    algo_did = ocean.on_send(
+        type="DEPLOY_ALGORITHM",
+        language="python",
+        format="docker-image",
+        version="0.1",
+        entrypoint="python $ALGO",
+        image="oceanprotocol/algo_dockers",
+        checksum="sha256:0",
+        tag="python-branin",
+        files_url="https://example.com/gpr.py",
+        name="gpr",
+        description="gpr",
+        author="Trent",
+        license="CCO",
+        has_pricing_schema=False,
+    )["did"]
+
+    ocean.on_send(type="PERMISSION_DATASET", data_did=data_did, algo_did=algo_did)
+    msg = ocean.on_send(type="C2D_JOB", data_did=data_did, algo_did=algo_did)
+    assert "Started compute job with job id" in caplog.records[-1].msg
+    assert msg["job_id"]
+
+    datatoken_address = ocean.ocean.assets.resolve(data_did).datatokens[0]["address"]
+    ocean.on_send(type="CREATE_DISPENSER", datatoken_address=datatoken_address)
+    ocean.on_send(
+        type="DOWNLOAD_JOB",
+        datatoken_address=datatoken_address,
+        asset_did=data_did,
+        datatoken_amt=1,
+    )
+
+    datatoken = ocean.ocean.get_datatoken(datatoken_address)
+    assert datatoken.balanceOf(ocean.wallet.address) == Web3.toWei(1, "ether")
+    assert ocean.backend.stats()["failures"] == {}
+
+    metrics = ocean.metrics.snapshot()
+    assert metrics["actions"]["C2D_JOB"]["succeeded"] == 1
+    assert metrics["actions"]["C2D_JOB"]["gas_used"] > 0
+    assert metrics["dependencies"]["rpc"]["count"] > 0
+    assert metrics["dependencies"]["provider"]["count"] > 0
+    ocean.on_disconnect()
+
+
+def test_wallet_pool_pins_owner_actions(tmp_path):
+    """Tests that owner-only actions go to the publishing wallet of a pool of wallets."""
+
+    key_paths = []
+    for index in range(3):
+        key_path = tmp_path / f"key{index}"
+        key_path.write_text(f"0x0{index}")
+        key_paths.append(str(key_path))
+
+    ocean = OceanConnection(
+        ConnectionConfig(
+            "ocean_connection",
+            "ocean_protocol",
+            "0.1.5",
+            backend="simulation",
+            simulation={"seed": 1},
+            journal_path=":memory:",
+            key_paths=key_paths,
+            wallet_policy="round_robin",
+        ),
+        str(tmp_path),
+    )
+    ocean.on_connect()
+    assert len(ocean.wallets) == 3
+
+    # Published outside of the connection, so its owner has to be looked up.
+    owner = list(ocean.wallets)[2]
+    _, datatoken, _ = ocean.ocean.assets.create_url_asset(
+        "example", "https://example.com/branin.arff", {"from": owner}
+    )
+    assert ocean.wallets.owner_of(datatoken.address) is None
+
+    # Round robin would give the next turns to wallets that can't create the dispenser.
+    for _ in range(2):
+        ocean.on_send(type="CREATE_DISPENSER", datatoken_address=datatoken.address)
+    assert ocean.wallets.owner_of(datatoken.address) == owner.address
+
+    with pytest.raises(ValueError, match="None of the wallets"):
+        ocean.on_send(
+            type="PERMISSION_DATASET", data_did="did:op:unknown", algo_did="did:op:0"
+        )
+    ocean.on_disconnect()
@@ -0,0 +1,129 @@
+import pytest
+
+from ocean_connection.connections.ocean_connection.retry import (
+    FATAL,
+    NONCE,
+    PROVIDER,
+    REVERT,
+    TRANSIENT,
+    Retrier,
+    RetryBudget,
+    RetryError,
+    RetryPolicy,
+    classify_error,
+)
+
+
+class VirtualMachineError(Exception):
+    pass
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+def _failing(errors, value="done"):
+    """Returns a function raising the given errors in turn, then returning value."""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return value
+
+    return fn, calls
+
+
+def test_classify_error():
+    """Tests the classification of the usual errors."""
+
+    assert classify_error(ValueError("nonce too low")) == NONCE
+    assert classify_error(ValueError("replacement transaction underpriced")) == NONCE
+    assert classify_error(VirtualMachineError("reverted")) == REVERT
+    assert classify_error(ValueError("execution reverted: not enough")) == REVERT
+    assert classify_error(ReadTimeout("read")) == TRANSIENT
+    assert classify_error(ConnectionError("refused")) == TRANSIENT
+    assert classify_error(ValueError("503 Server Error")) == TRANSIENT
+    assert classify_error(Exception("Aquarius returned no DDO")) == PROVIDER
+    assert classify_error(KeyError("name")) == FATAL
+
+
+def test_retries_with_backoff():
+    """Tests that transient errors are retried with growing delays."""
+
+    sleeps = []
+    retrier = Retrier(sleep=sleeps.append)
+    fn, calls = _failing([ReadTimeout(), ReadTimeout()])
+
+    outcome = retrier.run(fn, RetryPolicy(max_attempts=3, jitter=False))
+
+    assert outcome.succeeded
+    assert outcome.unwrap() == "done"
+    assert outcome.attempts == 3
+    assert len(calls) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_jitter_stays_within_the_delay():
+    """Tests that jittered delays never exceed the capped delay."""
+
+    policy = RetryPolicy(base_delay=2, max_delay=5)
+    for retry in range(1, 6):
+        assert 0 <= policy.delay(retry) <= min(5, 2 * 2 ** (retry - 1))
+
+
+def test_fatal_and_revert_errors_are_not_hammered():
+    """Tests that fatal errors aren't retried and reverts are retried once."""
+
+    retrier = Retrier(sleep=lambda delay: None)
+
+    fn, calls = _failing([KeyError("name")])
+    outcome = retrier.run(fn, RetryPolicy(max_attempts=5))
+    assert not outcome.succeeded
+    assert outcome.error_class == FATAL
+    assert len(calls) == 1
+
+    fn, calls = _failing([VirtualMachineError()] * 5)
+    outcome = retrier.run(fn, RetryPolicy(max_attempts=5))
+    assert outcome.error_class == REVERT
+    assert len(calls) == 2
+    with pytest.raises(RetryError) as e:
+        outcome.unwrap()
+    assert e.value.outcome is outcome
+
+
+def test_on_retry_is_called_with_the_error_class():
+    """Tests that callers can react before a retry, e.g. to resync nonces."""
+
+    seen = []
+    retrier = Retrier(sleep=lambda delay: None)
+    fn, _ = _failing([ValueError("nonce too low")])
+
+    outcome = retrier.run(
+        fn,
+        RetryPolicy(max_attempts=2),
+        on_retry=lambda error, error_class: seen.append(error_class),
+    )
+
+    assert outcome.succeeded
+    assert seen == [NONCE]
+
+
+def test_budget_is_shared():
+    """Tests that the connection-wide budget stops retries once exhausted."""
+
+    budget = RetryBudget(max_retries=2, window=60)
+    retrier = Retrier(budget=budget, sleep=lambda delay: None)
+
+    fn, calls = _failing([ReadTimeout()] * 10)
+    outcome = retrier.run(fn, RetryPolicy(max_attempts=10))
+
+    assert not outcome.succeeded
+    assert len(calls) == 3
+    assert budget.exhausted == 1
+
+    fn, calls = _failing([ReadTimeout()])
+    assert not retrier.run(fn, RetryPolicy(max_attempts=10)).succeeded
+    assert len(calls) == 1
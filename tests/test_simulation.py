@@ -0,0 +1,194 @@
+import os
+import random
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.multicall import (
+    BatchReader,
+    contract_call,
+)
+from ocean_connection.connections.ocean_connection.nonce import NonceManager
+from ocean_connection.connections.ocean_connection.retry import (
+    NONCE,
+    REVERT,
+    TRANSIENT,
+    classify_error,
+)
+from ocean_connection.connections.ocean_connection.simulation import (
+    LatencyModel,
+    SimulatedBackend,
+    SimulatedProviderError,
+    SimulatedRevert,
+    SimulatedTimeout,
+    SimulationConfig,
+)
+from ocean_connection.connections.ocean_connection.streaming import (
+    resolve_downloaded_file,
+)
+
+
+def _connect(**config):
+    backend = SimulatedBackend(SimulationConfig(seed=1, **config))
+    ocean = backend.create_ocean(backend.config_dict(backend.connect()))
+    wallet = backend.add_account("0x01")
+    return backend, ocean, wallet
+
+
+def test_latency_models():
+    """Tests the latency distributions and their configuration."""
+
+    rng = random.Random(1)
+    assert LatencyModel.from_spec(0.25).sample(rng) == 0.25
+    assert LatencyModel.from_spec(None).sample(rng) == 0.0
+
+    uniform = LatencyModel.from_spec(
+        {"distribution": "uniform", "low": 0.1, "high": 0.2}
+    )
+    assert all(0.1 <= uniform.sample(rng) <= 0.2 for _ in range(100))
+
+    lognormal = LatencyModel("lognormal", median=0.05, sigma=1.0)
+    samples = sorted(lognormal.sample(rng) for _ in range(1001))
+    assert 0.03 < samples[500] < 0.08
+    assert samples[-1] > 0.5
+
+    with pytest.raises(ValueError):
+        LatencyModel("pareto")
+    with pytest.raises(ValueError):
+        SimulationConfig(latency={"ipfs": 0.1})
+    with pytest.raises(ValueError):
+        SimulationConfig(failure_rates={"rpc": {"flaky": 0.1}})
+
+
+def test_publish_dispense_and_download(tmp_path):
+    """Tests publishing an asset, getting datatokens from a dispenser and downloading it."""
+
+    backend, ocean, wallet = _connect(file_size=100)
+    tx_dict = {"from": wallet}
+
+    data_nft, datatoken, ddo = ocean.assets.create_url_asset(
+        "example", "https://example.com/data.csv", tx_dict, with_compute=True
+    )
+    assert ddo.did.startswith("did:op:")
+    assert [service.type for service in ddo.services] == ["access", "compute"]
+    assert ocean.assets.resolve(ddo.did).did == ddo.did
+    assert ocean.get_datatoken(ddo.datatokens[0]["address"]) is datatoken
+
+    with pytest.raises(SimulatedRevert):
+        datatoken.dispense(amount=10**18, tx_dict=tx_dict)
+    datatoken.create_dispenser(tx_dict=tx_dict)
+    assert datatoken.dispenser_status().active
+    datatoken.dispense(amount=10**18, tx_dict=tx_dict)
+    assert datatoken.balanceOf(wallet.address) == 10**18
+
+    order_tx_id = ocean.assets.pay_for_access_service(asset=ddo, tx_dict=tx_dict)
+    assert datatoken.balanceOf(wallet.address) == 0
+
+    folder = ocean.assets.download(
+        asset=ddo,
+        consumer_wallet=wallet,
+        destination=str(tmp_path),
+        order_tx_id=order_tx_id,
+    )
+    assert os.path.getsize(resolve_downloaded_file(folder)) == 100
+
+    other = backend.add_account("0x02")
+    with pytest.raises(SimulatedProviderError):
+        ocean.assets.download(
+            asset=ddo,
+            consumer_wallet=other,
+            destination=str(tmp_path),
+            order_tx_id=order_tx_id,
+        )
+
+
+def test_exchange_needs_allowance_and_batches_reads():
+    """Tests buying from a fixed rate exchange, read through the batch reader."""
+
+    backend, ocean, wallet = _connect()
+    tx_dict = {"from": wallet}
+    _, datatoken, _ = ocean.assets.create_url_asset("example", "url", tx_dict)
+    exchange, _ = datatoken.create_exchange(
+        rate=2 * 10**18,
+        base_token_addr=ocean.OCEAN_address,
+        owner_addr=wallet.address,
+        full_info=True,
+        tx_dict=tx_dict,
+    )
+
+    buyer = backend.add_account("0x02")
+    buy = lambda: exchange.buy_DT(
+        datatoken_amt=10**18, tx_dict={"from": buyer}, max_basetoken_amt=2 * 10**18
+    )
+    with pytest.raises(SimulatedRevert) as e:
+        buy()
+    assert classify_error(e.value) == REVERT
+
+    ocean.OCEAN_token.approve(exchange.address, 2 * 10**18, {"from": buyer})
+    buy()
+
+    reader = BatchReader(backend.web3)
+    balance, details, allowance = reader.execute(
+        [
+            contract_call(datatoken.balanceOf, buyer.address),
+            contract_call(
+                ocean.fixed_rate_exchange.getExchange,
+                backend.web3.toBytes(hexstr=exchange.exchange_id),
+            ),
+            contract_call(ocean.OCEAN_token.allowance, buyer.address, exchange.address),
+        ]
+    )
+    assert reader.strategy == "sequential"
+    assert balance == 10**18
+    assert details[1] == datatoken.address
+    assert allowance == 0
+
+
+def test_nonces_follow_the_node():
+    """Tests that the nonce manager allocates nonces the simulated node accepts."""
+
+    backend, ocean, wallet = _connect()
+    nonces = NonceManager(backend.web3)
+
+    for _ in range(3):
+        with nonces.reserve(wallet.address) as nonce:
+            ocean.OCEAN_token.approve(
+                wallet.address, 1, {"from": wallet, "nonce": nonce}
+            )
+    assert backend.web3.eth.get_transaction_count(wallet.address, "pending") == 3
+
+    with pytest.raises(Exception) as e:
+        ocean.OCEAN_token.approve(wallet.address, 1, {"from": wallet, "nonce": 1})
+    assert classify_error(e.value) == NONCE
+
+
+def test_failure_injection_and_block_time():
+    """Tests that failures are injected at the configured rates and blocks are waited for."""
+
+    sleeps = []
+    backend = SimulatedBackend(
+        SimulationConfig(
+            seed=1,
+            latency={"rpc": 0.01},
+            failure_rates={"rpc": 0.5},
+            block_time=2.0,
+        )
+    )
+    backend.network._sleep = sleeps.append
+    ocean = backend.create_ocean(backend.config_dict(backend.connect()))
+    wallet = backend.add_account(None)
+
+    failures = 0
+    for _ in range(200):
+        try:
+            ocean.OCEAN_token.balanceOf(wallet.address)
+        except SimulatedTimeout as e:
+            assert classify_error(e) == TRANSIENT
+            failures += 1
+    assert 60 < failures < 140
+    assert backend.stats()["failures"]["rpc"] == failures
+    assert sleeps[:3] == [0.01] * 3
+
+    sleeps.clear()
+    ocean.OCEAN_token.approve(wallet.address, 1, {"from": wallet})
+    assert 0 < sleeps[-1] <= 2.0
+    assert backend.stats()["transactions"] == 1
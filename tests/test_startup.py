@@ -0,0 +1,65 @@
+import sys
+
+from ocean_connection.connections.ocean_connection.lazy import (
+    import_times,
+    lazy_import,
+)
+from ocean_connection.connections.ocean_connection.startup import StartupProfile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lazy_import_defers_the_import(tmp_path, monkeypatch):
+    """Tests that the module is only imported on first use."""
+
+    (tmp_path / "lazy_probe.py").write_text("def double(x):\n    return 2 * x\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_probe", raising=False)
+
+    double = lazy_import("lazy_probe", "double")
+    assert "lazy_probe" not in sys.modules
+    assert not double.resolved
+    assert "unresolved" in repr(double)
+
+    assert double(21) == 42
+    assert double.resolved
+    assert double.__name__ == "double"
+    assert "lazy_probe" in sys.modules
+    assert "lazy_probe" in import_times()
+
+
+def test_profile_times_each_phase():
+    """Tests that phases are timed, merged and checked against a budget."""
+
+    clock = FakeClock()
+    profile = StartupProfile(clock=clock)
+    with profile.phase("connect_to_network"):
+        clock.now += 2.0
+    with profile.phase("wallet"):
+        clock.now += 0.5
+
+    nested = StartupProfile(clock=clock)
+    with nested.phase("journal"):
+        clock.now += 0.25
+    profile.merge(nested, prefix="on_connect/")
+
+    assert profile.phases == {
+        "connect_to_network": 2.0,
+        "wallet": 0.5,
+        "on_connect/journal": 0.25,
+    }
+    assert profile.total == 2.5
+    assert profile.exceeds(2.0)
+    assert not profile.exceeds(3.0)
+    assert not profile.exceeds(None)
+
+    report = profile.report({"brownie": 1.5})
+    assert "phase connect_to_network" in report
+    assert "import brownie" in report
+    assert report.splitlines()[-1].startswith("total")
@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+import pytest
+
+from ocean_connection.connections.ocean_connection.streaming import (
+    ChunkedFileReader,
+    file_sha256,
+    resolve_downloaded_file,
+)
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    data = os.urandom(10_000)
+    path = tmp_path / "datafile.did:op:123,1"
+    path.mkdir()
+    (path / "branin.arff").write_bytes(data)
+    return str(path), data
+
+
+def test_chunked_reading_with_incremental_checksum(data_file):
+    """Tests reading a file in chunks while computing its checksum."""
+
+    folder, data = data_file
+    path = resolve_downloaded_file(folder)
+    reader = ChunkedFileReader(path, chunk_size=4096)
+
+    chunks = list(reader)
+
+    assert [chunk.offset for chunk in chunks] == [0, 4096, 8192]
+    assert max(len(chunk.data) for chunk in chunks) == 4096
+    assert b"".join(chunk.data for chunk in chunks) == data
+    reader.verify("sha256:" + hashlib.sha256(data).hexdigest())
+    assert file_sha256(path, chunk_size=1000) == reader.hexdigest()
+
+    with pytest.raises(ValueError):
+        reader.verify("0" * 64)
+
+
+def test_resuming_from_an_offset(data_file):
+    """Tests reading a byte range of a file."""
+
+    folder, data = data_file
+    reader = ChunkedFileReader(
+        resolve_downloaded_file(folder), chunk_size=3000, start=5000, end=9000
+    )
+
+    chunks = list(reader)
+
+    assert [chunk.offset for chunk in chunks] == [5000, 8000]
+    assert b"".join(chunk.data for chunk in chunks) == data[5000:9000]
+    assert not reader.is_whole_file
+    assert reader.hexdigest() == hashlib.sha256(data[5000:9000]).hexdigest()
+
+    with pytest.raises(ValueError):
+        ChunkedFileReader(resolve_downloaded_file(folder), start=20_000)
+    with pytest.raises(ValueError):
+        resolve_downloaded_file(folder, file_index=1)
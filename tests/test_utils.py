@@ -13,7 +13,7 @@ from brownie.network import chain
 from web3.main import Web3
 
 
-def test_get_tx_dict_on_ganache(publisher_wallet):
+def test_get_tx_dict_on_ganache(publisher_wallet, tmp_path):
     """Tests get_tx_dict function on Ganache."""
 
     os.environ["RPC_URL"] = "http://127.0.0.1:8545"
@@ -26,7 +26,7 @@ def test_get_tx_dict_on_ganache(publisher_wallet):
             ocean_network_name="development",
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     ocean.on_connect()
@@ -45,7 +45,7 @@ def test_convert_to_bytes_format():
     assert len(new_data) == 32
 
 
-def test_validation_errors():
+def test_validation_errors(tmp_path):
     """Tests validation possible errors."""
 
     os.environ["RPC_URL"] = "http://127.0.0.1:8545"
@@ -58,7 +58,7 @@ def test_validation_errors():
             ocean_network_name="development",
             key_path=os.environ["SELLER_AEA_KEY_ETHEREUM_PATH"],
         ),
-        "None",
+        str(tmp_path),
     )
 
     ocean.on_connect()
@@ -0,0 +1,121 @@
+import pytest
+
+from ocean_connection.connections.ocean_connection.nonce import NonceManager
+from ocean_connection.connections.ocean_connection.simulation import (
+    SimulatedBackend,
+    SimulationConfig,
+)
+from ocean_connection.connections.ocean_connection.wallets import (
+    WalletPool,
+    asset_key,
+)
+
+
+class _Wallet:
+    def __init__(self, address, balance=10**18):
+        self.address = address
+        self._balance = balance
+
+    def balance(self):
+        return self._balance
+
+
+class _Nonces:
+    def __init__(self, in_flight):
+        self._in_flight = in_flight
+
+    def in_flight(self, address):
+        return self._in_flight.get(address, 0)
+
+
+def test_round_robin():
+    """Tests that the wallets take turns."""
+
+    a, b = _Wallet("0xa"), _Wallet("0xb")
+    pool = WalletPool([a, b], policy="round_robin")
+
+    assert [pool.select() for _ in range(4)] == [a, b, a, b]
+    assert pool.default is a
+    assert pool.get("0xb") is b
+    with pytest.raises(ValueError):
+        pool.get("0xc")
+    with pytest.raises(ValueError):
+        WalletPool([a], policy="random")
+
+
+def test_least_pending():
+    """Tests that running actions and in-flight nonces both count as pending."""
+
+    a, b = _Wallet("0xa"), _Wallet("0xb")
+    pool = WalletPool([a, b], _Nonces({"0xa": 1}), policy="least_pending")
+
+    assert pool.select() is b
+    with pool.using(b), pool.using(b):
+        assert pool.select() is a
+    assert pool.select() is b
+
+
+def test_nonces_are_read_outside_of_the_pool_lock():
+    """Tests that reading the in-flight nonces doesn't block the other selections."""
+
+    a, b = _Wallet("0xa"), _Wallet("0xb")
+    pool = WalletPool([a, b], policy="least_pending")
+
+    class _Node(_Nonces):
+        def in_flight(self, address):
+            assert not pool._lock.locked()
+            return super().in_flight(address)
+
+    pool.nonces = _Node({"0xb": 2})
+    with pool.using(a):
+        assert pool.select() is a
+    with pool.using(a), pool.using(a), pool.using(a):
+        assert pool.select() is b
+
+
+def test_sticky_follows_owners():
+    """Tests that the actions about an asset go to its owner, or always to the same wallet."""
+
+    wallets = [_Wallet(f"0x{i}") for i in range(4)]
+    pool = WalletPool(wallets, policy="sticky")
+
+    assert len({pool.select("did:op:1").address for _ in range(10)}) == 1
+    pool.assign("did:op:1", "0x3")
+    assert pool.select("did:op:1") is wallets[3]
+    assert pool.owner_of("did:op:1") == "0x3"
+    assert asset_key({"type": "C2D_JOB", "data_did": "did:op:1"}) == "did:op:1"
+    assert asset_key({"type": "DEPLOY_C2D"}) is None
+
+
+def test_underfunded_wallets_are_skipped():
+    """Tests that wallets under the minimum balance only run actions when all are."""
+
+    poor, rich = _Wallet("0xa", balance=0), _Wallet("0xb")
+    pool = WalletPool([poor, rich], policy="round_robin", min_balance=10)
+    pool.refresh_balances()
+
+    assert {pool.select() for _ in range(4)} == {rich}
+    assert pool.balances() == {"0xa": 0, "0xb": 10**18}
+
+    rich._balance = 0
+    pool.refresh_balance(rich)
+    assert {pool.select() for _ in range(4)} == {poor, rich}
+
+
+def test_simulated_wallets_have_their_own_nonces():
+    """Tests that the wallets of the pool send transactions concurrently with separate nonces."""
+
+    backend = SimulatedBackend(SimulationConfig(seed=1))
+    ocean = backend.create_ocean(backend.config_dict(backend.connect()))
+    wallets = backend.add_accounts(["0x01", "0x02"])
+    nonces = NonceManager(backend.web3)
+    pool = WalletPool(wallets, nonces, policy="round_robin")
+
+    for _ in range(4):
+        wallet = pool.select()
+        with nonces.reserve(wallet.address) as nonce:
+            ocean.OCEAN_token.approve(
+                wallet.address, 1, {"from": wallet, "nonce": nonce}
+            )
+
+    assert [nonce for _, nonce, _ in backend.receipts_since(0)] == [0, 0, 1, 1]